@@ -0,0 +1,3 @@
+'''
+benchmarks for biscutbox's cookie jars, run them with `python -m benchmarks.run_benchmarks --help`
+'''
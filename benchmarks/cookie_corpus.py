@@ -0,0 +1,270 @@
+'''
+a seeded generator of synthetic cookies, requests and responses for the benchmarks
+
+the same seed always gives the same corpus, so results can be compared between runs. Sites are picked from a
+Zipf distribution, so a few sites have most of the cookies like on a real crawl, and each cookie gets a path,
+subdomain, secure flag and expiry from a fixed mix. Expiries are relative to the `now` passed in.
+'''
+
+from http.cookiejar import Cookie
+import email.message
+import itertools
+import random
+import typing
+import urllib.request
+
+'''
+the default exponent of the Zipf distribution the sites are picked from, higher means more skewed
+'''
+ZIPF_EXPONENT:float = 1.1
+
+'''
+how many cookies there are for each distinct site, on average
+'''
+COOKIES_PER_SITE:int = 20
+
+'''
+the public suffixes the sites are under, and how often each one is used
+'''
+PUBLIC_SUFFIXES:list[tuple[str, int]] = [("com", 60), ("org", 10), ("net", 10), ("co.uk", 8), ("de", 7), ("io", 5)]
+
+'''
+the subdomains the cookies and requests are for, "" is the site itself
+'''
+SUBDOMAINS:list[tuple[str, int]] = [("", 40), ("www", 40), ("api", 8), ("shop", 6), ("accounts", 6)]
+
+'''
+the paths the cookies are set for, and how often each one is used
+'''
+COOKIE_PATHS:list[tuple[str, int]] = \
+[
+    ("/", 70),
+    ("/account", 8),
+    ("/api", 6),
+    ("/cart", 5),
+    ("/search", 4),
+    ("/static", 4),
+    ("/blog/2024", 3),
+]
+
+'''
+the paths of the request URLs, these are under the cookie paths above so most of them match some cookies
+'''
+REQUEST_PATHS:list[tuple[str, int]] = \
+[
+    ("/", 40),
+    ("/index.html", 15),
+    ("/account/settings", 10),
+    ("/api/v1/items", 10),
+    ("/cart", 8),
+    ("/search?q=biscuits", 8),
+    ("/static/app.js", 5),
+    ("/blog/2024/05/post", 4),
+]
+
+'''
+the expiry of each cookie, as (kind, the least seconds from now, the most seconds from now, weight).
+`session` cookies don't have an expiry and are discarded at the end of the session, `expired` cookies
+expired between 1 second and 30 days ago
+'''
+EXPIRY_MIX:list[tuple[str, int, int, int]] = \
+[
+    ("session", 0, 0, 30),
+    ("expired", -60 * 60 * 24 * 30, -1, 10),
+    ("hour", 1, 60 * 60, 10),
+    ("month", 60 * 60, 60 * 60 * 24 * 30, 25),
+    ("years", 60 * 60 * 24 * 30, 60 * 60 * 24 * 365 * 2, 25),
+]
+
+'''
+the cookie names, common analytics and session cookies
+'''
+COOKIE_NAMES:list[str] = ["sid", "_ga", "_gid", "csrftoken", "lang", "theme", "consent", "cart_id", "__cf_bm", "prefs"]
+
+
+class FakeResponse:
+    '''
+    just enough of a response for `CookieJar.extract_cookies`
+    '''
+
+    def __init__(self, headers:email.message.Message):
+        '''
+        :param headers: the headers of the response
+        '''
+        self._headers = headers
+
+    def info(self) -> email.message.Message:
+        return self._headers
+
+
+class CookieCorpus:
+    '''
+    generates cookies, requests and responses for a synthetic set of sites
+    '''
+
+    def __init__(
+        self,
+        seed:int,
+        number_of_sites:int,
+        now:int,
+        zipf_exponent:float=ZIPF_EXPONENT):
+        '''
+        constructor
+
+        :param seed: the seed for the random number generators
+        :param number_of_sites: how many distinct registrable domains (like `example.com`) there are
+        :param now: the unix timestamp that the expiries are relative to
+        :param zipf_exponent: the exponent of the Zipf distribution the sites are picked from
+        '''
+
+        self.seed:int = seed
+        self.number_of_sites:int = number_of_sites
+        self.now:int = now
+
+        site_random = random.Random(seed)
+
+        # the site with rank `i` gets weight 1 / (i + 1) ** s, `random.choices` wants them added up
+        self._site_cumulative_weights:list[float] = list(itertools.accumulate(
+            1 / (i + 1) ** zipf_exponent for i in range(number_of_sites)))
+
+        suffix_list, suffix_weights = zip(*PUBLIC_SUFFIXES)
+        self.sites:list[str] = [f"site{i}.{x}" for i, x in enumerate(
+            site_random.choices(suffix_list, weights=suffix_weights, k=number_of_sites))]
+
+    def _pick_sites(self, rng:random.Random, count:int) -> list[str]:
+        '''
+        pick sites from the Zipf distribution
+
+        :param rng: the random number generator to use
+        :param count: how many sites to pick
+        :return: the sites, like `site3.co.uk`
+        '''
+
+        return rng.choices(self.sites, cum_weights=self._site_cumulative_weights, k=count)
+
+    def _make_cookie(self, rng:random.Random, index:int, site:str) -> Cookie:
+        '''
+        make a single cookie for a site
+
+        :param rng: the random number generator to use
+        :param index: the number of the cookie in the corpus, this makes the name unique
+        :param site: the registrable domain the cookie is for
+        :return: the cookie
+        '''
+
+        subdomain = _weighted_choice(rng, SUBDOMAINS)
+        path = _weighted_choice(rng, COOKIE_PATHS)
+        expiry_kind, least_seconds, most_seconds, _ = rng.choices(EXPIRY_MIX, weights=[x[3] for x in EXPIRY_MIX])[0]
+
+        # domain cookies have a leading dot and are sent to every subdomain, host only cookies aren't
+        domain_cookie = rng.random() < 0.5
+        if domain_cookie:
+            domain = f".{site}"
+        else:
+            domain = f"{subdomain}.{site}" if subdomain else site
+
+        expires = None if expiry_kind == "session" else self.now + rng.randint(least_seconds, most_seconds)
+
+        return Cookie(
+            version=0,
+            name=f"{rng.choice(COOKIE_NAMES)}_{index}",
+            value=rng.randbytes(rng.randint(4, 48)).hex(),
+            port=None,
+            port_specified=False,
+            domain=domain,
+            domain_specified=domain_cookie,
+            domain_initial_dot=domain_cookie,
+            path=path,
+            path_specified=True,
+            secure=rng.random() < 0.5,
+            expires=expires,
+            discard=expires is None,
+            comment=None,
+            comment_url=None,
+            rest={"HttpOnly": None} if rng.random() < 0.3 else {},
+            rfc2109=False)
+
+    def iter_cookie_batches(self, count:int, batch_size:int) -> typing.Iterator[list[Cookie]]:
+        '''
+        generate the cookies in batches, so a corpus of millions of cookies doesn't have to be in memory at once
+
+        :param count: how many cookies to generate in total
+        :param batch_size: the most cookies in each batch
+        :return: an iterator of lists of cookies
+        '''
+
+        rng = random.Random(f"{self.seed}-cookies")
+
+        for iter_start in range(0, count, batch_size):
+
+            iter_count = min(batch_size, count - iter_start)
+
+            yield [self._make_cookie(rng, iter_start + i, iter_site)
+                for i, iter_site in enumerate(self._pick_sites(rng, iter_count))]
+
+    def make_requests(self, count:int) -> list[urllib.request.Request]:
+        '''
+        make requests to the sites, picked from the same Zipf distribution as the cookies
+
+        :param count: how many requests to make
+        :return: the requests
+        '''
+
+        rng = random.Random(f"{self.seed}-requests")
+
+        result_list = list()
+
+        for iter_site in self._pick_sites(rng, count):
+
+            subdomain = _weighted_choice(rng, SUBDOMAINS)
+            host = f"{subdomain}.{iter_site}" if subdomain else iter_site
+            scheme = "https" if rng.random() < 0.8 else "http"
+
+            result_list.append(urllib.request.Request(f"{scheme}://{host}{_weighted_choice(rng, REQUEST_PATHS)}"))
+
+        return result_list
+
+    def make_responses(self, requests:list[urllib.request.Request]) -> list[FakeResponse]:
+        '''
+        make a response for each request, each with between 1 and 3 `Set-Cookie` headers
+
+        :param requests: the requests to respond to
+        :return: a response for each request, in the same order
+        '''
+
+        rng = random.Random(f"{self.seed}-responses")
+
+        result_list = list()
+
+        for i, iter_request in enumerate(requests):
+
+            headers = email.message.Message()
+
+            for j in range(rng.randint(1, 3)):
+
+                attribute_list = [f"{rng.choice(COOKIE_NAMES)}_r{i}_{j}={rng.randbytes(8).hex()}",
+                    f"Path={_weighted_choice(rng, COOKIE_PATHS)}"]
+
+                if rng.random() < 0.5:
+                    attribute_list.append(f"Max-Age={rng.randint(60, 60 * 60 * 24 * 365)}")
+
+                if iter_request.type == "https" and rng.random() < 0.5:
+                    attribute_list.append("Secure")
+
+                headers["Set-Cookie"] = "; ".join(attribute_list)
+
+            result_list.append(FakeResponse(headers))
+
+        return result_list
+
+
+def _weighted_choice(rng:random.Random, choices:list[tuple[str, int]]) -> str:
+    '''
+    pick from a list of (value, weight) tuples
+
+    :param rng: the random number generator to use
+    :param choices: the values and their weights
+    :return: one of the values
+    '''
+
+    return rng.choices([x[0] for x in choices], weights=[x[1] for x in choices])[0]
@@ -0,0 +1,313 @@
+'''
+benchmarks SqliteCookieJar against the standard library's CookieJar on synthetic cookie corpora,
+see `benchmarks.cookie_corpus`
+
+run it from the root of the repository with
+
+`python -m benchmarks.run_benchmarks --sizes 10000 1000000 10000000 --output benchmark_results.json`
+
+for each size, every cookie jar is loaded with that many cookies and then timed doing `add_cookie_header`,
+`extract_cookies`, `len`, iterating over every cookie, and `clear_expired_cookies`. The results are written
+as JSON, one entry per (cookie jar, size, operation), so they can be tracked between commits.
+The standard library's CookieJar keeps every cookie in memory, so it's skipped above `--stdlib-max-size`.
+'''
+
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import argparse
+import dataclasses
+import datetime
+import json
+import logging
+import pathlib
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import typing
+
+from benchmarks.cookie_corpus import CookieCorpus, COOKIES_PER_SITE
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+
+logger = logging.getLogger(__name__)
+
+'''
+the cookie jars that can be benchmarked
+'''
+JAR_KINDS:list[str] = ["sqlite", "stdlib"]
+
+DEFAULT_SIZES:list[int] = [10_000]
+DEFAULT_SEED:int = 1234
+DEFAULT_LOOKUPS:int = 1000
+DEFAULT_LEN_CALLS:int = 100
+DEFAULT_BATCH_SIZE:int = 10_000
+DEFAULT_STDLIB_MAX_SIZE:int = 1_000_000
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    '''
+    the timing of a single operation on a single cookie jar
+    '''
+
+    # the kind of cookie jar, see `JAR_KINDS`
+    jar:str
+
+    # how many cookies the corpus had
+    size:int
+
+    # the name of the operation, like `add_cookie_header`
+    operation:str
+
+    # how many times the operation ran, for `set_cookies` this is the number of cookies
+    iterations:int
+
+    total_seconds:float
+
+    @property
+    def seconds_per_operation(self) -> float:
+        return self.total_seconds / self.iterations if self.iterations else 0.0
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.iterations / self.total_seconds if self.total_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        '''
+        :return: this result as a dict, including the per operation numbers
+        '''
+
+        return dataclasses.asdict(self) | {
+            "seconds_per_operation": self.seconds_per_operation,
+            "operations_per_second": self.operations_per_second,
+        }
+
+
+def _time_operation(
+    jar:str,
+    size:int,
+    operation:str,
+    iterations:int,
+    function:typing.Callable[[], typing.Any]) -> BenchmarkResult:
+    '''
+    time a function that does an operation `iterations` times
+
+    :param jar: the kind of cookie jar
+    :param size: the size of the corpus
+    :param operation: the name of the operation
+    :param iterations: how many times the function does the operation
+    :param function: the function to time
+    :return: the result
+    '''
+
+    start_time = time.perf_counter()
+    function()
+    total_seconds = time.perf_counter() - start_time
+
+    result = BenchmarkResult(jar=jar, size=size, operation=operation, iterations=iterations, total_seconds=total_seconds)
+
+    logger.info("%-7s %10d cookies  %-22s %10d in %9.3f s  (%.1f ops/s)",
+        jar, size, operation, iterations, total_seconds, result.operations_per_second)
+
+    return result
+
+
+def run_benchmark(
+    jar_kind:str,
+    size:int,
+    corpus:CookieCorpus,
+    database_directory:pathlib.Path,
+    lookups:int,
+    len_calls:int,
+    batch_size:int) -> list[BenchmarkResult]:
+    '''
+    load a cookie jar with a corpus and time every operation on it
+
+    :param jar_kind: the kind of cookie jar, see `JAR_KINDS`
+    :param size: how many cookies to load
+    :param corpus: the corpus to load the cookies from
+    :param database_directory: where to create the SqliteCookieJar's database
+    :param lookups: how many requests to time `add_cookie_header` and `extract_cookies` with
+    :param len_calls: how many times to call `len()`
+    :param batch_size: how many cookies to add in each call to `set_cookies`
+    :return: the results, one for each operation
+    '''
+
+    policy = DefaultCookiePolicy()
+
+    if jar_kind == "sqlite":
+        database_path = database_directory / f"benchmark_{size}.sqlite3"
+        database_path.unlink(missing_ok=True)
+
+        cookie_jar = SqliteCookieJar(database_path=database_path, policy=policy)
+        cookie_jar.connect()
+
+        def _load_cookies():
+            for iter_batch in corpus.iter_cookie_batches(size, batch_size):
+                cookie_jar.set_cookies(iter_batch)
+
+    elif jar_kind == "stdlib":
+        cookie_jar = CookieJar(policy=policy)
+
+        def _load_cookies():
+            for iter_batch in corpus.iter_cookie_batches(size, batch_size):
+                for iter_cookie in iter_batch:
+                    cookie_jar.set_cookie(iter_cookie)
+
+    else:
+        raise ValueError(f"unknown cookie jar `{jar_kind}`, expected one of `{JAR_KINDS}`")
+
+    request_list = corpus.make_requests(lookups)
+    response_list = corpus.make_responses(request_list)
+
+    def _add_cookie_headers():
+        for iter_request in request_list:
+            iter_request.remove_header("Cookie")
+            cookie_jar.add_cookie_header(iter_request)
+
+    def _extract_cookies():
+        for iter_request, iter_response in zip(request_list, response_list):
+            cookie_jar.extract_cookies(iter_response, iter_request)
+
+    def _call_len():
+        for _ in range(len_calls):
+            len(cookie_jar)
+
+    def _iterate():
+        for _ in cookie_jar:
+            pass
+
+    result_list = list()
+
+    try:
+        # the corpus is generated while it's loaded, so this includes the time to make the Cookie objects
+        result_list.append(_time_operation(jar_kind, size, "set_cookies", size, _load_cookies))
+        result_list.append(_time_operation(jar_kind, size, "add_cookie_header", lookups, _add_cookie_headers))
+        result_list.append(_time_operation(jar_kind, size, "extract_cookies", lookups, _extract_cookies))
+        result_list.append(_time_operation(jar_kind, size, "len", len_calls, _call_len))
+
+        cookie_count = len(cookie_jar)
+        result_list.append(_time_operation(jar_kind, size, "iterate", cookie_count, _iterate))
+
+        # this goes last since it changes what's in the jar
+        result_list.append(_time_operation(jar_kind, size, "clear_expired_cookies", 1, cookie_jar.clear_expired_cookies))
+
+    finally:
+        if jar_kind == "sqlite":
+            cookie_jar.close()
+
+    return result_list
+
+
+def run_benchmarks(
+    sizes:list[int],
+    jar_kinds:list[str],
+    seed:int,
+    database_directory:pathlib.Path,
+    lookups:int=DEFAULT_LOOKUPS,
+    len_calls:int=DEFAULT_LEN_CALLS,
+    batch_size:int=DEFAULT_BATCH_SIZE,
+    stdlib_max_size:int=DEFAULT_STDLIB_MAX_SIZE) -> dict:
+    '''
+    run every benchmark
+
+    :param sizes: the numbers of cookies to benchmark with
+    :param jar_kinds: the cookie jars to benchmark, see `JAR_KINDS`
+    :param seed: the seed of the corpus
+    :param database_directory: where to create the SqliteCookieJar databases
+    :param lookups: how many requests to time `add_cookie_header` and `extract_cookies` with
+    :param len_calls: how many times to call `len()`
+    :param batch_size: how many cookies to add in each call to `set_cookies`
+    :param stdlib_max_size: the biggest size to benchmark the standard library's CookieJar with
+    :return: a dict with the environment the benchmarks ran in, and every result
+    '''
+
+    now = int(time.time())
+    result_list = list()
+
+    for iter_size in sizes:
+
+        corpus = CookieCorpus(seed=seed, number_of_sites=max(1, iter_size // COOKIES_PER_SITE), now=now)
+
+        for iter_jar_kind in jar_kinds:
+
+            if iter_jar_kind == "stdlib" and iter_size > stdlib_max_size:
+                logger.info("skipping the stdlib cookie jar with `%s` cookies, it's over `%s`", iter_size, stdlib_max_size)
+                continue
+
+            result_list.extend(run_benchmark(
+                jar_kind=iter_jar_kind,
+                size=iter_size,
+                corpus=corpus,
+                database_directory=database_directory,
+                lookups=lookups,
+                len_calls=len_calls,
+                batch_size=batch_size))
+
+    return {
+        "environment": {
+            "timestamp": datetime.datetime.fromtimestamp(now, datetime.timezone.utc).isoformat(),
+            "python_version": sys.version,
+            "sqlite_version": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "parameters": {
+            "seed": seed,
+            "sizes": sizes,
+            "jars": jar_kinds,
+            "lookups": lookups,
+            "len_calls": len_calls,
+            "batch_size": batch_size,
+        },
+        "results": [x.to_dict() for x in result_list],
+    }
+
+
+def main():
+    '''
+    run the benchmarks and write out the results
+    '''
+
+    parser = argparse.ArgumentParser(description="benchmark biscutbox against the standard library's CookieJar")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="the numbers of cookies to benchmark with, for example `10000 1000000 10000000`")
+    parser.add_argument("--jars", nargs="+", choices=JAR_KINDS, default=JAR_KINDS, help="the cookie jars to benchmark")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="the seed of the synthetic corpus")
+    parser.add_argument("--lookups", type=int, default=DEFAULT_LOOKUPS,
+        help="how many requests to time `add_cookie_header` and `extract_cookies` with")
+    parser.add_argument("--len-calls", type=int, default=DEFAULT_LEN_CALLS, help="how many times to call `len()`")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help="how many cookies to add in each call to `set_cookies`")
+    parser.add_argument("--stdlib-max-size", type=int, default=DEFAULT_STDLIB_MAX_SIZE,
+        help="the biggest size to benchmark the standard library's CookieJar with, since it keeps every cookie in memory")
+    parser.add_argument("--database-directory", type=pathlib.Path,
+        help="where to create the databases, defaults to a temporary directory that is deleted afterwards")
+    parser.add_argument("--output", type=pathlib.Path, help="write the results here as JSON, rather than to stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level="INFO", stream=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="biscutbox-benchmark-") as temp_directory:
+
+        benchmark_results = run_benchmarks(
+            sizes=args.sizes,
+            jar_kinds=args.jars,
+            seed=args.seed,
+            database_directory=args.database_directory or pathlib.Path(temp_directory),
+            lookups=args.lookups,
+            len_calls=args.len_calls,
+            batch_size=args.batch_size,
+            stdlib_max_size=args.stdlib_max_size)
+
+    results_json = json.dumps(benchmark_results, indent=4)
+
+    if args.output:
+        args.output.write_text(results_json + "\n", encoding="utf-8")
+        logger.info("wrote the results to `%s`", args.output)
+    else:
+        print(results_json)
+
+
+if __name__ == "__main__":
+    main()
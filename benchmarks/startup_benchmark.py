@@ -0,0 +1,207 @@
+'''
+benchmarks how long it takes a new process to start using a SqliteCookieJar, which is what short lived jobs that
+open a cookie jar to send a single request pay every time
+
+run it from the root of the repository with
+
+`python -m benchmarks.startup_benchmark --runs 20 --output startup_results.json`
+
+each run starts a new python process that times importing biscutbox, constructing a SqliteCookieJar, `connect()` and
+the first `add_cookie_header`, against a database that already has cookies in it. This is done with and without
+`lazy_connect`, and the median of each step is written out as JSON.
+
+this module doesn't import biscutbox at the top, so the child processes can time importing it
+'''
+
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUNS:int = 10
+DEFAULT_SEED:int = 1234
+DEFAULT_SIZE:int = 10_000
+
+'''
+the steps that each run times, in order
+'''
+STARTUP_STEPS:list[str] = ["import", "construct", "connect", "first_lookup"]
+
+
+def measure_startup(database_path:pathlib.Path, url:str, lazy_connect:bool) -> dict[str, float]:
+    '''
+    time every step of starting to use a cookie jar, this should be run in a new process, see `run_startup_benchmarks`
+
+    :param database_path: the database to open
+    :param url: the URL of the request to add the cookie header to
+    :param lazy_connect: whether to create the cookie jar with `lazy_connect`
+    :return: how many seconds each of `STARTUP_STEPS` took
+    '''
+
+    step_seconds = dict()
+
+    start_time = time.perf_counter()
+    from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+    step_seconds["import"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    cookie_jar = SqliteCookieJar(database_path=database_path, lazy_connect=lazy_connect)
+    step_seconds["construct"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    cookie_jar.connect()
+    step_seconds["connect"] = time.perf_counter() - start_time
+
+    try:
+        start_time = time.perf_counter()
+        cookie_jar.add_cookie_header(urllib.request.Request(url))
+        step_seconds["first_lookup"] = time.perf_counter() - start_time
+    finally:
+        cookie_jar.close()
+
+    return step_seconds
+
+
+def _create_database(database_path:pathlib.Path, size:int, seed:int) -> str:
+    '''
+    create a database with a synthetic corpus in it, see `benchmarks.cookie_corpus`
+
+    :param database_path: where to create the database
+    :param size: how many cookies to put in it
+    :param seed: the seed of the corpus
+    :return: the URL of a request to one of the corpus' sites
+    '''
+
+    from benchmarks.cookie_corpus import CookieCorpus, COOKIES_PER_SITE
+    from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+
+    corpus = CookieCorpus(seed=seed, number_of_sites=max(1, size // COOKIES_PER_SITE), now=int(time.time()))
+
+    with SqliteCookieJar(database_path=database_path) as cookie_jar:
+        for iter_batch in corpus.iter_cookie_batches(size, 10_000):
+            cookie_jar.set_cookies(iter_batch)
+
+    return corpus.make_requests(1)[0].full_url
+
+
+def run_startup_benchmarks(
+    database_directory:pathlib.Path,
+    runs:int=DEFAULT_RUNS,
+    size:int=DEFAULT_SIZE,
+    seed:int=DEFAULT_SEED) -> dict:
+    '''
+    run the startup benchmark in new processes, with and without `lazy_connect`
+
+    :param database_directory: where to create the database
+    :param runs: how many processes to start for each setting
+    :param size: how many cookies to put in the database
+    :param seed: the seed of the corpus
+    :return: a dict with the environment the benchmarks ran in, and the median seconds of each step
+    '''
+
+    now = int(time.time())
+
+    database_path = database_directory / "startup_benchmark.sqlite3"
+    database_path.unlink(missing_ok=True)
+    url = _create_database(database_path, size, seed)
+
+    result_list = list()
+
+    for iter_lazy_connect in [False, True]:
+
+        run_list = list()
+
+        for _ in range(runs):
+
+            command = [sys.executable, "-m", "benchmarks.startup_benchmark", "--measure",
+                "--database-path", str(database_path), "--url", url]
+
+            if iter_lazy_connect:
+                command.append("--lazy-connect")
+
+            completed_process = subprocess.run(command, capture_output=True, check=True, text=True)
+            run_list.append(json.loads(completed_process.stdout))
+
+        median_seconds = {x: statistics.median(y[x] for y in run_list) for x in STARTUP_STEPS}
+
+        logger.info("lazy_connect=%-5s %s", iter_lazy_connect,
+            "  ".join(f"{x}: {y * 1000:.2f} ms" for x, y in median_seconds.items()))
+
+        result_list.append({
+            "lazy_connect": iter_lazy_connect,
+            "runs": runs,
+            "median_seconds": median_seconds,
+            "median_total_seconds": statistics.median(sum(x.values()) for x in run_list),
+        })
+
+    return {
+        "environment": {
+            "timestamp": datetime.datetime.fromtimestamp(now, datetime.timezone.utc).isoformat(),
+            "python_version": sys.version,
+            "sqlite_version": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "parameters": {
+            "seed": seed,
+            "size": size,
+            "runs": runs,
+        },
+        "results": result_list,
+    }
+
+
+def main():
+    '''
+    run the startup benchmark and write out the results, or with `--measure`, do a single run in this process
+    '''
+
+    parser = argparse.ArgumentParser(description="benchmark how long it takes to start using a SqliteCookieJar")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="how many processes to start for each setting")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="how many cookies to put in the database")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="the seed of the synthetic corpus")
+    parser.add_argument("--database-directory", type=pathlib.Path,
+        help="where to create the database, defaults to a temporary directory that is deleted afterwards")
+    parser.add_argument("--output", type=pathlib.Path, help="write the results here as JSON, rather than to stdout")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--database-path", type=pathlib.Path, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--lazy-connect", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_startup(args.database_path, args.url, args.lazy_connect)))
+        return
+
+    logging.basicConfig(level="INFO", stream=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="biscutbox-startup-benchmark-") as temp_directory:
+
+        benchmark_results = run_startup_benchmarks(
+            database_directory=args.database_directory or pathlib.Path(temp_directory),
+            runs=args.runs,
+            size=args.size,
+            seed=args.seed)
+
+    results_json = json.dumps(benchmark_results, indent=4)
+
+    if args.output:
+        args.output.write_text(results_json + "\n", encoding="utf-8")
+        logger.info("wrote the results to `%s`", args.output)
+    else:
+        print(results_json)
+
+
+if __name__ == "__main__":
+    main()
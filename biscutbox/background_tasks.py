@@ -0,0 +1,88 @@
+'''
+a small helper for running periodic maintenance work for a SqliteCookieJar on a background thread
+'''
+
+import logging
+import threading
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTaskThread(threading.Thread):
+    '''
+    a daemon thread that runs a task over and over, where each run of the task returns how many
+    seconds to wait before running it again
+
+    the task is responsible for its own locking, usually by going through
+    `SqliteCookieJar._get_sqlite3_database_cursor`
+    '''
+
+    def __init__(self, name:str, task:typing.Callable[[], float], initial_delay:float):
+        '''
+        constructor
+
+        :param name: the name of the thread, shows up in log messages
+        :param task: the callable to run, it should return the number of seconds to wait before the next run
+        :param initial_delay: the number of seconds to wait before the first run
+        '''
+
+        super().__init__(name=name, daemon=True)
+
+        self._task = task
+        self._delay:float = initial_delay
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def run(self):
+        '''
+        the thread's main loop
+        '''
+
+        logger.debug("background task thread `%s` starting", self.name)
+
+        while True:
+
+            self._wake_event.wait(self._delay)
+            self._wake_event.clear()
+
+            if self._stop_event.is_set():
+                break
+
+            try:
+                self._delay = self._task()
+            except Exception:
+                # don't let one failure kill the thread, just try again after the same delay
+                logger.exception("background task thread `%s` had an uncaught exception", self.name)
+
+        logger.debug("background task thread `%s` stopped", self.name)
+
+    def is_stopping(self) -> bool:
+        '''
+        lets a long running task check if it should return early
+
+        :return: whether `stop()` has been called
+        '''
+
+        return self._stop_event.is_set()
+
+    def wake(self):
+        '''
+        run the task now instead of waiting out the current delay
+        '''
+
+        self._wake_event.set()
+
+    def stop(self, timeout:float|None=None):
+        '''
+        stop the thread and wait for it to finish, if it is in the middle of running the task
+        this will wait for that run to complete
+
+        :param timeout: how long to wait for the thread to finish, None means wait forever
+        '''
+
+        self._stop_event.set()
+        self._wake_event.set()
+
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,282 @@
+'''
+line by line parsers for the cookie file formats that python's http.cookiejar.FileCookieJar
+subclasses write out, `MozillaCookieJar` (the Netscape `cookies.txt` format) and `LWPCookieJar`
+(the libwww-perl `Set-Cookie3` format)
+
+the stdlib implementations of these parsers live in `_really_load` and call `self.set_cookie()` for
+every single cookie, which for us would mean one database transaction per cookie. These are ports of
+those methods that instead yield the Cookie objects, so the caller can batch them up however it wants
+'''
+
+from http.cookiejar import Cookie, LoadError, split_header_words, iso2time
+import logging
+import re
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+'''
+the number of cookies to hand to `SqliteCookieJar.set_cookies` at a time when loading a cookie file
+'''
+COOKIE_FILE_IMPORT_BATCH_SIZE:int = 10000
+
+'''
+the two file formats we know how to parse
+'''
+COOKIE_FILE_FORMAT_NETSCAPE:str = "netscape"
+COOKIE_FILE_FORMAT_LWP:str = "lwp"
+
+# these are copied from http.cookiejar, as they are private to that module
+NETSCAPE_MAGIC_RGX = re.compile("#( Netscape)? HTTP Cookie File")
+LWP_MAGIC_RGX = re.compile(r"^\#LWP-Cookies-(\d+\.\d+)", re.ASCII)
+HTTPONLY_ATTR = "HTTPOnly"
+HTTPONLY_PREFIX = "#HttpOnly_"
+
+
+def detect_cookie_file_format(magic_line:str) -> str:
+    '''
+    figure out what kind of cookie file we have from the first line of the file
+
+    :param magic_line: the first line of the cookie file
+    :return: either `COOKIE_FILE_FORMAT_NETSCAPE` or `COOKIE_FILE_FORMAT_LWP`
+    :raises LoadError: if the line doesn't look like either format
+    '''
+
+    if NETSCAPE_MAGIC_RGX.match(magic_line):
+        return COOKIE_FILE_FORMAT_NETSCAPE
+
+    if LWP_MAGIC_RGX.search(magic_line):
+        return COOKIE_FILE_FORMAT_LWP
+
+    raise LoadError(f"unknown cookie file format, first line was: `{magic_line!r}`")
+
+
+def _should_skip_cookie(cookie:Cookie, ignore_discard:bool, ignore_expires:bool, now:int) -> bool:
+    '''
+    the discard / expiry checks that both of the stdlib loaders do before calling `set_cookie`
+
+    :param cookie: the cookie we just parsed
+    :param ignore_discard: if true, keep session cookies
+    :param ignore_expires: if true, keep expired cookies
+    :param now: the time to check expiry against
+    :return: True if this cookie should not be loaded
+    '''
+
+    if not ignore_discard and cookie.discard:
+        return True
+
+    if not ignore_expires and cookie.is_expired(now):
+        return True
+
+    return False
+
+
+def parse_netscape_cookie_lines(
+    file_obj:typing.TextIO,
+    ignore_discard:bool=False,
+    ignore_expires:bool=False) -> typing.Iterator[Cookie]:
+    '''
+    parse the body of a Netscape / `MozillaCookieJar` cookie file, this is a port of
+    `MozillaCookieJar._really_load`
+
+    :param file_obj: a text file object that is positioned just after the magic first line
+    :param ignore_discard: if true, also yield session cookies
+    :param ignore_expires: if true, also yield expired cookies
+    :return: an iterator of Cookie objects
+    :raises LoadError: if a line can't be parsed
+    '''
+
+    now = int(time.time())
+
+    line = ""
+    try:
+        while (line := file_obj.readline()) != "":
+            rest = {}
+
+            # httponly is a cookie flag as defined in rfc6265
+            # when encoded in a netscape cookie file,
+            # the line is prepended with "#HttpOnly_"
+            if line.startswith(HTTPONLY_PREFIX):
+                rest[HTTPONLY_ATTR] = ""
+                line = line[len(HTTPONLY_PREFIX):]
+
+            # last field may be absent, so keep any trailing tab
+            if line.endswith("\n"):
+                line = line[:-1]
+
+            # skip comments and blank lines
+            if line.strip().startswith(("#", "$")) or line.strip() == "":
+                continue
+
+            domain, domain_specified, path, secure, expires, name, value = line.split("\t")
+            secure = (secure == "TRUE")
+            domain_specified = (domain_specified == "TRUE")
+            if name == "":
+                # cookies.txt regards 'Set-Cookie: foo' as a cookie
+                # with no name, whereas http.cookiejar regards it as a
+                # cookie with no value.
+                name = value
+                value = None
+
+            initial_dot = domain.startswith(".")
+            if domain_specified != initial_dot:
+                raise ValueError("domain_specified does not match the domain's initial dot")
+
+            # the expiry is stored as an integer, since that is what the `expires` column is. Some
+            # files have fractional expiries, which the stdlib's `Cookie` truncates the same way
+            discard = False
+            if expires == "":
+                expires = None
+                discard = True
+            else:
+                expires = int(float(expires))
+
+            # assume path_specified is false
+            cookie = Cookie(
+                version=0,
+                name=name,
+                value=value,
+                port=None,
+                port_specified=False,
+                domain=domain,
+                domain_specified=domain_specified,
+                domain_initial_dot=initial_dot,
+                path=path,
+                path_specified=False,
+                secure=secure,
+                expires=expires,
+                discard=discard,
+                comment=None,
+                comment_url=None,
+                rest=rest)
+
+            if _should_skip_cookie(cookie, ignore_discard, ignore_expires, now):
+                continue
+
+            yield cookie
+
+    except OSError:
+        raise
+    except Exception as e:
+        raise LoadError(f"invalid Netscape format cookies file line: `{line!r}`") from e
+
+
+def parse_lwp_cookie_lines(
+    file_obj:typing.TextIO,
+    ignore_discard:bool=False,
+    ignore_expires:bool=False) -> typing.Iterator[Cookie]:
+    '''
+    parse the body of a `LWPCookieJar` (`Set-Cookie3`) cookie file, this is a port of
+    `LWPCookieJar._really_load`
+
+    :param file_obj: a text file object that is positioned just after the magic first line
+    :param ignore_discard: if true, also yield session cookies
+    :param ignore_expires: if true, also yield expired cookies
+    :return: an iterator of Cookie objects
+    :raises LoadError: if a line can't be parsed
+    '''
+
+    now = int(time.time())
+
+    header = "Set-Cookie3:"
+    boolean_attrs = ("port_spec", "path_spec", "domain_dot", "secure", "discard")
+    value_attrs = ("version", "port", "path", "domain", "expires", "comment", "commenturl")
+
+    line = ""
+    try:
+        while (line := file_obj.readline()) != "":
+            if not line.startswith(header):
+                continue
+            line = line[len(header):].strip()
+
+            for data in split_header_words([line]):
+                name, value = data[0]
+                standard = {}
+                rest = {}
+                for k in boolean_attrs:
+                    standard[k] = False
+                for k, v in data[1:]:
+                    if k is not None:
+                        lc = k.lower()
+                    else:
+                        lc = None
+                    # don't lose case distinction for unknown fields
+                    if (lc in value_attrs) or (lc in boolean_attrs):
+                        k = lc
+                    if k in boolean_attrs:
+                        if v is None:
+                            v = True
+                        standard[k] = v
+                    elif k in value_attrs:
+                        standard[k] = v
+                    else:
+                        rest[k] = v
+
+                h = standard.get
+                expires = h("expires")
+                discard = h("discard")
+                if expires is not None:
+                    expires = iso2time(expires)
+                if expires is None:
+                    discard = True
+                domain = h("domain")
+                domain_specified = domain.startswith(".")
+
+                # the version is written out as a string, but the column is an integer
+                version = h("version")
+                if version is not None:
+                    version = int(version)
+
+                cookie = Cookie(
+                    version=version,
+                    name=name,
+                    value=value,
+                    port=h("port"),
+                    port_specified=h("port_spec"),
+                    domain=domain,
+                    domain_specified=domain_specified,
+                    domain_initial_dot=h("domain_dot"),
+                    path=h("path"),
+                    path_specified=h("path_spec"),
+                    secure=h("secure"),
+                    expires=expires,
+                    discard=discard,
+                    comment=h("comment"),
+                    comment_url=h("commenturl"),
+                    rest=rest)
+
+                if _should_skip_cookie(cookie, ignore_discard, ignore_expires, now):
+                    continue
+
+                yield cookie
+
+    except OSError:
+        raise
+    except Exception as e:
+        raise LoadError(f"invalid Set-Cookie3 format file line: `{line!r}`") from e
+
+
+def iter_cookies_from_file(
+    file_obj:typing.TextIO,
+    ignore_discard:bool=False,
+    ignore_expires:bool=False) -> typing.Iterator[Cookie]:
+    '''
+    read the magic first line of a cookie file, and then hand off the rest of the file
+    to the right parser
+
+    :param file_obj: a text file object positioned at the start of the file
+    :param ignore_discard: if true, also yield session cookies
+    :param ignore_expires: if true, also yield expired cookies
+    :return: an iterator of Cookie objects
+    :raises LoadError: if the file isn't a format we know, or a line can't be parsed
+    '''
+
+    file_format = detect_cookie_file_format(file_obj.readline())
+
+    logger.debug("detected cookie file format `%s`", file_format)
+
+    if file_format == COOKIE_FILE_FORMAT_NETSCAPE:
+        return parse_netscape_cookie_lines(file_obj, ignore_discard, ignore_expires)
+    else:
+        return parse_lwp_cookie_lines(file_obj, ignore_discard, ignore_expires)
@@ -0,0 +1,303 @@
+from http.cookiejar import CookieJar, CookiePolicy, Cookie, request_host
+from os import PathLike
+import json
+import logging
+import socket
+import time
+import typing
+import urllib.request
+
+from biscutbox import sql_statements
+from biscutbox.cookie_jar_server import CookieJarServerError, cookie_to_dict, cookie_from_dict
+
+logger = logging.getLogger(__name__)
+
+'''
+the default minimum number of seconds between the `clear_expired_cookies` requests that a CookieJarClient sends
+'''
+CLIENT_CLEAR_EXPIRED_INTERVAL:float = 60.0
+
+
+class CookieJarClient(CookieJar):
+    '''
+    a cookiejar whose cookies are stored by a `biscutbox.cookie_jar_server.CookieJarServer`, which it talks to
+    over a Unix domain socket. The server returns every cookie under a request's registrable domain, and this
+    runs them through its own CookiePolicy, so each client can have a different policy.
+
+    a client sends one request at a time and waits for its response, the batching happens on the server, across
+    every client connected to it. The protocol allows pipelining, see `biscutbox.cookie_jar_server`, but this
+    client doesn't do it.
+    '''
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self ,type, value, traceback):
+
+        self.close()
+
+    def __init__(
+        self,
+        socket_path:PathLike,
+        policy:CookiePolicy|None=None,
+        jar_id:str=sql_statements.DEFAULT_JAR_ID,
+        timeout:float|None=None,
+        clear_expired_interval:float=CLIENT_CLEAR_EXPIRED_INTERVAL):
+        '''
+        constructor
+
+        :param socket_path: the path of the server's Unix domain socket
+        :param policy: the CookiePolicy object to use
+        :param jar_id: the partition of the server's database to use, see `SqliteCookieJar.partition()`
+        :param timeout: how many seconds to wait for the server to respond, None means wait forever
+        :param clear_expired_interval: `CookieJar.add_cookie_header` calls `clear_expired_cookies` on every request,
+        so this only sends it to the server if it has been at least this many seconds since the last time. Expired
+        cookies are never sent anyway, since the policy checks them, and the server can delete them with its
+        `expiry_sweeper`. 0 sends every call
+        '''
+
+        # call superclass
+        super().__init__(policy)
+
+        self.socket_path:PathLike = socket_path
+        self.jar_id:str = jar_id
+        self.timeout:float|None = timeout
+
+        self._socket:socket.socket|None = None
+        self._socket_file:typing.BinaryIO|None = None
+        self._request_id:int = 0
+
+        self.clear_expired_interval:float = clear_expired_interval
+        # the `time.monotonic()` of the last `clear_expired_cookies` request, None if there hasn't been one
+        self._last_clear_expired_time:float|None = None
+
+    def connect(self):
+        '''
+        connect to the server
+        '''
+
+        logger.debug("connecting to the cookie jar server at `%s`", self.socket_path)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.connect(str(self.socket_path))
+        self._socket_file = self._socket.makefile("rwb")
+
+    def close(self):
+        ''' close the connection to the server '''
+
+        if self._socket_file:
+            self._socket_file.close()
+            self._socket_file = None
+
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+    def _call(self, op:str, **kwargs):
+        '''
+        send a request to the server and wait for the response, requests aren't pipelined
+
+        :param op: the name of the operation
+        :param kwargs: the operation's arguments
+        :return: the result that the server sent back
+        :raises CookieJarServerError: if the server returns an error, or the connection is lost
+
+        if a request times out or the connection fails part of the way through, the server's response could still
+        arrive later and be read as the response to the next request, so the connection is closed and has to
+        be opened again with `connect()`
+        '''
+
+        # only one thread gets to use the connection at a time, until it has read its own response
+        with self._cookies_lock:
+
+            if not self._socket_file:
+                raise CookieJarServerError("not connected to the cookie jar server, call `connect()` first")
+
+            self._request_id += 1
+            request = {"id": self._request_id, "op": op, "jar_id": self.jar_id} | kwargs
+
+            try:
+                self._socket_file.write(json.dumps(request).encode("utf-8") + b"\n")
+                self._socket_file.flush()
+
+                response_line = self._socket_file.readline()
+
+            except OSError as e:
+                self.close()
+                raise CookieJarServerError(f"lost the connection to the cookie jar server: {e}") from e
+
+            if not response_line:
+                self.close()
+                raise CookieJarServerError("the cookie jar server closed the connection")
+
+            try:
+                response = json.loads(response_line)
+            except ValueError as e:
+                self.close()
+                raise CookieJarServerError(f"invalid response from the cookie jar server: {e}") from e
+
+            if response.get("id") != request["id"]:
+                self.close()
+                raise CookieJarServerError(f"expected the response to request `{request['id']}`, got `{response.get('id')}`")
+
+        if "error" in response:
+            raise CookieJarServerError(f"{response['error']['type']}: {response['error']['message']}")
+
+        return response["result"]
+
+    def _does_cookie_pass_policies(self, cookie:Cookie, request:urllib.request.Request) -> bool:
+        '''
+        runs every check against the cookie policy, like SqliteCookieJar does for each row it reads
+
+        :param cookie: the cookie to check
+        :param request: the request being made
+        :return: whether the cookie and request pass the policies
+        '''
+
+        return (self._policy.domain_return_ok(cookie.domain, request)
+            and self._policy.path_return_ok(cookie.path, request)
+            and self._policy.return_ok(cookie, request))
+
+    @typing.override
+    def _cookies_for_domain(self, domain:str, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method, that returns the cookies for a given domain
+
+        :param domain: the domain to get the cookies from
+        :param request: the request being made
+        :return: a list of Cookie objects that match this domain
+        '''
+
+        self._policy._now = self._now = int(time.time())
+
+        cookie_list = [cookie_from_dict(x) for x in self._call("cookies_for_request", host=domain.lstrip("."))]
+
+        return [x for x in cookie_list if x.domain == domain and self._does_cookie_pass_policies(x, request)]
+
+    @typing.override
+    def _cookies_for_request(self, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method, that returns the cookies for a given request
+
+        :param request: the Request that we want the cookies for
+        :return: a list of Cookie objects
+        '''
+
+        self._policy._now = self._now = int(time.time())
+
+        cookie_list = [cookie_from_dict(x) for x in self._call("cookies_for_request", host=request_host(request))]
+
+        result_list = [x for x in cookie_list if self._does_cookie_pass_policies(x, request)]
+
+        logger.debug("returning `%s` cookies", len(result_list))
+
+        return result_list
+
+    @typing.override
+    def extract_cookies(self, response, request:urllib.request.Request):
+        '''
+        extract the cookies from the response that the policy allows, and send them to the server in
+        a single `set_cookies` request rather than one request per cookie
+
+        :param response: the response, see `http.cookiejar.CookieJar.extract_cookies`
+        :param request: the request that the response is for
+        '''
+
+        with self._cookies_lock:
+
+            self._policy._now = self._now = int(time.time())
+
+            cookie_list = [x for x in self.make_cookies(response, request) if self._policy.set_ok(x, request)]
+
+        if cookie_list:
+            self.set_cookies(cookie_list)
+
+    @typing.override
+    def set_cookie(self, cookie:Cookie):
+        """Set a cookie, without checking whether or not it should be set.
+
+        :param cookie: the Cookie object to add
+        """
+
+        self.set_cookies(cookie_list=[cookie])
+
+    def set_cookies(self, cookie_list:typing.Iterable[Cookie]):
+        '''
+        bulk add cookies
+
+        :param cookie_list: a sequence of Cookie objects to add
+        '''
+
+        self._call("set_cookies", cookies=[cookie_to_dict(x) for x in cookie_list])
+
+    @typing.override
+    def clear(self, domain=None, path=None, name=None):
+        '''
+        Clear some cookies, see `SqliteCookieJar.clear`
+        '''
+
+        if name is not None and ((domain is None) or (path is None)):
+            raise ValueError(
+                "domain and path must be given to remove a cookie by name")
+
+        if path is not None and domain is None:
+            raise ValueError(
+                "domain must be given to remove cookies by path")
+
+        self._call("clear", domain=domain, path=path, name=name)
+
+    @typing.override
+    def clear_session_cookies(self) -> None:
+        '''
+        Discard all session cookies
+        '''
+
+        self._call("clear_session_cookies")
+
+    @typing.override
+    def clear_expired_cookies(self) -> None:
+        '''
+        Discard all expired cookies, at most once every `clear_expired_interval` seconds
+        '''
+
+        now = time.monotonic()
+
+        if self._last_clear_expired_time is not None and now - self._last_clear_expired_time < self.clear_expired_interval:
+            logger.debug("skipping clear_expired_cookies, the last one was less than `%s` seconds ago",
+                self.clear_expired_interval)
+            return
+
+        self._last_clear_expired_time = now
+        self._call("clear_expired_cookies")
+
+    def __iter__(self):
+        '''
+        __iter__ implementation, this fetches every cookie in the partition from the server at once
+        '''
+
+        for iter_cookie_dict in self._call("list_cookies"):
+            yield cookie_from_dict(iter_cookie_dict)
+
+    def __len__(self):
+        '''
+        __len__ implementation
+        :return: the number of contained cookies in this cookiejar
+        '''
+
+        return self._call("len")
+
+    def __repr__(self) -> str:
+        '''__repr__ implementation, like SqliteCookieJar this doesn't print every cookie
+
+        :return: the string name of this class
+        '''
+        return f"<{self.__class__.__name__} />"
+
+    def __str__(self):
+        '''__str__ implementation, like SqliteCookieJar this doesn't print every cookie
+
+        :return: the string name of this class
+        '''
+        return f"<{self.__class__.__name__} />"
@@ -0,0 +1,614 @@
+'''
+a small local server that owns a SqliteCookieJar's database, so that many worker processes can share one jar
+without each of them opening their own connection and contending on SQLite's locks. The workers use
+`biscutbox.cookie_jar_client.CookieJarClient`, which is a CookieJar that forwards its calls to the server
+over a Unix domain socket.
+
+the protocol is newline delimited JSON. Each request is an object with an `id`, an `op` and the `jar_id` of the
+partition to use, plus the arguments for the op. Each response is an object with the same `id` and either a
+`result` or an `error`. A client can send several requests without waiting for the responses (pipelining), the
+responses on a connection always come back in the order the requests were sent. `CookieJarClient` doesn't
+pipeline, it waits for each response, so its requests are only batched with other clients' requests.
+
+every request from every connection goes through a single worker thread, which takes up to `max_batch_size`
+requests off the queue at a time and merges consecutive `set_cookies` requests for the same partition into
+one transaction. The worker also keeps a LRU cache of the cookies for each registrable domain, so repeated
+lookups for the same site don't touch the database at all.
+
+the server doesn't apply a cookie policy, it returns every cookie under the request host's registrable domain,
+the client runs those through its own CookiePolicy exactly like SqliteCookieJar does. Cookies returned from
+the cache don't update `last_accessed` when `track_last_access` is on.
+
+run it with `python -m biscutbox.cookie_jar_server --database-path cookies.sqlite3 --socket-path biscutbox.sock`
+'''
+
+from concurrent.futures import Future
+from http.cookiejar import CookiePolicy, Cookie
+from os import PathLike
+import argparse
+import collections
+import json
+import logging
+import pathlib
+import queue
+import socketserver
+import stat
+import threading
+import time
+
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+
+logger = logging.getLogger(__name__)
+
+'''
+the default number of registrable domains that the server keeps in its cookie cache
+'''
+SERVER_CACHE_SIZE:int = 1024
+
+'''
+the default maximum number of requests that the server's worker thread handles in one go
+'''
+SERVER_MAX_BATCH_SIZE:int = 256
+
+
+class CookieJarServerError(Exception):
+    '''
+    raised by CookieJarClient when the server returns an error, or the connection to it is lost
+    '''
+
+
+class AcceptAllCookiePolicy(CookiePolicy):
+    '''
+    a CookiePolicy that allows everything, the server uses this since the policy is applied by the client
+    '''
+
+    def set_ok(self, cookie:Cookie, request) -> bool:
+        return True
+
+    def return_ok(self, cookie:Cookie, request) -> bool:
+        return True
+
+    def domain_return_ok(self, domain:str, request) -> bool:
+        return True
+
+    def path_return_ok(self, path:str, request) -> bool:
+        return True
+
+
+def cookie_to_dict(cookie:Cookie) -> dict:
+    '''
+    convert a Cookie into something that can be sent as JSON
+
+    :param cookie: the cookie to convert
+    :return: a dict with the Cookie constructor's arguments
+    '''
+
+    return {
+        "version": cookie.version,
+        "name": cookie.name,
+        "value": cookie.value,
+        "port": cookie.port,
+        "port_specified": cookie.port_specified,
+        "domain": cookie.domain,
+        "domain_specified": cookie.domain_specified,
+        "domain_initial_dot": cookie.domain_initial_dot,
+        "path": cookie.path,
+        "path_specified": cookie.path_specified,
+        "secure": cookie.secure,
+        "expires": cookie.expires,
+        "discard": cookie.discard,
+        "comment": cookie.comment,
+        "comment_url": cookie.comment_url,
+        "rest": cookie._rest,
+        "rfc2109": cookie.rfc2109,
+    }
+
+
+def cookie_from_dict(cookie_dict:dict) -> Cookie:
+    '''
+    the reverse of `cookie_to_dict`
+
+    :param cookie_dict: the dict that was sent as JSON
+    :return: the Cookie
+    '''
+
+    return Cookie(**cookie_dict)
+
+
+class _CookieJarServerHandler(socketserver.StreamRequestHandler):
+    '''
+    handles a single client connection. The requests are read on this thread and handed to the worker thread,
+    while a second thread writes out the responses in order as they finish, so a client can pipeline requests
+    '''
+
+    def handle(self):
+
+        logger.debug("client connected")
+
+        response_queue:queue.Queue[tuple[object, Future]|None] = queue.Queue()
+
+        writer_thread = threading.Thread(
+            target=self._write_responses, args=(response_queue,), name="biscutbox-server-writer", daemon=True)
+        writer_thread.start()
+
+        try:
+            for iter_line in self.rfile:
+
+                if not iter_line.strip():
+                    continue
+
+                try:
+                    request = json.loads(iter_line)
+                    request_id = request.get("id")
+                    future = self.server.cookie_jar_server.submit(request)
+
+                except Exception as e:
+                    request_id = None
+                    future = Future()
+                    future.set_exception(CookieJarServerError(f"invalid request: {e}"))
+
+                response_queue.put((request_id, future))
+
+        finally:
+            response_queue.put(None)
+            writer_thread.join()
+
+            logger.debug("client disconnected")
+
+    def _write_responses(self, response_queue:queue.Queue):
+        '''
+        write the response for each request, in the order that they were received
+
+        :param response_queue: a queue of (request id, Future) tuples, ending with None
+        '''
+
+        client_connected = True
+
+        while (iter_item := response_queue.get()) is not None:
+
+            request_id, future = iter_item
+
+            try:
+                response = {"id": request_id, "result": future.result()}
+            except Exception as e:
+                response = {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+
+            if not client_connected:
+                continue
+
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            except OSError:
+                logger.debug("client went away before reading its response")
+                client_connected = False
+
+
+class _UnixStreamServer(socketserver.ThreadingUnixStreamServer):
+    '''
+    a ThreadingUnixStreamServer that knows about the CookieJarServer it is serving
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, socket_path:str, cookie_jar_server:"CookieJarServer"):
+
+        self.cookie_jar_server = cookie_jar_server
+        super().__init__(socket_path, _CookieJarServerHandler)
+
+
+class CookieJarServer:
+    '''
+    owns a SqliteCookieJar and serves it to CookieJarClients over a Unix domain socket, see the module docstring
+    '''
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self ,type, value, traceback):
+
+        self.stop()
+
+    def __init__(
+        self,
+        socket_path:PathLike,
+        database_path:PathLike,
+        cache_size:int=SERVER_CACHE_SIZE,
+        max_batch_size:int=SERVER_MAX_BATCH_SIZE,
+        **sqlite_cookie_jar_kwargs):
+        '''
+        constructor
+
+        :param socket_path: where to create the Unix domain socket, a stale socket left there by a server that
+        didn't shut down cleanly is removed
+        :param database_path: the database for the server's SqliteCookieJar
+        :param cache_size: how many registrable domains to keep in the cookie cache, 0 turns the cache off
+        :param max_batch_size: the maximum number of requests the worker thread takes off the queue at once
+        :param sqlite_cookie_jar_kwargs: any other keyword arguments are passed to the SqliteCookieJar, the
+        policy is always AcceptAllCookiePolicy as the clients apply their own
+        '''
+
+        self.socket_path:pathlib.Path = pathlib.Path(socket_path)
+        self.cache_size:int = cache_size
+        self.max_batch_size:int = max_batch_size
+
+        self.cookie_jar:SqliteCookieJar = SqliteCookieJar(
+            database_path=database_path,
+            policy=AcceptAllCookiePolicy(),
+            **sqlite_cookie_jar_kwargs)
+
+        # jar_id -> the partition handle, or the cookie jar itself for its own jar_id
+        self._partitions:dict[str, SqliteCookieJar] = {self.cookie_jar.jar_id: self.cookie_jar}
+
+        # (jar_id, registrable domain) -> list of cookie dicts, only used by the worker thread
+        self._cache:collections.OrderedDict[tuple[str, str], list[dict]] = collections.OrderedDict()
+        self.cache_hits:int = 0
+        self.cache_misses:int = 0
+
+        self._work_queue:queue.Queue[tuple[dict, Future]|None] = queue.Queue()
+        # held while queueing a request, so nothing can be queued after the None that stops the worker thread
+        self._submit_lock:threading.Lock = threading.Lock()
+        self._stopping:bool = False
+        self._worker_thread:threading.Thread|None = None
+        self._unix_server:_UnixStreamServer|None = None
+        self._server_thread:threading.Thread|None = None
+
+    def start(self):
+        '''
+        connect to the database, and start serving on background threads
+        '''
+
+        self.cookie_jar.connect()
+        self._stopping = False
+
+        if self.socket_path.exists() and stat.S_ISSOCK(self.socket_path.stat().st_mode):
+            logger.warning("removing the stale socket at `%s`", self.socket_path)
+            self.socket_path.unlink()
+
+        self._unix_server = _UnixStreamServer(str(self.socket_path), self)
+
+        self._worker_thread = threading.Thread(target=self._worker, name="biscutbox-server-worker", daemon=True)
+        self._worker_thread.start()
+
+        self._server_thread = threading.Thread(
+            target=self._unix_server.serve_forever, name="biscutbox-server", daemon=True)
+        self._server_thread.start()
+
+        logger.info("serving the cookie jar at `%s` on the socket `%s`", self.cookie_jar.database_path, self.socket_path)
+
+    def stop(self):
+        '''
+        stop accepting connections, finish the requests that are already queued and close the database. Clients
+        that are still connected get an error for any request they send after this
+        '''
+
+        if self._unix_server:
+            self._unix_server.shutdown()
+            self._unix_server.server_close()
+            self._server_thread.join()
+            self._unix_server = None
+            self._server_thread = None
+
+            self.socket_path.unlink(missing_ok=True)
+
+        with self._submit_lock:
+            self._stopping = True
+
+        if self._worker_thread:
+            self._work_queue.put(None)
+            self._worker_thread.join()
+            self._worker_thread = None
+
+        # nothing should be left, but a Future that is never resolved would hang its connection forever
+        while True:
+            try:
+                iter_item = self._work_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if iter_item is not None:
+                self._reject_request(iter_item[1])
+
+        self.cookie_jar.close()
+
+        logger.info("stopped serving on the socket `%s`", self.socket_path)
+
+    def submit(self, request:dict) -> Future:
+        '''
+        queue a request for the worker thread
+
+        :param request: the decoded request
+        :return: a Future for the request's result
+        '''
+
+        future = Future()
+
+        with self._submit_lock:
+            if self._stopping:
+                self._reject_request(future)
+            else:
+                self._work_queue.put((request, future))
+
+        return future
+
+    def _reject_request(self, future:Future):
+        '''
+        fail a request because the server is stopping
+
+        :param future: the Future for the request
+        '''
+
+        future.set_exception(CookieJarServerError("the cookie jar server is shutting down"))
+
+    def _worker(self):
+        '''
+        the worker thread's main loop, takes batches of requests off the queue until it gets None
+        '''
+
+        running = True
+
+        while running:
+
+            batch = [self._work_queue.get()]
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._work_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+
+                for iter_item in batch[batch.index(None) + 1:]:
+                    if iter_item is not None:
+                        self._reject_request(iter_item[1])
+
+                batch = batch[:batch.index(None)]
+
+            self._process_batch(batch)
+
+    def _process_batch(self, batch:list[tuple[dict, Future]]):
+        '''
+        run a batch of requests in order, merging each run of consecutive `set_cookies` requests for the
+        same partition into a single `set_cookies` call. The cookies of each request are parsed first, so a request
+        with an invalid cookie fails on its own rather than failing every request it would have been merged with
+
+        :param batch: a list of (request, Future) tuples
+        '''
+
+        logger.debug("processing a batch of `%s` requests", len(batch))
+
+        index = 0
+        while index < len(batch):
+
+            request, future = batch[index]
+
+            if request.get("op") != "set_cookies":
+                self._run_request(future, self._handle_request, request)
+                index += 1
+                continue
+
+            jar_id = request.get("jar_id", self.cookie_jar.jar_id)
+
+            end_index = index + 1
+            while (end_index < len(batch)
+                and batch[end_index][0].get("op") == "set_cookies"
+                and batch[end_index][0].get("jar_id", self.cookie_jar.jar_id) == jar_id):
+
+                end_index += 1
+
+            merged_request = {"op": "set_cookies", "jar_id": jar_id, "cookies": list()}
+            merged_future_list = list()
+
+            for iter_request, iter_future in batch[index:end_index]:
+                try:
+                    merged_request["cookies"].extend(cookie_from_dict(x) for x in iter_request["cookies"])
+                    merged_future_list.append(iter_future)
+                except Exception as e:
+                    logger.debug("set_cookies request `%s` has an invalid cookie: `%s`", iter_request.get("id"), e)
+                    iter_future.set_exception(CookieJarServerError(f"invalid cookie: {e!r}"))
+
+            index = end_index
+
+            if not merged_future_list:
+                continue
+
+            logger.debug("merged `%s` set_cookies requests into one with `%s` cookies",
+                len(merged_future_list), len(merged_request["cookies"]))
+
+            merged_future = Future()
+            self._run_request(merged_future, self._handle_set_cookies, merged_request)
+
+            for iter_future in merged_future_list:
+                if merged_future.exception() is not None:
+                    iter_future.set_exception(merged_future.exception())
+                else:
+                    iter_future.set_result(None)
+
+    def _run_request(self, future:Future, func, request:dict):
+        '''
+        run a request, setting its result or exception on the Future
+
+        :param future: the Future for the request
+        :param func: the function that handles the request
+        :param request: the decoded request
+        '''
+
+        try:
+            future.set_result(func(request))
+        except Exception as e:
+            logger.exception("request `%s` failed", request.get("op"))
+            future.set_exception(e)
+
+    def _get_partition(self, jar_id:str) -> SqliteCookieJar:
+        '''
+        :param jar_id: the partition
+        :return: the cookie jar handle for the partition
+        '''
+
+        if jar_id not in self._partitions:
+            self._partitions[jar_id] = self.cookie_jar.partition(jar_id)
+
+        return self._partitions[jar_id]
+
+    def _invalidate_cache(self, jar_id:str, base_domain:str|None=None):
+        '''
+        remove cached cookies for a partition
+
+        :param jar_id: the partition
+        :param base_domain: the registrable domain to remove, or None for every registrable domain
+        '''
+
+        if base_domain is not None:
+            self._cache.pop((jar_id, base_domain), None)
+            return
+
+        for iter_key in [x for x in self._cache if x[0] == jar_id]:
+            del self._cache[iter_key]
+
+    def _invalidate_expired_cache(self, jar_id:str, now:int):
+        '''
+        remove the cached cookies for the registrable domains of a partition that have an expired cookie, the rest
+        weren't changed by deleting the expired cookies
+
+        :param jar_id: the partition
+        :param now: the unix timestamp that cookies expiring at or before have been deleted
+        '''
+
+        for iter_key in [k for k, v in self._cache.items()
+            if k[0] == jar_id and any(x["expires"] is not None and x["expires"] <= now for x in v)]:
+
+            del self._cache[iter_key]
+
+    def _handle_request(self, request:dict):
+        '''
+        run a single request against the cookie jar
+
+        :param request: the decoded request
+        :return: the result to send back, this must be JSON serializable
+        '''
+
+        op = request.get("op")
+        jar_id = request.get("jar_id", self.cookie_jar.jar_id)
+        cookie_jar = self._get_partition(jar_id)
+
+        if op == "cookies_for_request":
+            return self._cookies_for_host(cookie_jar, request["host"])
+
+        elif op == "set_cookies":
+            return self._handle_set_cookies(request | {"cookies": [cookie_from_dict(x) for x in request["cookies"]]})
+
+        elif op == "clear":
+            domain = request.get("domain")
+            cookie_jar.clear(domain=domain, path=request.get("path"), name=request.get("name"))
+            self._invalidate_cache(jar_id, None if domain is None else cookie_jar._get_base_domain(domain))
+            return None
+
+        elif op == "clear_session_cookies":
+            cookie_jar.clear_session_cookies()
+            self._invalidate_cache(jar_id)
+            return None
+
+        elif op == "clear_expired_cookies":
+            cookie_jar.clear_expired_cookies()
+            self._invalidate_expired_cache(jar_id, int(time.time()))
+            return None
+
+        elif op == "len":
+            return len(cookie_jar)
+
+        elif op == "list_cookies":
+            return [cookie_to_dict(x) for x in cookie_jar]
+
+        raise CookieJarServerError(f"unknown op `{op}`")
+
+    def _handle_set_cookies(self, request:dict):
+        '''
+        run a `set_cookies` request whose cookies have already been parsed
+
+        :param request: the request, with a list of Cookie objects as its `cookies`
+        :return: None
+        '''
+
+        jar_id = request.get("jar_id", self.cookie_jar.jar_id)
+        cookie_jar = self._get_partition(jar_id)
+
+        cookie_jar.set_cookies(request["cookies"])
+
+        for iter_base_domain in {cookie_jar._get_base_domain(x.domain) for x in request["cookies"]}:
+            self._invalidate_cache(jar_id, iter_base_domain)
+
+        # evictions can remove cookies from any registrable domain
+        if cookie_jar.max_cookies is not None:
+            self._invalidate_cache(jar_id)
+
+        return None
+
+    def _cookies_for_host(self, cookie_jar:SqliteCookieJar, host:str) -> list[dict]:
+        '''
+        get every cookie under the registrable domain of a request's host, from the cache if possible
+
+        :param cookie_jar: the cookie jar handle for the partition
+        :param host: the request's host, from `http.cookiejar.request_host`
+        :return: a list of cookie dicts
+        '''
+
+        private_suffix = cookie_jar._public_suffix_list.privatesuffix(host)
+
+        if not private_suffix or cookie_jar._public_suffix_list.is_public(private_suffix):
+            return list()
+
+        cache_key = (cookie_jar.jar_id, private_suffix)
+
+        if cache_key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+
+        self.cache_misses += 1
+
+        # every host under the registrable domain shares this cache entry, so it has to have the cookies for
+        # all of them, not just the ones that `_cookies_for_request` would return for this host
+        result = [cookie_to_dict(x) for x in cookie_jar._cookies_for_base_domain(private_suffix)]
+
+        if self.cache_size > 0:
+            self._cache[cache_key] = result
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return result
+
+
+def main():
+    '''
+    run a CookieJarServer until interrupted
+    '''
+
+    parser = argparse.ArgumentParser(description="serve a biscutbox cookie jar over a Unix domain socket")
+    parser.add_argument("--database-path", required=True, help="the SQLite database to serve")
+    parser.add_argument("--socket-path", required=True, help="where to create the Unix domain socket")
+    parser.add_argument("--cache-size", type=int, default=SERVER_CACHE_SIZE,
+        help="how many registrable domains to cache, 0 turns the cache off")
+    parser.add_argument("--expiry-sweeper", action="store_true", help="delete expired cookies in the background")
+    parser.add_argument("--verbose", action="store_true", help="turn on debug logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level="DEBUG" if args.verbose else "INFO")
+
+    server = CookieJarServer(
+        socket_path=args.socket_path,
+        database_path=args.database_path,
+        cache_size=args.cache_size,
+        expiry_sweeper=args.expiry_sweeper)
+
+    with server:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            logger.info("interrupted, shutting down")
+
+
+if __name__ == "__main__":
+    main()
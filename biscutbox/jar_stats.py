@@ -0,0 +1,84 @@
+'''
+a command line tool that prints the statistics from `SqliteCookieJar.stats()` for a cookie jar database
+
+run it with `python -m biscutbox.jar_stats --database-path cookies.sqlite3`, add `--json` for machine readable output
+'''
+
+import argparse
+import json
+import logging
+import pathlib
+
+from biscutbox import sql_statements
+from biscutbox.results import JarStats
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+
+logger = logging.getLogger(__name__)
+
+
+def format_jar_stats(jar_stats:JarStats) -> str:
+    '''
+    format the stats of a cookie jar for people to read
+
+    :param jar_stats: the stats to format
+    :return: the formatted stats, over several lines
+    '''
+
+    line_list = [
+        f"cookies: {jar_stats.total_cookies} ({jar_stats.session_cookies} session, {jar_stats.persistent_cookies} persistent)",
+        f"expired cookies: {jar_stats.expired_cookies}",
+        f"cookies without an expiry: {jar_stats.no_expiry_cookies}",
+        f"registrable domains: {jar_stats.total_domains}",
+        f"value bytes: {jar_stats.value_bytes_total} total, {jar_stats.value_bytes_max} max, {jar_stats.value_bytes_average:.1f} average",
+        f"database: {jar_stats.page_count} pages of {jar_stats.page_size} bytes, {jar_stats.freelist_count} free",
+        "",
+        "top domains:",
+    ]
+
+    line_list.extend(f"    {x.count:>10}  {x.base_domain}" for x in jar_stats.top_domains)
+
+    line_list.append("")
+    line_list.append("expiry:")
+    line_list.extend(f"    {x.count:>10}  {x.label}" for x in jar_stats.expiry_histogram)
+
+    if jar_stats.storage is not None:
+        line_list.append("")
+        line_list.append("storage:")
+        line_list.extend(
+            f"    {x.pages:>10} pages  {x.payload_bytes:>12} payload bytes  {x.unused_bytes:>12} unused bytes  {x.name}"
+            for x in jar_stats.storage)
+
+    return "\n".join(line_list)
+
+
+def main():
+    '''
+    print the stats of a cookie jar database, it is opened read only so this never creates, upgrades or
+    changes it
+    '''
+
+    parser = argparse.ArgumentParser(description="print statistics about a biscutbox cookie jar")
+    parser.add_argument("--database-path", required=True, type=pathlib.Path, help="the SQLite database to read")
+    parser.add_argument("--jar-id", default=sql_statements.DEFAULT_JAR_ID, help="the partition to get the stats of")
+    parser.add_argument("--top", type=int, default=sql_statements.STATS_TOP_DOMAINS,
+        help="how many of the registrable domains with the most cookies to print")
+    parser.add_argument("--json", action="store_true", help="print the stats as JSON")
+    parser.add_argument("--verbose", action="store_true", help="turn on debug logging")
+    args = parser.parse_args()
+
+    if not args.database_path.is_file():
+        parser.error(f"the database `{args.database_path}` doesn't exist")
+
+    logging.basicConfig(level="DEBUG" if args.verbose else "INFO")
+
+    with SqliteCookieJar(database_path=args.database_path, jar_id=args.jar_id, read_only=True) as cookie_jar:
+        jar_stats = cookie_jar.stats(top_domains=args.top)
+
+    if args.json:
+        print(json.dumps(jar_stats.to_dict(), indent=4))
+    else:
+        print(format_jar_stats(jar_stats))
+
+
+if __name__ == "__main__":
+    main()
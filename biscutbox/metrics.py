@@ -0,0 +1,179 @@
+'''
+timing and counters for the operations of a SqliteCookieJar
+
+pass a callable as `SqliteCookieJar(metrics_callback=...)` and it is called with an `OperationMetrics` after every
+`_cookies_for_request` / `_cookies_for_domain`, `set_cookies`, `clear*`, `__iter__` and `__len__`. The callback
+runs on the thread that did the operation, after the database lock is released, so it should be quick.
+
+`MetricsCollector` is a callback that adds these up into latency histograms and counters per operation, which can be
+read with `snapshot()` or written out in the Prometheus text format with `format_prometheus()`
+'''
+
+import dataclasses
+import threading
+import typing
+
+from biscutbox import sql_statements
+
+
+@dataclasses.dataclass
+class OperationMetrics:
+    '''
+    what happened during a single operation on a SqliteCookieJar
+    '''
+
+    # the name of the method, like `set_cookies`
+    operation:str
+
+    # the partition the operation ran against
+    jar_id:str
+
+    # how long the operation took, including waiting for the lock
+    duration_seconds:float = 0.0
+
+    # how many rows were read from the cookie table
+    rows_fetched:int = 0
+
+    # how many cookies were returned to the caller, for lookups this is after the cookie policy is applied
+    cookies_returned:int = 0
+
+    # how many transactions were started, and how many of them were committed rather than rolled back
+    transactions:int = 0
+    commits:int = 0
+
+    # whether the operation raised an exception
+    error:bool = False
+
+
+'''
+the type of the `metrics_callback` argument of SqliteCookieJar
+'''
+MetricsCallback = typing.Callable[[OperationMetrics], None]
+
+
+@dataclasses.dataclass
+class OperationSummary:
+    '''
+    the totals that `MetricsCollector` keeps for a single operation
+    '''
+
+    # how many times the operation ran, and how many of those raised an exception
+    count:int = 0
+    errors:int = 0
+
+    # the total time spent in the operation
+    duration_seconds_total:float = 0.0
+
+    # the number of runs that took at most each of `latency_buckets` seconds, the last entry is every run
+    latency_bucket_counts:list[int] = dataclasses.field(default_factory=list)
+
+    rows_fetched:int = 0
+    cookies_returned:int = 0
+    transactions:int = 0
+    commits:int = 0
+
+
+class MetricsCollector:
+    '''
+    a metrics callback that keeps latency histograms and counters for every operation, it is safe to share
+    between several cookie jars and threads
+    '''
+
+    def __init__(self, latency_buckets:typing.Sequence[float]=sql_statements.METRICS_LATENCY_BUCKETS):
+        '''
+        constructor
+
+        :param latency_buckets: the upper bounds of the latency histogram buckets in seconds, in increasing order
+        '''
+
+        self.latency_buckets:list[float] = list(latency_buckets)
+        self._summaries:dict[str, OperationSummary] = dict()
+        self._lock = threading.Lock()
+
+    def __call__(self, operation_metrics:OperationMetrics):
+        '''
+        add an operation to the totals
+
+        :param operation_metrics: the metrics of the operation
+        '''
+
+        with self._lock:
+
+            summary = self._summaries.get(operation_metrics.operation)
+
+            if summary is None:
+                summary = OperationSummary(latency_bucket_counts=[0] * (len(self.latency_buckets) + 1))
+                self._summaries[operation_metrics.operation] = summary
+
+            summary.count += 1
+            summary.errors += int(operation_metrics.error)
+            summary.duration_seconds_total += operation_metrics.duration_seconds
+            summary.rows_fetched += operation_metrics.rows_fetched
+            summary.cookies_returned += operation_metrics.cookies_returned
+            summary.transactions += operation_metrics.transactions
+            summary.commits += operation_metrics.commits
+
+            # the buckets are cumulative, like a Prometheus histogram
+            for i, iter_bound in enumerate(self.latency_buckets):
+                if operation_metrics.duration_seconds <= iter_bound:
+                    summary.latency_bucket_counts[i] += 1
+
+            summary.latency_bucket_counts[-1] += 1
+
+    def snapshot(self) -> dict[str, OperationSummary]:
+        '''
+        :return: a copy of the totals so far, keyed by the name of the operation
+        '''
+
+        with self._lock:
+            return {k: dataclasses.replace(v, latency_bucket_counts=list(v.latency_bucket_counts))
+                for k, v in self._summaries.items()}
+
+    def reset(self):
+        '''
+        throw away the totals so far
+        '''
+
+        with self._lock:
+            self._summaries.clear()
+
+    def format_prometheus(self, prefix:str="biscutbox") -> str:
+        '''
+        write out the totals so far in the Prometheus text exposition format,
+        see https://prometheus.io/docs/instrumenting/exposition_formats/
+
+        :param prefix: what to start the name of every metric with
+        :return: the metrics, one sample per line
+        '''
+
+        summaries = self.snapshot()
+
+        line_list = [
+            f"# HELP {prefix}_operation_duration_seconds how long each cookie jar operation took",
+            f"# TYPE {prefix}_operation_duration_seconds histogram",
+        ]
+
+        for iter_operation, iter_summary in summaries.items():
+
+            for iter_bound, iter_count in zip(self.latency_buckets, iter_summary.latency_bucket_counts):
+                line_list.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{iter_operation}",le="{iter_bound}"}} {iter_count}')
+
+            line_list.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{iter_operation}",le="+Inf"}} {iter_summary.count}')
+            line_list.append(f'{prefix}_operation_duration_seconds_sum{{operation="{iter_operation}"}} {iter_summary.duration_seconds_total}')
+            line_list.append(f'{prefix}_operation_duration_seconds_count{{operation="{iter_operation}"}} {iter_summary.count}')
+
+        for iter_field, iter_help in [
+            ("errors", "how many cookie jar operations raised an exception"),
+            ("rows_fetched", "how many rows were read from the cookie table"),
+            ("cookies_returned", "how many cookies were returned, after the cookie policy"),
+            ("transactions", "how many transactions were started"),
+            ("commits", "how many transactions were committed"),
+        ]:
+
+            line_list.append(f"# HELP {prefix}_{iter_field}_total {iter_help}")
+            line_list.append(f"# TYPE {prefix}_{iter_field}_total counter")
+
+            for iter_operation, iter_summary in summaries.items():
+                line_list.append(f'{prefix}_{iter_field}_total{{operation="{iter_operation}"}} {getattr(iter_summary, iter_field)}')
+
+        return "\n".join(line_list) + "\n"
@@ -0,0 +1,202 @@
+'''
+checking many cookies against a `http.cookiejar.DefaultCookiePolicy` for a single request
+
+the policy's `domain_return_ok`, `path_return_ok` and `return_ok` are called once per cookie, and each call parses
+the request again (`request_host`, `request_path`, `request_port`, `is_third_party`). `DefaultPolicyEvaluator` does
+the same checks, but parses the request once and remembers the result for each domain and path it has seen, so a
+lookup that returns lots of cookies for the same few domains and paths does very little work per cookie.
+
+this is only exact for the methods of DefaultCookiePolicy itself, see `DefaultPolicyEvaluator.for_policy`
+'''
+
+from http.cookiejar import Cookie, CookiePolicy, DefaultCookiePolicy, \
+    domain_match, eff_request_host, is_third_party, request_path, request_port, user_domain_match
+import time
+import typing
+import urllib.request
+
+from biscutbox import sql_statements
+
+'''
+every method of DefaultCookiePolicy that `DefaultPolicyEvaluator` does the work of, if a subclass overrides any
+of these then the policy has to be called for each cookie instead
+'''
+DEFAULT_POLICY_EVALUATOR_CHECKS:tuple[str, ...] = \
+    sql_statements.DEFAULT_POLICY_DOMAIN_CHECKS \
+    + sql_statements.DEFAULT_POLICY_SQL_CHECKS \
+    + tuple(f"return_ok_{x}" for x in sql_statements.DEFAULT_POLICY_PYTHON_CHECKS)
+
+
+class DefaultPolicyEvaluator:
+    '''
+    does the checks of `DefaultCookiePolicy.domain_return_ok`, `path_return_ok` and `return_ok` for one request
+    '''
+
+    @classmethod
+    def for_policy(cls, policy:CookiePolicy, request:urllib.request.Request) -> typing.Self|None:
+        '''
+        get an evaluator for a policy and request, if the policy is a DefaultCookiePolicy that doesn't override
+        any of `DEFAULT_POLICY_EVALUATOR_CHECKS`
+
+        :param policy: the cookie policy
+        :param request: the request being made
+        :return: the evaluator, or None if the policy has to be called for each cookie
+        '''
+
+        if not isinstance(policy, DefaultCookiePolicy):
+            return None
+
+        policy_class = type(policy)
+
+        if any(getattr(policy_class, x) is not getattr(DefaultCookiePolicy, x) for x in DEFAULT_POLICY_EVALUATOR_CHECKS):
+            return None
+
+        return cls(policy, request)
+
+    def __init__(self, policy:DefaultCookiePolicy, request:urllib.request.Request):
+        '''
+        constructor, this reads everything the checks need from the request and policy up front, so the policy's
+        settings (and its `_now`) shouldn't be changed while the evaluator is in use
+
+        :param policy: the cookie policy
+        :param request: the request being made
+        '''
+
+        self.policy:DefaultCookiePolicy = policy
+
+        self.request_host, self.effective_request_host = eff_request_host(request)
+        self.request_path:str = request_path(request)
+        self.request_port:str = request_port(request) or "80"
+        self.request_is_secure:bool = request.type in policy.secure_protocols
+        self.request_is_unverifiable_third_party:bool = bool(request.unverifiable and is_third_party(request))
+
+        # like `Cookie.is_expired`, the current time is used if the cookiejar hasn't set `_now` on the policy yet
+        policy_now = getattr(policy, "_now", None)
+        self.now:float = policy_now if policy_now is not None else time.time()
+        self.strict_non_domain:bool = bool(policy.strict_ns_domain & DefaultCookiePolicy.DomainStrictNonDomain)
+
+        self._dotted_request_host:str = self.request_host if self.request_host.startswith(".") else f".{self.request_host}"
+        self._dotted_effective_request_host:str = self.effective_request_host \
+            if self.effective_request_host.startswith(".") else f".{self.effective_request_host}"
+
+        self._domain_results:dict[str, bool] = dict()
+        self._path_results:dict[str, bool] = dict()
+
+    def domain_return_ok(self, domain:str) -> bool:
+        '''
+        the same as `DefaultCookiePolicy.domain_return_ok`
+
+        :param domain: the cookie's domain
+        :return: whether cookies for this domain can be returned for the request
+        '''
+
+        result = self._domain_results.get(domain)
+
+        if result is None:
+
+            dotted_domain = f".{domain}" if domain and not domain.startswith(".") else domain
+
+            result = (self._dotted_request_host.endswith(dotted_domain)
+                or self._dotted_effective_request_host.endswith(dotted_domain)) \
+                and not any(user_domain_match(domain, x) for x in self.policy._blocked_domains) \
+                and (self.policy._allowed_domains is None
+                    or any(user_domain_match(domain, x) for x in self.policy._allowed_domains))
+
+            self._domain_results[domain] = result
+
+        return result
+
+    def path_return_ok(self, path:str) -> bool:
+        '''
+        the same as `DefaultCookiePolicy.path_return_ok`
+
+        :param path: the cookie's path
+        :return: whether cookies for this path can be returned for the request
+        '''
+
+        result = self._path_results.get(path)
+
+        if result is None:
+
+            result = self.request_path == path or (self.request_path.startswith(path)
+                and (path.endswith("/") or self.request_path[len(path):len(path) + 1] == "/"))
+
+            self._path_results[path] = result
+
+        return result
+
+    def return_ok(self, cookie:Cookie, default_policy_filtered:bool=False) -> bool:
+        '''
+        the same as `DefaultCookiePolicy.return_ok`
+
+        :param cookie: the cookie to check
+        :param default_policy_filtered: whether the cookie was read with `sql_statements.DEFAULT_POLICY_FILTER`,
+        so the secure and expiry checks can be skipped
+        :return: whether the cookie can be returned for the request
+        '''
+
+        policy = self.policy
+
+        # version
+        if cookie.version > 0 and not policy.rfc2965:
+            return False
+        elif cookie.version == 0 and not policy.netscape:
+            return False
+
+        # verifiability
+        if self.request_is_unverifiable_third_party:
+            if cookie.version > 0 and policy.strict_rfc2965_unverifiable:
+                return False
+            elif cookie.version == 0 and policy.strict_ns_unverifiable:
+                return False
+
+        if not default_policy_filtered:
+
+            # secure
+            if cookie.secure and not self.request_is_secure:
+                return False
+
+            # expires
+            if cookie.expires is not None and cookie.expires <= self.now:
+                return False
+
+        # port
+        if cookie.port and self.request_port not in cookie.port.split(","):
+            return False
+
+        # domain
+        domain = cookie.domain
+        dotted_domain = f".{domain}" if domain and not domain.startswith(".") else domain
+
+        if (cookie.version == 0 and self.strict_non_domain
+            and not cookie.domain_specified and domain != self.effective_request_host):
+            return False
+
+        if cookie.version > 0 and not domain_match(self.effective_request_host, domain):
+            return False
+
+        if cookie.version == 0 and not self._dotted_effective_request_host.endswith(dotted_domain):
+            return False
+
+        return True
+
+    def check_cookies(
+        self,
+        cookie_list:typing.Sequence[Cookie],
+        check_domain:bool=True,
+        default_policy_filtered:bool=False) -> list[bool]:
+        '''
+        check a list of cookies in one pass
+
+        :param cookie_list: the cookies to check
+        :param check_domain: whether to do the `domain_return_ok` check, `_cookies_for_domain` does it once for the
+        whole domain beforehand
+        :param default_policy_filtered: whether the cookies were read with `sql_statements.DEFAULT_POLICY_FILTER`,
+        so the path, secure and expiry checks can be skipped
+        :return: whether each cookie can be returned for the request, in the same order as `cookie_list`
+        '''
+
+        return [(not check_domain or self.domain_return_ok(x.domain))
+            and (default_policy_filtered or self.path_return_ok(x.path))
+            and self.return_ok(x, default_policy_filtered)
+            for x in cookie_list]
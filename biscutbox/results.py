@@ -0,0 +1,208 @@
+'''
+simple classes that hold the results of the larger SqliteCookieJar operations
+'''
+
+from http.cookiejar import Cookie
+from os import PathLike
+import dataclasses
+
+
+@dataclasses.dataclass
+class SnapshotResult:
+    '''
+    the result of `SqliteCookieJar.snapshot`
+    '''
+
+    # where the snapshot was written
+    destination_path:PathLike
+
+    # the total number of pages in the database that was copied
+    total_pages:int
+
+    # how many steps the copy took, each step copies up to `pages_per_step` pages
+    steps:int
+
+    # how long the entire snapshot took, including the sleeps between steps
+    duration_seconds:float
+
+
+@dataclasses.dataclass
+class EvictionResult:
+    '''
+    how many cookies `SqliteCookieJar.set_cookies` evicted to stay under the capacity limits
+    '''
+
+    # expired cookies that were evicted, these are always evicted before any other cookie
+    expired_evicted:int = 0
+
+    # cookies that were evicted because their registrable domain had too many cookies
+    domain_limit_evicted:int = 0
+
+    # cookies that were evicted because the whole jar had too many cookies
+    global_limit_evicted:int = 0
+
+    @property
+    def total(self) -> int:
+        '''
+        :return: the total number of cookies that were evicted
+        '''
+
+        return self.expired_evicted + self.domain_limit_evicted + self.global_limit_evicted
+
+
+@dataclasses.dataclass
+class DomainCount:
+    '''
+    the number of cookies under a single registrable domain
+    '''
+
+    base_domain:str
+
+    count:int
+
+
+@dataclasses.dataclass
+class ExpiryHistogramBucket:
+    '''
+    the number of cookies that expire within a range of time from now
+    '''
+
+    # a description of the range, like `within 1 day`
+    label:str
+
+    # the end of the range in seconds from now, None for the bucket of cookies that expire after every other bucket
+    upper_bound_seconds:int|None
+
+    count:int
+
+
+@dataclasses.dataclass
+class StorageStats:
+    '''
+    how much of the database file a single table or index uses, from the `dbstat` virtual table
+    '''
+
+    # the name of the table or index
+    name:str
+
+    pages:int
+
+    # bytes of the pages that hold data, and bytes that are unused
+    payload_bytes:int
+    unused_bytes:int
+
+
+@dataclasses.dataclass
+class JarStats:
+    '''
+    the result of `SqliteCookieJar.stats`
+    '''
+
+    # how many cookies are in the jar (the partition, for a partition handle)
+    total_cookies:int
+
+    # cookies with `discard` set, which are thrown away at the end of a session, and every other cookie
+    session_cookies:int
+    persistent_cookies:int
+
+    # cookies that have already expired but haven't been cleared yet
+    expired_cookies:int
+
+    # cookies without an expiry
+    no_expiry_cookies:int
+
+    # how many distinct registrable domains have cookies
+    total_domains:int
+
+    # the registrable domains with the most cookies, most first
+    top_domains:list[DomainCount]
+
+    # the cookies that haven't expired yet, by how soon they expire
+    expiry_histogram:list[ExpiryHistogramBucket]
+
+    # the sizes of the cookie values, in bytes of UTF-8
+    value_bytes_total:int
+    value_bytes_max:int
+    value_bytes_average:float
+
+    # the size of the whole database file, from `PRAGMA page_size`, `PRAGMA page_count` and `PRAGMA freelist_count`
+    page_size:int
+    page_count:int
+    freelist_count:int
+
+    # the pages used by each table and index, None if sqlite wasn't built with the `dbstat` virtual table
+    storage:list[StorageStats]|None
+
+    def to_dict(self) -> dict:
+        '''
+        :return: these stats as a dict that can be written out as JSON
+        '''
+
+        return dataclasses.asdict(self)
+
+
+@dataclasses.dataclass
+class ChangeSet:
+    '''
+    the changes to a partition of a SqliteCookieJar after a point in its change log, see
+    `SqliteCookieJar.changes_since`. A key that changed several times is only included once, with its current cookies
+    '''
+
+    # the partition the changes are from
+    jar_id:str
+
+    # the changes are the ones after this `seq`
+    since_seq:int
+
+    # the last `seq` in the change log when the changes were read, pass this as `since_seq` next time
+    last_seq:int
+
+    # the (domain, path, name) of every cookie that changed
+    changed_keys:list[tuple[str, str, str]]
+
+    # the current cookies for those keys, a key that isn't here was deleted
+    cookies:list[Cookie]
+
+
+@dataclasses.dataclass
+class SyncResult:
+    '''
+    the result of `SqliteCookieJar.sync_from`
+    '''
+
+    # the last `seq` of the source's change log that is now applied, pass this as `since_seq` next time
+    last_seq:int
+
+    # how many cookie keys changed in the source
+    changed_keys:int
+
+    # how many cookies were deleted, which includes the old versions of cookies that were then inserted again
+    cookies_deleted:int
+
+    # how many cookies were inserted
+    cookies_inserted:int
+
+    # cookies evicted afterwards to stay under the capacity limits
+    eviction:EvictionResult
+
+
+@dataclasses.dataclass
+class MergeResult:
+    '''
+    the result of `SqliteCookieJar.merge_from`
+    '''
+
+    # how many cookies were in the source, counting each (domain, path, name) once
+    source_cookies:int = 0
+
+    # how many source cookies had a key that wasn't in the target, and were inserted
+    inserted:int = 0
+
+    # how many source cookies had a key that was in the target, and replaced the target's cookie
+    replaced:int = 0
+
+    # how many source cookies had a key that was in the target, and were skipped because the target's cookie won
+    kept:int = 0
+
+    # cookies evicted afterwards to stay under the capacity limits
+    eviction:EvictionResult = dataclasses.field(default_factory=EvictionResult)
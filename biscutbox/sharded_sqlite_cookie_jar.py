@@ -0,0 +1,342 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar, CookiePolicy, Cookie, request_host
+from os import PathLike
+import logging
+import pathlib
+import time
+import typing
+import urllib.request
+import zlib
+
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar, get_public_suffix_list
+from biscutbox.results import EvictionResult
+
+logger = logging.getLogger(__name__)
+
+'''
+the file name of each shard's database inside of the shard directory, formatted with the shard's index
+'''
+SHARD_DATABASE_FILENAME_TEMPLATE:str = "cookies_shard_{:04d}.sqlite3"
+
+T = typing.TypeVar("T")
+
+
+class ShardedSqliteCookieJar(CookieJar):
+    '''
+    a cookiejar that spreads its cookies across several SQLite databases (shards), each one
+    a SqliteCookieJar.
+
+    A single SQLite database only allows one writer at a time, so with many processes writing cookies
+    to the same jar they all end up waiting on the same write lock. Here each cookie is routed to a shard
+    by a hash of its registrable domain (the private suffix, `example.com` for `a.example.com`), so
+    writers for different sites usually don't block each other.
+
+    Every cookie that could be returned for a request shares the registrable domain of the request's host,
+    so looking up cookies for a request only touches a single shard. Operations that don't have a domain,
+    like iterating over the jar, `len()` and clearing expired or session cookies, run against every shard,
+    in parallel on a thread pool if `parallel` is true.
+
+    The number of shards decides which shard a cookie goes to, so it must stay the same for a given
+    `shard_directory`, changing it means cookies already in the jar won't be found.
+    '''
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self ,type, value, traceback):
+
+        self.close()
+
+    def __init__(
+        self,
+        shard_directory:PathLike,
+        number_of_shards:int,
+        policy:CookiePolicy|None=None,
+        parallel:bool=False,
+        max_workers:int|None=None,
+        **sqlite_cookie_jar_kwargs):
+        '''
+        constructor
+
+        :param shard_directory: the directory that holds the shard databases, it is created at `connect()`
+        if it doesn't exist
+        :param number_of_shards: how many shard databases to spread the cookies across
+        :param policy: the CookiePolicy object to use, this is shared with every shard
+        :param parallel: if true, operations that run against every shard do so on a thread pool
+        :param max_workers: only used if `parallel` is true, the maximum number of threads in the thread pool,
+        defaults to `number_of_shards`
+        :param sqlite_cookie_jar_kwargs: any other keyword arguments are passed to each shard's SqliteCookieJar,
+        for example `max_cookies_per_domain` or `expiry_sweeper`. Note that `max_cookies` is then the limit
+        for each shard, not the whole jar.
+        '''
+
+        # call superclass
+        super().__init__(policy)
+
+        if number_of_shards <= 0:
+            raise ValueError(f"number_of_shards must be positive, got `{number_of_shards}`")
+
+        self.shard_directory:pathlib.Path = pathlib.Path(shard_directory)
+        self.number_of_shards:int = number_of_shards
+
+        self.parallel:bool = parallel
+        self.max_workers:int = max_workers or number_of_shards
+        self._executor:ThreadPoolExecutor|None = None
+
+        self.shards:list[SqliteCookieJar] = [
+            SqliteCookieJar(
+                database_path=self.shard_directory / SHARD_DATABASE_FILENAME_TEMPLATE.format(i),
+                policy=self._policy,
+                **sqlite_cookie_jar_kwargs)
+            for i in range(number_of_shards)]
+
+    def connect(self):
+        '''
+        create the shard directory if needed and connect to every shard
+        '''
+
+        logger.debug("connecting to `%s` shards in the directory `%s`", self.number_of_shards, self.shard_directory)
+
+        self.shard_directory.mkdir(parents=True, exist_ok=True)
+
+        if self.parallel:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="biscutbox-shard")
+
+        self._for_each_shard(lambda x: x.connect())
+
+    def close(self):
+        ''' commit and close every shard '''
+
+        logger.debug("closing `%s` shards", self.number_of_shards)
+
+        try:
+            self._for_each_shard(lambda x: x.close())
+
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _for_each_shard(self, func:typing.Callable[[SqliteCookieJar], T]) -> list[T]:
+        '''
+        call a function with every shard, on the thread pool if `parallel` is true
+
+        :param func: the function to call, it is passed the shard
+        :return: a list of what the function returned for each shard, in shard order
+        '''
+
+        if self._executor:
+            return list(self._executor.map(func, self.shards))
+
+        return [func(x) for x in self.shards]
+
+    def _get_shard_index(self, domain:str) -> int:
+        '''
+        get the index of the shard that holds cookies for a domain. This hashes the same
+        registrable domain that SqliteCookieJar stores in the `base_domain` column, using crc32 rather
+        than `hash()` so every process agrees on it
+
+        :param domain: a cookie's domain, which may have a leading dot, or a request's host
+        :return: the index of the shard in `shards`
+        '''
+
+        stripped_domain = domain.lstrip(".").lower()
+        base_domain = get_public_suffix_list().privatesuffix(stripped_domain) or stripped_domain
+
+        return zlib.crc32(base_domain.encode("utf-8")) % self.number_of_shards
+
+    def get_shard(self, domain:str) -> SqliteCookieJar:
+        '''
+        :param domain: a cookie's domain, which may have a leading dot, or a request's host
+        :return: the shard that holds cookies for the domain
+        '''
+
+        return self.shards[self._get_shard_index(domain)]
+
+    @typing.override
+    def set_policy(self, policy:CookiePolicy):
+        '''
+        set the CookiePolicy object used by this jar and every shard
+
+        :param policy: the new CookiePolicy
+        '''
+
+        super().set_policy(policy)
+
+        for iter_shard in self.shards:
+            iter_shard.set_policy(policy)
+
+    @typing.override
+    def _cookies_for_domain(self, domain:str, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method, that returns the cookies for a given domain from the shard that holds them
+
+        :param domain: the domain to get the cookies from
+        :param request: the request being made
+        :return: a list of Cookie objects that match this domain
+        '''
+
+        return self.get_shard(domain)._cookies_for_domain(domain, request)
+
+    @typing.override
+    def _cookies_for_request(self, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method, that returns the cookies for a given request from the single
+        shard that holds the cookies for the request's host
+
+        :param request: the Request that we want the cookies for
+        :return: a list of Cookie objects
+        '''
+
+        return self.get_shard(request_host(request))._cookies_for_request(request)
+
+    @typing.override
+    def add_cookie_header(self, request:urllib.request.Request):
+        '''
+        add the Cookie header to the request. This is handed off to the shard for the request's host,
+        so the expired cookie cleanup that http.cookiejar.CookieJar does afterwards only touches that shard
+        rather than every shard
+
+        :param request: the request to add the header to
+        '''
+
+        self.get_shard(request_host(request)).add_cookie_header(request)
+
+    @typing.override
+    def extract_cookies(self, response, request:urllib.request.Request):
+        '''
+        extract the cookies from the response that the policy allows, and store them. Unlike
+        http.cookiejar.CookieJar, which calls `set_cookie` once per cookie, these are grouped by shard
+        and stored with a single `set_cookies` call for each shard
+
+        :param response: the response, see `http.cookiejar.CookieJar.extract_cookies`
+        :param request: the request that the response is for
+        '''
+
+        with self._cookies_lock:
+
+            self._policy._now = self._now = int(time.time())
+
+            cookie_list = [x for x in self.make_cookies(response, request) if self._policy.set_ok(x, request)]
+
+        self.set_cookies(cookie_list)
+
+    @typing.override
+    def set_cookie(self, cookie:Cookie):
+        """Set a cookie, without checking whether or not it should be set.
+
+        :param cookie: the Cookie object to add
+        """
+
+        self.set_cookies(cookie_list=[cookie])
+
+    def set_cookies(self, cookie_list:typing.Iterable[Cookie]) -> EvictionResult:
+        '''
+        bulk add cookies, with one `set_cookies` call (and so one transaction) for each shard that
+        any of the cookies belong to
+
+        :param cookie_list: a sequence of Cookie objects to add
+        :return: an EvictionResult with how many cookies were evicted across every shard
+        '''
+
+        shard_cookie_dict:dict[int, list[Cookie]] = dict()
+
+        for iter_cookie in cookie_list:
+            shard_cookie_dict.setdefault(self._get_shard_index(iter_cookie.domain), list()).append(iter_cookie)
+
+        eviction_result = EvictionResult()
+
+        for iter_shard_index, iter_cookie_list in shard_cookie_dict.items():
+
+            iter_eviction_result = self.shards[iter_shard_index].set_cookies(iter_cookie_list)
+
+            eviction_result.expired_evicted += iter_eviction_result.expired_evicted
+            eviction_result.domain_limit_evicted += iter_eviction_result.domain_limit_evicted
+            eviction_result.global_limit_evicted += iter_eviction_result.global_limit_evicted
+
+        return eviction_result
+
+    @typing.override
+    def clear(self, domain=None, path=None, name=None):
+        '''
+        Clear some cookies, see `SqliteCookieJar.clear`.
+
+        Clearing by domain only touches the shard for that domain, clearing everything
+        runs against every shard
+        '''
+
+        if domain is None:
+            if name is not None:
+                raise ValueError(
+                    "domain and path must be given to remove a cookie by name")
+            if path is not None:
+                raise ValueError(
+                    "domain must be given to remove cookies by path")
+
+            self._for_each_shard(lambda x: x.clear())
+            return
+
+        self.get_shard(domain).clear(domain=domain, path=path, name=name)
+
+    @typing.override
+    def clear_session_cookies(self) -> None:
+        '''
+        Discard all session cookies in every shard
+        '''
+
+        self._for_each_shard(lambda x: x.clear_session_cookies())
+
+    def clear_expired_cookies_from_time(self, expires_time:int) -> None:
+        '''
+        Discard all cookies in every shard whose `expires` value is less than `expires_time`
+
+        :param expires_time: the time to compare the cookie's `expires` time with when deciding what cookie to clear out
+        '''
+
+        self._for_each_shard(lambda x: x.clear_expired_cookies_from_time(expires_time))
+
+    @typing.override
+    def clear_expired_cookies(self) -> None:
+        '''
+        Discard all expired cookies in every shard
+        '''
+
+        self.clear_expired_cookies_from_time(expires_time=int(time.time()))
+
+    def flush_last_access(self):
+        '''
+        write out every shard's pending last access times, see `SqliteCookieJar.flush_last_access`
+        '''
+
+        self._for_each_shard(lambda x: x.flush_last_access())
+
+    def __iter__(self):
+        '''
+        __iter__ implementation, this iterates over each shard in turn
+        '''
+
+        for iter_shard in self.shards:
+            yield from iter_shard
+
+    def __len__(self):
+        '''
+        __len__ implementation, the sum of the number of cookies in every shard
+        :return: the number of contained cookies in this cookiejar
+        '''
+
+        return sum(self._for_each_shard(len))
+
+    def __repr__(self) -> str:
+        '''__repr__ implementation, like SqliteCookieJar this doesn't print every cookie
+
+        :return: the string name of this class
+        '''
+        return f"<{self.__class__.__name__} />"
+
+    def __str__(self):
+        '''__str__ implementation, like SqliteCookieJar this doesn't print every cookie
+
+        :return: the string name of this class
+        '''
+        return f"<{self.__class__.__name__} />"
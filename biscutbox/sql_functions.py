@@ -0,0 +1,84 @@
+'''
+the cookie matching rules of `http.cookiejar.DefaultCookiePolicy` as plain functions, which SqliteCookieJar
+registers as SQL functions on its connection so that queries can filter and sort by them
+
+these are deterministic, so sqlite can evaluate them once per row and use them in WHERE and ORDER BY clauses.
+They aren't used in any index or trigger, since then the database couldn't be written to by anything that
+doesn't register them (like the sqlite3 command line tool)
+see https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.create_function
+'''
+
+import sqlite3
+
+from biscutbox import sql_statements
+
+
+def domain_match(request_host:str|None, domain:str|None) -> bool:
+    '''
+    the domain check of `DefaultCookiePolicy.domain_return_ok`: whether a cookie for `domain` can be returned for a
+    request to `request_host`, which is when the host is the domain or a subdomain of it. A leading dot on the
+    domain makes no difference here, `DefaultCookiePolicy.return_ok_domain` is stricter about host only cookies.
+
+    :param request_host: the host of the request, lowercase and without a port, see `http.cookiejar.request_host`
+    :param domain: the cookie's domain
+    :return: whether the domain matches
+    '''
+
+    if request_host is None or domain is None:
+        return False
+
+    dotted_host = request_host if request_host.startswith(".") else f".{request_host}"
+    dotted_domain = domain if not domain or domain.startswith(".") else f".{domain}"
+
+    return dotted_host.endswith(dotted_domain)
+
+
+def path_match(request_path:str|None, path:str|None) -> bool:
+    '''
+    the same check as `DefaultCookiePolicy.path_return_ok`: whether a cookie for `path` can be returned for a request
+    to `request_path`, which is when the request path is the cookie's path, or starts with it and either the cookie's
+    path ends with a `/` or the next character of the request path is a `/`
+
+    :param request_path: the path of the request, see `http.cookiejar.request_path`
+    :param path: the cookie's path
+    :return: whether the path matches
+    '''
+
+    if request_path is None or path is None:
+        return False
+
+    if request_path == path:
+        return True
+
+    return request_path.startswith(path) and (path.endswith("/") or request_path[len(path):len(path) + 1] == "/")
+
+
+def reversed_domain(domain:str|None) -> str|None:
+    '''
+    a domain with its labels in reverse order, so sorting by it keeps every domain next to its parent domain,
+    like `com.example`, `com.example.a`, `com.example.b`. The leading dot of a domain cookie is dropped
+
+    none of the statements in `sql_statements` use this, since the cookies for a request are ordered by path length
+    and creation time, it is registered for queries that list or export a cookie jar's cookies grouped by site, like
+    `SELECT * FROM biscutbox_cookies_v1 ORDER BY biscutbox_reversed_domain(domain)`
+
+    :param domain: the domain to reverse
+    :return: the reversed domain
+    '''
+
+    if domain is None:
+        return None
+
+    return ".".join(reversed(domain.lstrip(".").lower().split(".")))
+
+
+def register_functions(connection:sqlite3.Connection):
+    '''
+    register every function in this module on a connection
+
+    :param connection: the connection
+    '''
+
+    connection.create_function(sql_statements.DOMAIN_MATCH_FUNCTION_NAME, 2, domain_match, deterministic=True)
+    connection.create_function(sql_statements.PATH_MATCH_FUNCTION_NAME, 2, path_match, deterministic=True)
+    connection.create_function(sql_statements.REVERSED_DOMAIN_FUNCTION_NAME, 1, reversed_domain, deterministic=True)
@@ -1,5 +1,19 @@
 TABLE_NAME_V1 = "biscutbox_cookies_v1"
 
+'''
+the special database path that tells sqlite to use a database that only exists in RAM
+see https://www.sqlite.org/inmemorydb.html
+'''
+IN_MEMORY_DATABASE_PATH:str = ":memory:"
+
+'''
+the query string added to a database's `file:` URI to open it read only, and to also tell sqlite that nothing
+else will change the file, so it doesn't lock it or look at the WAL at all
+see https://www.sqlite.org/uri.html#recognized_query_parameters
+'''
+READ_ONLY_URI_QUERY:str = "mode=ro"
+IMMUTABLE_URI_QUERY:str = "mode=ro&immutable=1"
+
 '''
 a statement to create the Cookies V1 table
 setting a basic cookie shows every value filled in except for:
@@ -12,6 +26,22 @@ comment_url
 
 everything else i set as NOT NULL
 
+`base_domain` is not part of http.cookiejar.Cookie, it is the registrable domain (the "private suffix",
+see https://publicsuffix.org) of the cookie's domain, used to group cookies by site
+
+`last_accessed` is not part of http.cookiejar.Cookie either, it is the unix timestamp of when the cookie
+was set, or last returned for a request if last access tracking is turned on. NULL if it was never set
+by biscutbox (databases created before this column existed)
+
+`creation_time` is not part of http.cookiejar.Cookie either, it is the unix timestamp of when the cookie was first
+set. Setting a cookie with the same (`jar_id`, `domain`, `path`, `name`) replaces it but keeps its `creation_time`,
+like RFC 6265 section 5.3 says, so it can be used to order the cookies in the `Cookie` header. NULL for cookies stored
+before this column existed
+see https://www.rfc-editor.org/rfc/rfc6265#section-5.3
+
+`jar_id` is the partition that the cookie belongs to, so that many logical cookie jars can share one database,
+see `SqliteCookieJar.partition()`. Cookies stored by a plain SqliteCookieJar use `DEFAULT_JAR_ID`
+
 >>> cj = http.cookiejar.CookieJar()
 >>> opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cj))
 >>> urllib.request.install_opener(opener)
@@ -42,6 +72,10 @@ CREATE TABLE IF NOT EXISTS "{TABLE_NAME_V1}"  (
     "domain_specified" INTEGER NOT NULL,
     "domain_initial_dot" INTEGER NOT NULL,
     "path_specified" INTEGER NOT NULL,
+    "base_domain" TEXT,
+    "last_accessed" INTEGER,
+    "jar_id" TEXT NOT NULL DEFAULT '',
+    "creation_time" INTEGER,
     PRIMARY KEY("id" AUTOINCREMENT)
 );
 '''
@@ -51,12 +85,257 @@ f'''
 CREATE INDEX IF NOT EXISTS
 "domain_idx" ON {TABLE_NAME_V1}
 (
+    "jar_id",
     "domain"
 );
 '''
 
+CREATE_COOKIE_TABLE_BASE_DOMAIN_INDEX_STATEMENT:str = \
+f'''
+CREATE INDEX IF NOT EXISTS
+"base_domain_idx" ON {TABLE_NAME_V1}
+(
+    "jar_id",
+    "base_domain"
+);
+'''
+
+'''
+a cookie is identified by its (`domain`, `path`, `name`) in each partition, so there is only ever one row for each,
+and setting a cookie again replaces it, see `UPSERT_COOKIE_CLAUSE`
+'''
+CREATE_COOKIE_TABLE_KEY_INDEX_STATEMENT:str = \
+f'''
+CREATE UNIQUE INDEX IF NOT EXISTS
+"cookie_key_idx" ON {TABLE_NAME_V1}
+(
+    "jar_id",
+    "domain",
+    "path",
+    "name"
+);
+'''
+
+'''
+the index on `expires` isn't partitioned by `jar_id`, as the background expiry sweeper deletes expired cookies
+from every partition at once
+'''
+CREATE_COOKIE_TABLE_EXPIRES_INDEX_STATEMENT:str = \
+f'''
+CREATE INDEX IF NOT EXISTS
+"expires_idx" ON {TABLE_NAME_V1}
+(
+    "expires"
+);
+'''
+
+'''
+the name of the table that holds the number of cookies in each `jar_id`
+'''
+JAR_COUNT_TABLE_NAME_V1 = "biscutbox_jar_counts_v1"
+
+'''
+the name of the table that holds the number of cookies for each `base_domain` in each `jar_id`
+'''
+DOMAIN_COUNT_TABLE_NAME_V1 = "biscutbox_domain_counts_v1"
+
+'''
+the statements that create the count tables, and the triggers on the cookie table that keep them up to date,
+so that `len()` and the per domain counts are a single primary key lookup rather than a COUNT() over the
+cookie table. A `base_domain` of NULL is counted under the empty string.
+
+rows are deleted once their count drops to 0, so the count tables only hold the partitions and domains
+that currently have cookies.
+
+Note that `changes()` doesn't include the rows changed by triggers, so `ROWS_MODIFIED` isn't affected by these.
+see https://www.sqlite.org/lang_createtrigger.html
+'''
+CREATE_COUNT_TABLES_AND_TRIGGERS_STATEMENTS:list[str] = \
+[
+    f'''
+    CREATE TABLE IF NOT EXISTS "{JAR_COUNT_TABLE_NAME_V1}" (
+        "jar_id" TEXT NOT NULL,
+        "count" INTEGER NOT NULL,
+        PRIMARY KEY("jar_id")
+    ) WITHOUT ROWID
+    ''',
+    f'''
+    CREATE TABLE IF NOT EXISTS "{DOMAIN_COUNT_TABLE_NAME_V1}" (
+        "jar_id" TEXT NOT NULL,
+        "base_domain" TEXT NOT NULL,
+        "count" INTEGER NOT NULL,
+        PRIMARY KEY("jar_id", "base_domain")
+    ) WITHOUT ROWID
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "cookie_count_insert_trigger" AFTER INSERT ON "{TABLE_NAME_V1}"
+    BEGIN
+        INSERT INTO "{JAR_COUNT_TABLE_NAME_V1}" (jar_id, count) VALUES (NEW.jar_id, 1)
+        ON CONFLICT (jar_id) DO UPDATE SET count = count + 1;
+
+        INSERT INTO "{DOMAIN_COUNT_TABLE_NAME_V1}" (jar_id, base_domain, count)
+        VALUES (NEW.jar_id, IFNULL(NEW.base_domain, ''), 1)
+        ON CONFLICT (jar_id, base_domain) DO UPDATE SET count = count + 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "cookie_count_delete_trigger" AFTER DELETE ON "{TABLE_NAME_V1}"
+    BEGIN
+        UPDATE "{JAR_COUNT_TABLE_NAME_V1}" SET count = count - 1 WHERE jar_id == OLD.jar_id;
+        DELETE FROM "{JAR_COUNT_TABLE_NAME_V1}" WHERE jar_id == OLD.jar_id AND count <= 0;
+
+        UPDATE "{DOMAIN_COUNT_TABLE_NAME_V1}" SET count = count - 1
+        WHERE jar_id == OLD.jar_id AND base_domain == IFNULL(OLD.base_domain, '');
+        DELETE FROM "{DOMAIN_COUNT_TABLE_NAME_V1}"
+        WHERE jar_id == OLD.jar_id AND base_domain == IFNULL(OLD.base_domain, '') AND count <= 0;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "cookie_count_update_trigger" AFTER UPDATE OF jar_id, base_domain ON "{TABLE_NAME_V1}"
+    BEGIN
+        UPDATE "{JAR_COUNT_TABLE_NAME_V1}" SET count = count - 1 WHERE jar_id == OLD.jar_id;
+        DELETE FROM "{JAR_COUNT_TABLE_NAME_V1}" WHERE jar_id == OLD.jar_id AND count <= 0;
+
+        UPDATE "{DOMAIN_COUNT_TABLE_NAME_V1}" SET count = count - 1
+        WHERE jar_id == OLD.jar_id AND base_domain == IFNULL(OLD.base_domain, '');
+        DELETE FROM "{DOMAIN_COUNT_TABLE_NAME_V1}"
+        WHERE jar_id == OLD.jar_id AND base_domain == IFNULL(OLD.base_domain, '') AND count <= 0;
+
+        INSERT INTO "{JAR_COUNT_TABLE_NAME_V1}" (jar_id, count) VALUES (NEW.jar_id, 1)
+        ON CONFLICT (jar_id) DO UPDATE SET count = count + 1;
+
+        INSERT INTO "{DOMAIN_COUNT_TABLE_NAME_V1}" (jar_id, base_domain, count)
+        VALUES (NEW.jar_id, IFNULL(NEW.base_domain, ''), 1)
+        ON CONFLICT (jar_id, base_domain) DO UPDATE SET count = count + 1;
+    END
+    ''',
+]
+
+'''
+the name of the application defined SQL function that returns the `base_domain` for a domain, this is
+registered on every connection by `SqliteCookieJar.connect()` so that statements that don't go through
+python Cookie objects (migrations, browser imports) can fill in the `base_domain` column
+see https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.create_function
+'''
+BASE_DOMAIN_FUNCTION_NAME:str = "biscutbox_base_domain"
+
 '''
-A SQL statement to insert a http.cookiejar into the database
+the names of the application defined SQL functions for the cookie matching rules, registered on every connection by
+`SqliteCookieJar.connect()`, see `biscutbox.sql_functions`
+'''
+DOMAIN_MATCH_FUNCTION_NAME:str = "biscutbox_domain_match"
+PATH_MATCH_FUNCTION_NAME:str = "biscutbox_path_match"
+REVERSED_DOMAIN_FUNCTION_NAME:str = "biscutbox_reversed_domain"
+
+'''
+the current version of the database schema, stored in `PRAGMA user_version`
+see https://www.sqlite.org/pragma.html#pragma_user_version
+'''
+SCHEMA_VERSION:int = 5
+
+'''
+the `jar_id` of the cookies stored by a SqliteCookieJar that isn't a partition
+'''
+DEFAULT_JAR_ID:str = ""
+
+'''
+the key to the value of the get schema version SQL statement
+'''
+GET_SCHEMA_VERSION_KEY = "user_version"
+
+'''
+SQL statement to get the schema version of the database
+'''
+GET_SCHEMA_VERSION:str = \
+'''
+PRAGMA user_version;
+'''
+
+'''
+SQL statement to set the schema version of the database. this has a python string.format marker `{}`
+that you are meant to fill in, as you cannot use parameters in a PRAGMA
+'''
+SET_SCHEMA_VERSION:str = \
+'''
+PRAGMA user_version = {};
+'''
+
+'''
+SQL statement to check if the cookie table exists already
+'''
+SELECT_COOKIE_TABLE_EXISTS:str = \
+f'''
+SELECT name FROM sqlite_master WHERE type == 'table' AND name == '{TABLE_NAME_V1}'
+'''
+
+'''
+the SQL statements that upgrade an existing cookie table to the next schema version, the key is the
+version that the statements upgrade the database to. A brand new database is created with
+`CREATE_TABLE_STATEMENT_COOKIE_TABLE` which is always the latest version, so these only run for
+databases created by an older version of biscutbox.
+'''
+SCHEMA_MIGRATIONS:dict[int, list[str]] = \
+{
+    1:
+    [
+        f'''ALTER TABLE "{TABLE_NAME_V1}" ADD COLUMN "base_domain" TEXT''',
+        f'''UPDATE "{TABLE_NAME_V1}" SET base_domain = {BASE_DOMAIN_FUNCTION_NAME}(domain)''',
+    ],
+    2:
+    [
+        f'''ALTER TABLE "{TABLE_NAME_V1}" ADD COLUMN "last_accessed" INTEGER''',
+    ],
+    3:
+    [
+        f'''ALTER TABLE "{TABLE_NAME_V1}" ADD COLUMN "jar_id" TEXT NOT NULL DEFAULT \'\'''',
+        # these are recreated with `jar_id` as the first column after the migrations run
+        '''DROP INDEX IF EXISTS "domain_idx"''',
+        '''DROP INDEX IF EXISTS "base_domain_idx"''',
+    ],
+    4:
+    CREATE_COUNT_TABLES_AND_TRIGGERS_STATEMENTS +
+    [
+        # count the cookies that are already there
+        f'''INSERT INTO "{JAR_COUNT_TABLE_NAME_V1}" (jar_id, count)
+        SELECT jar_id, COUNT(id) FROM "{TABLE_NAME_V1}" GROUP BY jar_id''',
+        f'''INSERT INTO "{DOMAIN_COUNT_TABLE_NAME_V1}" (jar_id, base_domain, count)
+        SELECT jar_id, IFNULL(base_domain, ''), COUNT(id) FROM "{TABLE_NAME_V1}" GROUP BY jar_id, IFNULL(base_domain, '')''',
+    ],
+    5:
+    [
+        f'''ALTER TABLE "{TABLE_NAME_V1}" ADD COLUMN "creation_time" INTEGER''',
+        # older versions inserted a new row every time a cookie was set, only keep the last one that was set, so
+        # `cookie_key_idx` can be created after the migrations run
+        f'''DELETE FROM "{TABLE_NAME_V1}" WHERE id NOT IN
+        (SELECT MAX(id) FROM "{TABLE_NAME_V1}" GROUP BY jar_id, domain, path, name)''',
+    ],
+}
+
+'''
+the columns that are overwritten when a cookie is set again, everything but the key (`jar_id`, `domain`, `path`,
+`name`), the `base_domain` that comes from the key, and `creation_time`
+'''
+UPSERT_COOKIE_UPDATE_COLUMNS:list[str] = ["version", "value", "port", "secure", "expires", "discard", "comment",
+    "comment_url", "rfc2109", "rest", "port_specified", "domain_specified", "domain_initial_dot", "path_specified",
+    "last_accessed"]
+
+'''
+the SET part of an upsert, which overwrites every one of `UPSERT_COOKIE_UPDATE_COLUMNS` with the new cookie's value
+'''
+UPSERT_COOKIE_SET:str = ", ".join(f"{x} = excluded.{x}" for x in UPSERT_COOKIE_UPDATE_COLUMNS)
+
+'''
+the clause added to the end of the statements that insert cookies, so setting a cookie that is already stored (see
+`cookie_key_idx`) replaces it rather than adding another row, and keeps its `id` and `creation_time`
+see https://www.sqlite.org/lang_upsert.html
+'''
+UPSERT_COOKIE_CLAUSE:str = \
+f'''
+ON CONFLICT (jar_id, domain, path, name) DO UPDATE SET {UPSERT_COOKIE_SET}
+'''
+
+'''
+A SQL statement to insert a http.cookiejar into the database, or replace it if it's already there
 '''
 INSERT_COOKIE_STATEMENT:str = \
 f'''
@@ -78,7 +357,11 @@ INSERT INTO "{TABLE_NAME_V1}"
     "port_specified",
     "domain_specified",
     "domain_initial_dot",
-    "path_specified"
+    "path_specified",
+    "base_domain",
+    "last_accessed",
+    "jar_id",
+    "creation_time"
 )
 VALUES
 (
@@ -98,8 +381,13 @@ VALUES
     :port_specified,
     :domain_specified,
     :domain_initial_dot,
-    :path_specified
-);
+    :path_specified,
+    :base_domain,
+    :last_accessed,
+    :jar_id,
+    :creation_time
+)
+{UPSERT_COOKIE_CLAUSE.strip()};
 
 '''
 
@@ -119,12 +407,14 @@ SELECT changes();
 '''
 
 '''
-a SQL statement to count the number of entries in the
-v1 cookies table
+a SQL statement to get the number of entries in the
+v1 cookies table for a single `jar_id`, from the count table
 '''
 COUNT_ENTRIES_IN_COOKIE_TABLE_STATEMENT:str = \
 f'''
-SELECT COUNT(id) AS {COUNT_ENTRIES_IN_COOKIE_TABLE_KEY} FROM "{TABLE_NAME_V1}";
+SELECT IFNULL(
+    (SELECT count FROM "{JAR_COUNT_TABLE_NAME_V1}" WHERE jar_id == :jar_id),
+    0) AS {COUNT_ENTRIES_IN_COOKIE_TABLE_KEY};
 
 '''
 
@@ -134,14 +424,17 @@ the batch size for the select all sql statement
 SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE:int = 1000
 
 '''
-A SQL statement that is meant to iterate over the entire table
-in batches. this has a python string.format marker `{}` that you are meant
-to fill in, as you cannot use parameters in that spot.
+A SQL statement that is meant to iterate over the entire table in batches of :limit rows, each batch starts
+after the highest `id` of the previous one (:after_id, 0 for the first batch). Each batch is read in its own
+transaction, so this picks up where it left off even if cookies were added or removed in between, which an
+OFFSET wouldn't
 '''
 SELECT_ALL_FROM_COOKIE_TABLE_BATCH_STATEMENT:str = \
 f'''
 SELECT * FROM "{TABLE_NAME_V1}"
-LIMIT 1000 OFFSET {{}}'''
+WHERE jar_id == :jar_id AND id > :after_id
+ORDER BY id
+LIMIT :limit'''
 
 
 '''
@@ -151,21 +444,100 @@ given domain.
 SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_STATEMENT:str = \
 f'''
 SELECT * FROM "{TABLE_NAME_V1}"
-WHERE domain == :domain
+WHERE jar_id == :jar_id AND domain == :domain
 '''
 
 '''
-a SQL statement that will return all of the cookies that match the
-given domain using sqlite LIKE
-see https://sqlite.org/lang_expr.html#the_like_glob_regexp_match_and_extract_operators
-
+a SQL statement that will return every cookie under a registrable domain (:base_domain), for every host under it,
+in the same order as `SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_TEMPLATE`. Used by
+`biscutbox.cookie_jar_server`, which caches the result for every host under the registrable domain
 '''
-SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_LIKE_STATEMENT:str = \
+SELECT_ALL_FROM_COOKIE_TABLE_BY_BASE_DOMAIN_STATEMENT:str = \
 f'''
 SELECT * FROM "{TABLE_NAME_V1}"
-WHERE domain LIKE :domain_pattern
+WHERE jar_id == :jar_id AND base_domain == :base_domain
+ORDER BY length(path) DESC, creation_time, id
+'''
+'''
+a SQL statement that will return all of the cookies that can be sent with a request, before the cookie policy
+is checked. That is the cookies under the request host's registrable domain (:base_domain, which is looked up with
+the index on `base_domain`) whose domain is the request host (:request_host) or one of its parent domains.
+They are sorted the way RFC 6265 section 5.4 says to put them in the `Cookie` header, longest path first, and
+then the earliest `creation_time`, so the header doesn't need sorting afterwards.
+`{domain_filter}` is either empty or `ALLOWED_COOKIE_DOMAINS_FILTER`, and `{policy_filter}` is either empty or
+`DEFAULT_POLICY_FILTER`, see `SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_STATEMENTS`
+'''
+SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_TEMPLATE:str = \
+f'''
+SELECT * FROM "{TABLE_NAME_V1}"
+WHERE jar_id == :jar_id AND base_domain == :base_domain AND {DOMAIN_MATCH_FUNCTION_NAME}(:request_host, domain)
+{{domain_filter}}{{policy_filter}}ORDER BY length(path) DESC, creation_time, id
 '''
 
+'''
+a condition for `SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_TEMPLATE` that only keeps the cookies whose domain is in
+:cookie_domains, a JSON array of strings. This is used to leave out the domains that the policy's `blocked_domains`
+and `allowed_domains` reject
+see https://www.sqlite.org/json1.html#jeach
+'''
+ALLOWED_COOKIE_DOMAINS_FILTER:str = \
+'''
+AND domain IN (SELECT value FROM json_each(:cookie_domains))
+'''
+
+'''
+the checks of `http.cookiejar.DefaultCookiePolicy` that `DEFAULT_POLICY_FILTER` does in SQL. SqliteCookieJar only
+uses the filter when the policy is a DefaultCookiePolicy that doesn't override any of these methods
+'''
+DEFAULT_POLICY_SQL_CHECKS:tuple[str, ...] = ("path_return_ok", "return_ok", "return_ok_secure", "return_ok_expires")
+
+'''
+the methods of `DefaultCookiePolicy` that decide whether a cookie's domain can be returned. If a subclass doesn't
+override any of these, the `blocked_domains` and `allowed_domains` of the policy are checked in the query with
+`ALLOWED_COOKIE_DOMAINS_FILTER` rather than in python on every row
+'''
+DEFAULT_POLICY_DOMAIN_CHECKS:tuple[str, ...] = ("domain_return_ok", "is_blocked", "is_not_allowed")
+
+'''
+the rest of the checks that `DefaultCookiePolicy.return_ok` does, which are still done in python on the rows that
+pass `DEFAULT_POLICY_FILTER`. These are the `return_ok_<name>` methods of the policy
+'''
+DEFAULT_POLICY_PYTHON_CHECKS:tuple[str, ...] = ("version", "verifiability", "port", "domain")
+
+'''
+the conditions that `DefaultCookiePolicy.path_return_ok`, `return_ok_expires` and `return_ok_secure` check, to add
+to the end of a SELECT statement so the rows that would fail them are never read. The parameters are
+:now (the policy's `_now`), :request_path (from `http.cookiejar.request_path`) and :request_is_secure (whether
+the request's scheme is one of the policy's `secure_protocols`)
+
+the path check is the same function as `path_return_ok`, see `biscutbox.sql_functions.path_match`
+'''
+DEFAULT_POLICY_FILTER:str = \
+f'''
+AND (expires ISNULL OR expires > :now)
+AND (NOT IFNULL(secure, 0) OR :request_is_secure)
+AND {PATH_MATCH_FUNCTION_NAME}(:request_path, path)
+'''
+
+'''
+`SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_STATEMENT` with `DEFAULT_POLICY_FILTER`
+'''
+SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_DEFAULT_POLICY_STATEMENT:str = \
+    SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_STATEMENT.rstrip("\n") + DEFAULT_POLICY_FILTER
+
+'''
+`SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_TEMPLATE` with every combination of filters, keyed by
+(whether it has `ALLOWED_COOKIE_DOMAINS_FILTER`, whether it has `DEFAULT_POLICY_FILTER`)
+'''
+SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_STATEMENTS:dict[tuple[bool, bool], str] = \
+{
+    (domain_filtered, default_policy_filtered): SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_TEMPLATE.format(
+        domain_filter=ALLOWED_COOKIE_DOMAINS_FILTER.lstrip("\n") if domain_filtered else "",
+        policy_filter=DEFAULT_POLICY_FILTER.lstrip("\n") if default_policy_filtered else "")
+    for domain_filtered in [False, True]
+    for default_policy_filtered in [False, True]
+}
+
 '''
 SQL statement to turn foreign keys on
 see https://www3.sqlite.org/quirks.html#foreign_key_enforcement_is_off_by_default
@@ -185,11 +557,12 @@ PRAGMA journal_mode=WAL;
 '''
 
 '''
-SQL statement to delete all cookies from the cookie table
+SQL statement to delete all cookies from the cookie table for a given `jar_id`, this
+is a range delete on the `jar_id` prefix of `domain_idx`
 '''
 DELETE_ALL_FROM_COOKIE_TABLE:str = \
 f'''
-DELETE FROM "{TABLE_NAME_V1}"
+DELETE FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id
 '''
 
 '''
@@ -198,7 +571,7 @@ for a given domain
 '''
 DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN:str = \
 f'''
-DELETE FROM "{TABLE_NAME_V1}" WHERE domain == :domain
+DELETE FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id AND domain == :domain
 '''
 
 '''
@@ -207,7 +580,7 @@ for a given domain and path
 '''
 DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN_PATH:str = \
 f'''
-DELETE FROM "{TABLE_NAME_V1}" WHERE domain == :domain AND path == :path
+DELETE FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id AND domain == :domain AND path == :path
 '''
 
 '''
@@ -217,7 +590,8 @@ for a given cookie's name, domain and path
 DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN_PATH_NAME:str = \
 f'''
 DELETE FROM "{TABLE_NAME_V1}" WHERE
-domain == :domain
+jar_id == :jar_id
+AND domain == :domain
 AND path == :path
 AND name == :name
 '''
@@ -227,7 +601,7 @@ SQL statement to delete all session cookies from the cookie table
 '''
 DELETE_ALL_SESSION_COOKIES_FROM_COOKIE_TABLE:str = \
 f'''
-DELETE FROM "{TABLE_NAME_V1}" WHERE discard == 1
+DELETE FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id AND discard == 1
 '''
 
 '''
@@ -235,5 +609,689 @@ SQL statement to delete all expired cookies from the cookie table
 '''
 DELETE_ALL_EXPIRED_COOKIES_FROM_COOKIE_TABLE:str = \
 f'''
-DELETE FROM "{TABLE_NAME_V1}" WHERE (expires notnull AND expires <= :expires_val)
-'''
\ No newline at end of file
+DELETE FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id AND (expires notnull AND expires <= :expires_val)
+'''
+
+'''
+SQL statement to delete at most `:limit` expired cookies from the cookie table, used by the
+background expiry sweeper so that each transaction only holds the write lock for a short time.
+This deletes from every `jar_id`
+'''
+DELETE_EXPIRED_COOKIES_CHUNK_FROM_COOKIE_TABLE:str = \
+f'''
+DELETE FROM "{TABLE_NAME_V1}" WHERE id IN
+(
+    SELECT id FROM "{TABLE_NAME_V1}"
+    WHERE (expires notnull AND expires <= :expires_val)
+    LIMIT :limit
+)
+'''
+
+'''
+the key to the value of the next expiry SQL statement
+'''
+SELECT_NEXT_EXPIRY_FROM_COOKIE_TABLE_KEY = "next_expiry"
+
+'''
+SQL statement to get the earliest `expires` value in the cookie table, this is NULL if no
+cookie has an expiry. MIN() ignores NULLs and is answered from the `expires_idx` index. This
+looks at every `jar_id`
+'''
+SELECT_NEXT_EXPIRY_FROM_COOKIE_TABLE:str = \
+f'''
+SELECT MIN(expires) AS {SELECT_NEXT_EXPIRY_FROM_COOKIE_TABLE_KEY} FROM "{TABLE_NAME_V1}"
+'''
+
+'''
+the defaults for the background expiry sweeper, the maximum number of cookies to delete per
+transaction, and the shortest and longest amount of seconds to wait in between sweeps
+'''
+EXPIRY_SWEEP_CHUNK_SIZE:int = 500
+EXPIRY_SWEEP_MIN_INTERVAL:float = 1.0
+EXPIRY_SWEEP_MAX_INTERVAL:float = 300.0
+
+'''
+the default number of pages to copy in each step of `SqliteCookieJar.snapshot`, and how long to
+sleep in between each step
+see https://www.sqlite.org/c3ref/backup_finish.html#sqlite3backupstep
+'''
+SNAPSHOT_PAGES_PER_STEP:int = 256
+SNAPSHOT_SLEEP_SECONDS:float = 0.05
+
+'''
+the schema name that a browser's cookie database is attached under while we import from it
+'''
+BROWSER_IMPORT_SCHEMA_NAME:str = "biscutbox_browser_import"
+
+'''
+SQL statement to attach a browser's cookie database so we can copy from it with a single
+INSERT ... SELECT
+see https://www.sqlite.org/lang_attach.html
+'''
+ATTACH_BROWSER_IMPORT_DATABASE:str = \
+f'''
+ATTACH DATABASE :database_path AS "{BROWSER_IMPORT_SCHEMA_NAME}"
+'''
+
+'''
+SQL statement to detach the browser's cookie database once the import is done
+'''
+DETACH_BROWSER_IMPORT_DATABASE:str = \
+f'''
+DETACH DATABASE "{BROWSER_IMPORT_SCHEMA_NAME}"
+'''
+
+'''
+a SQL fragment for a single domain filter when importing browser cookies. This has python
+string.format markers for the host column name and the parameter name for the domain, the
+host matches if it is the domain, or if it ends with `.` + the domain, so filtering on
+`example.com` will match `example.com`, `.example.com` and `a.example.com`
+'''
+BROWSER_IMPORT_DOMAIN_FILTER_FRAGMENT:str = \
+'''
+({host_column} == :{param_name} OR substr({host_column}, -length(:{param_name}_suffix)) == :{param_name}_suffix)'''
+
+'''
+A SQL statement that copies every cookie out of an attached Firefox `cookies.sqlite` database's
+`moz_cookies` table. This has a python string.format marker `{}` for the domain filter, which is
+either `1` or the `BROWSER_IMPORT_DOMAIN_FILTER_FRAGMENT`s joined with OR
+
+notes on the mapping:
+* `host` has a leading dot for domain cookies, the same as http.cookiejar.Cookie.domain
+* `expiry` is in seconds since the epoch, but newer versions of Firefox store milliseconds,
+  so anything too large to be seconds is divided down
+* Firefox doesn't persist session cookies, so `discard` is always false
+* `lastAccessed` and `creationTime` are in microseconds since the epoch
+* Firefox can store the same cookie more than once for different `originAttributes`, the last one wins
+'''
+IMPORT_FIREFOX_COOKIES_STATEMENT:str = \
+f'''
+INSERT INTO "{TABLE_NAME_V1}"
+(
+    "version",
+    "name",
+    "value",
+    "port",
+    "domain",
+    "path",
+    "secure",
+    "expires",
+    "discard",
+    "comment",
+    "comment_url",
+    "rfc2109",
+    "rest",
+    "port_specified",
+    "domain_specified",
+    "domain_initial_dot",
+    "path_specified",
+    "base_domain",
+    "last_accessed",
+    "jar_id",
+    "creation_time"
+)
+SELECT
+    0,
+    name,
+    value,
+    NULL,
+    host,
+    path,
+    isSecure != 0,
+    CASE WHEN expiry > 100000000000 THEN expiry / 1000 ELSE expiry END,
+    0,
+    NULL,
+    NULL,
+    0,
+    CASE WHEN isHttpOnly THEN json_object('HttpOnly', NULL) ELSE json_object() END,
+    0,
+    substr(host, 1, 1) == '.',
+    substr(host, 1, 1) == '.',
+    0,
+    {BASE_DOMAIN_FUNCTION_NAME}(host),
+    lastAccessed / 1000000,
+    :jar_id,
+    creationTime / 1000000
+FROM "{BROWSER_IMPORT_SCHEMA_NAME}"."moz_cookies"
+WHERE {{}}
+{UPSERT_COOKIE_CLAUSE.strip()}
+'''
+
+'''
+A SQL statement that copies every cookie out of an attached Chromium `Cookies` database's
+`cookies` table. This has a python string.format marker `{}` for the domain filter, which is
+either `1` or the `BROWSER_IMPORT_DOMAIN_FILTER_FRAGMENT`s joined with OR
+
+notes on the mapping:
+* `host_key` has a leading dot for domain cookies, the same as http.cookiejar.Cookie.domain
+* `expires_utc` is in microseconds since 1601-01-01, so it gets converted to seconds since the
+  unix epoch
+* `last_access_utc` is in the same units as `expires_utc`, and is 0 if unknown, `creation_utc` is in the same units
+* Chromium can store the same cookie more than once for different partitions or schemes, the last one wins
+* cookies whose value is only stored in `encrypted_value` are skipped, as we have no way of
+  decrypting them inside SQLite
+'''
+IMPORT_CHROMIUM_COOKIES_STATEMENT:str = \
+f'''
+INSERT INTO "{TABLE_NAME_V1}"
+(
+    "version",
+    "name",
+    "value",
+    "port",
+    "domain",
+    "path",
+    "secure",
+    "expires",
+    "discard",
+    "comment",
+    "comment_url",
+    "rfc2109",
+    "rest",
+    "port_specified",
+    "domain_specified",
+    "domain_initial_dot",
+    "path_specified",
+    "base_domain",
+    "last_accessed",
+    "jar_id",
+    "creation_time"
+)
+SELECT
+    0,
+    name,
+    value,
+    NULL,
+    host_key,
+    path,
+    is_secure != 0,
+    CASE WHEN has_expires AND is_persistent THEN expires_utc / 1000000 - 11644473600 ELSE NULL END,
+    is_persistent == 0,
+    NULL,
+    NULL,
+    0,
+    CASE WHEN is_httponly THEN json_object('HttpOnly', NULL) ELSE json_object() END,
+    0,
+    substr(host_key, 1, 1) == '.',
+    substr(host_key, 1, 1) == '.',
+    0,
+    {BASE_DOMAIN_FUNCTION_NAME}(host_key),
+    CASE WHEN last_access_utc > 0 THEN last_access_utc / 1000000 - 11644473600 ELSE NULL END,
+    :jar_id,
+    creation_utc / 1000000 - 11644473600
+FROM "{BROWSER_IMPORT_SCHEMA_NAME}"."cookies"
+WHERE NOT (value == '' AND length(encrypted_value) > 0)
+AND {{}}
+{UPSERT_COOKIE_CLAUSE.strip()}
+'''
+
+'''
+SQL statement to get the number of cookies under a single `base_domain`, from the count table
+'''
+COUNT_ENTRIES_IN_COOKIE_TABLE_BY_BASE_DOMAIN_STATEMENT:str = \
+f'''
+SELECT IFNULL(
+    (SELECT count FROM "{DOMAIN_COUNT_TABLE_NAME_V1}" WHERE jar_id == :jar_id AND base_domain == :base_domain),
+    0) AS {COUNT_ENTRIES_IN_COOKIE_TABLE_KEY}
+'''
+
+'''
+SQL statement to find every `base_domain` that has more than `:max_cookies` cookies, used to enforce the per
+domain limit after a bulk import where we don't know which domains were touched
+'''
+SELECT_BASE_DOMAINS_OVER_LIMIT_STATEMENT:str = \
+f'''
+SELECT base_domain FROM "{DOMAIN_COUNT_TABLE_NAME_V1}"
+WHERE jar_id == :jar_id AND count > :max_cookies
+'''
+
+'''
+SQL statement to evict up to `:limit` expired cookies under a single `base_domain`
+'''
+EVICT_EXPIRED_COOKIES_BY_BASE_DOMAIN_STATEMENT:str = \
+f'''
+DELETE FROM "{TABLE_NAME_V1}" WHERE id IN
+(
+    SELECT id FROM "{TABLE_NAME_V1}"
+    WHERE jar_id == :jar_id AND base_domain == :base_domain AND (expires notnull AND expires <= :expires_val)
+    LIMIT :limit
+)
+'''
+
+'''
+SQL statement to evict the `:limit` least recently used cookies under a single `base_domain`, cookies
+that have never been accessed (NULL `last_accessed`) are evicted first
+'''
+EVICT_OLDEST_COOKIES_BY_BASE_DOMAIN_STATEMENT:str = \
+f'''
+DELETE FROM "{TABLE_NAME_V1}" WHERE id IN
+(
+    SELECT id FROM "{TABLE_NAME_V1}"
+    WHERE jar_id == :jar_id AND base_domain == :base_domain
+    ORDER BY last_accessed ASC, id ASC
+    LIMIT :limit
+)
+'''
+
+'''
+SQL statement to evict up to `:limit` expired cookies from a single `jar_id`
+'''
+EVICT_EXPIRED_COOKIES_STATEMENT:str = \
+f'''
+DELETE FROM "{TABLE_NAME_V1}" WHERE id IN
+(
+    SELECT id FROM "{TABLE_NAME_V1}"
+    WHERE jar_id == :jar_id AND (expires notnull AND expires <= :expires_val)
+    LIMIT :limit
+)
+'''
+
+'''
+SQL statement to evict the `:limit` least recently used cookies from a single `jar_id`, cookies
+that have never been accessed (NULL `last_accessed`) are evicted first
+'''
+EVICT_OLDEST_COOKIES_STATEMENT:str = \
+f'''
+DELETE FROM "{TABLE_NAME_V1}" WHERE id IN
+(
+    SELECT id FROM "{TABLE_NAME_V1}"
+    WHERE jar_id == :jar_id
+    ORDER BY last_accessed ASC, id ASC
+    LIMIT :limit
+)
+'''
+
+'''
+SQL statement to update when a single cookie was last accessed, this is run with executemany() to flush
+every pending update in one transaction
+'''
+UPDATE_COOKIE_LAST_ACCESSED_STATEMENT:str = \
+f'''
+UPDATE "{TABLE_NAME_V1}" SET last_accessed = :last_accessed WHERE id == :id
+'''
+
+'''
+the default number of seconds in between flushes of the pending last access times
+'''
+LAST_ACCESS_FLUSH_INTERVAL:float = 60.0
+
+'''
+SQL statement to list every `jar_id` that has at least one cookie, from the count table
+'''
+SELECT_ALL_JAR_IDS_STATEMENT:str = \
+f'''
+SELECT jar_id FROM "{JAR_COUNT_TABLE_NAME_V1}" ORDER BY jar_id
+'''
+
+'''
+the upper bounds (in seconds from now) of the buckets in the expiry histogram returned by `SqliteCookieJar.stats()`,
+with a label for each one. Cookies that expire after the last bound go in a final "later" bucket
+'''
+STATS_EXPIRY_HISTOGRAM_BUCKETS:list[tuple[str, int]] = \
+[
+    ("within 1 hour", 60 * 60),
+    ("within 1 day", 60 * 60 * 24),
+    ("within 1 week", 60 * 60 * 24 * 7),
+    ("within 30 days", 60 * 60 * 24 * 30),
+    ("within 1 year", 60 * 60 * 24 * 365),
+]
+
+'''
+the default number of registrable domains in `SqliteCookieJar.stats()`'s top domains
+'''
+STATS_TOP_DOMAINS:int = 10
+
+'''
+the expiry histogram columns of `SELECT_COOKIE_STATS_STATEMENT`, `expires_within_<index>` is the number of cookies
+that expire after the previous bucket's bound and before the bound of `STATS_EXPIRY_HISTOGRAM_BUCKETS[index]`
+'''
+STATS_EXPIRY_HISTOGRAM_COLUMNS:str = "".join(
+    f"    IFNULL(SUM(expires > :now + {lower_bound} AND expires <= :now + {upper_bound}), 0) AS expires_within_{i},\n"
+    for i, (lower_bound, (_, upper_bound)) in enumerate(zip(
+        [0] + [x[1] for x in STATS_EXPIRY_HISTOGRAM_BUCKETS],
+        STATS_EXPIRY_HISTOGRAM_BUCKETS)))
+
+'''
+SQL statement that gets every statistic about the cookies in a single `jar_id` that needs to look at the
+cookies themselves, in one pass over the partition
+'''
+SELECT_COOKIE_STATS_STATEMENT:str = \
+f'''
+SELECT
+    COUNT(id) AS cookie_count,
+    IFNULL(SUM(discard != 0), 0) AS session_count,
+    IFNULL(SUM(expires ISNULL), 0) AS no_expiry_count,
+    IFNULL(SUM(expires <= :now), 0) AS expired_count,
+{STATS_EXPIRY_HISTOGRAM_COLUMNS}    IFNULL(SUM(expires > :now + {STATS_EXPIRY_HISTOGRAM_BUCKETS[-1][1]}), 0) AS expires_later,
+    IFNULL(SUM(length(CAST(value AS BLOB))), 0) AS value_bytes_total,
+    IFNULL(MAX(length(CAST(value AS BLOB))), 0) AS value_bytes_max
+FROM "{TABLE_NAME_V1}"
+WHERE jar_id == :jar_id
+'''
+
+'''
+SQL statement to get the registrable domains with the most cookies in a single `jar_id`, from the count table
+'''
+SELECT_TOP_DOMAINS_STATEMENT:str = \
+f'''
+SELECT base_domain, count FROM "{DOMAIN_COUNT_TABLE_NAME_V1}"
+WHERE jar_id == :jar_id
+ORDER BY count DESC, base_domain ASC
+LIMIT :limit
+'''
+
+'''
+SQL statement to get the number of distinct registrable domains in a single `jar_id`, from the count table
+'''
+COUNT_DOMAINS_STATEMENT:str = \
+f'''
+SELECT COUNT(base_domain) AS {COUNT_ENTRIES_IN_COOKIE_TABLE_KEY} FROM "{DOMAIN_COUNT_TABLE_NAME_V1}"
+WHERE jar_id == :jar_id
+'''
+
+'''
+pragmas that report how big the database file is, and how much of it is free pages
+see https://www.sqlite.org/pragma.html#pragma_page_count
+'''
+GET_PAGE_SIZE:str = "PRAGMA page_size;"
+GET_PAGE_COUNT:str = "PRAGMA page_count;"
+GET_FREELIST_COUNT:str = "PRAGMA freelist_count;"
+
+'''
+SQL statement to get how many pages each table and index uses, and how many bytes of those pages are used. This
+needs sqlite to be built with SQLITE_ENABLE_DBSTAT_VTAB, which most builds are
+see https://www.sqlite.org/dbstat.html
+'''
+SELECT_DBSTAT_STATEMENT:str = \
+'''
+SELECT name, COUNT(*) AS pages, SUM(payload) AS payload_bytes, SUM(unused) AS unused_bytes
+FROM dbstat
+GROUP BY name
+ORDER BY pages DESC, name ASC
+'''
+
+'''
+the upper bounds (in seconds) of the latency histogram buckets that `biscutbox.metrics.MetricsCollector` keeps
+for each operation, like a Prometheus histogram there is also an implicit `+Inf` bucket
+'''
+METRICS_LATENCY_BUCKETS:list[float] = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+'''
+what to put in front of a statement to get its query plan instead of running it
+see https://www.sqlite.org/eqp.html
+'''
+EXPLAIN_QUERY_PLAN_PREFIX:str = "EXPLAIN QUERY PLAN "
+
+'''
+the first keywords of the statements that `EXPLAIN QUERY PLAN` has something to say about
+'''
+EXPLAINABLE_STATEMENT_KEYWORDS:tuple[str, ...] = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+'''
+the default number of slow statements that `biscutbox.sql_trace.SqlTracer` keeps around in `slow_statements`
+'''
+SQL_TRACE_MAX_SLOW_STATEMENTS:int = 100
+
+'''
+the name of the optional change log table, see `SqliteCookieJar(change_log=True)`
+'''
+CHANGE_LOG_TABLE_NAME_V1 = "biscutbox_change_log_v1"
+
+'''
+the columns of the cookie table that are part of the cookie itself, a change to any of them is logged.
+`last_accessed` isn't, so tracking last access times doesn't fill up the change log
+'''
+CHANGE_LOG_COOKIE_COLUMNS:list[str] = ["version", "name", "value", "port", "domain", "path", "secure", "expires",
+    "discard", "comment", "comment_url", "rfc2109", "rest", "port_specified", "domain_specified",
+    "domain_initial_dot", "path_specified", "base_domain", "jar_id"]
+
+'''
+the statements that create the change log table, and the triggers on the cookie table that add a row to it for
+every cookie that is inserted, updated or deleted. Each row has the cookie's key (`jar_id`, `domain`, `path`, `name`),
+so a replica only needs the keys that changed after the last `seq` it saw, and the current cookies for those keys.
+`seq` is AUTOINCREMENT, so it keeps going up even after the rows with the highest `seq` are pruned.
+`operation` is one of `insert`, `update` or `delete`, an update that changes a cookie's key logs a `delete` for the
+old key as well.
+
+these are created with IF NOT EXISTS every time a cookie jar is connected with `change_log=True`, and aren't part
+of the schema version, so they can be turned on for an existing database
+see https://www.sqlite.org/autoinc.html
+'''
+CREATE_CHANGE_LOG_TABLE_AND_TRIGGERS_STATEMENTS:list[str] = \
+[
+    f'''
+    CREATE TABLE IF NOT EXISTS "{CHANGE_LOG_TABLE_NAME_V1}" (
+        "seq" INTEGER NOT NULL,
+        "jar_id" TEXT NOT NULL,
+        "domain" TEXT NOT NULL,
+        "path" TEXT NOT NULL,
+        "name" TEXT NOT NULL,
+        "operation" TEXT NOT NULL,
+        PRIMARY KEY("seq" AUTOINCREMENT)
+    )
+    ''',
+    f'''
+    CREATE INDEX IF NOT EXISTS "change_log_jar_id_idx" ON "{CHANGE_LOG_TABLE_NAME_V1}" ("jar_id", "seq")
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "change_log_insert_trigger" AFTER INSERT ON "{TABLE_NAME_V1}"
+    BEGIN
+        INSERT INTO "{CHANGE_LOG_TABLE_NAME_V1}" (jar_id, domain, path, name, operation)
+        VALUES (NEW.jar_id, NEW.domain, NEW.path, NEW.name, 'insert');
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "change_log_delete_trigger" AFTER DELETE ON "{TABLE_NAME_V1}"
+    BEGIN
+        INSERT INTO "{CHANGE_LOG_TABLE_NAME_V1}" (jar_id, domain, path, name, operation)
+        VALUES (OLD.jar_id, OLD.domain, OLD.path, OLD.name, 'delete');
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS "change_log_update_trigger"
+    AFTER UPDATE OF {", ".join(CHANGE_LOG_COOKIE_COLUMNS)} ON "{TABLE_NAME_V1}"
+    BEGIN
+        INSERT INTO "{CHANGE_LOG_TABLE_NAME_V1}" (jar_id, domain, path, name, operation)
+        SELECT OLD.jar_id, OLD.domain, OLD.path, OLD.name, 'delete'
+        WHERE OLD.jar_id IS NOT NEW.jar_id OR OLD.domain IS NOT NEW.domain
+            OR OLD.path IS NOT NEW.path OR OLD.name IS NOT NEW.name;
+        INSERT INTO "{CHANGE_LOG_TABLE_NAME_V1}" (jar_id, domain, path, name, operation)
+        VALUES (NEW.jar_id, NEW.domain, NEW.path, NEW.name, 'update');
+    END
+    ''',
+]
+
+'''
+SQL statement to log every cookie that is already in the database when the change log is created, so syncing
+from `seq` 0 copies everything
+'''
+BACKFILL_CHANGE_LOG_STATEMENT:str = \
+f'''
+INSERT INTO "{CHANGE_LOG_TABLE_NAME_V1}" (jar_id, domain, path, name, operation)
+SELECT jar_id, domain, path, name, 'insert' FROM "{TABLE_NAME_V1}" ORDER BY id
+'''
+
+'''
+SQL statement to check if the change log table exists
+'''
+SELECT_CHANGE_LOG_TABLE_EXISTS:str = \
+f'''
+SELECT name FROM sqlite_master WHERE type == 'table' AND name == '{CHANGE_LOG_TABLE_NAME_V1}'
+'''
+
+'''
+SQL statement to get the highest `seq` in the change log, including the rows that were pruned, 0 if nothing was
+ever logged. AUTOINCREMENT keeps this in the `sqlite_sequence` table
+'''
+SELECT_CHANGE_LOG_LAST_SEQ_STATEMENT:str = \
+f'''
+SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name == '{CHANGE_LOG_TABLE_NAME_V1}'), 0) AS last_seq
+'''
+
+'''
+SQL statement to get the lowest `seq` still in the change log, NULL if it's empty
+'''
+SELECT_CHANGE_LOG_FIRST_SEQ_STATEMENT:str = \
+f'''
+SELECT MIN(seq) AS first_seq FROM "{CHANGE_LOG_TABLE_NAME_V1}"
+'''
+
+'''
+SQL statement to get every cookie key in a partition that changed after :since_seq, up to and including :last_seq
+'''
+SELECT_CHANGED_COOKIE_KEYS_STATEMENT:str = \
+f'''
+SELECT DISTINCT domain, path, name FROM "{CHANGE_LOG_TABLE_NAME_V1}"
+WHERE jar_id == :jar_id AND seq > :since_seq AND seq <= :last_seq
+'''
+
+'''
+SQL statement to get the current cookies in a partition for every key that changed after :since_seq, up to and
+including :last_seq
+'''
+SELECT_CHANGED_COOKIES_STATEMENT:str = \
+f'''
+SELECT * FROM "{TABLE_NAME_V1}" WHERE jar_id == :jar_id AND (domain, path, name) IN
+(
+    SELECT domain, path, name FROM "{CHANGE_LOG_TABLE_NAME_V1}"
+    WHERE jar_id == :jar_id AND seq > :since_seq AND seq <= :last_seq
+)
+ORDER BY id
+'''
+
+'''
+SQL statement to delete the change log rows up to and including :up_to_seq
+'''
+DELETE_CHANGE_LOG_UP_TO_SEQ_STATEMENT:str = \
+f'''
+DELETE FROM "{CHANGE_LOG_TABLE_NAME_V1}" WHERE seq <= :up_to_seq
+'''
+
+'''
+the schema name that another cookie jar's database is attached under while we merge from it, see
+`SqliteCookieJar.merge_from`
+'''
+MERGE_SOURCE_SCHEMA_NAME:str = "biscutbox_merge_source"
+
+'''
+SQL statement to attach the database we are merging from
+'''
+ATTACH_MERGE_SOURCE_DATABASE:str = \
+f'''
+ATTACH DATABASE :database_path AS "{MERGE_SOURCE_SCHEMA_NAME}"
+'''
+
+'''
+SQL statement to detach the database we merged from
+'''
+DETACH_MERGE_SOURCE_DATABASE:str = \
+f'''
+DETACH DATABASE "{MERGE_SOURCE_SCHEMA_NAME}"
+'''
+
+'''
+SQL statement to get the schema version of the database we are merging from
+'''
+GET_MERGE_SOURCE_SCHEMA_VERSION:str = \
+f'''
+PRAGMA "{MERGE_SOURCE_SCHEMA_NAME}".user_version
+'''
+
+'''
+the conflict rules for `SqliteCookieJar.merge_from`, for when a cookie's (domain, path, name) is in both jars:
+* `MERGE_NEWEST_EXPIRY_WINS`: keep whichever cookie expires later, a session cookie counts as expiring before any
+  other cookie, and the target's cookie is kept if they expire at the same time
+* `MERGE_SOURCE_WINS`: always replace the target's cookie with the source's
+* `MERGE_TARGET_WINS`: never replace the target's cookie, so only new keys are copied
+'''
+MERGE_NEWEST_EXPIRY_WINS:str = "newest_expiry_wins"
+MERGE_SOURCE_WINS:str = "source_wins"
+MERGE_TARGET_WINS:str = "target_wins"
+
+'''
+the columns that are copied from the source database when merging, everything except `id` and `jar_id`
+'''
+MERGE_COOKIE_COLUMNS:list[str] = ["version", "name", "value", "port", "domain", "path", "secure", "expires",
+    "discard", "comment", "comment_url", "rfc2109", "rest", "port_specified", "domain_specified",
+    "domain_initial_dot", "path_specified", "base_domain", "last_accessed", "creation_time"]
+
+'''
+the name of the temporary table that holds the source's cookies while merging, with one cookie per
+(domain, path, name)
+'''
+MERGE_SOURCE_TEMP_TABLE_NAME:str = "biscutbox_merge_source_cookies"
+
+'''
+SQL statements to copy the cookies in the :source_jar_id partition of the source database into a temporary table.
+If the source has more than one cookie with the same (domain, path, name), only the one that expires last is
+kept, so each key is only merged once. The index is for the lookups of each key in the statements below
+'''
+CREATE_MERGE_SOURCE_TEMP_TABLE_STATEMENTS:list[str] = \
+[
+    f'''
+    CREATE TEMP TABLE "{MERGE_SOURCE_TEMP_TABLE_NAME}" AS
+    SELECT {", ".join(MERGE_COOKIE_COLUMNS)} FROM
+    (
+        SELECT *, ROW_NUMBER() OVER
+        (
+            PARTITION BY domain, path, name ORDER BY IFNULL(expires, -1) DESC, id DESC
+        ) AS merge_rank
+        FROM "{MERGE_SOURCE_SCHEMA_NAME}"."{TABLE_NAME_V1}" WHERE jar_id == :source_jar_id
+    )
+    WHERE merge_rank == 1
+    ''',
+    f'''
+    CREATE INDEX "temp"."{MERGE_SOURCE_TEMP_TABLE_NAME}_key_idx" ON "{MERGE_SOURCE_TEMP_TABLE_NAME}" (domain, path, name)
+    ''',
+]
+
+'''
+SQL statement to drop the temporary table once the merge is done
+'''
+DROP_MERGE_SOURCE_TEMP_TABLE_STATEMENT:str = \
+f'''
+DROP TABLE IF EXISTS "temp"."{MERGE_SOURCE_TEMP_TABLE_NAME}"
+'''
+
+'''
+a SQL condition for whether the target (:jar_id partition of the main database) has a cookie with the same key as
+the source cookie `source`
+'''
+MERGE_TARGET_HAS_KEY_CONDITION:str = \
+f'''
+EXISTS (SELECT 1 FROM "main"."{TABLE_NAME_V1}" AS target WHERE target.jar_id == :jar_id
+    AND target.domain == source.domain AND target.path == source.path AND target.name == source.name)
+'''
+
+'''
+SQL statement to count the source's cookies, and how many of them have a key that is already in the target
+'''
+COUNT_MERGE_SOURCE_COOKIES_STATEMENT:str = \
+f'''
+SELECT COUNT(*) AS source_cookies, IFNULL(SUM({MERGE_TARGET_HAS_KEY_CONDITION}), 0) AS conflicts
+FROM "temp"."{MERGE_SOURCE_TEMP_TABLE_NAME}" AS source
+'''
+
+'''
+for each conflict rule, what the upsert in `INSERT_COOKIES_FOR_MERGE_STATEMENT` does when the target already has a
+cookie with the same key. A replaced cookie keeps the target's `creation_time`, like `UPSERT_COOKIE_CLAUSE`
+'''
+MERGE_CONFLICT_ACTIONS:dict[str, str] = \
+{
+    MERGE_NEWEST_EXPIRY_WINS: f'''UPDATE SET {UPSERT_COOKIE_SET}
+        WHERE IFNULL(excluded.expires, -1) > IFNULL("{TABLE_NAME_V1}".expires, -1)''',
+    MERGE_SOURCE_WINS: f"UPDATE SET {UPSERT_COOKIE_SET}",
+    MERGE_TARGET_WINS: "NOTHING",
+}
+
+'''
+SQL statement to upsert every source cookie into the target. This has a python string.format marker `{}` for one of
+the `MERGE_CONFLICT_ACTIONS`. The `WHERE 1` is needed so sqlite doesn't read the ON of the upsert as a join
+see https://www.sqlite.org/lang_upsert.html#parsing_ambiguity
+'''
+INSERT_COOKIES_FOR_MERGE_STATEMENT:str = \
+f'''
+INSERT INTO "main"."{TABLE_NAME_V1}" ({", ".join(MERGE_COOKIE_COLUMNS)}, jar_id)
+SELECT {", ".join(MERGE_COOKIE_COLUMNS)}, :jar_id FROM "temp"."{MERGE_SOURCE_TEMP_TABLE_NAME}" WHERE 1
+ON CONFLICT (jar_id, domain, path, name) DO {{}}
+'''
@@ -0,0 +1,194 @@
+'''
+a diagnostic mode for SqliteCookieJar that times every SQL statement, and logs the statements that are slower
+than a threshold along with their `EXPLAIN QUERY PLAN`, so it's easy to see when a query is scanning a table
+
+turn it on with `SqliteCookieJar(slow_statement_threshold=...)`. This uses `sqlite3.Connection.set_trace_callback`,
+which is called as each statement starts, with its parameters already filled in. sqlite doesn't say when a
+statement finishes, so a statement is timed until the next statement starts or the transaction ends, which
+includes fetching its rows (and whatever the cookie jar does with each row in between). Only statements run through
+`SqliteCookieJar._get_sqlite3_database_cursor` are timed.
+
+the query plans are only gathered after the transaction with the slow statement ends, since the connection can't
+be used from inside the trace callback
+'''
+
+import collections
+import dataclasses
+import logging
+import sqlite3
+import time
+
+from biscutbox import sql_statements
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class SlowStatement:
+    '''
+    a SQL statement that took longer than the threshold of a SqlTracer
+    '''
+
+    # the statement, with its parameters filled in
+    sql:str
+
+    duration_seconds:float
+
+    # the `detail` column of each row of `EXPLAIN QUERY PLAN`, indented by their depth in the plan.
+    # Empty for statements that don't have a query plan, like `BEGIN` and `COMMIT`
+    query_plan:list[str]
+
+
+class SqlTracer:
+    '''
+    times the statements run on a connection, see the module docstring
+    '''
+
+    def __init__(
+        self,
+        slow_statement_threshold:float,
+        max_slow_statements:int=sql_statements.SQL_TRACE_MAX_SLOW_STATEMENTS):
+        '''
+        constructor
+
+        :param slow_statement_threshold: statements that take longer than this many seconds are logged with their query plan
+        :param max_slow_statements: how many of the most recent slow statements to keep in `slow_statements`
+        '''
+
+        self.slow_statement_threshold:float = slow_statement_threshold
+
+        # the most recent slow statements, oldest first
+        self.slow_statements:collections.deque[SlowStatement] = collections.deque(maxlen=max_slow_statements)
+
+        # how many `begin()` calls haven't had their `end()` yet, `_get_sqlite3_database_cursor` can be nested
+        # since the lock is reentrant. Statements are only timed when this is above 0
+        self._depth:int = 0
+
+        # the statement that is running right now, and when it started
+        self._current_sql:str|None = None
+        self._current_start_time:float = 0.0
+
+        # the slow statements of the current transaction that still need their query plan
+        self._pending_slow_statements:list[tuple[str, float]] = list()
+
+    def install(self, connection:sqlite3.Connection):
+        '''
+        start getting called for every statement run on the connection
+
+        :param connection: the connection to trace
+        '''
+
+        connection.set_trace_callback(self._on_statement)
+
+    def uninstall(self, connection:sqlite3.Connection):
+        '''
+        stop tracing the connection
+
+        :param connection: the connection that was passed to `install()`
+        '''
+
+        connection.set_trace_callback(None)
+
+    def begin(self):
+        '''
+        start timing statements, called when a transaction starts
+        '''
+
+        self._depth += 1
+
+    def end(self, connection:sqlite3.Connection):
+        '''
+        stop timing statements, called when a transaction ends, and log every slow statement in it with its query plan
+
+        :param connection: the connection the transaction ran on, this runs `EXPLAIN QUERY PLAN` on it
+        '''
+
+        self._depth -= 1
+
+        if self._depth > 0:
+            return
+
+        self._finish_current_statement(time.perf_counter())
+
+        if not self._pending_slow_statements:
+            return
+
+        for iter_sql, iter_duration in self._pending_slow_statements:
+
+            slow_statement = SlowStatement(
+                sql=iter_sql,
+                duration_seconds=iter_duration,
+                query_plan=self._get_query_plan(connection, iter_sql))
+
+            self.slow_statements.append(slow_statement)
+
+            logger.warning("slow SQL statement took `%.4f` seconds: `%s`, query plan:\n%s",
+                iter_duration, iter_sql.strip(), "\n".join(slow_statement.query_plan) or "(none)")
+
+        self._pending_slow_statements.clear()
+
+    def _on_statement(self, sql:str):
+        '''
+        the trace callback, called as each statement starts
+
+        :param sql: the statement, with its parameters filled in
+        '''
+
+        if self._depth <= 0:
+            return
+
+        now = time.perf_counter()
+
+        self._finish_current_statement(now)
+
+        self._current_sql = sql
+        self._current_start_time = now
+
+    def _finish_current_statement(self, now:float):
+        '''
+        stop timing the statement that is running right now, if there is one
+
+        :param now: the value of `time.perf_counter()` when it finished
+        '''
+
+        if self._current_sql is None:
+            return
+
+        duration = now - self._current_start_time
+
+        logger.debug("SQL statement took `%.4f` seconds: `%s`", duration, self._current_sql.strip())
+
+        if duration >= self.slow_statement_threshold:
+            self._pending_slow_statements.append((self._current_sql, duration))
+
+        self._current_sql = None
+
+    def _get_query_plan(self, connection:sqlite3.Connection, sql:str) -> list[str]:
+        '''
+        get the query plan of a statement
+
+        :param connection: the connection to run `EXPLAIN QUERY PLAN` on
+        :param sql: the statement, with its parameters filled in
+        :return: the `detail` column of each row of the plan, indented by its depth, or an empty list if the
+        statement doesn't have a query plan
+        '''
+
+        if not sql.lstrip().upper().startswith(sql_statements.EXPLAINABLE_STATEMENT_KEYWORDS):
+            return list()
+
+        try:
+            plan_rows = connection.execute(sql_statements.EXPLAIN_QUERY_PLAN_PREFIX + sql).fetchall()
+        except sqlite3.Error as e:
+            logger.debug("couldn't get the query plan of `%s`: `%s`", sql.strip(), e)
+            return list()
+
+        # each row has an `id` and the `id` of its parent row, 0 is the top of the plan
+        depth_by_id = {0: -1}
+        result_list = list()
+
+        for iter_id, iter_parent, _, iter_detail in plan_rows:
+
+            depth_by_id[iter_id] = depth_by_id.get(iter_parent, -1) + 1
+            result_list.append(("    " * depth_by_id[iter_id]) + iter_detail)
+
+        return result_list
@@ -1,10 +1,13 @@
-from contextlib import contextmanager
-from http.cookiejar import CookieJar, CookiePolicy, Cookie, request_host
+from contextlib import contextmanager, closing
+from http.cookiejar import CookieJar, CookiePolicy, DefaultCookiePolicy, Cookie, request_host, request_path
 from os import PathLike
 import email.message
+import functools
 import http
+import itertools
 import json
 import logging
+import pathlib
 import sqlite3
 import time
 import typing
@@ -12,9 +15,46 @@ import urllib.request
 
 import publicsuffixlist
 from biscutbox import sql_statements as sql_statements
+from biscutbox import cookie_file_parsers
+from biscutbox import sql_functions
+from biscutbox.background_tasks import BackgroundTaskThread
+from biscutbox.metrics import OperationMetrics, MetricsCallback
+from biscutbox.policy_evaluator import DefaultPolicyEvaluator
+from biscutbox.sql_trace import SqlTracer
+from biscutbox.results import SnapshotResult, EvictionResult, JarStats, DomainCount, ExpiryHistogramBucket, StorageStats, \
+    ChangeSet, SyncResult, MergeResult
 
 logger = logging.getLogger(__name__)
 
+
+class ReadOnlyCookieJarError(Exception):
+    '''
+    raised when a SqliteCookieJar opened with `read_only` or `immutable` is asked to change its cookies, or its
+    database has an older schema that it can't upgrade
+    '''
+
+
+class ChangeLogError(Exception):
+    '''
+    raised when the changes since a `seq` can't be read from a database's change log, because it doesn't have one,
+    or the changes were already pruned. Either way, the replica has to be copied again from scratch
+    '''
+
+
+@functools.cache
+def get_public_suffix_list() -> publicsuffixlist.PublicSuffixList:
+    '''
+    the public suffix list takes a while to parse, so it is only loaded the first time a cookie jar needs it, and
+    then shared by every cookie jar in the process
+
+    :return: the public suffix list
+    '''
+
+    logger.debug("loading the public suffix list")
+
+    return publicsuffixlist.PublicSuffixList()
+
+
 class SqliteCookieJar(CookieJar):
     '''
     a cookiejar that is backed by a SQLite database
@@ -28,7 +68,25 @@ class SqliteCookieJar(CookieJar):
 
         self.close()
 
-    def __init__(self, database_path:PathLike, policy:CookiePolicy|None=None):
+    def __init__(
+        self,
+        database_path:PathLike,
+        policy:CookiePolicy|None=None,
+        in_memory:bool=False,
+        checkpoint_interval:float|None=None,
+        expiry_sweeper:bool=False,
+        expiry_sweep_chunk_size:int=sql_statements.EXPIRY_SWEEP_CHUNK_SIZE,
+        max_cookies_per_domain:int|None=None,
+        max_cookies:int|None=None,
+        track_last_access:bool=False,
+        last_access_flush_interval:float=sql_statements.LAST_ACCESS_FLUSH_INTERVAL,
+        jar_id:str=sql_statements.DEFAULT_JAR_ID,
+        metrics_callback:MetricsCallback|None=None,
+        slow_statement_threshold:float|None=None,
+        lazy_connect:bool=False,
+        read_only:bool=False,
+        immutable:bool=False,
+        change_log:bool=False):
         '''
         constructor
 
@@ -36,13 +94,50 @@ class SqliteCookieJar(CookieJar):
         so it can either be a pathlib.Path like object, or a string. Also, `:memory:` can be passed to
         use a in memory sqlite database.
         :param policy: the CookiePolicy object to use
+        :param in_memory: if true, the database at `database_path` is loaded into an in memory database at
+        `connect()`, and all operations run against that. The in memory database is written back to `database_path`
+        whenever `checkpoint()` is called, and at `close()`. Anything that happened since the last checkpoint is
+        lost if the process exits without calling `close()`.
+        :param checkpoint_interval: only used if `in_memory` is true, if provided, `checkpoint()` will be called
+        every `checkpoint_interval` seconds on a background thread
+        :param expiry_sweeper: if true, a background thread deletes expired cookies, scheduling itself based on
+        when the next cookie expires (between `expiry_sweep_min_interval` and `expiry_sweep_max_interval` seconds)
+        :param expiry_sweep_chunk_size: the maximum number of expired cookies the background thread deletes in
+        a single transaction
+        :param max_cookies_per_domain: if provided, the maximum number of cookies to keep for each registrable
+        domain (for example `example.com`, which includes `a.example.com`). When `set_cookies` goes over this limit,
+        expired cookies for that domain are evicted first, and then the oldest ones.
+        :param max_cookies: if provided, the maximum number of cookies to keep in the whole jar, evicted the same way
+        :param track_last_access: if true, update the `last_accessed` column of every cookie returned for a request.
+        The updates are kept in memory and written out in a single transaction at most once every
+        `last_access_flush_interval` seconds, and at `close()`. Without this, `last_accessed` is when the cookie was set.
+        The capacity limits evict the least recently accessed cookies first.
+        :param last_access_flush_interval: how many seconds to wait in between writing out the pending last access times
+        :param jar_id: the partition of the database that this cookie jar reads and writes, see `partition()`
+        :param metrics_callback: if provided, this is called with a `biscutbox.metrics.OperationMetrics` after every
+        lookup, `set_cookies`, `clear*`, `__iter__` and `__len__`, see `biscutbox.metrics.MetricsCollector`
+        :param slow_statement_threshold: if provided, every SQL statement is timed, and the ones that take longer than this
+        many seconds are logged with their `EXPLAIN QUERY PLAN`, see `biscutbox.sql_trace`. This is meant for diagnosing
+        slow lookups, not for running all the time
+        :param lazy_connect: if true, `connect()` doesn't open the database, it is opened (and the background threads
+        are started) the first time this cookie jar is used instead, so a cookie jar that is opened but never used
+        doesn't touch the database. `sqlite_connection` is None until then
+        :param read_only: if true, the database is opened read only (`mode=ro`), for cookie jars that only send cookies.
+        It has to already exist with the current schema, since no DDL is run, and every method that would change the
+        cookies raises ReadOnlyCookieJarError. It can't be used with `in_memory`, `expiry_sweeper` or `track_last_access`
+        :param immutable: implies `read_only`, and also tells sqlite that nothing else will change the database while
+        it's open (`immutable=1`), so it doesn't take any locks or use the WAL's shared memory file. Only use this for
+        snapshots that nothing writes to, like one made with `snapshot()`, as changes made by other connections may not
+        be seen, or may cause errors
+        :param change_log: if true, `connect()` creates the change log table and the triggers that fill it in, if they
+        don't exist yet, so other cookie jars can copy just the changes with `sync_from()`. The triggers stay in the
+        database, so every connection's changes are logged from then on, whether or not it passes this. The cookies
+        already in the database are logged once when the change log is created. See `changes_since()`
         '''
 
         # call superclass
         super().__init__(policy)
 
-        self._public_suffix_list = publicsuffixlist.PublicSuffixList()
-
         # python's cookiejar / cookie policy implementation is just updating this class instance variable _now
         # in various spots to check for expiry, rather than you know just using `time.time()`, and now
         # we have to worry about keeping these in sync?
@@ -54,12 +149,83 @@ class SqliteCookieJar(CookieJar):
         self.sqlite_connection:sqlite3.Connection|None = None
 
         if not database_path:
-            raise ArgumentException(datab)
+            raise ValueError("database_path cannot be empty")
+
+        if in_memory and database_path == sql_statements.IN_MEMORY_DATABASE_PATH:
+            raise ValueError("`in_memory` needs a database_path on disk to load from and checkpoint to")
+
+        self.immutable:bool = immutable
+        self.read_only:bool = read_only or immutable
+
+        if self.read_only:
+            if database_path == sql_statements.IN_MEMORY_DATABASE_PATH:
+                raise ValueError("`read_only` needs an existing database on disk")
+
+            if in_memory or expiry_sweeper or track_last_access:
+                raise ValueError("`read_only` can't be used with `in_memory`, `expiry_sweeper` or `track_last_access`")
+
+        self.in_memory:bool = in_memory
+        self.checkpoint_interval:float|None = checkpoint_interval
+        self._checkpoint_thread:BackgroundTaskThread|None = None
+
+        self.expiry_sweeper:bool = expiry_sweeper
+        self.expiry_sweep_chunk_size:int = expiry_sweep_chunk_size
+        self.expiry_sweep_min_interval:float = sql_statements.EXPIRY_SWEEP_MIN_INTERVAL
+        self.expiry_sweep_max_interval:float = sql_statements.EXPIRY_SWEEP_MAX_INTERVAL
+        self._expiry_sweeper_thread:BackgroundTaskThread|None = None
+        # the unix timestamp of the next scheduled sweep, so `set_cookies` knows if it needs to wake the sweeper up
+        self._next_expiry_sweep_time:float = 0
+
+        self.max_cookies_per_domain:int|None = max_cookies_per_domain
+        self.max_cookies:int|None = max_cookies
+
+        self.track_last_access:bool = track_last_access
+        self.last_access_flush_interval:float = last_access_flush_interval
+        # cookie row id -> the unix timestamp it was last returned for a request, that hasn't been written out yet
+        self._pending_last_access:dict[int, int] = dict()
+        self._last_access_flush_time:float = time.monotonic()
+
+        self.jar_id:str = jar_id
+
+        self.metrics_callback:MetricsCallback|None = metrics_callback
+
+        self.slow_statement_threshold:float|None = slow_statement_threshold
+        self.sql_tracer:SqlTracer|None = None
+
+        self.lazy_connect:bool = lazy_connect
+        # whether `connect()` was called with `lazy_connect`, and the database hasn't been opened yet
+        self._connect_pending:bool = False
+
+        self.change_log:bool = change_log
+
+    @property
+    def _public_suffix_list(self) -> publicsuffixlist.PublicSuffixList:
+        '''
+        the public suffix list, see `get_public_suffix_list()`
+        '''
+
+        return get_public_suffix_list()
 
     @contextmanager
-    def _get_sqlite3_database_cursor(self):
+    def _get_sqlite3_database_cursor(self, operation_metrics:OperationMetrics|None=None):
+        '''
+        get a cursor in a new transaction, which is committed if the block doesn't raise, and rolled back if it does
+
+        :param operation_metrics: if provided, the transaction and commit are counted here
+        '''
+
+        self._connect_if_pending()
+
+        # the connection is shared with the background threads, so only one
+        # thread gets to use it at a time. This reuses the lock that
+        # http.cookiejar.CookieJar already holds in `add_cookie_header` and `extract_cookies`
+        with self._cookies_lock, self.sqlite_connection:
 
-        with self.sqlite_connection:
+            if operation_metrics is not None:
+                operation_metrics.transactions += 1
+
+            if self.sql_tracer:
+                self.sql_tracer.begin()
 
             cur = None
             try:
@@ -73,11 +239,45 @@ class SqliteCookieJar(CookieJar):
             else:
                 logger.debug("sqlite3 database transaction committing")
                 self.sqlite_connection.commit()
+
+                if operation_metrics is not None:
+                    operation_metrics.commits += 1
             finally:
                 if cur:
                     logger.debug("sqlite3 cursor closing")
                     cur.close()
 
+                if self.sql_tracer:
+                    self.sql_tracer.end(self.sqlite_connection)
+
+    @contextmanager
+    def _measure_operation(self, operation:str):
+        '''
+        time an operation and send its metrics to `metrics_callback` once it's done, whether or not it raises.
+        The OperationMetrics this yields should be passed to `_get_sqlite3_database_cursor` and have its
+        row counts filled in
+
+        :param operation: the name of the operation
+        '''
+
+        operation_metrics = OperationMetrics(operation=operation, jar_id=self.jar_id)
+        start_time = time.perf_counter()
+
+        try:
+            yield operation_metrics
+        except Exception:
+            operation_metrics.error = True
+            raise
+        finally:
+            operation_metrics.duration_seconds = time.perf_counter() - start_time
+
+            if self.metrics_callback is not None:
+                try:
+                    self.metrics_callback(operation_metrics)
+                except Exception:
+                    # a broken exporter shouldn't break the cookie jar
+                    logger.exception("metrics callback raised an exception for operation `%s`", operation)
+
     def _get_changed_rows(self, cursor:sqlite3.Cursor) -> int:
         '''
         get the number of changed rows
@@ -91,283 +291,1269 @@ class SqliteCookieJar(CookieJar):
 
     def connect(self):
         '''
-        connects to the database
+        connects to the database, or if this cookie jar was created with `lazy_connect`, waits until it is first used
         '''
 
         if not self.database_path:
             raise Exception("database_path cannot be None")
 
-        logger.debug("Connecting to the sqlite database at the path `%s`", self.database_path)
-        self.sqlite_connection = sqlite3.connect(database=self.database_path)
-        self.sqlite_connection.row_factory = sqlite3.Row
+        if self.lazy_connect:
+            logger.debug("waiting until the cookie jar is used to connect to the sqlite database at the path `%s`",
+                self.database_path)
+
+            self._connect_pending = True
+            return
+
+        self._open_connection()
+
+    def _connect_if_pending(self):
+        '''
+        open the database if `connect()` was called with `lazy_connect` and it hasn't been opened yet
+        '''
+
+        if not self._connect_pending:
+            return
+
+        with self._cookies_lock:
+
+            # another thread may have opened it while we were waiting for the lock
+            if self._connect_pending:
+                self._connect_pending = False
+                self._open_connection()
+
+    def _open_connection(self):
+        '''
+        open the database, create or upgrade the tables and start the background threads
+        '''
+
+        logger.debug("Connecting to the sqlite database at the path `%s`", self.database_path)
+
+        # `check_same_thread` is off since the background threads share this connection, access to it
+        # is serialized by `_get_sqlite3_database_cursor`
+        if self.in_memory:
+            self.sqlite_connection = sqlite3.connect(
+                database=sql_statements.IN_MEMORY_DATABASE_PATH, check_same_thread=False)
+
+            logger.debug("loading the sqlite database at the path `%s` into memory", self.database_path)
+            with closing(sqlite3.connect(database=self.database_path)) as disk_connection:
+                disk_connection.backup(self.sqlite_connection)
+        elif self.read_only:
+            uri_query = sql_statements.IMMUTABLE_URI_QUERY if self.immutable else sql_statements.READ_ONLY_URI_QUERY
+            database_uri = f"{pathlib.Path(self.database_path).absolute().as_uri()}?{uri_query}"
+
+            logger.debug("opening the sqlite database read only with the URI `%s`", database_uri)
+            self.sqlite_connection = sqlite3.connect(database=database_uri, uri=True, check_same_thread=False)
+        else:
+            self.sqlite_connection = sqlite3.connect(database=self.database_path, check_same_thread=False)
+
+        self.sqlite_connection.row_factory = sqlite3.Row
+
+        self.sqlite_connection.create_function(
+            sql_statements.BASE_DOMAIN_FUNCTION_NAME, 1, self._get_base_domain, deterministic=True)
+        sql_functions.register_functions(self.sqlite_connection)
+
+        if self.slow_statement_threshold is not None:
+            logger.info("tracing SQL statements, logging the ones that take longer than `%s` seconds",
+                self.slow_statement_threshold)
+
+            self.sql_tracer = SqlTracer(slow_statement_threshold=self.slow_statement_threshold)
+            self.sql_tracer.install(self.sqlite_connection)
+
+        if self.read_only:
+            logger.info("Connected to the sqlite database at the path `%s` read only", self.database_path)
+
+            try:
+                self._check_read_only_schema_version()
+            except Exception:
+                self.sqlite_connection.close()
+                self.sqlite_connection = None
+                raise
+
+            return
+
+        # turn on foreign keys and WAL
+        with self._get_sqlite3_database_cursor() as cur:
+            cur.execute(sql_statements.TURN_FOREIGN_KEYS_ON)
+            cur.execute(sql_statements.TURN_WAL_MODE_ON)
+            wal_result = cur.fetchone()
+
+            wal_result_key = "journal_mode"
+            if wal_result_key in wal_result.keys():
+                logger.debug("WAL pragma result: `%s`", wal_result[wal_result_key])
+            else:
+                logger.warning("couldn't find the key `%s` in the sqlite3.Row object returned after `%s`",
+                    wal_result_key, sql_statements.TURN_WAL_MODE_ON)
+
+        logger.info("Connected to the sqlite database at the path `%s`", self.database_path)
+
+        self._create_tables()
+
+        if self.change_log:
+            self._create_change_log()
+
+        if self.in_memory and self.checkpoint_interval:
+            self._checkpoint_thread = BackgroundTaskThread(
+                name="biscutbox-checkpoint",
+                task=self._checkpoint_task,
+                initial_delay=self.checkpoint_interval)
+            self._checkpoint_thread.start()
+
+        if self.expiry_sweeper:
+            self._expiry_sweeper_thread = BackgroundTaskThread(
+                name="biscutbox-expiry-sweeper",
+                task=self._expiry_sweep_task,
+                initial_delay=0)
+            self._expiry_sweeper_thread.start()
+
+    def checkpoint(self):
+        '''
+        if this cookie jar was created with `in_memory`, copy the in memory database back to `database_path`
+        using the sqlite backup API, otherwise this does nothing since every operation already goes to disk.
+
+        see https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.backup
+        '''
+
+        if not self.in_memory:
+            logger.debug("checkpoint called on a cookie jar that isn't in memory, ignoring")
+            return
+
+        if self.sqlite_connection is None:
+            logger.debug("checkpoint called on a cookie jar that hasn't opened its database yet, ignoring")
+            return
+
+        start_time = time.perf_counter()
+
+        with self._cookies_lock, closing(sqlite3.connect(database=self.database_path)) as disk_connection:
+            self.sqlite_connection.backup(disk_connection)
+
+        logger.debug("checkpoint to `%s` finished in `%s` seconds", self.database_path, time.perf_counter() - start_time)
+
+    def _checkpoint_task(self) -> float:
+        '''
+        the task that the background checkpoint thread runs
+
+        :return: the number of seconds until the next checkpoint
+        '''
+
+        self.checkpoint()
+        return self.checkpoint_interval
+
+    def snapshot(
+        self,
+        destination_path:PathLike,
+        pages_per_step:int=sql_statements.SNAPSHOT_PAGES_PER_STEP,
+        sleep_seconds:float=sql_statements.SNAPSHOT_SLEEP_SECONDS,
+        progress:typing.Callable[[int, int], None]|None=None) -> SnapshotResult:
+        '''
+        make a consistent copy of this cookie jar's database at `destination_path` while it is still in use,
+        using the sqlite backup API. Any existing database at `destination_path` is overwritten.
+
+        The copy is done `pages_per_step` pages at a time, sleeping `sleep_seconds` in between each step,
+        so other threads and processes writing to the database only ever wait on a single step. Changes made
+        through this cookie jar during the snapshot are included in it, changes made by other connections
+        cause sqlite to restart the copy.
+
+        see https://www.sqlite.org/backup.html
+
+        :param destination_path: where to write the snapshot
+        :param pages_per_step: how many pages to copy at a time
+        :param sleep_seconds: how long to sleep in between each step
+        :param progress: if provided, called after each step with the number of pages copied so far and the
+        total number of pages
+        :return: a SnapshotResult with the total number of pages, the number of steps and how long it took
+        '''
+
+        if pages_per_step <= 0:
+            raise ValueError(f"pages_per_step must be positive, got `{pages_per_step}`")
+
+        steps = 0
+        total_pages = 0
+
+        def _on_backup_progress(status:int, remaining:int, total:int):
+            nonlocal steps, total_pages
+
+            steps += 1
+            total_pages = total
+
+            logger.debug("snapshot to `%s`: copied `%s` of `%s` pages", destination_path, total - remaining, total)
+
+            if progress:
+                progress(total - remaining, total)
+
+        self._connect_if_pending()
+
+        logger.debug("starting snapshot to `%s`", destination_path)
+
+        start_time = time.perf_counter()
+
+        # this intentionally doesn't go through `_get_sqlite3_database_cursor`, as holding the lock for the whole
+        # backup would block every other thread using this jar until it is done. sqlite serializes access to the
+        # connection for each step.
+        with closing(sqlite3.connect(database=destination_path)) as destination_connection:
+            self.sqlite_connection.backup(
+                destination_connection,
+                pages=pages_per_step,
+                progress=_on_backup_progress,
+                sleep=sleep_seconds)
+
+        duration_seconds = time.perf_counter() - start_time
+
+        logger.info("snapshot to `%s` finished, copied `%s` pages in `%s` steps in `%s` seconds",
+            destination_path, total_pages, steps, duration_seconds)
+
+        return SnapshotResult(
+            destination_path=destination_path,
+            total_pages=total_pages,
+            steps=steps,
+            duration_seconds=duration_seconds)
+
+    def partition(self, jar_id:str, policy:CookiePolicy|None=None) -> "SqliteCookieJarPartition":
+        '''
+        get a handle to another logical cookie jar stored in the same database, whose cookies are kept
+        apart from this one's by the `jar_id` column.
+
+        The handle shares this cookie jar's connection, page cache, indexes and public suffix list, so it is
+        cheap to create one per identity / session, and creating one doesn't touch the database. Its
+        `clear()`, `clear_session_cookies()` and `clear_expired_cookies()` only affect its own partition.
+
+        :param jar_id: the partition to use, any string other than this cookie jar's own `jar_id`
+        :param policy: the CookiePolicy object for the handle to use, defaults to this cookie jar's policy
+        :return: the handle, which is a SqliteCookieJar
+        '''
+
+        return SqliteCookieJarPartition(parent=self, jar_id=jar_id, policy=policy)
+
+    def jar_ids(self) -> list[str]:
+        '''
+        :return: every `jar_id` that has at least one cookie stored in this database, see `partition()`
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.SELECT_ALL_JAR_IDS_STATEMENT)
+            return [x["jar_id"] for x in cursor.fetchall()]
+
+
+    def _check_read_only_schema_version(self):
+        '''
+        a read only cookie jar can't create or upgrade the tables, so make sure the database already has them
+
+        :raises ReadOnlyCookieJarError: if the database's schema is older than the current version
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.GET_SCHEMA_VERSION)
+            schema_version = cursor.fetchone()[sql_statements.GET_SCHEMA_VERSION_KEY]
+
+        if schema_version < sql_statements.SCHEMA_VERSION:
+            raise ReadOnlyCookieJarError(f"the database at `{self.database_path}` has the schema version "
+                f"`{schema_version}`, open it without `read_only` first to upgrade it to version `{sql_statements.SCHEMA_VERSION}`")
+
+        elif schema_version > sql_statements.SCHEMA_VERSION:
+            logger.warning("the database's schema version `%s` is newer than the version `%s` that we know about",
+                schema_version, sql_statements.SCHEMA_VERSION)
+
+    def _raise_if_read_only(self, operation:str):
+        '''
+        :param operation: the name of the method that would change the cookies
+        :raises ReadOnlyCookieJarError: if this cookie jar was opened with `read_only` or `immutable`
+        '''
+
+        if self.read_only:
+            raise ReadOnlyCookieJarError(f"can't call `{operation}` on a cookie jar opened read only")
+
+    def _create_tables(self):
+        '''
+        create the sqlite3 tables if they don't already exist, or upgrade them to the current
+        schema version if they were created by an older version of biscutbox
+        '''
+
+        logger.debug("running create table statement")
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.GET_SCHEMA_VERSION)
+            schema_version = cursor.fetchone()[sql_statements.GET_SCHEMA_VERSION_KEY]
+
+            # the schema version is only set once every table, trigger and index exists, so there is nothing to do
+            if schema_version == sql_statements.SCHEMA_VERSION:
+                logger.debug("the database's schema is already at version `%s`, not running any DDL", schema_version)
+                return
+
+            cursor.execute(sql_statements.SELECT_COOKIE_TABLE_EXISTS)
+            table_exists = cursor.fetchone() is not None
+
+            if not table_exists:
+                # create tables, this is always the latest version of the schema
+                cursor.execute(sql_statements.CREATE_TABLE_STATEMENT_COOKIE_TABLE)
+
+                for iter_statement in sql_statements.CREATE_COUNT_TABLES_AND_TRIGGERS_STATEMENTS:
+                    cursor.execute(iter_statement)
+
+            elif schema_version > sql_statements.SCHEMA_VERSION:
+                logger.warning("the database's schema version `%s` is newer than the version `%s` that we know about",
+                    schema_version, sql_statements.SCHEMA_VERSION)
+
+            else:
+                for iter_version in range(schema_version + 1, sql_statements.SCHEMA_VERSION + 1):
+                    logger.info("upgrading the database schema from version `%s` to version `%s`",
+                        iter_version - 1, iter_version)
+
+                    for iter_statement in sql_statements.SCHEMA_MIGRATIONS[iter_version]:
+                        cursor.execute(iter_statement)
+
+            # create indexes
+            cursor.execute(sql_statements.CREATE_COOKIE_TABLE_DOMAIN_INDEX_STATEMENT)
+            cursor.execute(sql_statements.CREATE_COOKIE_TABLE_BASE_DOMAIN_INDEX_STATEMENT)
+            cursor.execute(sql_statements.CREATE_COOKIE_TABLE_EXPIRES_INDEX_STATEMENT)
+            cursor.execute(sql_statements.CREATE_COOKIE_TABLE_KEY_INDEX_STATEMENT)
+
+            if schema_version < sql_statements.SCHEMA_VERSION:
+                cursor.execute(sql_statements.SET_SCHEMA_VERSION.format(sql_statements.SCHEMA_VERSION))
+
+        logger.debug("create table statement finished")
+
+
+    def _create_change_log(self):
+        '''
+        create the change log table and its triggers if they don't already exist, see `change_log`
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.SELECT_CHANGE_LOG_TABLE_EXISTS)
+            table_exists = cursor.fetchone() is not None
+
+            for iter_statement in sql_statements.CREATE_CHANGE_LOG_TABLE_AND_TRIGGERS_STATEMENTS:
+                cursor.execute(iter_statement)
+
+            if not table_exists:
+                cursor.execute(sql_statements.BACKFILL_CHANGE_LOG_STATEMENT)
+                logger.info("created the change log, logged the `%s` cookies already in the database",
+                    self._get_changed_rows(cursor))
+
+    def changes_since(self, since_seq:int=0) -> ChangeSet:
+        '''
+        get the cookies in this cookie jar's partition that changed after `since_seq` in the change log, see `change_log`
+
+        :param since_seq: the `last_seq` of the previous ChangeSet, or 0 to get every cookie
+        :return: a ChangeSet with the keys that changed and their current cookies, all read in one transaction
+        :raises ChangeLogError: if the database doesn't have a change log, or the changes after `since_seq` were pruned
+        '''
+
+        with self._measure_operation("changes_since") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            cursor.execute(sql_statements.SELECT_CHANGE_LOG_TABLE_EXISTS)
+            if cursor.fetchone() is None:
+                raise ChangeLogError(f"the database at `{self.database_path}` doesn't have a change log, "
+                    "connect to it with `change_log=True` first")
+
+            cursor.execute(sql_statements.SELECT_CHANGE_LOG_LAST_SEQ_STATEMENT)
+            last_seq = cursor.fetchone()["last_seq"]
+
+            cursor.execute(sql_statements.SELECT_CHANGE_LOG_FIRST_SEQ_STATEMENT)
+            first_seq = cursor.fetchone()["first_seq"]
+
+            if since_seq > last_seq:
+                raise ChangeLogError(f"`since_seq` `{since_seq}` is after the last `seq` `{last_seq}` in the change log "
+                    f"of the database at `{self.database_path}`, is it a different database?")
+
+            # `seq` goes up by one for every row, so if the first row left isn't right after `since_seq`, the ones
+            # in between were pruned
+            if since_seq < last_seq and (first_seq is None or first_seq > since_seq + 1):
+                raise ChangeLogError(f"the changes after `since_seq` `{since_seq}` were pruned from the change log "
+                    f"of the database at `{self.database_path}`")
+
+            param_dict = {"jar_id": self.jar_id, "since_seq": since_seq, "last_seq": last_seq}
+
+            cursor.execute(sql_statements.SELECT_CHANGED_COOKIE_KEYS_STATEMENT, param_dict)
+            changed_keys = [(x["domain"], x["path"], x["name"]) for x in cursor.fetchall()]
+
+            cursor.execute(sql_statements.SELECT_CHANGED_COOKIES_STATEMENT, param_dict)
+            row_list = cursor.fetchall()
+
+            operation_metrics.rows_fetched += len(row_list)
+            cookie_list = [self._cookie_from_sqlite_row(x) for x in row_list]
+            operation_metrics.cookies_returned += len(cookie_list)
+
+        logger.debug("`%s` keys changed between the `seq` `%s` and `%s`", len(changed_keys), since_seq, last_seq)
+
+        return ChangeSet(jar_id=self.jar_id, since_seq=since_seq, last_seq=last_seq,
+            changed_keys=changed_keys, cookies=cookie_list)
+
+    def sync_from(self, source:"SqliteCookieJar|ChangeSet", since_seq:int=0) -> SyncResult:
+        '''
+        apply the changes another cookie jar made after `since_seq` to this cookie jar's partition. Every cookie with a
+        key that changed is deleted, and then the source's current cookies for those keys are inserted, in one
+        transaction, so applying the same changes twice does nothing
+
+        the usual way to use this is to keep the `last_seq` of the result, and pass it as `since_seq` the next time
+
+        :param source: the cookie jar to copy the changes from, which has to have a change log, or a ChangeSet that
+        was already read from one with `changes_since()`
+        :param since_seq: only used if `source` is a cookie jar, the `last_seq` of the previous sync, or 0 to copy
+        every cookie
+        :return: a SyncResult with how many cookies were deleted and inserted, and the `last_seq` to sync from next time
+        :raises ChangeLogError: if the changes can't be read from the source, see `changes_since()`
+        '''
+
+        self._raise_if_read_only("sync_from")
+
+        change_set = source if isinstance(source, ChangeSet) else source.changes_since(since_seq)
+
+        with self._measure_operation("sync_from") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            cursor.executemany(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN_PATH_NAME,
+                [{"jar_id": self.jar_id, "domain": x[0], "path": x[1], "name": x[2]} for x in change_set.changed_keys])
+
+            # for `executemany`, this is the total for every set of parameters
+            cookies_deleted = max(cursor.rowcount, 0)
+
+            self._insert_cookies(cursor, change_set.cookies)
+
+            eviction_result = self._enforce_capacity_limits(
+                cursor, {self._get_base_domain(x.domain) for x in change_set.cookies})
+
+        logger.debug("synced `%s` changed keys up to the `seq` `%s`", len(change_set.changed_keys), change_set.last_seq)
+
+        return SyncResult(last_seq=change_set.last_seq, changed_keys=len(change_set.changed_keys),
+            cookies_deleted=cookies_deleted, cookies_inserted=len(change_set.cookies), eviction=eviction_result)
+
+    def prune_change_log(self, up_to_seq:int) -> int:
+        '''
+        delete the change log rows up to and including `up_to_seq`, for every partition. Only do this once every
+        replica has synced past `up_to_seq`, the ones that haven't will get a ChangeLogError and have to start over
+
+        :param up_to_seq: the lowest `last_seq` that every replica has synced to
+        :return: how many rows were deleted
+        '''
+
+        self._raise_if_read_only("prune_change_log")
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.DELETE_CHANGE_LOG_UP_TO_SEQ_STATEMENT, {"up_to_seq": up_to_seq})
+            deleted_rows = self._get_changed_rows(cursor)
+
+        logger.debug("pruned `%s` rows from the change log, up to the `seq` `%s`", deleted_rows, up_to_seq)
+
+        return deleted_rows
+
+    def _get_default_policy_filter_params(self, request:urllib.request.Request) -> dict|None:
+        '''
+        if the policy is a DefaultCookiePolicy whose path, secure and expiry checks aren't overridden, get the
+        parameters of `sql_statements.DEFAULT_POLICY_FILTER`, which does those checks in the query instead
+
+        :param request: the request being made
+        :return: the parameters, or None if the policy's checks have to be done in python
+        '''
+
+        if not isinstance(self._policy, DefaultCookiePolicy):
+            return None
+
+        policy_class = type(self._policy)
+
+        if any(getattr(policy_class, x) is not getattr(DefaultCookiePolicy, x) for x in sql_statements.DEFAULT_POLICY_SQL_CHECKS):
+            return None
+
+        return {
+            "now": self._now,
+            "request_path": request_path(request),
+            "request_is_secure": request.type in self._policy.secure_protocols,
+        }
+
+    def _get_allowed_cookie_domains(self, hostname:str, private_suffix:str) -> list[str]|None:
+        '''
+        if the policy is a DefaultCookiePolicy whose domain checks aren't overridden, get the cookie domains that can be
+        returned for a request to `hostname` and that the policy's `blocked_domains` and `allowed_domains` don't reject
+
+        a cookie can only be returned for a request if its domain is the request's host or one of the host's parent
+        domains (with or without a leading dot), so there are only a handful of domains to check, rather than one
+        for every row
+
+        :param hostname: the host of the request, see `http.cookiejar.request_host`
+        :param private_suffix: the registrable domain of `hostname`
+        :return: the allowed cookie domains, or None if either the policy's domain checks have to be done in python,
+        or none of the domains are rejected
+        '''
+
+        if not isinstance(self._policy, DefaultCookiePolicy):
+            return None
+
+        if self._policy.blocked_domains() == () and self._policy.allowed_domains() is None:
+            return None
+
+        policy_class = type(self._policy)
+
+        if any(getattr(policy_class, x) is not getattr(DefaultCookiePolicy, x) for x in sql_statements.DEFAULT_POLICY_DOMAIN_CHECKS):
+            return None
+
+        if hostname != private_suffix and not hostname.endswith(f".{private_suffix}"):
+            return None
+
+        # the host and every parent domain of it, down to the registrable domain
+        label_list = hostname.split(".")
+        number_of_labels = len(private_suffix.split("."))
+        domain_list = [".".join(label_list[i:]) for i in range(len(label_list) - number_of_labels + 1)]
+
+        candidate_list = list(itertools.chain.from_iterable((x, f".{x}") for x in domain_list))
+
+        allowed_list = [x for x in candidate_list
+            if not self._policy.is_blocked(x) and not self._policy.is_not_allowed(x)]
+
+        if len(allowed_list) == len(candidate_list):
+            return None
+
+        return allowed_list
+
+    def _does_cookie_pass_non_domain_policies(
+        self,
+        cookie:Cookie,
+        request:urllib.request.Request,
+        default_policy_filtered:bool=False) -> bool:
+        '''
+        runs the various checks against the cookie policy except the domain check
+
+        :param cookie: the cookie to check
+        :param request: the request being made
+        :param default_policy_filtered: whether the cookie was read with `sql_statements.DEFAULT_POLICY_FILTER`, so only
+        the checks in `sql_statements.DEFAULT_POLICY_PYTHON_CHECKS` are left to do
+        :return: whether the cookie and request pass the policies
+        '''
+
+        if default_policy_filtered:
+            for iter_check in sql_statements.DEFAULT_POLICY_PYTHON_CHECKS:
+                if not getattr(self._policy, f"return_ok_{iter_check}")(cookie, request):
+                    logger.debug("cookie with name `%s`, domain `%s`, and request `%s` failed the `%s` policy",
+                        cookie.name, cookie.domain, request.full_url, iter_check)
+                    return False
+
+            return True
+
+        if not self._policy.path_return_ok(cookie.path, request):
+            logger.debug("cookie with name `%s`, domain `%s`, and request `%s` failed the path policy",
+                cookie.name, cookie.domain, request.full_url)
+            return False
+
+        if not self._policy.return_ok(cookie, request):
+            logger.debug("cookie with name `%s`, domain `%s`, and request `%s` failed the return_ok policies",
+                cookie.name, cookie.domain, request.full_url)
+            return False
+
+        return True
+
+    def _does_domain_pass_policy(self, domain:str, request:urllib.request.Request) -> bool:
+        '''
+        do the domain checks against the cookie policy
+
+        :param domain: the domain to check
+        :param request: the request to check
+        :return: whether the domain passes the policy
+        '''
+        if not self._policy.domain_return_ok(domain, request):
+            logger.debug("domain `%s` failed policy, returning nothing", domain)
+            return False
+
+        return True
+
+    def _check_cookies_against_policy(
+        self,
+        cookie_list:list[Cookie],
+        request:urllib.request.Request,
+        check_domain:bool,
+        default_policy_filtered:bool) -> list[bool]:
+        '''
+        check a list of cookies against the cookie policy, with a `DefaultPolicyEvaluator` if the policy allows it,
+        so the request is only parsed once, otherwise by calling the policy for each cookie
+
+        :param cookie_list: the cookies to check
+        :param request: the request being made
+        :param check_domain: whether to do the domain check for each cookie
+        :param default_policy_filtered: whether the cookies were read with `sql_statements.DEFAULT_POLICY_FILTER`
+        :return: whether each cookie passes the policies, in the same order as `cookie_list`
+        '''
+
+        if policy_evaluator := DefaultPolicyEvaluator.for_policy(self._policy, request):
+            return policy_evaluator.check_cookies(cookie_list, check_domain, default_policy_filtered)
+
+        return [(not check_domain or self._does_domain_pass_policy(x.domain, request))
+            and self._does_cookie_pass_non_domain_policies(x, request, default_policy_filtered)
+            for x in cookie_list]
+
+    @typing.override
+    def _cookies_for_domain(self, domain:str, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method , that returns the cookies for a given domain
+
+        all overrides of private methods are fragile and are prone to breakage if the internals of http.cookiejar.CookeJar change
+
+        this performs database I/O by looking up cookies for the given domain
+
+        :param domain: the domain to get the cookies from
+        :param request: The request object (usually a urllib.request.Request instance) must support the method get_full_url()
+        and the attributes host, unverifiable and origin_req_host, as documented by urllib.request. The request is used to set
+        default values for cookie-attributes as well as for checking that the cookie is allowed to be set.
+        :return: a list of Cookie objects that match this domain, or an empty list if the cookie policy rejects this domain
+        (see CookiePolicy.domain_return_ok)
+
+        '''
+
+        # update the semi global 'now' variable to check for expiry
+        self._policy._now = self._now = int(time.time())
+
+
+        # check the domain policy manually first
+        if not self._does_domain_pass_policy(domain, request):
+            return list()
+
+        logger.debug("Checking the domain `%s` for cookies to return for request `%s`", domain, request.full_url)
+
+        # make the database query for all cookies under this domain, then we will filter them
+        # out based on the policies
+        with self._measure_operation("_cookies_for_domain") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            param_dict = {"jar_id": self.jar_id, "domain": domain}
+
+            # skip the rows that would fail the path, secure and expiry checks in the query itself if we can
+            if default_policy_filter_params := self._get_default_policy_filter_params(request):
+                cursor.execute(
+                    sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_DEFAULT_POLICY_STATEMENT,
+                    param_dict | default_policy_filter_params)
+            else:
+                cursor.execute(
+                    sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_STATEMENT,
+                    param_dict)
+
+            cookie_list = [self._cookie_from_sqlite_row(x) for x in cursor.fetchall()]
+            operation_metrics.rows_fetched = len(cookie_list)
+
+            # check the cookie policy for all of the rows at once, the domain was already checked above
+            # the default policy will call `path_return_ok` which checks the full URL on the `request` parameter
+            # and 'return_ok" checks `return_ok_port`, `return_ok_verifiability`, `return_ok_secure`,
+            # `return_ok_expires`, `return_ok_domain`, `return_ok_version`
+            passed_list = self._check_cookies_against_policy(
+                cookie_list, request, check_domain=False, default_policy_filtered=default_policy_filter_params is not None)
+
+            result_list = list(itertools.compress(cookie_list, passed_list))
+
+            operation_metrics.cookies_returned = len(result_list)
+
+        logger.debug("returning `%s` cookies", len(result_list))
+
+        return result_list
+
+    @typing.override
+    def _cookies_for_request(self, request:urllib.request.Request) -> list[Cookie]:
+        '''
+        override of a private method , that returns the cookies for a given domain
+
+        all overrides of private methods are fragile and are prone to breakage if the internals of http.cookiejar.CookeJar change
+
+        this performs database I/O by looking up cookies for the given domain
+
+        this will return a list of cookies to return for a given request
+
+        :param request: the Request that we want the cookies for
+        :return: a list of Cookie objects
+
+        '''
+
+
+        # so, the original implementation of this seems to just iterate over the cookies dictionary
+        # and then call `_cookies_for_domain` on each domain. That is incredibly slow, however this is accurate
+        # since there are various cookie rules around cookies and domains, like a cookie for domain
+        # `.twitter.com` versus `twitter.com` versus `a.twitter.com`.
+        # here, we are utilizing the index on the `base_domain` column to get every cookie under the request's
+        # registrable domain, and the `biscutbox_domain_match` SQL function (see `biscutbox.sql_functions`) to skip
+        # the ones for other subdomains, and then we do the fine grained filtering with the cookie policy.
+
+
+        # get all the cookies that match the glob of the "private suffix", aka
+        # the lowest level domain that a user can register
+        # this is extremely complicated so we use a library for this, see https://publicsuffix.org
+        # a.example.com -> private suffix is example.com
+        # a.example.co.uk -> private suffix is example.co.uk
+        # we also need to check to make sure that we aren't returning cookies for top level domains
+        # as that is bad form
+
+        # update the semi global 'now' variable to check for expiry, `add_cookie_header` does this too but
+        # this can be called on its own
+        self._policy._now = self._now = int(time.time())
+
+        hostname = request_host(request)
+        private_suffix = self._public_suffix_list.privatesuffix(hostname)
+
+        if not private_suffix or self._public_suffix_list.is_public(private_suffix):
+            # either invalid or a public suffix (like `com`) which means we we don't want to return anything
+            # (don't want websites setting a cookie for a TLD and having it be sent to every website under
+            # that TLD)
+
+            logger.debug("for the hostname `%s`, the private suffix `%s` is either None or a public suffix, returning empty list",
+                hostname, private_suffix)
+
+            return list()
+
+        # skip the cookies for domains that the policy blocks, or doesn't allow, in the query itself if we can
+        allowed_cookie_domains = self._get_allowed_cookie_domains(hostname, private_suffix)
+
+        if allowed_cookie_domains == []:
+
+            logger.debug("the policy doesn't allow any of the cookie domains for the hostname `%s`, returning empty list",
+                hostname)
+
+            return list()
+
+        accessed_id_list = list()
+
+
+        # make the database query for all cookies under this domain, then we will filter them
+        # out based on the policies
+        with self._measure_operation("_cookies_for_request") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            logger.debug("_cookie_for_request with full url `%s`, searching for cookies under the base domain `%s`",
+                hostname, private_suffix)
+
+            param_dict = {"jar_id": self.jar_id, "base_domain": private_suffix, "request_host": hostname}
+
+            if allowed_cookie_domains is not None:
+                param_dict["cookie_domains"] = json.dumps(allowed_cookie_domains)
+
+            # skip the rows that would fail the path, secure and expiry checks in the query itself if we can
+            if default_policy_filter_params := self._get_default_policy_filter_params(request):
+                param_dict |= default_policy_filter_params
+
+            cursor.execute(
+                sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_STATEMENTS[
+                    (allowed_cookie_domains is not None, default_policy_filter_params is not None)],
+                param_dict)
+
+
+            row_list = cursor.fetchall()
+            cookie_list = [self._cookie_from_sqlite_row(x) for x in row_list]
+            operation_metrics.rows_fetched = len(cookie_list)
+
+            # check the domain and cookie policies for all of the rows at once
+            # the default policy will call `path_return_ok` which checks the full URL on the `request` parameter
+            # and 'return_ok" checks `return_ok_port`, `return_ok_verifiability`, `return_ok_secure`,
+            # `return_ok_expires`, `return_ok_domain`, `return_ok_version`
+            passed_list = self._check_cookies_against_policy(
+                cookie_list, request, check_domain=True, default_policy_filtered=default_policy_filter_params is not None)
+
+            result_list = list(itertools.compress(cookie_list, passed_list))
+
+            if self.track_last_access:
+                accessed_id_list = [x["id"] for x in itertools.compress(row_list, passed_list)]
+
+            operation_metrics.cookies_returned = len(result_list)
+
+        if accessed_id_list:
+            self._record_last_access(accessed_id_list)
+
+        logger.debug("returning `%s` cookies", len(result_list))
+
+        return result_list
+
+    def _cookies_for_base_domain(self, base_domain:str) -> list[Cookie]:
+        '''
+        get every cookie under a registrable domain, for any host under it, without checking them against
+        the cookie policy or updating their last access time
+
+        :param base_domain: the registrable domain, like `example.com`
+        :return: a list of Cookie objects
+        '''
+
+        with self._measure_operation("_cookies_for_base_domain") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            cursor.execute(sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BY_BASE_DOMAIN_STATEMENT,
+                {"jar_id": self.jar_id, "base_domain": base_domain})
+            row_list = cursor.fetchall()
+
+            operation_metrics.rows_fetched = len(row_list)
+            operation_metrics.cookies_returned = len(row_list)
+
+        return [self._cookie_from_sqlite_row(x) for x in row_list]
+
+
+    def _record_last_access(self, id_list:list[int]):
+        '''
+        remember that the cookies with these row ids were just returned for a request, and write out every
+        pending last access time if it has been at least `last_access_flush_interval` seconds since the last time
+
+        :param id_list: the row ids of the cookies that were accessed
+        '''
+
+        now = int(time.time())
+
+        with self._cookies_lock:
+
+            for iter_id in id_list:
+                self._pending_last_access[iter_id] = now
+
+            if time.monotonic() - self._last_access_flush_time >= self.last_access_flush_interval:
+                self.flush_last_access()
+
+    def flush_last_access(self):
+        '''
+        write out every pending last access time in a single transaction. This is called automatically
+        every `last_access_flush_interval` seconds when cookies are returned for a request, before evicting cookies,
+        and at `close()`
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            self._flush_last_access(cursor)
+
+    def _flush_last_access(self, cursor:sqlite3.Cursor):
+        '''
+        write out every pending last access time using an existing cursor
+
+        :param cursor: the cursor from an existing transaction
+        '''
+
+        self._last_access_flush_time = time.monotonic()
+
+        if not self._pending_last_access:
+            return
+
+        logger.debug("flushing `%s` pending last access times", len(self._pending_last_access))
+
+        cursor.executemany(
+            sql_statements.UPDATE_COOKIE_LAST_ACCESSED_STATEMENT,
+            [{"id": k, "last_accessed": v} for k, v in self._pending_last_access.items()])
+
+        self._pending_last_access.clear()
+
+    @typing.override
+    def set_cookie(self, cookie:Cookie):
+        """Set a cookie, without checking whether or not it should be set.
+
+        :param cookie: the Cookie object to add
+        """
+
+        self.set_cookies(cookie_list=[cookie])
+
+
+    def set_cookies(self, cookie_list:list[Cookie]) -> EvictionResult:
+        '''
+        non override method, but a way to bulk add cookies
+        :param cookie_list: a sequence of Cookie objects to add
+        :return: an EvictionResult with how many cookies were evicted to stay under
+        `max_cookies_per_domain` / `max_cookies`
+        '''
+
+        self._raise_if_read_only("set_cookies")
+
+        with self._measure_operation("set_cookies") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+
+            self._insert_cookies(cursor, cookie_list)
+
+            eviction_result = self._enforce_capacity_limits(
+                cursor, {self._get_base_domain(x.domain) for x in cookie_list})
+
+        # if any of these cookies expire before the sweeper is next going to run, wake it up so
+        # it can reschedule itself
+        if self._expiry_sweeper_thread:
+            earliest_expiry = min((x.expires for x in cookie_list if x.expires is not None), default=None)
+
+            if earliest_expiry is not None and earliest_expiry < self._next_expiry_sweep_time:
+                logger.debug("cookie expiring at `%s` is before the next expiry sweep at `%s`, waking the sweeper",
+                    earliest_expiry, self._next_expiry_sweep_time)
+                self._expiry_sweeper_thread.wake()
+
+        return eviction_result
+
+    def _get_base_domain(self, domain:str|None) -> str|None:
+        '''
+        get the value of the `base_domain` column for a cookie's domain, this is the registrable domain
+        (the private suffix) of the domain, or the domain itself if it doesn't have one (like `localhost`,
+        an IP address or a public suffix like `com`)
+
+        this is also registered as a SQL function on the connection, see `BASE_DOMAIN_FUNCTION_NAME`
+
+        :param domain: the cookie's domain, which may have a leading dot
+        :return: the base domain
+        '''
+
+        if domain is None:
+            return None
+
+        stripped_domain = domain.lstrip(".").lower()
+
+        return self._public_suffix_list.privatesuffix(stripped_domain) or stripped_domain
+
+    def _enforce_capacity_limits(self, cursor:sqlite3.Cursor, base_domains:typing.Iterable[str]|None) -> EvictionResult:
+        '''
+        evict cookies until we are under `max_cookies_per_domain` for each of the given base domains, and
+        then under `max_cookies` for the whole jar. Expired cookies are evicted first, and then the oldest
+        cookies.
+
+        :param cursor: the cursor from an existing transaction
+        :param base_domains: the base domains to check the per domain limit for, or None to check every base domain
+        :return: an EvictionResult with how many cookies were evicted
+        '''
+
+        eviction_result = EvictionResult()
 
-        # turn on foreign keys and WAL
-        with self._get_sqlite3_database_cursor() as cur:
-            cur.execute(sql_statements.TURN_FOREIGN_KEYS_ON)
-            cur.execute(sql_statements.TURN_WAL_MODE_ON)
-            wal_result = cur.fetchone()
+        if self.max_cookies_per_domain is None and self.max_cookies is None:
+            return eviction_result
 
-            wal_result_key = "journal_mode"
-            if wal_result_key in wal_result.keys():
-                logger.debug("WAL pragma result: `%s`", wal_result[wal_result_key])
-            else:
-                logger.warning("couldn't find the key `%s` in the sqlite3.Row object returned after `%s`",
-                    wal_result_key, sql_statements.TURN_WAL_MODE_ON)
+        now = int(time.time())
 
-        logger.info("Connected to the sqlite database at the path `%s`", self.database_path)
+        # make sure the eviction order sees the latest access times
+        self._flush_last_access(cursor)
 
-        self._create_tables()
+        if self.max_cookies_per_domain is not None:
 
+            if base_domains is None:
+                cursor.execute(sql_statements.SELECT_BASE_DOMAINS_OVER_LIMIT_STATEMENT,
+                    {"jar_id": self.jar_id, "max_cookies": self.max_cookies_per_domain})
+                base_domains = [x["base_domain"] for x in cursor.fetchall()]
 
+            for iter_base_domain in base_domains:
 
-    def _create_tables(self):
-        '''
-        create the sqlite3 tables if they don't already exist
-        '''
+                cursor.execute(sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_BY_BASE_DOMAIN_STATEMENT,
+                    {"jar_id": self.jar_id, "base_domain": iter_base_domain})
+                over_limit = cursor.fetchone()[sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_KEY] - self.max_cookies_per_domain
 
-        logger.debug("running create table statement")
+                if over_limit <= 0:
+                    continue
 
-        with self._get_sqlite3_database_cursor() as cursor:
+                expired_evicted, oldest_evicted = self._evict_cookies(
+                    cursor,
+                    over_limit,
+                    sql_statements.EVICT_EXPIRED_COOKIES_BY_BASE_DOMAIN_STATEMENT,
+                    sql_statements.EVICT_OLDEST_COOKIES_BY_BASE_DOMAIN_STATEMENT,
+                    {"jar_id": self.jar_id, "base_domain": iter_base_domain, "expires_val": now})
 
-            # create tables
-            cursor.execute(sql_statements.CREATE_TABLE_STATEMENT_COOKIE_TABLE)
+                eviction_result.expired_evicted += expired_evicted
+                eviction_result.domain_limit_evicted += oldest_evicted
 
-            # create indexes
-            cursor.execute(sql_statements.CREATE_COOKIE_TABLE_DOMAIN_INDEX_STATEMENT)
+                logger.debug("evicted `%s` expired and `%s` other cookies for the base domain `%s`",
+                    expired_evicted, oldest_evicted, iter_base_domain)
 
-        logger.debug("create table statement finished")
+        if self.max_cookies is not None:
 
+            cursor.execute(sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_STATEMENT, {"jar_id": self.jar_id})
+            over_limit = cursor.fetchone()[sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_KEY] - self.max_cookies
 
-    def _does_cookie_pass_non_domain_policies(self, cookie:Cookie, request:urllib.request.Request) -> bool:
-        '''
-        runs the various checks against the cookie policy except the domain check
+            if over_limit > 0:
+                expired_evicted, oldest_evicted = self._evict_cookies(
+                    cursor,
+                    over_limit,
+                    sql_statements.EVICT_EXPIRED_COOKIES_STATEMENT,
+                    sql_statements.EVICT_OLDEST_COOKIES_STATEMENT,
+                    {"jar_id": self.jar_id, "expires_val": now})
 
-        :param cookie: the cookie to check
-        :param request: the request being made
-        :return: whether the cookie and request pass the policies
-        '''
-        if not self._policy.path_return_ok(cookie.path, request):
-            logger.debug("cookie with name `%s`, domain `%s`, and request `%s` failed the path policy",
-                cookie.name, cookie.domain, request.full_url)
-            return False
+                eviction_result.expired_evicted += expired_evicted
+                eviction_result.global_limit_evicted += oldest_evicted
 
-        if not self._policy.return_ok(cookie, request):
-            logger.debug("cookie with name `%s`, domain `%s`, and request `%s` failed the return_ok policies",
-                cookie.name, cookie.domain, request.full_url)
-            return False
+        if eviction_result.total:
+            logger.info("evicted `%s` cookies to stay under the capacity limits: `%s`", eviction_result.total, eviction_result)
 
-        return True
+        return eviction_result
 
-    def _does_domain_pass_policy(self, domain:str, request:urllib.request.Request) -> bool:
+    def _evict_cookies(
+        self,
+        cursor:sqlite3.Cursor,
+        number_to_evict:int,
+        evict_expired_statement:str,
+        evict_oldest_statement:str,
+        param_dict:dict) -> tuple[int, int]:
         '''
-        do the domain checks against the cookie policy
+        evict `number_to_evict` cookies, expired ones first, and then the oldest ones
 
-        :param domain: the domain to check
-        :param request: the request to check
-        :return: whether the domain passes the policy
+        :param cursor: the cursor from an existing transaction
+        :param number_to_evict: how many cookies to evict
+        :param evict_expired_statement: the SQL statement that evicts up to `:limit` expired cookies
+        :param evict_oldest_statement: the SQL statement that evicts the `:limit` oldest cookies
+        :param param_dict: the rest of the parameters for both statements
+        :return: a tuple of the number of expired cookies evicted, and the number of other cookies evicted
         '''
-        if not self._policy.domain_return_ok(domain, request):
-            logger.debug("domain `%s` failed policy, returning nothing", domain)
-            return False
 
-        return True
+        cursor.execute(evict_expired_statement, param_dict | {"limit": number_to_evict})
+        expired_evicted = self._get_changed_rows(cursor)
 
-    @typing.override
-    def _cookies_for_domain(self, domain:str, request:urllib.request.Request) -> list[Cookie]:
-        '''
-        override of a private method , that returns the cookies for a given domain
+        oldest_evicted = 0
+        if expired_evicted < number_to_evict:
+            cursor.execute(evict_oldest_statement, param_dict | {"limit": number_to_evict - expired_evicted})
+            oldest_evicted = self._get_changed_rows(cursor)
 
-        all overrides of private methods are fragile and are prone to breakage if the internals of http.cookiejar.CookeJar change
+        return expired_evicted, oldest_evicted
 
-        this performs database I/O by looking up cookies for the given domain
+    def _insert_cookies(self, cursor:sqlite3.Cursor, cookie_list:typing.Sequence[Cookie]):
+        '''
+        insert the given cookies using an existing cursor, so callers can insert
+        several batches within one transaction. A cookie that is already stored is replaced, keeping its
+        `creation_time`
 
-        :param domain: the domain to get the cookies from
-        :param request: The request object (usually a urllib.request.Request instance) must support the method get_full_url()
-        and the attributes host, unverifiable and origin_req_host, as documented by urllib.request. The request is used to set
-        default values for cookie-attributes as well as for checking that the cookie is allowed to be set.
-        :return: a list of Cookie objects that match this domain, or an empty list if the cookie policy rejects this domain
-        (see CookiePolicy.domain_return_ok)
+        :param cursor: the cursor from an existing transaction
+        :param cookie_list: a sequence of Cookie objects to add
+        '''
 
+        logger.debug("inserting `%s` cookies into the database", len(cookie_list))
+
+        param_dict_list = list()
+        now = int(time.time())
+
+        for cookie in cookie_list:
+            iter_param_dict = {
+                "version": cookie.version,
+                "name": cookie.name,
+                "value": cookie.value,
+                "port": cookie.port,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+                "expires": cookie.expires,
+                "discard": cookie.discard,
+                "comment": cookie.comment,
+                "comment_url": cookie.comment_url,
+                "rfc2109": cookie.rfc2109,
+                "rest": json.dumps(cookie._rest),
+                "port_specified": cookie.port_specified,
+                "domain_specified": cookie.domain_specified,
+                "domain_initial_dot": cookie.domain_initial_dot,
+                "path_specified": cookie.path_specified,
+                "base_domain": self._get_base_domain(cookie.domain),
+                "last_accessed": now,
+                "jar_id": self.jar_id,
+                "creation_time": now
+            }
+
+            param_dict_list.append(iter_param_dict)
+
+        cursor.executemany(sql_statements.INSERT_COOKIE_STATEMENT, param_dict_list)
+
+    def load_cookie_file(
+        self,
+        filename:PathLike,
+        ignore_discard:bool=False,
+        ignore_expires:bool=False,
+        batch_size:int=cookie_file_parsers.COOKIE_FILE_IMPORT_BATCH_SIZE) -> int:
+        '''
+        bulk load a cookie file written by `http.cookiejar.MozillaCookieJar` or `http.cookiejar.LWPCookieJar`
+        into this cookie jar, the format is detected from the first line of the file.
+
+        Unlike loading the file into a stdlib FileCookieJar and then calling `set_cookie` for each cookie,
+        this parses the file line by line and inserts the cookies in batches of `batch_size`, all within
+        a single transaction, so either the whole file is loaded or none of it is.
+
+        :param filename: the path to the cookie file
+        :param ignore_discard: same as `FileCookieJar.load`, if true, also load session cookies
+        :param ignore_expires: same as `FileCookieJar.load`, if true, also load expired cookies
+        :param batch_size: how many cookies to insert at a time
+        :return: the number of cookies that were loaded
+        :raises http.cookiejar.LoadError: if the file isn't a format we know, or a line can't be parsed
         '''
 
-        # update the semi global 'now' variable to check for expiry
-        self._policy._now = self._now = int(time.time())
+        self._raise_if_read_only("load_cookie_file")
 
+        logger.debug("loading cookie file `%s`", filename)
 
-        # check the domain policy manually first
-        if not self._does_domain_pass_policy(domain, request):
-            return list()
+        number_of_cookies = 0
 
-        logger.debug("Checking the domain `%s` for cookies to return for request `%s`", domain, request.full_url)
+        with open(filename, "r", encoding="utf-8") as f:
 
-        result_list = list()
+            with self._get_sqlite3_database_cursor() as cursor:
 
-        # make the database query for all cookies under this domain, then we will filter them
-        # out based on the policies
-        with self._get_sqlite3_database_cursor() as cursor:
+                cookie_iterator = cookie_file_parsers.iter_cookies_from_file(f, ignore_discard, ignore_expires)
 
-            param_dict = {"domain": domain}
-            cursor.execute(
-                sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_STATEMENT,
-                param_dict)
+                for iter_batch in itertools.batched(cookie_iterator, batch_size):
 
-            while (iter_row := cursor.fetchone()) != None:
+                    self._insert_cookies(cursor, iter_batch)
+                    number_of_cookies += len(iter_batch)
 
-                tmp_cookie = self._cookie_from_sqlite_row(iter_row)
+                self._enforce_capacity_limits(cursor, None)
 
-                # check the cookie policy and if both pass, add it to the result list
-                # the default policy will call `path_return_ok` which checks the full URL on the `request` parameter
-                # and 'return_ok" checks `return_ok_port`, `return_ok_verifiability`, `return_ok_secure`,
-                # `return_ok_expires`, `return_ok_domain`, `return_ok_version`
-                if self._does_cookie_pass_non_domain_policies(tmp_cookie, request):
+        logger.info("loaded `%s` cookies from the cookie file `%s`", number_of_cookies, filename)
 
-                    result_list.append(tmp_cookie)
-                else:
-                    # failed policies don't add to list
-                    continue
+        return number_of_cookies
 
-        logger.debug("returning `%s` cookies", len(result_list))
+    def import_firefox_cookies(self, database_path:PathLike, domains:typing.Iterable[str]|None=None) -> int:
+        '''
+        import the cookies from a Firefox profile's `cookies.sqlite` database
 
-        return result_list
+        the database is ATTACHed to our connection and the cookies are copied over with a single
+        INSERT ... SELECT, so they never go through python Cookie objects. Firefox keeps this file locked
+        while it is running, so you probably want to copy it somewhere first.
 
-    @typing.override
-    def _cookies_for_request(self, request:urllib.request.Request) -> list[Cookie]:
+        :param database_path: the path to the `cookies.sqlite` file
+        :param domains: if provided, only import cookies for these domains and their subdomains
+        :return: the number of cookies that were imported
         '''
-        override of a private method , that returns the cookies for a given domain
 
-        all overrides of private methods are fragile and are prone to breakage if the internals of http.cookiejar.CookeJar change
+        return self._import_browser_cookies(
+            database_path=database_path,
+            import_statement_template=sql_statements.IMPORT_FIREFOX_COOKIES_STATEMENT,
+            host_column="host",
+            domains=domains)
 
-        this performs database I/O by looking up cookies for the given domain
+    def import_chromium_cookies(self, database_path:PathLike, domains:typing.Iterable[str]|None=None) -> int:
+        '''
+        import the cookies from a Chromium (or Chrome, Edge, etc) profile's `Cookies` database
 
-        this will return a list of cookies to return for a given request
+        the database is ATTACHed to our connection and the cookies are copied over with a single
+        INSERT ... SELECT, so they never go through python Cookie objects. Cookies whose value is
+        encrypted (`encrypted_value`) are skipped, as they can't be decrypted inside SQLite.
 
-        :param request: the Request that we want the cookies for
-        :return: a list of Cookie objects
+        :param database_path: the path to the `Cookies` file
+        :param domains: if provided, only import cookies for these domains and their subdomains
+        :return: the number of cookies that were imported
+        '''
 
+        return self._import_browser_cookies(
+            database_path=database_path,
+            import_statement_template=sql_statements.IMPORT_CHROMIUM_COOKIES_STATEMENT,
+            host_column="host_key",
+            domains=domains)
+
+    def _import_browser_cookies(
+        self,
+        database_path:PathLike,
+        import_statement_template:str,
+        host_column:str,
+        domains:typing.Iterable[str]|None) -> int:
         '''
+        attach a browser's cookie database, run the given INSERT ... SELECT statement and then detach it
 
+        :param database_path: the path to the browser's cookie database
+        :param import_statement_template: one of the `IMPORT_*_COOKIES_STATEMENT`s from sql_statements
+        :param host_column: the name of the column that holds the cookie's domain in the browser's table
+        :param domains: if provided, only import cookies for these domains and their subdomains
+        :return: the number of cookies that were imported
+        '''
 
-        # so, the original implementation of this seems to just iterate over the cookies dictionary
-        # and then call `_cookies_for_domain` on each domain. That is incredibly slow, however this is accurate
-        # since there are various cookie rules around cookies and domains, like a cookie for domain
-        # `.twitter.com` versus `twitter.com` versus `a.twitter.com`.
-        # here, we are utilizing the index on the cookie table and using the sqlite LIKE operator to
-        # get cookies for all domains that contain the request domain, and then we will pass those to `_cookies_for_domain`
-        # to do the fine grained filtering.
+        self._raise_if_read_only("import_browser_cookies")
 
+        param_dict = {"jar_id": self.jar_id}
+        domain_filter = "1"
 
-        # get all the cookies that match the glob of the "private suffix", aka
-        # the lowest level domain that a user can register
-        # this is extremely complicated so we use a library for this, see https://publicsuffix.org
-        # a.example.com -> private suffix is example.com
-        # a.example.co.uk -> private suffix is example.co.uk
-        # we also need to check to make sure that we aren't returning cookies for top level domains
-        # as that is bad form
+        if domains is not None:
+            fragment_list = list()
 
-        hostname = request_host(request)
-        private_suffix = self._public_suffix_list.privatesuffix(hostname)
+            for iter_index, iter_domain in enumerate(domains):
+                iter_param_name = f"domain_{iter_index}"
+                fragment_list.append(sql_statements.BROWSER_IMPORT_DOMAIN_FILTER_FRAGMENT.format(
+                    host_column=host_column, param_name=iter_param_name))
 
-        if not private_suffix or self._public_suffix_list.is_public(private_suffix):
-            # either invalid or a public suffix (like `com`) which means we we don't want to return anything
-            # (don't want websites setting a cookie for a TLD and having it be sent to every website under
-            # that TLD)
+                param_dict[iter_param_name] = iter_domain
+                param_dict[f"{iter_param_name}_suffix"] = f".{iter_domain.lstrip('.')}"
 
-            logger.debug("for the hostname `%s`, the private suffix `%s` is either None or a public suffix, returning empty list",
-                hostname, private_suffix)
+            # an empty list of domains means nothing should match
+            domain_filter = " OR ".join(fragment_list) if fragment_list else "0"
 
-            return list()
+        import_statement = import_statement_template.format(f"({domain_filter})")
 
-        result_list = list()
+        self._connect_if_pending()
 
+        logger.debug("attaching the browser cookie database at `%s`", database_path)
 
-        # make the database query for all cookies under this domain, then we will filter them
-        # out based on the policies
-        with self._get_sqlite3_database_cursor() as cursor:
+        # ATTACH can't be run inside of a transaction, so it is done outside of
+        # `_get_sqlite3_database_cursor`
+        self.sqlite_connection.execute(
+            sql_statements.ATTACH_BROWSER_IMPORT_DATABASE, {"database_path": str(database_path)})
 
-            search_term = f"%{private_suffix}"
+        try:
+            with self._get_sqlite3_database_cursor() as cursor:
 
-            logger.debug("_cookie_for_request with full url `%s`, searching for cookies with the glob `%s`",
-                hostname, search_term)
+                cursor.execute(import_statement, param_dict)
 
-            param_dict = {"domain_pattern": search_term}
+                changed_rows = self._get_changed_rows(cursor)
 
-            cursor.execute(
-                sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_DOMAIN_LIKE_STATEMENT,
-                param_dict)
+                self._enforce_capacity_limits(cursor, None)
 
+        finally:
+            self.sqlite_connection.execute(sql_statements.DETACH_BROWSER_IMPORT_DATABASE)
 
-            while (iter_row := cursor.fetchone()) != None:
+        logger.info("imported `%s` cookies from the browser cookie database at `%s`", changed_rows, database_path)
 
-                tmp_cookie = self._cookie_from_sqlite_row(iter_row)
+        return changed_rows
 
-                # check the domain policy manually first
-                if not self._does_domain_pass_policy(tmp_cookie.domain, request):
-                    # failed domain policy, don't return
-                    continue
+    def merge_from(
+        self,
+        database_path:PathLike,
+        conflict_rule:str=sql_statements.MERGE_NEWEST_EXPIRY_WINS,
+        source_jar_id:str|None=None) -> MergeResult:
+        '''
+        merge the cookies from another cookie jar's database into this cookie jar's partition, keyed by
+        (domain, path, name)
+
+        like the browser imports, the database is ATTACHed to our connection and the merge is done with a few
+        statements in a single transaction, so the cookies never go through python Cookie objects. The source
+        database should be closed, or at least not written to, while this runs.
+
+        :param database_path: the path to the database to merge from, it has to have the current schema version,
+        open it with a SqliteCookieJar first to upgrade it
+        :param conflict_rule: what to do when a key is in both jars, one of `sql_statements.MERGE_NEWEST_EXPIRY_WINS`,
+        `MERGE_SOURCE_WINS` or `MERGE_TARGET_WINS`
+        :param source_jar_id: the partition of the source database to merge from, defaults to this cookie jar's `jar_id`
+        :return: a MergeResult with how many cookies were inserted, replaced and kept
+        '''
 
-                # check the cookie policy and if both pass, add it to the result list
-                # the default policy will call `path_return_ok` which checks the full URL on the `request` parameter
-                # and 'return_ok" checks `return_ok_port`, `return_ok_verifiability`, `return_ok_secure`,
-                # `return_ok_expires`, `return_ok_domain`, `return_ok_version`
-                if self._does_cookie_pass_non_domain_policies(tmp_cookie, request):
+        self._raise_if_read_only("merge_from")
 
-                    result_list.append(tmp_cookie)
-                else:
-                    # failed policies, don't return
-                    continue
+        if conflict_rule not in sql_statements.MERGE_CONFLICT_ACTIONS:
+            raise ValueError(f"unknown conflict rule `{conflict_rule}`, expected one of "
+                f"`{list(sql_statements.MERGE_CONFLICT_ACTIONS)}`")
 
-        logger.debug("returning `%s` cookies", len(result_list))
+        param_dict = {"jar_id": self.jar_id, "source_jar_id": self.jar_id if source_jar_id is None else source_jar_id}
+        merge_result = MergeResult()
 
-        return result_list
+        self._connect_if_pending()
 
+        logger.debug("attaching the cookie database at `%s` to merge from", database_path)
 
-    @typing.override
-    def set_cookie(self, cookie:Cookie):
-        """Set a cookie, without checking whether or not it should be set.
+        # ATTACH can't be run inside of a transaction, so it is done outside of
+        # `_get_sqlite3_database_cursor`
+        self.sqlite_connection.execute(
+            sql_statements.ATTACH_MERGE_SOURCE_DATABASE, {"database_path": str(database_path)})
 
-        :param cookie: the Cookie object to add
-        """
+        try:
+            with self._measure_operation("merge_from") as operation_metrics, \
+                self._get_sqlite3_database_cursor(operation_metrics) as cursor:
 
-        self.set_cookies(cookie_list=[cookie])
+                cursor.execute(sql_statements.GET_MERGE_SOURCE_SCHEMA_VERSION)
+                schema_version = cursor.fetchone()[sql_statements.GET_SCHEMA_VERSION_KEY]
 
+                if schema_version != sql_statements.SCHEMA_VERSION:
+                    raise ValueError(f"the database at `{database_path}` has the schema version `{schema_version}`, "
+                        f"open it with a SqliteCookieJar first to upgrade it to version `{sql_statements.SCHEMA_VERSION}`")
 
-    def set_cookies(self, cookie_list:list[Cookie]):
-        '''
-        non override method, but a way to bulk add cookies
-        :param cookie_list: a sequence of Cookie objects to add
-        '''
+                for iter_statement in sql_statements.CREATE_MERGE_SOURCE_TEMP_TABLE_STATEMENTS:
+                    cursor.execute(iter_statement, param_dict)
 
-        with self._get_sqlite3_database_cursor() as cursor:
+                cursor.execute(sql_statements.COUNT_MERGE_SOURCE_COOKIES_STATEMENT, param_dict)
+                count_row = cursor.fetchone()
+                merge_result.source_cookies = count_row["source_cookies"]
+                conflicts = count_row["conflicts"]
 
-            logger.debug("inserting `%s cookies into the database", len(cookie_list))
+                cursor.execute(sql_statements.INSERT_COOKIES_FOR_MERGE_STATEMENT.format(
+                    sql_statements.MERGE_CONFLICT_ACTIONS[conflict_rule]), param_dict)
 
-            param_dict_list = list()
+                # `changes()` counts the rows the upsert inserted and the ones it updated, and every key that wasn't a
+                # conflict is inserted, so the rest were updated
+                merge_result.inserted = merge_result.source_cookies - conflicts
+                merge_result.replaced = self._get_changed_rows(cursor) - merge_result.inserted
+                merge_result.kept = conflicts - merge_result.replaced
 
-            for cookie in cookie_list:
-                iter_param_dict = {
-                    "version": cookie.version,
-                    "name": cookie.name,
-                    "value": cookie.value,
-                    "port": cookie.port,
-                    "domain": cookie.domain,
-                    "path": cookie.path,
-                    "secure": cookie.secure,
-                    "expires": cookie.expires,
-                    "discard": cookie.discard,
-                    "comment": cookie.comment,
-                    "comment_url": cookie.comment_url,
-                    "rfc2109": cookie.rfc2109,
-                    "rest": json.dumps(cookie._rest),
-                    "port_specified": cookie.port_specified,
-                    "domain_specified": cookie.domain_specified,
-                    "domain_initial_dot": cookie.domain_initial_dot,
-                    "path_specified": cookie.path_specified
-                }
+                cursor.execute(sql_statements.DROP_MERGE_SOURCE_TEMP_TABLE_STATEMENT)
 
-                param_dict_list.append(iter_param_dict)
+                if merge_result.inserted or merge_result.replaced:
+                    merge_result.eviction = self._enforce_capacity_limits(cursor, None)
 
-            cursor.executemany(sql_statements.INSERT_COOKIE_STATEMENT, param_dict_list)
+        finally:
+            self.sqlite_connection.execute(sql_statements.DETACH_MERGE_SOURCE_DATABASE)
 
+        logger.info("merged the cookie database at `%s` with `%s`: `%s`", database_path, conflict_rule, merge_result)
+
+        return merge_result
 
 
     @typing.override
@@ -386,28 +1572,36 @@ class SqliteCookieJar(CookieJar):
         https://github.com/python/cpython/blob/fb8bb36f56e4fc2948cd404337b6b316b78c86aa/Lib/http/cookiejar.py#L1692
         '''
 
+        self._raise_if_read_only("clear")
+
         # copied the if...elif.. else structure from python3 cookiejar.py
         if name is not None:
             if (domain is None) or (path is None):
                 raise ValueError(
                     "domain and path must be given to remove a cookie by name")
-            self._clear_cookies_given_domain_path_and_name(domain=domain, path=path, name=name)
+
+            with self._measure_operation("clear") as operation_metrics:
+                self._clear_cookies_given_domain_path_and_name(domain=domain, path=path, name=name, operation_metrics=operation_metrics)
             return
 
         elif path is not None:
             if domain is None:
                 raise ValueError(
                     "domain must be given to remove cookies by path")
-            self._clear_cookies_given_domain_and_path(domain=domain, path=path)
+
+            with self._measure_operation("clear") as operation_metrics:
+                self._clear_cookies_given_domain_and_path(domain=domain, path=path, operation_metrics=operation_metrics)
             return
 
         elif domain is not None:
-            self._clear_cookies_given_domain(domain=domain)
+            with self._measure_operation("clear") as operation_metrics:
+                self._clear_cookies_given_domain(domain=domain, operation_metrics=operation_metrics)
             return
 
         else:
             # no arguments, clear all cookies
-            self._clear_all_cookies()
+            with self._measure_operation("clear") as operation_metrics:
+                self._clear_all_cookies(operation_metrics=operation_metrics)
             return
 
     @typing.override
@@ -423,10 +1617,13 @@ class SqliteCookieJar(CookieJar):
         true ignore_discard argument
         '''
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        self._raise_if_read_only("clear_session_cookies")
+
+        with self._measure_operation("clear_session_cookies") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
             logger.debug("Removing all session cookies")
 
-            cursor.execute(sql_statements.DELETE_ALL_SESSION_COOKIES_FROM_COOKIE_TABLE)
+            cursor.execute(sql_statements.DELETE_ALL_SESSION_COOKIES_FROM_COOKIE_TABLE, {"jar_id": self.jar_id})
 
             changed_rows = self._get_changed_rows(cursor)
 
@@ -441,11 +1638,13 @@ class SqliteCookieJar(CookieJar):
         :param expires_time: the time to compare the cookie's `expires` time with when deciding what cookie to clear out
         '''
 
+        self._raise_if_read_only("clear_expired_cookies")
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        with self._measure_operation("clear_expired_cookies") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
             logger.debug("Removing all expired cookies from the database whose expiry is older than `%s`", expires_time)
 
-            param_dict = {"expires_val": expires_time}
+            param_dict = {"jar_id": self.jar_id, "expires_val": expires_time}
 
             cursor.execute(sql_statements.DELETE_ALL_EXPIRED_COOKIES_FROM_COOKIE_TABLE, param_dict)
 
@@ -472,8 +1671,15 @@ class SqliteCookieJar(CookieJar):
 
         so we can just implement this using a sqlite statement and have this be much more performant with huge
         cookie jars
+
+        `CookieJar.add_cookie_header` calls this after every request, so a cookie jar opened with `read_only` or
+        `immutable` does nothing here rather than raising. Expired cookies are never returned for a request anyway,
+        use `clear_expired_cookies_from_time` to get the ReadOnlyCookieJarError
         '''
 
+        if self.read_only:
+            logger.debug("clear_expired_cookies: not clearing the expired cookies of a read only cookie jar")
+            return
 
         # just call the 'new' method we created (for unit tests) with `time.time()`
         # the expires attribute appears to be an unix timestamp, seconds since the epoch. `time.time()` returns
@@ -481,8 +1687,72 @@ class SqliteCookieJar(CookieJar):
         expires_time_val = int(time.time())
         self.clear_expired_cookies_from_time(expires_time=expires_time_val)
 
+    def _clear_expired_cookies_chunk(self, expires_time:int, limit:int) -> int:
+        '''
+        delete at most `limit` cookies whose `expires` value is less than or equal to `expires_time`,
+        in its own transaction
+
+        :param expires_time: the time to compare the cookie's `expires` time with
+        :param limit: the maximum number of cookies to delete
+        :return: the number of cookies that were deleted
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            param_dict = {"expires_val": expires_time, "limit": limit}
+            cursor.execute(sql_statements.DELETE_EXPIRED_COOKIES_CHUNK_FROM_COOKIE_TABLE, param_dict)
+
+            return self._get_changed_rows(cursor)
+
+    def _get_next_expiry(self) -> int|None:
+        '''
+        :return: the earliest `expires` value of any cookie in the jar, or None if no cookie has an expiry
+        '''
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.SELECT_NEXT_EXPIRY_FROM_COOKIE_TABLE)
+            fetch_result = cursor.fetchone()
+            return fetch_result[sql_statements.SELECT_NEXT_EXPIRY_FROM_COOKIE_TABLE_KEY]
+
+    def _expiry_sweep_task(self) -> float:
+        '''
+        the task that the background expiry sweeper thread runs. This deletes expired cookies
+        `expiry_sweep_chunk_size` at a time, releasing the lock in between each chunk, and then schedules
+        the next sweep for when the next cookie expires
+
+        :return: the number of seconds until the next sweep
+        '''
+
+        now = int(time.time())
+        total_deleted = 0
+
+        while True:
+            deleted_rows = self._clear_expired_cookies_chunk(now, self.expiry_sweep_chunk_size)
+            total_deleted += deleted_rows
+
+            if deleted_rows < self.expiry_sweep_chunk_size:
+                break
+
+            if self._expiry_sweeper_thread and self._expiry_sweeper_thread.is_stopping():
+                break
+
+        next_expiry = self._get_next_expiry()
 
-    def _clear_cookies_given_domain_path_and_name(self, domain:str, path:str, name:str) -> None:
+        if next_expiry is None:
+            delay = self.expiry_sweep_max_interval
+        else:
+            delay = min(max(next_expiry - now, self.expiry_sweep_min_interval), self.expiry_sweep_max_interval)
+
+        self._next_expiry_sweep_time = now + delay
+
+        logger.debug("expiry sweep deleted `%s` cookies, next expiry is `%s`, sweeping again in `%s` seconds",
+            total_deleted, next_expiry, delay)
+
+        return delay
+
+
+    def _clear_cookies_given_domain_path_and_name(self, domain:str, path:str, name:str, operation_metrics:OperationMetrics|None=None) -> None:
         '''
         clear cookies under a specific domain and path
         :param domain: the domain whose cookies we want to clear
@@ -491,6 +1761,8 @@ class SqliteCookieJar(CookieJar):
         Note: this is for a specific domain, using string equality,
         So calling this method with `example.com` will not delete
         cookies for `a.example.com`
+
+        :param operation_metrics: if provided, the transaction is counted here
         '''
 
         if domain is None:
@@ -500,18 +1772,18 @@ class SqliteCookieJar(CookieJar):
         if name is None:
             raise Exception("`name` should not be None")
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        with self._get_sqlite3_database_cursor(operation_metrics) as cursor:
             logger.debug("Removing all cookies from the database that match domain `%s`, path `%s`, and name `%s`",
                 domain, path, name)
 
-            param_dict = {"domain": domain, "path": path, "name": name}
+            param_dict = {"jar_id": self.jar_id, "domain": domain, "path": path, "name": name}
             cursor.execute(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN_PATH_NAME, param_dict)
 
             changed_rows = self._get_changed_rows(cursor)
 
             logger.debug("deletion of cookies complete, deleted `%s` cookies", changed_rows)
 
-    def _clear_cookies_given_domain_and_path(self, domain:str, path:str) -> None:
+    def _clear_cookies_given_domain_and_path(self, domain:str, path:str, operation_metrics:OperationMetrics|None=None) -> None:
         '''
         clear cookies under a specific domain and path
         :param domain: the domain whose cookies we want to clear
@@ -520,6 +1792,8 @@ class SqliteCookieJar(CookieJar):
         Note: this is for a specific domain, using string equality
         So calling this method with `example.com` will not delete
         cookies for `a.example.com`
+
+        :param operation_metrics: if provided, the transaction is counted here
         '''
 
         if domain is None:
@@ -527,17 +1801,17 @@ class SqliteCookieJar(CookieJar):
         if path is None:
             raise Exception("`path` should not be None")
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        with self._get_sqlite3_database_cursor(operation_metrics) as cursor:
             logger.debug("Removing all cookies from the database that match domain `%s` and path `%s`", domain, path)
 
-            param_dict = {"domain": domain, "path": path}
+            param_dict = {"jar_id": self.jar_id, "domain": domain, "path": path}
             cursor.execute(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN_PATH, param_dict)
 
             changed_rows = self._get_changed_rows(cursor)
 
             logger.debug("deletion of cookies complete, deleted `%s` cookies", changed_rows)
 
-    def _clear_cookies_given_domain(self, domain:str):
+    def _clear_cookies_given_domain(self, domain:str, operation_metrics:OperationMetrics|None=None):
         '''
         clear cookies under a specific domain
         :param domain: the domain whose cookies we want to clear
@@ -545,14 +1819,16 @@ class SqliteCookieJar(CookieJar):
         Note: this is for a specific domain, using string equality,
         So calling this method with `example.com` will not delete
         cookies for `a.example.com`
+
+        :param operation_metrics: if provided, the transaction is counted here
         '''
 
         if domain is None:
             raise Exception("`domain` should not be None")
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        with self._get_sqlite3_database_cursor(operation_metrics) as cursor:
             logger.debug("Removing all cookies from the database that match domain `%s`", domain)
-            param_dict = {"domain": domain}
+            param_dict = {"jar_id": self.jar_id, "domain": domain}
             cursor.execute(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE_BY_DOMAIN, param_dict)
 
             changed_rows = self._get_changed_rows(cursor)
@@ -560,52 +1836,59 @@ class SqliteCookieJar(CookieJar):
             logger.debug("deletion of cookies complete, deleted `%s` cookies", changed_rows)
 
 
-    def _clear_all_cookies(self):
+    def _clear_all_cookies(self, operation_metrics:OperationMetrics|None=None):
         '''
         delete all cookies
+
+        :param operation_metrics: if provided, the transaction is counted here
         '''
 
-        with self._get_sqlite3_database_cursor() as cursor:
+        with self._get_sqlite3_database_cursor(operation_metrics) as cursor:
 
             logger.debug("removing all cookies from the database")
 
-            cursor.execute(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE)
+            cursor.execute(sql_statements.DELETE_ALL_FROM_COOKIE_TABLE, {"jar_id": self.jar_id})
 
             logger.debug("deletion of all cookies completed")
 
     def __iter__(self):
         '''
         __iter__ implementation, this will iterate over the entire database in batchces.
-        This performs IO on the database, by selecting the total number of rows and then
-        fetching them in batches one by one.
+        This performs IO on the database, fetching the rows in batches one by one.
+
+        each batch is read in its own transaction, and the lock and transaction are released before any of its
+        cookies are yielded, so a caller that stops part of the way through (or takes a while with each cookie)
+        doesn't block the background threads or other threads using this cookie jar
         '''
 
-        # get number of rows
-        number_of_rows = len(self)
+        with self._measure_operation("__iter__") as operation_metrics:
 
-        logger.debug("__iter__: number of rows are `%s`", number_of_rows)
-        with self._get_sqlite3_database_cursor() as cursor:
+            after_id = 0
 
-            # get count of rows in database
-            number_of_rows = len(self)
+            while True:
 
-            for iter_offset in range(0, number_of_rows, sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE):
+                logger.debug("executing 'select all batch' statement after the id `%s`", after_id)
 
-                # format the sql statement
-                iter_select_all_statement = sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BATCH_STATEMENT.format(iter_offset)
+                with self._get_sqlite3_database_cursor(operation_metrics) as cursor:
 
-                logger.debug("executing 'select all batch' statement with offset `%s`", iter_offset)
+                    cursor.execute(sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BATCH_STATEMENT,
+                        {"jar_id": self.jar_id, "after_id": after_id, "limit": sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE})
+                    iter_result = cursor.fetchall()
 
-                # execute it
-                cursor.execute(iter_select_all_statement)
-                iter_result = cursor.fetchall()
+                operation_metrics.rows_fetched += len(iter_result)
 
                 for iter_row in iter_result:
 
-                    # now yield one by one
+                    # now yield one by one, outside of the transaction
                     iter_cookie = self._cookie_from_sqlite_row(iter_row)
+                    operation_metrics.cookies_returned += 1
                     yield iter_cookie
 
+                if len(iter_result) < sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE:
+                    break
+
+                after_id = iter_result[-1]["id"]
+
     def _cookie_from_sqlite_row(self, row:sqlite3.Row) -> Cookie:
         '''
         returns a cookie from a sqlite3 row
@@ -645,14 +1928,92 @@ class SqliteCookieJar(CookieJar):
     def __len__(self):
         '''
         __len__ implementation, this returns the number of contained cookies.
-        For now, this invokes IO by queriyng the Sqlite database.
+        This is a single lookup in the count table that the triggers on the cookie table keep up to date,
+        rather than counting every row.
         :return: the number of contained cookies in this cookiejar
         '''
+        with self._measure_operation("__len__") as operation_metrics, \
+            self._get_sqlite3_database_cursor(operation_metrics) as cursor:
+            cursor.execute(sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_STATEMENT, {"jar_id": self.jar_id})
+            fetch_result = cursor.fetchone()
+            return fetch_result[sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_KEY]
+
+    def count_for_domain(self, domain:str) -> int:
+        '''
+        get the number of cookies under a domain's registrable domain, so `a.example.com` counts every cookie
+        for `example.com` and its subdomains. Like `len()`, this is a single lookup in a count table.
+
+        :param domain: the domain to count the cookies for, which may have a leading dot
+        :return: the number of cookies
+        '''
         with self._get_sqlite3_database_cursor() as cursor:
-            cursor.execute(sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_STATEMENT)
+            cursor.execute(sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_BY_BASE_DOMAIN_STATEMENT,
+                {"jar_id": self.jar_id, "base_domain": self._get_base_domain(domain)})
             fetch_result = cursor.fetchone()
             return fetch_result[sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_KEY]
 
+    def stats(self, top_domains:int=sql_statements.STATS_TOP_DOMAINS) -> JarStats:
+        '''
+        get statistics about the cookies in this cookie jar and the size of the database, using aggregate queries
+        rather than loading every cookie. The per-cookie statistics take one pass over this cookie jar's
+        partition, the domain statistics come from the count tables.
+
+        :param top_domains: how many of the registrable domains with the most cookies to return
+        :return: a JarStats object
+        '''
+
+        now = int(time.time())
+
+        with self._get_sqlite3_database_cursor() as cursor:
+
+            cursor.execute(sql_statements.SELECT_COOKIE_STATS_STATEMENT, {"jar_id": self.jar_id, "now": now})
+            cookie_stats = cursor.fetchone()
+
+            cursor.execute(sql_statements.SELECT_TOP_DOMAINS_STATEMENT, {"jar_id": self.jar_id, "limit": top_domains})
+            top_domain_list = [DomainCount(base_domain=x["base_domain"], count=x["count"]) for x in cursor.fetchall()]
+
+            cursor.execute(sql_statements.COUNT_DOMAINS_STATEMENT, {"jar_id": self.jar_id})
+            total_domains = cursor.fetchone()[sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_KEY]
+
+            page_size = cursor.execute(sql_statements.GET_PAGE_SIZE).fetchone()["page_size"]
+            page_count = cursor.execute(sql_statements.GET_PAGE_COUNT).fetchone()["page_count"]
+            freelist_count = cursor.execute(sql_statements.GET_FREELIST_COUNT).fetchone()["freelist_count"]
+
+            try:
+                cursor.execute(sql_statements.SELECT_DBSTAT_STATEMENT)
+                storage = [StorageStats(
+                    name=x["name"],
+                    pages=x["pages"],
+                    payload_bytes=x["payload_bytes"],
+                    unused_bytes=x["unused_bytes"]) for x in cursor.fetchall()]
+
+            except sqlite3.OperationalError as e:
+                logger.debug("the dbstat virtual table isn't available, not getting per table storage: `%s`", e)
+                storage = None
+
+        expiry_histogram = [ExpiryHistogramBucket(label=label, upper_bound_seconds=upper_bound, count=cookie_stats[f"expires_within_{i}"])
+            for i, (label, upper_bound) in enumerate(sql_statements.STATS_EXPIRY_HISTOGRAM_BUCKETS)]
+        expiry_histogram.append(ExpiryHistogramBucket(label="later", upper_bound_seconds=None, count=cookie_stats["expires_later"]))
+
+        total_cookies = cookie_stats["cookie_count"]
+
+        return JarStats(
+            total_cookies=total_cookies,
+            session_cookies=cookie_stats["session_count"],
+            persistent_cookies=total_cookies - cookie_stats["session_count"],
+            expired_cookies=cookie_stats["expired_count"],
+            no_expiry_cookies=cookie_stats["no_expiry_count"],
+            total_domains=total_domains,
+            top_domains=top_domain_list,
+            expiry_histogram=expiry_histogram,
+            value_bytes_total=cookie_stats["value_bytes_total"],
+            value_bytes_max=cookie_stats["value_bytes_max"],
+            value_bytes_average=cookie_stats["value_bytes_total"] / total_cookies if total_cookies else 0.0,
+            page_size=page_size,
+            page_count=page_count,
+            freelist_count=freelist_count,
+            storage=storage)
+
 
     def __repr__(self) -> str:
         '''__repr__ implementation, the original CookieJar implementation
@@ -677,13 +2038,114 @@ class SqliteCookieJar(CookieJar):
 
         logger.debug("Committing and closing connection")
 
+        self._connect_pending = False
+
+        if self._expiry_sweeper_thread:
+            self._expiry_sweeper_thread.stop()
+            self._expiry_sweeper_thread = None
+
+        if self._checkpoint_thread:
+            self._checkpoint_thread.stop()
+            self._checkpoint_thread = None
+
         if self.sqlite_connection:
+            self.flush_last_access()
+
             self.sqlite_connection.commit()
 
+            # write out anything that happened since the last checkpoint
+            self.checkpoint()
+
             self.sqlite_connection.close()
 
             self.sqlite_connection = None
+            self.sql_tracer = None
+
+
+class SqliteCookieJarPartition(SqliteCookieJar):
+    '''
+    a lightweight handle to a single partition (`jar_id`) of a SqliteCookieJar's database, see
+    `SqliteCookieJar.partition()`
+
+    the parent cookie jar owns the connection, so `connect()` and `close()` do nothing here, and the handle can't
+    be used after the parent is closed. Anything that isn't specific to the partition (the connection, the lock,
+    the capacity limits, the background threads, ...) is looked up on the parent, and operations on the whole
+    database like `checkpoint()` and `snapshot()` behave exactly as they do on the parent.
+    '''
+
+    def __init__(self, parent:SqliteCookieJar, jar_id:str, policy:CookiePolicy|None=None):
+        '''
+        constructor
+
+        :param parent: the cookie jar that owns the connection
+        :param jar_id: the partition to use
+        :param policy: the CookiePolicy object to use, defaults to the parent's policy
+        '''
+
+        # this intentionally doesn't call SqliteCookieJar.__init__, as that would set up state that the parent
+        # already has
+        self._parent:SqliteCookieJar = parent
+
+        CookieJar.__init__(self, policy if policy is not None else parent._policy)
+
+        if jar_id == parent.jar_id:
+            raise ValueError(f"the jar_id `{jar_id}` is the parent cookie jar's own jar_id")
+
+        self.jar_id:str = jar_id
 
+        # only one thread gets to use the shared connection at a time
+        self._cookies_lock = parent._cookies_lock
 
+        self._now:int = int(time.time())
+        self._policy._now = self._now
+
+    def __getattr__(self, name:str):
+        '''
+        look up anything that isn't set on the partition on the parent cookie jar, this is only
+        called if normal attribute lookup fails
+        '''
+
+        if name == "_parent":
+            raise AttributeError(name)
+
+        return getattr(self._parent, name)
+
+    @typing.override
+    def connect(self):
+        '''
+        does nothing, the parent cookie jar owns the connection
+        '''
+
+        logger.debug("connect called on the partition `%s`, ignoring", self.jar_id)
+
+    @typing.override
+    def close(self):
+        '''
+        does nothing, the parent cookie jar owns the connection
+        '''
+
+        logger.debug("close called on the partition `%s`, ignoring", self.jar_id)
+
+    @typing.override
+    def _connect_if_pending(self):
+        '''
+        the parent cookie jar owns the connection, so let it open the database
+        '''
+
+        self._parent._connect_if_pending()
 
+    @typing.override
+    def partition(self, jar_id:str, policy:CookiePolicy|None=None) -> "SqliteCookieJarPartition":
+        '''
+        get a handle to another partition of the parent cookie jar's database, see `SqliteCookieJar.partition()`
+        '''
+
+        return self._parent.partition(jar_id=jar_id, policy=policy)
+
+    @typing.override
+    def _flush_last_access(self, cursor:sqlite3.Cursor):
+        '''
+        the pending last access times are shared with the parent cookie jar, so let it do the flushing
+        '''
 
+        self._parent._flush_last_access(cursor)
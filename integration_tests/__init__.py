@@ -0,0 +1,3 @@
+'''
+end to end tests that run real HTTP traffic through biscutbox's cookie jars, see `integration_tests.load_generator`
+'''
@@ -1,73 +1,270 @@
+'''
+a local HTTP server that sets cookies, for running real traffic through a cookie jar
+
+every GET response sets a few cookies picked from a configurable mix of kinds (session, persistent, domain, path,
+secure, and deletions of earlier cookies), for the site in the request's `Host` header, and reports back how many
+cookies the request sent. A POST with a JSON body sets exactly the cookie described in the body, see
+`CookieServingHttpHandler.do_POST`.
+
+run it with `python -m integration_tests.cookie_serving_http_server --port 8000 --mix session=3,persistent=5`
+'''
+
+import argparse
 import http.server
 import json
-
 import logging
-logging.basicConfig(level="DEBUG")
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+'''
+the kinds of cookies a GET response can set, and how often each one is picked by default
+'''
+DEFAULT_SET_COOKIE_MIX:dict[str, int] = \
+{
+    "session": 3,
+    "persistent": 4,
+    "domain": 2,
+    "path": 2,
+    "secure": 1,
+    "delete": 1,
+}
+
+'''
+how many cookies each GET response sets by default
+'''
+DEFAULT_COOKIES_PER_RESPONSE:int = 2
+
+'''
+how many different names each kind of cookie uses, so later responses replace or delete earlier cookies
+'''
+COOKIE_NAMES_PER_KIND:int = 5
+
+
+def make_set_cookie_header(kind:str, rng:random.Random, host:str, path:str) -> str:
+    '''
+    make the value of a `Set-Cookie` header
+
+    :param kind: the kind of cookie, one of the keys of `DEFAULT_SET_COOKIE_MIX`
+    :param rng: the random number generator to use
+    :param host: the host the request was for, without the port
+    :param path: the path the request was for
+    :return: the header value
+    '''
+
+    name_number = rng.randrange(COOKIE_NAMES_PER_KIND)
+    value = rng.randbytes(8).hex()
+
+    if kind == "session":
+        return f"session{name_number}={value}; Path=/"
+
+    elif kind == "persistent":
+        return f"persistent{name_number}={value}; Path=/; Max-Age={rng.randint(60, 60 * 60 * 24 * 365)}"
+
+    elif kind == "domain":
+        site = host.removeprefix("www.")
+        return f"domain{name_number}={value}; Domain=.{site}; Path=/; Max-Age=86400"
+
+    elif kind == "path":
+        # the first directory of the request, or the root
+        first_segment = path.split("?", 1)[0].strip("/").split("/", 1)[0]
+        return f"path{name_number}={value}; Path=/{first_segment}; Max-Age=3600"
+
+    elif kind == "secure":
+        return f"secure{name_number}={value}; Path=/; Secure; HttpOnly"
+
+    elif kind == "delete":
+        # delete one of the persistent cookies
+        return f"persistent{name_number}=; Path=/; Max-Age=0"
+
+    else:
+        raise ValueError(f"unknown kind of cookie `{kind}`, expected one of `{list(DEFAULT_SET_COOKIE_MIX)}`")
+
+
+def parse_set_cookie_mix(mix:str) -> dict[str, int]:
+    '''
+    parse a mix of cookie kinds from the command line
+
+    :param mix: comma separated `kind=weight` pairs, like `session=3,persistent=5`
+    :return: the weight of each kind
+    '''
+
+    result = dict()
+
+    for iter_pair in mix.split(","):
+        kind, weight = iter_pair.split("=", 1)
+
+        if kind not in DEFAULT_SET_COOKIE_MIX:
+            raise ValueError(f"unknown kind of cookie `{kind}`, expected one of `{list(DEFAULT_SET_COOKIE_MIX)}`")
+
+        result[kind] = int(weight)
+
+    return result
 
-logger = logging.getLogger("DEBUG")
 
 class CookieServingHttpHandler(http.server.BaseHTTPRequestHandler):
+    '''
+    handles a single request, see the module docstring. The mix and the number of cookies per
+    response come from the CookieServingHttpServer
+    '''
+
+    # so urllib can reuse the connection
+    protocol_version = "HTTP/1.1"
+
+    server:"CookieServingHttpServer"
+
+    def _send_json(self, status:int, body:dict, set_cookie_lines:list[str]):
+        '''
+        send a complete response
+
+        :param status: the HTTP status code
+        :param body: the body, which is sent as JSON
+        :param set_cookie_lines: the values of the `Set-Cookie` headers to send
+        '''
+
+        body_bytes = json.dumps(body).encode("utf-8")
+
+        self.send_response(status)
+
+        for iter_line in set_cookie_lines:
+            self.send_header("Set-Cookie", iter_line)
+
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body_bytes)))
+        self.end_headers()
+
+        self.wfile.write(body_bytes)
+
+    def do_GET(self):
+        ''' set some cookies from the server's mix, and report how many cookies the request sent'''
+
+        host = (self.headers.get("Host") or "localhost").rsplit(":", 1)[0]
+        cookie_header = self.headers.get("Cookie")
+        received_cookies = len(cookie_header.split(";")) if cookie_header else 0
+
+        with self.server.rng_lock:
+            kind_list = self.server.rng.choices(
+                list(self.server.set_cookie_mix),
+                weights=list(self.server.set_cookie_mix.values()),
+                k=self.server.cookies_per_response)
+
+            set_cookie_lines = [make_set_cookie_header(x, self.server.rng, host, self.path) for x in kind_list]
+
+        self._send_json(200, {"received_cookies": received_cookies, "set_cookies": len(set_cookie_lines)}, set_cookie_lines)
 
     def do_POST(self):
-        ''' handle get requests'''
+        ''' set the single cookie described by the JSON body'''
 
         content_length = self.headers.get('content-length')
-        length=-1
-        if content_length:
-            length = int(content_length)
-        else:
-            length = 0
+        length = int(content_length) if content_length else 0
 
         post_body = self.rfile.read(length)
 
-        post_body = None
         try:
             post_json = json.loads(post_body)
-        except Exception as e:
+        except ValueError:
             logger.error("invalid json in post body")
             self.send_error(400, "invalid json in post body")
             return
 
+        try:
+            cookie_name = post_json["name"]
+            cookie_value = post_json["cookie_value"]
+        except (KeyError, TypeError):
+            logger.error("post body is missing `name` or `cookie_value`")
+            self.send_error(400, "post body is missing `name` or `cookie_value`")
+            return
+
+        # every other attribute is optional
+        attribute_list = [f"{cookie_name}={cookie_value}"]
+
+        for iter_key, iter_attribute in [
+            ("domain", "Domain"),
+            ("expires", "Expires"),
+            ("maxage", "Max-Age"),
+            ("path", "Path"),
+            ("comment", "Comment"),
+            ("commenturl", "CommentURL"),
+            ("samesite", "SameSite"),
+        ]:
+            if post_json.get(iter_key) is not None:
+                attribute_list.append(f"{iter_attribute}={post_json[iter_key]}")
+
+        for iter_key, iter_attribute in [("httponly", "HttpOnly"), ("secure", "Secure"), ("discard", "Discard")]:
+            if post_json.get(iter_key):
+                attribute_list.append(iter_attribute)
 
-        # parse the json config
-        cookie_name = post_json["name"]
-        cookie_value = post_json["cookie_value"]
-        cookie_domain = post_json["domain"]
-        cookie_expires = post_json["expires"]
-        cookie_httponly = int(post_json["httponly"])
-        cookie_maxage = post_json["maxage"]
-        cookie_path = post_json["path"]
-        cookie_secure = int(post_json["secure"])
-        cookie_discard = int(post_json["discard"])
-        cookie_comment = post_json["comment"]
-        cookie_commentUrl = post_json["commenturl"]
-        cookie_samesite = post_json["samesite"]
+        self._send_json(200, {"set_cookies": 1}, ["; ".join(attribute_list)])
 
+    def log_message(self, format, *args):
+        ''' log requests to the logger at debug level, rather than to stderr'''
+        logger.debug("%s - %s", self.address_string(), format % args)
 
-        set_cookie_line = f"{cookie_name}={cookie_value}; Version=1; Domain={cookie_domain}; " +
-        f"Expires={cookie_expires}; Max-Age={cookie_maxage}; Path={cookie_path}; " +
-        f"Comment={cookie_comment}; CommentUrl={cookie_commentUrl}; SameSite={cookie_samesite}; "
 
-        if cookie_httponly:
-            set_cookie_line += "HttpOnly;"
+class CookieServingHttpServer(http.server.ThreadingHTTPServer):
+    '''
+    a threaded HTTP server that runs a CookieServingHttpHandler for each request
+    '''
 
-        if cookie_secure:
-            set_cookie_line += "Secure; "
+    daemon_threads = True
 
-        if cookie_discard:
-            set_cookie_line += "Discard; "
+    def __init__(
+        self,
+        server_address:tuple[str, int],
+        set_cookie_mix:dict[str, int]|None=None,
+        cookies_per_response:int=DEFAULT_COOKIES_PER_RESPONSE,
+        seed:int|None=None):
+        '''
+        constructor
 
-        self.send_header("Set-Cookie2", set_cookie_line)
+        :param server_address: the host and port to listen on, port 0 picks a free one
+        :param set_cookie_mix: the weight of each kind of cookie, see `DEFAULT_SET_COOKIE_MIX`
+        :param cookies_per_response: how many cookies each GET response sets
+        :param seed: the seed for picking the cookies, None for a different mix every run
+        '''
 
+        super().__init__(server_address, CookieServingHttpHandler)
 
-class Main:
+        self.set_cookie_mix:dict[str, int] = set_cookie_mix or DEFAULT_SET_COOKIE_MIX
+        self.cookies_per_response:int = cookies_per_response
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
 
 
-    def run(self):
-        server_address = ('', 8000)
-        httpd = http.server.HTTPServer(server_address, CookieServingHttpHandler)
+def main():
+    '''
+    run the server until interrupted
+    '''
+
+    parser = argparse.ArgumentParser(description="a local HTTP server that sets cookies")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="the port to listen on")
+    parser.add_argument("--mix", type=parse_set_cookie_mix,
+        help=f"the weight of each kind of cookie, like `session=3,persistent=5`, the kinds are `{list(DEFAULT_SET_COOKIE_MIX)}`")
+    parser.add_argument("--cookies-per-response", type=int, default=DEFAULT_COOKIES_PER_RESPONSE,
+        help="how many cookies each GET response sets")
+    parser.add_argument("--seed", type=int, help="the seed for picking the cookies")
+    parser.add_argument("--verbose", action="store_true", help="turn on debug logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level="DEBUG" if args.verbose else "INFO")
+
+    httpd = CookieServingHttpServer(
+        (args.host, args.port),
+        set_cookie_mix=args.mix,
+        cookies_per_response=args.cookies_per_response,
+        seed=args.seed)
+
+    logger.info("serving cookies on `%s:%s`", *httpd.server_address[:2])
+
+    try:
         httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("interrupted, shutting down")
+    finally:
+        httpd.server_close()
+
 
 if __name__ == "__main__":
-    m =  Main()
-    m.run()
\ No newline at end of file
+    main()
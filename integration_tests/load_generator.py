@@ -0,0 +1,341 @@
+'''
+drives a `integration_tests.cookie_serving_http_server` with many threads, each making requests through its own
+`urllib` opener that shares a single SqliteCookieJar, and reports the requests per second and the latency
+percentiles of the whole request and of just the cookie jar (`add_cookie_header` plus `extract_cookies`)
+
+the requests are for made up hosts like `www.site12.test`, so the cookie jar sees many different sites, but every
+connection goes to the local server no matter what the host is
+
+run it from the root of the repository with
+`python -m integration_tests.load_generator --threads 8 --requests-per-thread 500`, which starts a server
+in the same process unless `--server-port` is given
+'''
+
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import argparse
+import dataclasses
+import functools
+import http.client
+import json
+import logging
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from integration_tests.cookie_serving_http_server import CookieServingHttpServer, parse_set_cookie_mix
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+
+logger = logging.getLogger(__name__)
+
+'''
+the percentiles that are reported for each latency
+'''
+REPORTED_PERCENTILES:list[int] = [50, 90, 99]
+
+'''
+the paths the requests are for, the `path` cookies are set for the first directory of these
+'''
+REQUEST_PATHS:list[str] = ["/", "/index.html", "/account/settings", "/api/v1/items", "/cart", "/search?q=biscuits"]
+
+
+class _LocalHTTPConnection(http.client.HTTPConnection):
+    '''
+    a HTTPConnection that connects to a fixed address, whatever the host of the URL is. The host is still
+    sent in the `Host` header, and is what the cookie jar sees
+    '''
+
+    def __init__(self, host:str, *, server_address:tuple[str, int], **kwargs):
+        '''
+        :param host: the host of the URL
+        :param server_address: the host and port to actually connect to
+        '''
+        super().__init__(host, **kwargs)
+        self._server_address = server_address
+
+    def connect(self):
+        self.sock = self._create_connection(self._server_address, self.timeout, self.source_address)
+
+
+class LocalHTTPHandler(urllib.request.HTTPHandler):
+    '''
+    a urllib handler that sends every `http://` request to a fixed address, see `_LocalHTTPConnection`
+    '''
+
+    def __init__(self, server_address:tuple[str, int]):
+        '''
+        :param server_address: the host and port to send every request to
+        '''
+        super().__init__()
+        self._server_address = server_address
+
+    def http_open(self, req:urllib.request.Request):
+        return self.do_open(functools.partial(_LocalHTTPConnection, server_address=self._server_address), req)
+
+
+class TimedHTTPCookieProcessor(urllib.request.HTTPCookieProcessor):
+    '''
+    a HTTPCookieProcessor that records how long the cookie jar takes for each request and response
+    '''
+
+    def __init__(self, cookiejar:CookieJar):
+        '''
+        :param cookiejar: the cookie jar to use
+        '''
+        super().__init__(cookiejar)
+
+        # seconds spent in the cookie jar for each request, and for the request that is in progress
+        self.latencies:list[float] = list()
+        self._current_latency:float = 0.0
+
+    def http_request(self, request:urllib.request.Request):
+        start_time = time.perf_counter()
+        result = super().http_request(request)
+        self._current_latency = time.perf_counter() - start_time
+        return result
+
+    def http_response(self, request:urllib.request.Request, response):
+        start_time = time.perf_counter()
+        result = super().http_response(request, response)
+        self.latencies.append(self._current_latency + time.perf_counter() - start_time)
+        return result
+
+
+@dataclasses.dataclass
+class LatencySummary:
+    '''
+    percentiles of a list of latencies, in milliseconds
+    '''
+
+    mean_ms:float
+    max_ms:float
+
+    # percentile -> latency, see `REPORTED_PERCENTILES`
+    percentiles_ms:dict[int, float]
+
+    @classmethod
+    def from_seconds(cls, latencies:list[float]) -> "LatencySummary":
+        '''
+        :param latencies: the latencies in seconds, if there are none (every request failed) the summary is all zeros
+        :return: the summary
+        '''
+
+        if not latencies:
+            return cls(mean_ms=0.0, max_ms=0.0, percentiles_ms={x: 0.0 for x in REPORTED_PERCENTILES})
+
+        # `quantiles` needs at least two latencies, every percentile of just one is that latency
+        if len(latencies) == 1:
+            return cls(
+                mean_ms=latencies[0] * 1000,
+                max_ms=latencies[0] * 1000,
+                percentiles_ms={x: latencies[0] * 1000 for x in REPORTED_PERCENTILES})
+
+        # `quantiles` with n=100 returns the 1st to the 99th percentile
+        quantile_list = statistics.quantiles(latencies, n=100, method="inclusive")
+
+        return cls(
+            mean_ms=statistics.fmean(latencies) * 1000,
+            max_ms=max(latencies) * 1000,
+            percentiles_ms={x: quantile_list[x - 1] * 1000 for x in REPORTED_PERCENTILES})
+
+
+@dataclasses.dataclass
+class LoadResult:
+    '''
+    the result of `run_load`
+    '''
+
+    threads:int
+    requests:int
+    errors:int
+    duration_seconds:float
+    requests_per_second:float
+
+    # the latency of the whole request, and of just the cookie jar
+    request_latency:LatencySummary
+    cookie_jar_latency:LatencySummary
+
+    # how many cookies are in the jar at the end
+    cookies_in_jar:int
+
+
+def run_load(
+    cookie_jar:CookieJar,
+    server_address:tuple[str, int],
+    threads:int,
+    requests_per_thread:int,
+    number_of_sites:int,
+    seed:int) -> LoadResult:
+    '''
+    make requests to the server from many threads, through `urllib` openers that share a cookie jar
+
+    :param cookie_jar: the cookie jar to share
+    :param server_address: the host and port of the server
+    :param threads: how many threads to make requests from
+    :param requests_per_thread: how many requests each thread makes
+    :param number_of_sites: how many different sites the requests are for
+    :param seed: the seed for picking the sites and paths, each thread adds its own number to it
+    :return: the result
+    '''
+
+    request_latency_list:list[float] = list()
+    cookie_jar_latency_list:list[float] = list()
+    error_count = 0
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + 1)
+
+    def _worker(worker_number:int):
+
+        nonlocal error_count
+
+        rng = random.Random(seed + worker_number)
+        cookie_processor = TimedHTTPCookieProcessor(cookie_jar)
+        opener = urllib.request.build_opener(LocalHTTPHandler(server_address), cookie_processor)
+
+        worker_latency_list = list()
+        worker_error_count = 0
+
+        start_barrier.wait()
+
+        for _ in range(requests_per_thread):
+
+            site_number = rng.randrange(number_of_sites)
+            host = f"www.site{site_number}.test" if rng.random() < 0.5 else f"site{site_number}.test"
+            url = f"http://{host}:{server_address[1]}{rng.choice(REQUEST_PATHS)}"
+
+            start_time = time.perf_counter()
+
+            try:
+                with opener.open(url) as response:
+                    response.read()
+            except OSError as e:
+                logger.debug("request to `%s` failed: `%s`", url, e)
+                worker_error_count += 1
+                continue
+
+            worker_latency_list.append(time.perf_counter() - start_time)
+
+        with results_lock:
+            request_latency_list.extend(worker_latency_list)
+            cookie_jar_latency_list.extend(cookie_processor.latencies)
+            error_count += worker_error_count
+
+    thread_list = [threading.Thread(target=_worker, args=(i,), name=f"load-{i}") for i in range(threads)]
+
+    for iter_thread in thread_list:
+        iter_thread.start()
+
+    start_barrier.wait()
+    start_time = time.perf_counter()
+
+    for iter_thread in thread_list:
+        iter_thread.join()
+
+    duration = time.perf_counter() - start_time
+
+    return LoadResult(
+        threads=threads,
+        requests=len(request_latency_list),
+        errors=error_count,
+        duration_seconds=duration,
+        requests_per_second=len(request_latency_list) / duration,
+        request_latency=LatencySummary.from_seconds(request_latency_list),
+        cookie_jar_latency=LatencySummary.from_seconds(cookie_jar_latency_list),
+        cookies_in_jar=len(cookie_jar))
+
+
+def format_load_result(load_result:LoadResult) -> str:
+    '''
+    format a load result for people to read
+
+    :param load_result: the result to format
+    :return: the formatted result, over several lines
+    '''
+
+    line_list = [
+        f"{load_result.requests} requests from {load_result.threads} threads in {load_result.duration_seconds:.2f} s, "
+            f"{load_result.requests_per_second:.1f} requests/s, {load_result.errors} errors",
+        f"{load_result.cookies_in_jar} cookies in the jar",
+    ]
+
+    for iter_name, iter_summary in [("request", load_result.request_latency), ("cookie jar", load_result.cookie_jar_latency)]:
+
+        percentile_text = ", ".join(f"p{k} {v:.3f} ms" for k, v in iter_summary.percentiles_ms.items())
+        line_list.append(f"{iter_name} latency: mean {iter_summary.mean_ms:.3f} ms, {percentile_text}, max {iter_summary.max_ms:.3f} ms")
+
+    return "\n".join(line_list)
+
+
+def main():
+    '''
+    run the load generator and print the results, exiting with a non zero status if every request failed
+    '''
+
+    parser = argparse.ArgumentParser(description="drive a cookie serving HTTP server through a SqliteCookieJar")
+    parser.add_argument("--threads", type=int, default=8, help="how many threads to make requests from")
+    parser.add_argument("--requests-per-thread", type=int, default=200, help="how many requests each thread makes")
+    parser.add_argument("--sites", type=int, default=100, help="how many different sites the requests are for")
+    parser.add_argument("--seed", type=int, default=1234, help="the seed for the requests and the server's cookies")
+    parser.add_argument("--database-path", type=pathlib.Path,
+        help="the SqliteCookieJar's database, defaults to one in a temporary directory")
+    parser.add_argument("--stdlib", action="store_true", help="use the standard library's CookieJar instead, to compare")
+    parser.add_argument("--server-port", type=int,
+        help="use a server that is already running on this port on localhost, rather than starting one")
+    parser.add_argument("--mix", type=parse_set_cookie_mix, help="the server's mix of cookies, like `session=3,persistent=5`")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="turn on debug logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level="DEBUG" if args.verbose else "WARNING")
+
+    httpd = None
+
+    if args.server_port:
+        server_address = ("127.0.0.1", args.server_port)
+    else:
+        httpd = CookieServingHttpServer(("127.0.0.1", 0), set_cookie_mix=args.mix, seed=args.seed)
+        threading.Thread(target=httpd.serve_forever, name="cookie-server", daemon=True).start()
+        server_address = httpd.server_address[:2]
+
+    with tempfile.TemporaryDirectory(prefix="biscutbox-load-") as temp_directory:
+
+        if args.stdlib:
+            cookie_jar = CookieJar(DefaultCookiePolicy())
+        else:
+            cookie_jar = SqliteCookieJar(
+                database_path=args.database_path or pathlib.Path(temp_directory) / "cookies.sqlite3",
+                policy=DefaultCookiePolicy())
+            cookie_jar.connect()
+
+        try:
+            load_result = run_load(
+                cookie_jar=cookie_jar,
+                server_address=server_address,
+                threads=args.threads,
+                requests_per_thread=args.requests_per_thread,
+                number_of_sites=args.sites,
+                seed=args.seed)
+        finally:
+            if not args.stdlib:
+                cookie_jar.close()
+
+            if httpd:
+                httpd.shutdown()
+                httpd.server_close()
+
+    if args.json:
+        print(json.dumps(dataclasses.asdict(load_result), indent=4))
+    else:
+        print(format_load_result(load_result))
+
+    if load_result.requests == 0:
+        logger.error("every request failed, is the server at `%s:%s` running?", *server_address)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from benchmarks.cookie_corpus import CookieCorpus
+from benchmarks.run_benchmarks import run_benchmarks, JAR_KINDS
+from benchmarks.startup_benchmark import run_startup_benchmarks, STARTUP_STEPS
+from tests.testing_util import assert_cookie_equality
+
+import itertools
+import json
+import pathlib
+import re
+
+
+class TestBenchmarks():
+    '''
+    tests for the synthetic cookie corpus and the benchmark runner, run at a tiny size
+    '''
+
+    def test_corpus_is_reproducible(self):
+        '''
+        the same seed should always give the same cookies and requests
+        '''
+
+        corpus_one = CookieCorpus(seed=1, number_of_sites=50, now=1_700_000_000)
+        corpus_two = CookieCorpus(seed=1, number_of_sites=50, now=1_700_000_000)
+
+        cookie_list_one = list(itertools.chain.from_iterable(corpus_one.iter_cookie_batches(500, 64)))
+        cookie_list_two = list(itertools.chain.from_iterable(corpus_two.iter_cookie_batches(500, 64)))
+
+        assert len(cookie_list_one) == 500
+        for iter_cookie_one, iter_cookie_two in zip(cookie_list_one, cookie_list_two):
+            assert_cookie_equality(iter_cookie_one, iter_cookie_two)
+
+        assert [x.full_url for x in corpus_one.make_requests(20)] == [x.full_url for x in corpus_two.make_requests(20)]
+
+        # a different seed gives a different corpus
+        corpus_three = CookieCorpus(seed=2, number_of_sites=50, now=1_700_000_000)
+        assert [x.value for x in next(corpus_three.iter_cookie_batches(10, 10))] != [x.value for x in cookie_list_one[:10]]
+
+    def test_corpus_is_skewed(self):
+        '''
+        the most popular site should have many more cookies than the median one
+        '''
+
+        corpus = CookieCorpus(seed=1, number_of_sites=100, now=1_700_000_000)
+
+        site_counts = dict()
+        for iter_cookie in itertools.chain.from_iterable(corpus.iter_cookie_batches(5000, 1000)):
+            iter_site = re.search(r"site\d+", iter_cookie.domain).group(0)
+            site_counts[iter_site] = site_counts.get(iter_site, 0) + 1
+
+        sorted_counts = sorted(site_counts.values(), reverse=True)
+        assert sorted_counts[0] > 10 * sorted_counts[len(sorted_counts) // 2]
+
+    def test_run_benchmarks(self, tmp_path:pathlib.Path):
+        '''
+        every operation should be timed for every cookie jar, and the results should be JSON serializable
+        '''
+
+        benchmark_results = run_benchmarks(
+            sizes=[200],
+            jar_kinds=JAR_KINDS,
+            seed=1,
+            database_directory=tmp_path,
+            lookups=5,
+            len_calls=5,
+            batch_size=50)
+
+        results = json.loads(json.dumps(benchmark_results))["results"]
+
+        assert {(x["jar"], x["operation"]) for x in results} == {(x, y) for x in JAR_KINDS for y in [
+            "set_cookies", "add_cookie_header", "extract_cookies", "len", "iterate", "clear_expired_cookies"]}
+        assert all(x["size"] == 200 and x["total_seconds"] >= 0 for x in results)
+        assert benchmark_results["parameters"]["seed"] == 1
+
+    def test_run_startup_benchmarks(self, tmp_path:pathlib.Path):
+        '''
+        every startup step should be timed in a new process, with and without `lazy_connect`
+        '''
+
+        benchmark_results = run_startup_benchmarks(database_directory=tmp_path, runs=1, size=50, seed=1)
+
+        results = json.loads(json.dumps(benchmark_results))["results"]
+
+        assert [x["lazy_connect"] for x in results] == [False, True]
+        assert all(list(x["median_seconds"].keys()) == STARTUP_STEPS for x in results)
+        assert all(x["median_total_seconds"] > 0 for x in results)
@@ -0,0 +1,136 @@
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import create_simple_cookie
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def limited_sqlite_cookie_jar() -> SqliteCookieJar:
+    ''' a fixture to set up an in memory SqliteCookieJar with a per domain limit of 3
+    and a global limit of 5
+    '''
+
+    cj = SqliteCookieJar(database_path=":memory:", max_cookies_per_domain=3, max_cookies=5)
+    cj.connect()
+
+    yield cj
+
+    cj.close()
+
+
+class TestCapacityLimits():
+    '''
+    tests for the `max_cookies_per_domain` and `max_cookies` limits
+    '''
+
+    def test_no_limits_by_default(self):
+        '''
+        without limits nothing should ever be evicted
+        '''
+
+        with SqliteCookieJar(database_path=":memory:") as cookie_jar:
+
+            result = cookie_jar.set_cookies(
+                [create_simple_cookie(f"a{i}", "b", "example.com") for i in range(50)])
+
+            assert result.total == 0
+            assert len(cookie_jar) == 50
+
+    def test_per_domain_limit_evicts_oldest(
+        self,
+        limited_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        going over the per domain limit should evict the oldest cookies for that registrable
+        domain, which includes its subdomains
+        '''
+
+        limited_sqlite_cookie_jar.set_cookies([
+            create_simple_cookie("a", "1", "example.com"),
+            create_simple_cookie("b", "2", "a.example.com"),
+            create_simple_cookie("c", "3", "zombo.com"),
+        ])
+
+        result = limited_sqlite_cookie_jar.set_cookies([
+            create_simple_cookie("d", "4", ".example.com"),
+            create_simple_cookie("e", "5", "b.example.com"),
+        ])
+
+        assert result.domain_limit_evicted == 1
+        assert result.expired_evicted == 0
+        assert result.global_limit_evicted == 0
+        assert result.total == 1
+
+        # `a` was the oldest cookie under example.com
+        assert sorted(x.name for x in limited_sqlite_cookie_jar) == ["b", "c", "d", "e"]
+
+    def test_per_domain_limit_evicts_expired_first(
+        self,
+        limited_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        an expired cookie should be evicted before older cookies that haven't expired
+        '''
+
+        expired_cookie = create_simple_cookie("b", "2", "example.com")
+        expired_cookie.expires = int(time.time()) - 10
+
+        limited_sqlite_cookie_jar.set_cookies([
+            create_simple_cookie("a", "1", "example.com"),
+            expired_cookie,
+            create_simple_cookie("c", "3", "example.com"),
+        ])
+
+        result = limited_sqlite_cookie_jar.set_cookies([create_simple_cookie("d", "4", "example.com")])
+
+        assert result.expired_evicted == 1
+        assert result.domain_limit_evicted == 0
+        assert sorted(x.name for x in limited_sqlite_cookie_jar) == ["a", "c", "d"]
+
+        result = limited_sqlite_cookie_jar.set_cookies([create_simple_cookie("e", "5", "example.com")])
+        assert result.expired_evicted == 0
+        assert result.domain_limit_evicted == 1
+        assert sorted(x.name for x in limited_sqlite_cookie_jar) == ["c", "d", "e"]
+
+    def test_global_limit(
+        self,
+        limited_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        going over the global limit should evict the oldest cookies in the whole jar
+        '''
+
+        limited_sqlite_cookie_jar.set_cookies([
+            create_simple_cookie("a", "1", "example.com"),
+            create_simple_cookie("b", "2", "zombo.com"),
+            create_simple_cookie("c", "3", "contoso.com"),
+            create_simple_cookie("d", "4", "example.org"),
+        ])
+
+        result = limited_sqlite_cookie_jar.set_cookies([
+            create_simple_cookie("e", "5", "example.net"),
+            create_simple_cookie("f", "6", "example.edu"),
+        ])
+
+        assert result.global_limit_evicted == 1
+        assert result.domain_limit_evicted == 0
+        assert len(limited_sqlite_cookie_jar) == 5
+        assert sorted(x.name for x in limited_sqlite_cookie_jar) == ["b", "c", "d", "e", "f"]
+
+    def test_limits_apply_to_cookie_file_loads(
+        self,
+        tmp_path,
+        limited_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        bulk loads don't know which domains they touched up front, but should still be limited
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+        expiry_time = int(time.time()) + 1000
+
+        cookie_file_path.write_text(
+            "# Netscape HTTP Cookie File\n" +
+            "".join(f"example.com\tFALSE\t/\tFALSE\t{expiry_time}\ta{i}\tb\n" for i in range(10)),
+            encoding="utf-8")
+
+        assert limited_sqlite_cookie_jar.load_cookie_file(cookie_file_path) == 10
+        assert len(limited_sqlite_cookie_jar) == 3
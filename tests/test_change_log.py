@@ -0,0 +1,165 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar, ChangeLogError
+from biscutbox.results import ChangeSet
+from biscutbox import sql_statements
+from tests.testing_util import create_simple_cookie
+
+import pathlib
+
+import pytest
+
+
+def _cookie_tuples(cookie_jar:SqliteCookieJar) -> list[tuple]:
+    return sorted((x.domain, x.path, x.name, x.value) for x in cookie_jar)
+
+
+class TestChangeLog():
+    '''
+    tests for the optional change log, and syncing cookie jars with it
+    '''
+
+    def test_change_log_is_opt_in(self, tempfolder_database_path:pathlib.Path):
+        '''
+        the change log table should only be created when asked for, and log the cookies that were already there
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            assert cookie_jar.sqlite_connection.execute(sql_statements.SELECT_CHANGE_LOG_TABLE_EXISTS).fetchone() is None
+
+            with pytest.raises(ChangeLogError):
+                cookie_jar.changes_since(0)
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, change_log=True) as cookie_jar:
+
+            change_set = cookie_jar.changes_since(0)
+
+            assert change_set.last_seq == 1
+            assert change_set.changed_keys == [("example.com", "/", "a")]
+            assert [x.name for x in change_set.cookies] == ["a"]
+
+        # the triggers keep logging without `change_log`
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("b", "2", "example.com"))
+
+            assert cookie_jar.changes_since(1).changed_keys == [("example.com", "/", "b")]
+
+    def test_changes_since(self, tempfolder_database_path:pathlib.Path):
+        '''
+        only the keys that changed after `since_seq` should be returned, with their current cookies
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, change_log=True) as cookie_jar:
+
+            assert cookie_jar.changes_since(0) == ChangeSet(jar_id=sql_statements.DEFAULT_JAR_ID,
+                since_seq=0, last_seq=0, changed_keys=[], cookies=[])
+
+            cookie_jar.set_cookies([create_simple_cookie("a", "1", "example.com"), create_simple_cookie("b", "2", "example.com")])
+            first_seq = cookie_jar.changes_since(0).last_seq
+
+            cookie_jar.clear("example.com", "/", "a")
+            cookie_jar.partition("other").set_cookie(create_simple_cookie("c", "3", "example.com"))
+
+            change_set = cookie_jar.changes_since(first_seq)
+
+            assert change_set.since_seq == first_seq
+            assert change_set.last_seq > first_seq
+            assert change_set.changed_keys == [("example.com", "/", "a")]
+            assert change_set.cookies == []
+
+            # last access times aren't logged
+            last_seq = change_set.last_seq
+            cookie_jar.sqlite_connection.execute(f'UPDATE "{sql_statements.TABLE_NAME_V1}" SET last_accessed = 1')
+            assert cookie_jar.changes_since(last_seq).changed_keys == []
+
+            with pytest.raises(ChangeLogError):
+                cookie_jar.changes_since(last_seq + 1)
+
+    def test_sync_from(self, tempfolder_database_path:pathlib.Path, tmp_path:pathlib.Path):
+        '''
+        syncing should make the replica's partition match the source's, copying only what changed
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, change_log=True) as source_cookie_jar, \
+            SqliteCookieJar(database_path=tmp_path / "replica.sqlite3") as replica_cookie_jar:
+
+            source_cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", "example.com") for i in range(5)])
+            source_cookie_jar.partition("other").set_cookie(create_simple_cookie("other", "1", "example.com"))
+
+            sync_result = replica_cookie_jar.sync_from(source_cookie_jar)
+
+            assert sync_result.cookies_inserted == 5
+            assert sync_result.cookies_deleted == 0
+            assert _cookie_tuples(replica_cookie_jar) == _cookie_tuples(source_cookie_jar)
+            assert replica_cookie_jar.jar_ids() == [sql_statements.DEFAULT_JAR_ID]
+
+            # nothing changed, so nothing to do
+            sync_result = replica_cookie_jar.sync_from(source_cookie_jar, sync_result.last_seq)
+            assert (sync_result.changed_keys, sync_result.cookies_deleted, sync_result.cookies_inserted) == (0, 0, 0)
+
+            source_cookie_jar.set_cookie(create_simple_cookie("a0", "2", "example.com"))
+            source_cookie_jar.clear("example.com", "/", "a0")
+            source_cookie_jar.clear("example.com", "/", "a1")
+            source_cookie_jar.set_cookie(create_simple_cookie("b", "1", "zombo.com"))
+
+            sync_result = replica_cookie_jar.sync_from(source_cookie_jar, sync_result.last_seq)
+
+            assert sync_result.changed_keys == 3
+            assert sync_result.cookies_deleted == 2
+            assert sync_result.cookies_inserted == 1
+            assert _cookie_tuples(replica_cookie_jar) == _cookie_tuples(source_cookie_jar)
+
+            source_cookie_jar.clear()
+            replica_cookie_jar.sync_from(source_cookie_jar, sync_result.last_seq)
+
+            assert len(replica_cookie_jar) == 0
+
+    def test_sync_from_change_set_and_partitions(self, tempfolder_database_path:pathlib.Path, tmp_path:pathlib.Path):
+        '''
+        a ChangeSet can be applied directly, and partitions sync into the replica's own partition
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, change_log=True) as source_cookie_jar, \
+            SqliteCookieJar(database_path=tmp_path / "replica.sqlite3") as replica_cookie_jar:
+
+            source_partition = source_cookie_jar.partition("tenant")
+            source_partition.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            change_set = source_partition.changes_since(0)
+            assert change_set.jar_id == "tenant"
+
+            replica_partition = replica_cookie_jar.partition("tenant")
+            replica_partition.sync_from(change_set)
+
+            # applying it again does nothing
+            replica_partition.sync_from(change_set)
+
+            assert _cookie_tuples(replica_partition) == [("example.com", "/", "a", "1")]
+            assert len(replica_cookie_jar) == 0
+
+    def test_prune_change_log(self, tempfolder_database_path:pathlib.Path, tmp_path:pathlib.Path):
+        '''
+        pruning should keep the changes after `up_to_seq`, and replicas that are behind should get an error
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, change_log=True) as source_cookie_jar, \
+            SqliteCookieJar(database_path=tmp_path / "replica.sqlite3") as replica_cookie_jar:
+
+            source_cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", "example.com") for i in range(3)])
+            last_seq = replica_cookie_jar.sync_from(source_cookie_jar).last_seq
+
+            source_cookie_jar.set_cookie(create_simple_cookie("b", "1", "example.com"))
+
+            assert source_cookie_jar.prune_change_log(last_seq) == 3
+
+            sync_result = replica_cookie_jar.sync_from(source_cookie_jar, last_seq)
+            assert sync_result.cookies_inserted == 1
+            assert _cookie_tuples(replica_cookie_jar) == _cookie_tuples(source_cookie_jar)
+
+            with pytest.raises(ChangeLogError, match="pruned"):
+                replica_cookie_jar.sync_from(source_cookie_jar, 0)
+
+            # pruning everything still keeps the `seq` going up
+            source_cookie_jar.prune_change_log(sync_result.last_seq)
+            assert source_cookie_jar.changes_since(sync_result.last_seq).last_seq == sync_result.last_seq
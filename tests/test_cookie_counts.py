@@ -0,0 +1,134 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar, tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_statements
+from tests.testing_util import create_simple_cookie
+
+import pathlib
+import sqlite3
+import time
+
+
+def _assert_counts_match(cookie_jar:SqliteCookieJar):
+    '''
+    check the count tables against actually counting the rows in the cookie table
+
+    :param cookie_jar: the cookie jar to check
+    '''
+
+    connection = cookie_jar.sqlite_connection
+
+    expected_jar_counts = {x["jar_id"]: x["c"] for x in connection.execute(
+        f'SELECT jar_id, COUNT(id) AS c FROM "{sql_statements.TABLE_NAME_V1}" GROUP BY jar_id')}
+    jar_counts = {x["jar_id"]: x["count"] for x in connection.execute(
+        f'SELECT jar_id, count FROM "{sql_statements.JAR_COUNT_TABLE_NAME_V1}"')}
+
+    expected_domain_counts = {(x["jar_id"], x["base_domain"]): x["c"] for x in connection.execute(
+        f'SELECT jar_id, base_domain, COUNT(id) AS c FROM "{sql_statements.TABLE_NAME_V1}" GROUP BY jar_id, base_domain')}
+    domain_counts = {(x["jar_id"], x["base_domain"]): x["count"] for x in connection.execute(
+        f'SELECT jar_id, base_domain, count FROM "{sql_statements.DOMAIN_COUNT_TABLE_NAME_V1}"')}
+
+    assert jar_counts == expected_jar_counts
+    assert domain_counts == expected_domain_counts
+
+
+class TestCookieCounts():
+    '''
+    tests for the count tables that make `len()` and `count_for_domain()` constant time
+    '''
+
+    def test_counts_follow_inserts_and_deletes(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the count tables should match the cookie table after every kind of insert and delete
+        '''
+
+        partition = in_memory_sqlite_cookie_jar.partition("other")
+
+        expired_cookie = create_simple_cookie("expired", "1", "zombo.com")
+        expired_cookie.expires = int(time.time()) - 10
+
+        in_memory_sqlite_cookie_jar.set_cookies(
+            [create_simple_cookie(f"a{i}", "1", "example.com") for i in range(5)] +
+            [create_simple_cookie(f"b{i}", "1", f"{i}.zombo.com") for i in range(3)] +
+            [expired_cookie])
+        partition.set_cookies([create_simple_cookie("a", "1", "example.com")])
+        _assert_counts_match(in_memory_sqlite_cookie_jar)
+
+        assert len(in_memory_sqlite_cookie_jar) == 9
+        assert len(partition) == 1
+        assert in_memory_sqlite_cookie_jar.count_for_domain("example.com") == 5
+        assert in_memory_sqlite_cookie_jar.count_for_domain("a.zombo.com") == 4
+        assert in_memory_sqlite_cookie_jar.count_for_domain(".zombo.com") == 4
+        assert in_memory_sqlite_cookie_jar.count_for_domain("contoso.com") == 0
+        assert partition.count_for_domain("example.com") == 1
+
+        in_memory_sqlite_cookie_jar.clear_expired_cookies()
+        in_memory_sqlite_cookie_jar.clear("example.com", "/", "a0")
+        _assert_counts_match(in_memory_sqlite_cookie_jar)
+        assert len(in_memory_sqlite_cookie_jar) == 7
+
+        in_memory_sqlite_cookie_jar.clear()
+        _assert_counts_match(in_memory_sqlite_cookie_jar)
+        assert len(in_memory_sqlite_cookie_jar) == 0
+        assert in_memory_sqlite_cookie_jar.jar_ids() == ["other"]
+
+        # moving a cookie to another partition
+        with in_memory_sqlite_cookie_jar.sqlite_connection as connection:
+            connection.execute(f'UPDATE "{sql_statements.TABLE_NAME_V1}" SET jar_id = \'moved\'')
+        _assert_counts_match(in_memory_sqlite_cookie_jar)
+        assert in_memory_sqlite_cookie_jar.jar_ids() == ["moved"]
+
+    def test_counts_follow_evictions(self):
+        '''
+        cookies evicted to stay under the capacity limits should be taken off the counts
+        '''
+
+        with SqliteCookieJar(database_path=":memory:", max_cookies_per_domain=3, max_cookies=5) as cookie_jar:
+
+            cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", "example.com") for i in range(10)])
+            cookie_jar.set_cookies([create_simple_cookie(f"b{i}", "1", f"zombo{i}.com") for i in range(10)])
+
+            _assert_counts_match(cookie_jar)
+            assert len(cookie_jar) == 5
+
+    def test_len_does_not_scan_cookie_table(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        `len()` should be a primary key lookup on the count table
+        '''
+
+        query_plan = in_memory_sqlite_cookie_jar.sqlite_connection.execute(
+            f"EXPLAIN QUERY PLAN {sql_statements.COUNT_ENTRIES_IN_COOKIE_TABLE_STATEMENT}", {"jar_id": ""}).fetchall()
+
+        query_plan_detail = " ".join(x["detail"] for x in query_plan)
+        assert sql_statements.TABLE_NAME_V1 not in query_plan_detail
+        assert f"SEARCH {sql_statements.JAR_COUNT_TABLE_NAME_V1} USING PRIMARY KEY" in query_plan_detail
+
+    def test_counts_backfilled_on_upgrade(self, tempfolder_database_path:pathlib.Path):
+        '''
+        upgrading a database from before the count tables existed should count the cookies already in it
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", f"{i % 2}.example{i % 3}.com") for i in range(12)])
+            cookie_jar.partition("other").set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+        # turn the database back into schema version 3
+        conn = sqlite3.connect(tempfolder_database_path)
+        with conn:
+            for iter_trigger in ["cookie_count_insert_trigger", "cookie_count_delete_trigger", "cookie_count_update_trigger"]:
+                conn.execute(f'DROP TRIGGER "{iter_trigger}"')
+            conn.execute(f'DROP TABLE "{sql_statements.JAR_COUNT_TABLE_NAME_V1}"')
+            conn.execute(f'DROP TABLE "{sql_statements.DOMAIN_COUNT_TABLE_NAME_V1}"')
+            conn.execute('DROP INDEX "cookie_key_idx"')
+            conn.execute(f'ALTER TABLE "{sql_statements.TABLE_NAME_V1}" DROP COLUMN "creation_time"')
+            conn.execute("PRAGMA user_version = 3")
+        conn.close()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            _assert_counts_match(cookie_jar)
+            assert len(cookie_jar) == 12
+            assert cookie_jar.count_for_domain("example0.com") == 4
+            assert cookie_jar.jar_ids() == ["", "other"]
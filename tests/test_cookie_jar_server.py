@@ -0,0 +1,317 @@
+from biscutbox.cookie_jar_server import CookieJarServer, CookieJarServerError, cookie_to_dict
+from biscutbox.cookie_jar_client import CookieJarClient
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie,
+    FakeResponse
+)
+
+from concurrent.futures import Future
+import json
+import pathlib
+import socket
+import time
+
+import pytest
+
+
+@pytest.fixture
+def cookie_jar_server(tmp_path:pathlib.Path) -> CookieJarServer:
+    ''' a fixture that runs a CookieJarServer on a socket in a temporary folder
+    '''
+
+    server = CookieJarServer(socket_path=tmp_path / "biscutbox.sock", database_path=tmp_path / "cookies.sqlite3")
+    server.start()
+
+    yield server
+
+    server.stop()
+
+
+class TestCookieJarServer():
+    '''
+    tests for CookieJarServer and CookieJarClient
+    '''
+
+    def test_clients_share_cookies(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        a cookie set through one client should be sent by another, with each client applying its own policy
+        '''
+
+        with CookieJarClient(cookie_jar_server.socket_path) as client_one, \
+            CookieJarClient(cookie_jar_server.socket_path) as client_two:
+
+            request = create_dummy_request("https://www.example.com/", "GET")
+            response = FakeResponse([
+                "Set-Cookie: a=1; Domain=.example.com; Path=/",
+                "Set-Cookie: b=2; Secure",
+                "Set-Cookie: c=3; Path=/other",
+            ])
+            client_one.extract_cookies(response, request)
+
+            assert len(client_two) == 3
+
+            https_request = create_dummy_request("https://www.example.com/", "GET")
+            client_two.add_cookie_header(https_request)
+            assert sorted(https_request.get_header("Cookie").split("; ")) == ["a=1", "b=2"]
+
+            # the secure cookie isn't sent over http
+            http_request = create_dummy_request("http://www.example.com/other", "GET")
+            client_two.add_cookie_header(http_request)
+            assert sorted(http_request.get_header("Cookie").split("; ")) == ["a=1", "c=3"]
+
+            assert [x.name for x in client_two._cookies_for_domain("www.example.com", https_request)] == ["b"]
+
+            client_two.clear("www.example.com")
+            assert sorted(x.name for x in client_one) == ["a"]
+
+            client_one.clear()
+            assert len(client_two) == 0
+
+    def test_cache(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        repeated lookups for the same registrable domain should come from the cache, until a cookie is set for it
+        '''
+
+        with CookieJarClient(cookie_jar_server.socket_path) as client:
+
+            client.set_cookies([
+                create_simple_cookie("a", "1", "example.com"),
+                create_simple_cookie("b", "2", "zombo.com"),
+            ])
+
+            request = create_dummy_request("https://example.com/", "GET")
+            assert len(client._cookies_for_request(request)) == 1
+            assert len(client._cookies_for_request(create_dummy_request("https://a.example.com/", "GET"))) == 1
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (1, 1)
+
+            # setting a cookie for another site doesn't invalidate the cached lookup
+            client.set_cookie(create_simple_cookie("c", "3", "zombo.com"))
+            assert len(client._cookies_for_request(request)) == 1
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (1, 2)
+
+            client.set_cookie(create_simple_cookie("d", "4", "example.com"))
+            assert len(client._cookies_for_request(request)) == 2
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (2, 2)
+
+    def test_cache_sibling_hosts(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        sibling hosts share a cache entry, so each one should still get its own cookies from it
+        '''
+
+        with CookieJarClient(cookie_jar_server.socket_path) as client:
+
+            client.set_cookies([
+                create_simple_cookie("a", "1", "a.example.com"),
+                create_simple_cookie("b", "2", "b.example.com"),
+            ])
+
+            a_request = create_dummy_request("https://a.example.com/", "GET")
+            b_request = create_dummy_request("https://b.example.com/", "GET")
+
+            assert [x.name for x in client._cookies_for_request(a_request)] == ["a"]
+            assert [x.name for x in client._cookies_for_request(b_request)] == ["b"]
+            assert [x.name for x in client._cookies_for_request(a_request)] == ["a"]
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (1, 2)
+
+            client.add_cookie_header(b_request)
+            assert b_request.get_header("Cookie") == "b=2"
+
+    def test_clear_expired_cookies(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        `add_cookie_header` shouldn't send `clear_expired_cookies` every time, and clearing the expired cookies
+        should only drop the cache entries that had one
+        '''
+
+        with CookieJarClient(cookie_jar_server.socket_path) as client:
+
+            client.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            for _ in range(3):
+                request = create_dummy_request("https://example.com/", "GET")
+                client.add_cookie_header(request)
+                assert request.get_header("Cookie") == "a=1"
+
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (1, 2)
+
+        with CookieJarClient(cookie_jar_server.socket_path, clear_expired_interval=0) as client:
+
+            expired_cookie = create_simple_cookie("b", "2", "zombo.com")
+            expired_cookie.expires = int(time.time()) - 10
+            client.set_cookie(expired_cookie)
+
+            zombo_request = create_dummy_request("https://zombo.com/", "GET")
+            assert client._cookies_for_request(zombo_request) == []
+            assert (cookie_jar_server.cache_misses, cookie_jar_server.cache_hits) == (2, 2)
+
+            client.clear_expired_cookies()
+            client.clear_expired_cookies()
+
+            assert len(client) == 1
+            assert list(cookie_jar_server._cache) == [("", "example.com")]
+
+    def test_partitions(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        clients with different `jar_id`s shouldn't see each other's cookies
+        '''
+
+        with CookieJarClient(cookie_jar_server.socket_path, jar_id="one") as client_one, \
+            CookieJarClient(cookie_jar_server.socket_path, jar_id="two") as client_two:
+
+            client_one.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            request = create_dummy_request("https://example.com/", "GET")
+            assert len(client_one._cookies_for_request(request)) == 1
+            assert len(client_two._cookies_for_request(request)) == 0
+
+            client_two.clear()
+            assert len(client_one) == 1
+
+        assert cookie_jar_server.cookie_jar.jar_ids() == ["one"]
+
+    def test_pipelined_set_cookies_are_batched(
+        self,
+        cookie_jar_server:CookieJarServer,
+        monkeypatch:pytest.MonkeyPatch):
+        '''
+        requests that are sent without waiting for a response should get their responses back in order,
+        and consecutive `set_cookies` for the same partition should be merged into one transaction
+        '''
+
+        set_cookies_calls = list()
+        original_set_cookies = cookie_jar_server.cookie_jar.set_cookies
+
+        def _counting_set_cookies(cookie_list):
+            set_cookies_calls.append(len(cookie_list))
+            return original_set_cookies(cookie_list)
+
+        monkeypatch.setattr(cookie_jar_server.cookie_jar, "set_cookies", _counting_set_cookies)
+
+        batch = list()
+        for i in range(5):
+            batch.append(({"op": "set_cookies", "jar_id": "", "cookies": [
+                cookie_to_dict(create_simple_cookie(f"a{i}", "1", "example.com"))]}, Future()))
+        batch.append(({"op": "len", "jar_id": ""}, Future()))
+
+        cookie_jar_server._process_batch(batch)
+
+        assert set_cookies_calls == [5]
+        assert [x.result() for _, x in batch] == [None] * 5 + [5]
+
+        # an invalid cookie only fails its own request, not the ones it would have been merged with
+        batch = [
+            ({"op": "set_cookies", "jar_id": "", "cookies": [
+                cookie_to_dict(create_simple_cookie("c0", "1", "example.com"))]}, Future()),
+            ({"op": "set_cookies", "jar_id": "", "cookies": [{"not_a_cookie_argument": 1}]}, Future()),
+            ({"op": "set_cookies", "jar_id": ""}, Future()),
+            ({"op": "set_cookies", "jar_id": "", "cookies": [
+                cookie_to_dict(create_simple_cookie("c1", "1", "example.com"))]}, Future()),
+        ]
+
+        cookie_jar_server._process_batch(batch)
+
+        assert set_cookies_calls == [5, 2]
+        assert [x.exception() is None for _, x in batch] == [True, False, False, True]
+        assert isinstance(batch[1][1].exception(), CookieJarServerError)
+        assert len(cookie_jar_server.cookie_jar) == 7
+
+        # the same thing over the socket, these may or may not end up in the same batch
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as raw_socket:
+            raw_socket.connect(str(cookie_jar_server.socket_path))
+            socket_file = raw_socket.makefile("rwb")
+
+            request_list = [{"id": i, "op": "set_cookies", "jar_id": "", "cookies": [
+                cookie_to_dict(create_simple_cookie(f"b{i}", "1", "example.com"))]} for i in range(20)]
+            request_list.append({"id": 20, "op": "len", "jar_id": ""})
+            request_list.append({"id": 21, "op": "not_a_real_op", "jar_id": ""})
+
+            socket_file.write(b"".join(json.dumps(x).encode("utf-8") + b"\n" for x in request_list))
+            socket_file.flush()
+
+            response_list = [json.loads(socket_file.readline()) for _ in request_list]
+
+        assert [x["id"] for x in response_list] == list(range(22))
+        assert response_list[20]["result"] == 27
+        assert "unknown op" in response_list[21]["error"]["message"]
+        assert sum(set_cookies_calls) == 27
+
+    def test_errors(
+        self,
+        cookie_jar_server:CookieJarServer):
+        '''
+        errors on the server should be raised by the client
+        '''
+
+        client = CookieJarClient(cookie_jar_server.socket_path)
+
+        with pytest.raises(CookieJarServerError):
+            len(client)
+
+        with client:
+            with pytest.raises(CookieJarServerError, match="unknown op"):
+                client._call("not_a_real_op")
+
+            with pytest.raises(ValueError):
+                client.clear(path="/")
+
+            # the connection is still usable after an error
+            assert len(client) == 0
+
+    def test_stop_with_connected_clients(self, tmp_path:pathlib.Path):
+        '''
+        a client that is still connected after the server stops should get an error, rather than waiting forever
+        '''
+
+        cookie_jar_server = CookieJarServer(socket_path=tmp_path / "biscutbox.sock", database_path=tmp_path / "cookies.sqlite3")
+        cookie_jar_server.start()
+
+        with CookieJarClient(cookie_jar_server.socket_path, timeout=10) as client:
+
+            assert len(client) == 0
+
+            cookie_jar_server.stop()
+
+            assert not cookie_jar_server.socket_path.exists()
+            assert cookie_jar_server.submit({"op": "len", "jar_id": ""}).exception(timeout=0) is not None
+
+            with pytest.raises(CookieJarServerError, match="shutting down"):
+                len(client)
+
+    def test_timeout_closes_the_connection(self, tmp_path:pathlib.Path):
+        '''
+        after a request times out the connection should be closed, so the late response can't be read as the
+        response to the next request
+        '''
+
+        socket_path = tmp_path / "slow.sock"
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listening_socket:
+            listening_socket.bind(str(socket_path))
+            listening_socket.listen()
+
+            with CookieJarClient(socket_path, timeout=0.1) as client:
+
+                server_socket, _ = listening_socket.accept()
+
+                with server_socket:
+
+                    with pytest.raises(CookieJarServerError, match="lost the connection"):
+                        len(client)
+
+                    # the server can't send the late response, the client closed its end
+                    with pytest.raises(OSError):
+                        server_socket.sendall(b'{"id": 1, "result": 1}\n')
+
+                    with pytest.raises(CookieJarServerError, match="not connected"):
+                        len(client)
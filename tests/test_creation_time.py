@@ -0,0 +1,86 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+from http.cookiejar import Cookie
+
+
+def _create_cookie(name:str, domain:str, path:str) -> Cookie:
+    cookie = create_simple_cookie(name, "1", domain)
+    cookie.path = path
+    return cookie
+
+
+def _get_rows(cookie_jar:SqliteCookieJar) -> dict[str, tuple]:
+    return {x["name"]: (x["id"], x["value"], x["creation_time"]) for x in cookie_jar.sqlite_connection.execute(
+        f'SELECT id, name, value, creation_time FROM "{sql_statements.TABLE_NAME_V1}"')}
+
+
+def _set_creation_time(cookie_jar:SqliteCookieJar, name:str, creation_time:int):
+    with cookie_jar.sqlite_connection:
+        cookie_jar.sqlite_connection.execute(
+            f'UPDATE "{sql_statements.TABLE_NAME_V1}" SET creation_time = ? WHERE name == ?', (creation_time, name))
+
+
+class TestCreationTime():
+    '''
+    tests for the `creation_time` column, and ordering the cookies for a request by it
+    '''
+
+    def test_creation_time_kept_when_replaced(self, in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        setting a cookie that is already stored should replace it, keeping its row and `creation_time`
+        '''
+
+        in_memory_sqlite_cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+        row_id, _, creation_time = _get_rows(in_memory_sqlite_cookie_jar)["a"]
+        assert creation_time is not None
+
+        _set_creation_time(in_memory_sqlite_cookie_jar, "a", creation_time - 100)
+
+        in_memory_sqlite_cookie_jar.set_cookies([create_simple_cookie("a", "2", "example.com"),
+            create_simple_cookie("a", "3", "example.com")])
+
+        assert _get_rows(in_memory_sqlite_cookie_jar) == {"a": (row_id, "3", creation_time - 100)}
+        assert len(in_memory_sqlite_cookie_jar) == 1
+
+        # a different path is a different cookie
+        in_memory_sqlite_cookie_jar.set_cookie(_create_cookie("a", "example.com", "/account"))
+        assert len(in_memory_sqlite_cookie_jar) == 2
+
+    def test_request_order(self, in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the cookies for a request should be longest path first, and then the earliest created
+        '''
+
+        in_memory_sqlite_cookie_jar.set_cookies([
+            _create_cookie("root_new", "example.com", "/"),
+            _create_cookie("root_old", "a.example.com", "/"),
+            _create_cookie("short", "example.com", "/a"),
+            _create_cookie("long", "a.example.com", "/a/b"),
+            _create_cookie("root_same", "example.com", "/"),
+        ])
+
+        _set_creation_time(in_memory_sqlite_cookie_jar, "root_new", 2000)
+        _set_creation_time(in_memory_sqlite_cookie_jar, "root_old", 1000)
+        _set_creation_time(in_memory_sqlite_cookie_jar, "root_same", 2000)
+
+        request = create_dummy_request("https://a.example.com/a/b/c", "GET")
+
+        assert [x.name for x in in_memory_sqlite_cookie_jar._cookies_for_request(request)] == \
+            ["long", "short", "root_old", "root_new", "root_same"]
+
+        in_memory_sqlite_cookie_jar.add_cookie_header(request)
+        assert request.get_header("Cookie") == "long=1; short=1; root_old=1; root_new=1; root_same=1"
+
+        # replacing the oldest cookie doesn't move it to the end
+        in_memory_sqlite_cookie_jar.set_cookie(_create_cookie("root_old", "a.example.com", "/"))
+
+        assert [x.name for x in in_memory_sqlite_cookie_jar._cookies_for_request(request)] == \
+            ["long", "short", "root_old", "root_new", "root_same"]
@@ -0,0 +1,108 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from tests.cookie_policies import COOKIE_POLICY_ONLY_EXAMPLE_COM
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.metrics import OperationMetrics
+from tests.testing_util import \
+(
+    cookie_keys,
+    create_corpus_requests,
+    create_cookie_corpus,
+    create_dummy_request,
+    create_simple_cookie,
+    CORPUS_SITES,
+    PythonOnlyDomainCookiePolicy
+)
+
+from http.cookiejar import DefaultCookiePolicy
+import time
+
+
+class TestDomainPrefilter():
+    '''
+    tests for checking DefaultCookiePolicy's `blocked_domains` and `allowed_domains` in the query
+    '''
+
+    def test_same_cookies_as_python_checks(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the cookies returned with the domain checks in SQL should be exactly the ones returned with the checks in python
+        '''
+
+        in_memory_sqlite_cookie_jar.set_cookies(create_cookie_corpus(int(time.time())))
+
+        site_list = CORPUS_SITES
+
+        policy_kwargs_list = [
+            {"allowed_domains": site_list[:5]},
+            {"allowed_domains": [f".{x}" for x in site_list[:5]] + [f"www.{site_list[5]}"]},
+            {"blocked_domains": [f"www.{site_list[0]}", f".{site_list[1]}", site_list[2]]},
+            {"blocked_domains": [f".{site_list[0]}"], "allowed_domains": site_list[:3] + [f".{site_list[3]}"]},
+        ]
+
+        for iter_policy_kwargs in policy_kwargs_list:
+
+            default_policy = DefaultCookiePolicy(**iter_policy_kwargs)
+            python_only_policy = PythonOnlyDomainCookiePolicy(**iter_policy_kwargs)
+
+            for iter_request in create_corpus_requests():
+
+                in_memory_sqlite_cookie_jar.set_policy(default_policy)
+                sql_cookie_list = in_memory_sqlite_cookie_jar._cookies_for_request(iter_request)
+
+                in_memory_sqlite_cookie_jar.set_policy(python_only_policy)
+                python_cookie_list = in_memory_sqlite_cookie_jar._cookies_for_request(iter_request)
+
+                assert cookie_keys(sql_cookie_list) == cookie_keys(python_cookie_list)
+
+    def test_allowed_cookie_domains(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the candidate domains should be the host and its parent domains down to the registrable domain,
+        with and without a leading dot, minus the ones the policy rejects
+        '''
+
+        # a blocked domain with a leading dot only blocks its subdomains, like `DefaultCookiePolicy.is_blocked`
+        in_memory_sqlite_cookie_jar.set_policy(DefaultCookiePolicy(blocked_domains=[".b.example.com"]))
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("a.b.example.com", "example.com") == \
+            ["b.example.com", "example.com", ".example.com"]
+
+        in_memory_sqlite_cookie_jar.set_policy(COOKIE_POLICY_ONLY_EXAMPLE_COM)
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("a.example.com", "example.com") == ["example.com"]
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("zombo.com", "zombo.com") == []
+
+        # nothing is rejected, or the policy has no blocked or allowed domains, so there is nothing to add to the query
+        in_memory_sqlite_cookie_jar.set_policy(DefaultCookiePolicy(blocked_domains=["zombo.com"]))
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("a.example.com", "example.com") is None
+        in_memory_sqlite_cookie_jar.set_policy(DefaultCookiePolicy())
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("a.example.com", "example.com") is None
+        in_memory_sqlite_cookie_jar.set_policy(PythonOnlyDomainCookiePolicy(allowed_domains=["example.com"]))
+        assert in_memory_sqlite_cookie_jar._get_allowed_cookie_domains("zombo.com", "zombo.com") is None
+
+    def test_disallowed_hosts_do_not_query(self):
+        '''
+        a request to a host outside of the allowed domains shouldn't touch the database, and the cookies for
+        rejected domains under an allowed host shouldn't be read
+        '''
+
+        metrics_list:list[OperationMetrics] = list()
+
+        with SqliteCookieJar(database_path=":memory:", policy=COOKIE_POLICY_ONLY_EXAMPLE_COM,
+            metrics_callback=metrics_list.append) as cookie_jar:
+
+            cookie_jar.set_cookies([
+                create_simple_cookie("sent", "1", "example.com"),
+                create_simple_cookie("subdomain", "1", "a.example.com"),
+                create_simple_cookie("dotted", "1", ".example.com"),
+                create_simple_cookie("other", "1", "zombo.com"),
+            ])
+
+            metrics_list.clear()
+
+            assert cookie_jar._cookies_for_request(create_dummy_request("https://zombo.com/", "GET")) == []
+            assert metrics_list == []
+
+            request = create_dummy_request("https://a.example.com/", "GET")
+            assert [x.name for x in cookie_jar._cookies_for_request(request)] == ["sent"]
+            assert (metrics_list[-1].rows_fetched, metrics_list[-1].cookies_returned) == (1, 1)
@@ -0,0 +1,115 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import create_simple_cookie
+
+import time
+
+
+def _wait_for_length(cookie_jar:SqliteCookieJar, expected_length:int, timeout:float) -> int:
+    '''
+    poll len() on the cookie jar until it matches the expected length or we time out
+
+    :param cookie_jar: the cookie jar to check
+    :param expected_length: the length we are waiting for
+    :param timeout: how many seconds to wait
+    :return: the last length we saw
+    '''
+
+    deadline = time.monotonic() + timeout
+    current_length = len(cookie_jar)
+    while current_length != expected_length and time.monotonic() < deadline:
+        time.sleep(0.05)
+        current_length = len(cookie_jar)
+
+    return current_length
+
+
+class TestExpirySweeper():
+    '''
+    tests for the background expiry sweeper
+    '''
+
+    def test_expiry_sweep_task_deletes_in_chunks(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        run the sweep task directly, it should delete every expired cookie even though
+        there are more than the chunk size, and schedule itself for the next expiry
+        '''
+
+        now = int(time.time())
+
+        expired_cookie_list = list()
+        for i in range(25):
+            iter_cookie = create_simple_cookie(f"a{i}", f"b{i}", "example.com")
+            iter_cookie.expires = now - 10
+            expired_cookie_list.append(iter_cookie)
+
+        not_expired_cookie = create_simple_cookie("c", "d", "example.com")
+        not_expired_cookie.expires = now + 100
+
+        in_memory_sqlite_cookie_jar.set_cookies(expired_cookie_list + [not_expired_cookie])
+
+        in_memory_sqlite_cookie_jar.expiry_sweep_chunk_size = 10
+        in_memory_sqlite_cookie_jar.expiry_sweep_max_interval = 1000
+        delay = in_memory_sqlite_cookie_jar._expiry_sweep_task()
+
+        assert len(in_memory_sqlite_cookie_jar) == 1
+
+        # the next sweep should be scheduled for when the remaining cookie expires
+        assert 95 <= delay <= 100
+
+    def test_expiry_sweep_task_delay_bounds(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the delay should be clamped between the min and max interval
+        '''
+
+        in_memory_sqlite_cookie_jar.expiry_sweep_min_interval = 5
+        in_memory_sqlite_cookie_jar.expiry_sweep_max_interval = 50
+
+        # no cookies with an expiry, wait the max interval
+        assert in_memory_sqlite_cookie_jar._expiry_sweep_task() == 50
+
+        far_cookie = create_simple_cookie("a", "b", "example.com")
+        far_cookie.expires = int(time.time()) + 10000
+        in_memory_sqlite_cookie_jar.set_cookie(far_cookie)
+        assert in_memory_sqlite_cookie_jar._expiry_sweep_task() == 50
+
+        near_cookie = create_simple_cookie("c", "d", "example.com")
+        near_cookie.expires = int(time.time()) + 1
+        in_memory_sqlite_cookie_jar.set_cookie(near_cookie)
+        assert in_memory_sqlite_cookie_jar._expiry_sweep_task() == 5
+
+    def test_expiry_sweeper_thread(self):
+        '''
+        the background thread should delete a cookie shortly after it expires, waking up early
+        since the cookie was added after it had scheduled itself for the max interval
+        '''
+
+        cookie_jar = SqliteCookieJar(database_path=":memory:", expiry_sweeper=True)
+        cookie_jar.expiry_sweep_min_interval = 0.05
+        cookie_jar.expiry_sweep_max_interval = 1000
+
+        with cookie_jar:
+
+            # wait for the first sweep to schedule itself
+            deadline = time.monotonic() + 5
+            while cookie_jar._next_expiry_sweep_time == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            soon_cookie = create_simple_cookie("a", "b", "example.com")
+            soon_cookie.expires = int(time.time()) + 1
+            not_soon_cookie = create_simple_cookie("c", "d", "example.com")
+            not_soon_cookie.expires = int(time.time()) + 1000
+
+            cookie_jar.set_cookies([soon_cookie, not_soon_cookie])
+
+            assert _wait_for_length(cookie_jar, 1, timeout=5) == 1
+
+            sweeper_thread = cookie_jar._expiry_sweeper_thread
+
+        # close() should stop the thread
+        assert cookie_jar._expiry_sweeper_thread is None
+        assert not sweeper_thread.is_alive()
@@ -0,0 +1,210 @@
+from tests.fixtures import \
+(
+    tempfolder_database_path,
+    in_memory_sqlite_cookie_jar
+)
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import create_dummy_request
+
+import pathlib
+import sqlite3
+import time
+
+'''
+the parts of the Firefox `moz_cookies` schema that the importer reads
+'''
+FIREFOX_CREATE_TABLE_STATEMENT = '''
+CREATE TABLE moz_cookies (
+    id INTEGER PRIMARY KEY,
+    originAttributes TEXT NOT NULL DEFAULT '',
+    name TEXT,
+    value TEXT,
+    host TEXT,
+    path TEXT,
+    expiry INTEGER,
+    lastAccessed INTEGER,
+    creationTime INTEGER,
+    isSecure INTEGER,
+    isHttpOnly INTEGER,
+    sameSite INTEGER DEFAULT 0
+)
+'''
+
+'''
+the parts of the Chromium `cookies` schema that the importer reads
+'''
+CHROMIUM_CREATE_TABLE_STATEMENT = '''
+CREATE TABLE cookies (
+    creation_utc INTEGER NOT NULL,
+    host_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    encrypted_value BLOB NOT NULL DEFAULT '',
+    path TEXT NOT NULL,
+    expires_utc INTEGER NOT NULL,
+    is_secure INTEGER NOT NULL,
+    is_httponly INTEGER NOT NULL,
+    has_expires INTEGER NOT NULL DEFAULT 1,
+    is_persistent INTEGER NOT NULL DEFAULT 1,
+    last_access_utc INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+'''
+the number of seconds between 1601-01-01 and 1970-01-01, Chromium's epoch vs the unix epoch
+'''
+CHROMIUM_EPOCH_OFFSET_SECONDS = 11644473600
+
+
+def _create_browser_database(database_path:pathlib.Path, create_statement:str, insert_statement:str, rows:list[tuple]):
+    '''
+    create a fake browser cookie database
+
+    :param database_path: where to create the database
+    :param create_statement: the CREATE TABLE statement
+    :param insert_statement: the INSERT statement for each row
+    :param rows: the rows to insert
+    '''
+
+    conn = sqlite3.connect(database_path)
+    with conn:
+        conn.execute(create_statement)
+        conn.executemany(insert_statement, rows)
+    conn.close()
+
+
+class TestImportBrowserCookies():
+    '''
+    tests for `SqliteCookieJar.import_firefox_cookies` and `SqliteCookieJar.import_chromium_cookies`
+    '''
+
+    def test_import_firefox_cookies(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        import a fake Firefox database and make sure the columns are mapped correctly
+        '''
+
+        firefox_path = tmp_path / "cookies.sqlite"
+        expiry_time = int(time.time()) + 1000
+
+        _create_browser_database(
+            firefox_path,
+            FIREFOX_CREATE_TABLE_STATEMENT,
+            "INSERT INTO moz_cookies (name, value, host, path, expiry, isSecure, isHttpOnly) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("a", "b", "example.com", "/", expiry_time, 0, 1),
+                # expiry in milliseconds like newer versions of Firefox
+                ("c", "d", ".example.com", "/foo", expiry_time * 1000, 1, 0),
+            ])
+
+        number_imported = in_memory_sqlite_cookie_jar.import_firefox_cookies(firefox_path)
+
+        assert number_imported == 2
+        assert len(in_memory_sqlite_cookie_jar) == 2
+
+        result_cookies = sorted(in_memory_sqlite_cookie_jar, key=lambda x: x.name)
+
+        assert result_cookies[0].name == "a"
+        assert result_cookies[0].value == "b"
+        assert result_cookies[0].domain == "example.com"
+        assert result_cookies[0].domain_initial_dot == False
+        assert result_cookies[0].secure == False
+        assert result_cookies[0].expires == expiry_time
+        assert result_cookies[0].discard == False
+        assert result_cookies[0].has_nonstandard_attr("HttpOnly")
+
+        assert result_cookies[1].name == "c"
+        assert result_cookies[1].domain == ".example.com"
+        assert result_cookies[1].domain_initial_dot == True
+        assert result_cookies[1].domain_specified == True
+        assert result_cookies[1].path == "/foo"
+        assert result_cookies[1].secure == True
+        assert result_cookies[1].expires == expiry_time
+        assert not result_cookies[1].has_nonstandard_attr("HttpOnly")
+
+        # the imported cookies should be returned for a request
+        request = create_dummy_request("https://www.example.com/foo", "GET")
+        assert len(in_memory_sqlite_cookie_jar._cookies_for_request(request)) == 2
+
+    def test_import_chromium_cookies(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        import a fake Chromium database and make sure the columns are mapped correctly,
+        and that encrypted cookies are skipped
+        '''
+
+        chromium_path = tmp_path / "Cookies"
+        expiry_time = int(time.time()) + 1000
+        expiry_time_chromium = (expiry_time + CHROMIUM_EPOCH_OFFSET_SECONDS) * 1000000
+
+        _create_browser_database(
+            chromium_path,
+            CHROMIUM_CREATE_TABLE_STATEMENT,
+            '''INSERT INTO cookies (creation_utc, host_key, name, value, encrypted_value, path, expires_utc,
+                is_secure, is_httponly, has_expires, is_persistent) VALUES (0, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            [
+                ("example.com", "a", "b", b"", "/", expiry_time_chromium, 1, 0, 1, 1),
+                # session cookie
+                (".example.com", "c", "d", b"", "/", 0, 0, 1, 0, 0),
+                # encrypted cookie, should be skipped
+                ("example.com", "e", "", b"v10abcdef", "/", expiry_time_chromium, 0, 0, 1, 1),
+            ])
+
+        number_imported = in_memory_sqlite_cookie_jar.import_chromium_cookies(chromium_path)
+
+        assert number_imported == 2
+        assert len(in_memory_sqlite_cookie_jar) == 2
+
+        result_cookies = sorted(in_memory_sqlite_cookie_jar, key=lambda x: x.name)
+
+        assert result_cookies[0].name == "a"
+        assert result_cookies[0].secure == True
+        assert result_cookies[0].expires == expiry_time
+        assert result_cookies[0].discard == False
+
+        assert result_cookies[1].name == "c"
+        assert result_cookies[1].domain == ".example.com"
+        assert result_cookies[1].expires == None
+        assert result_cookies[1].discard == True
+        assert result_cookies[1].has_nonstandard_attr("HttpOnly")
+
+    def test_import_browser_cookies_domain_filter(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        make sure the domain filter only imports cookies for the given domains and their subdomains
+        '''
+
+        firefox_path = tmp_path / "cookies.sqlite"
+        expiry_time = int(time.time()) + 1000
+
+        _create_browser_database(
+            firefox_path,
+            FIREFOX_CREATE_TABLE_STATEMENT,
+            "INSERT INTO moz_cookies (name, value, host, path, expiry, isSecure, isHttpOnly) VALUES (?, ?, ?, ?, ?, 0, 0)",
+            [
+                ("a", "b", "example.com", "/", expiry_time),
+                ("c", "d", ".example.com", "/", expiry_time),
+                ("e", "f", "a.example.com", "/", expiry_time),
+                ("g", "h", "notexample.com", "/", expiry_time),
+                ("i", "j", "zombo.com", "/", expiry_time),
+                ("k", "l", "contoso.com", "/", expiry_time),
+            ])
+
+        number_imported = in_memory_sqlite_cookie_jar.import_firefox_cookies(
+            firefox_path, domains=["example.com", "zombo.com"])
+
+        assert number_imported == 4
+        assert sorted(x.name for x in in_memory_sqlite_cookie_jar) == ["a", "c", "e", "i"]
+
+        # an empty list of domains imports nothing
+        assert in_memory_sqlite_cookie_jar.import_firefox_cookies(firefox_path, domains=[]) == 0
+
+        # the database should be detached afterwards, so importing again works
+        assert in_memory_sqlite_cookie_jar.import_firefox_cookies(firefox_path, domains=["contoso.com"]) == 1
+        assert len(in_memory_sqlite_cookie_jar) == 5
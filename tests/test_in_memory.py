@@ -0,0 +1,101 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import \
+(
+    assert_cookie_equality,
+    create_simple_cookie
+)
+
+import pathlib
+import time
+
+import pytest
+
+
+class TestInMemory():
+    '''
+    tests for a SqliteCookieJar created with `in_memory`, where the database is loaded
+    into memory and written back to disk at checkpoints
+    '''
+
+    def test_in_memory_requires_path_on_disk(self):
+        '''
+        `in_memory` doesn't make sense for a `:memory:` database
+        '''
+
+        with pytest.raises(ValueError):
+            SqliteCookieJar(database_path=":memory:", in_memory=True)
+
+    def test_in_memory_checkpoint_and_close(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        cookies should only show up on disk after a checkpoint, and close() should
+        write out anything since the last checkpoint
+        '''
+
+        test_cookie_one = create_simple_cookie("a", "b", "example.com")
+        test_cookie_two = create_simple_cookie("c", "d", "example.com")
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, in_memory=True) as hot_jar:
+
+            hot_jar.set_cookie(test_cookie_one)
+            assert len(hot_jar) == 1
+
+            # nothing has been checkpointed yet
+            with SqliteCookieJar(database_path=tempfolder_database_path) as disk_jar:
+                assert len(disk_jar) == 0
+
+            hot_jar.checkpoint()
+
+            with SqliteCookieJar(database_path=tempfolder_database_path) as disk_jar:
+                assert len(disk_jar) == 1
+
+            hot_jar.set_cookie(test_cookie_two)
+
+        # close() should have checkpointed the second cookie
+        with SqliteCookieJar(database_path=tempfolder_database_path) as disk_jar:
+            result_cookies = sorted(disk_jar, key=lambda x: x.name)
+            assert len(result_cookies) == 2
+            assert_cookie_equality(result_cookies[0], test_cookie_one)
+            assert_cookie_equality(result_cookies[1], test_cookie_two)
+
+    def test_in_memory_loads_existing_database(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        an existing database on disk should be loaded into memory at connect()
+        '''
+
+        test_cookie = create_simple_cookie("a", "b", "example.com")
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as disk_jar:
+            disk_jar.set_cookie(test_cookie)
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, in_memory=True) as hot_jar:
+            result_cookies = list(hot_jar)
+            assert len(result_cookies) == 1
+            assert_cookie_equality(result_cookies[0], test_cookie)
+
+    def test_in_memory_periodic_checkpoint(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        with a checkpoint interval, cookies should end up on disk without calling checkpoint()
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, in_memory=True, checkpoint_interval=0.05) as hot_jar:
+
+            hot_jar.set_cookie(create_simple_cookie("a", "b", "example.com"))
+
+            # wait for the background thread to checkpoint
+            deadline = time.monotonic() + 5
+            number_on_disk = 0
+            while number_on_disk == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+                with SqliteCookieJar(database_path=tempfolder_database_path) as disk_jar:
+                    number_on_disk = len(disk_jar)
+
+            assert number_on_disk == 1
+
+        assert hot_jar._checkpoint_thread is None
@@ -0,0 +1,149 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+import time
+
+
+def _get_last_accessed(cookie_jar:SqliteCookieJar) -> dict[str, int]:
+    '''
+    :param cookie_jar: the cookie jar to look at
+    :return: a dict of cookie name -> the `last_accessed` column
+    '''
+
+    return {x["name"]: x["last_accessed"] for x in cookie_jar.sqlite_connection.execute(
+        f'SELECT name, last_accessed FROM "{sql_statements.TABLE_NAME_V1}"')}
+
+
+def _set_last_accessed(cookie_jar:SqliteCookieJar, name:str, last_accessed:int):
+    '''
+    overwrite the `last_accessed` column for a cookie
+
+    :param cookie_jar: the cookie jar to change
+    :param name: the name of the cookie
+    :param last_accessed: the new value
+    '''
+
+    with cookie_jar.sqlite_connection:
+        cookie_jar.sqlite_connection.execute(
+            f'UPDATE "{sql_statements.TABLE_NAME_V1}" SET last_accessed = ? WHERE name == ?', (last_accessed, name))
+
+
+class TestLastAccess():
+    '''
+    tests for the `last_accessed` column and batched last access tracking
+    '''
+
+    def test_last_accessed_set_on_insert(self):
+        '''
+        without tracking, `last_accessed` is just when the cookie was set
+        '''
+
+        with SqliteCookieJar(database_path=":memory:") as cookie_jar:
+
+            before = int(time.time())
+            cookie_jar.set_cookie(create_simple_cookie("a", "b", "example.com"))
+            after = int(time.time())
+
+            assert before <= _get_last_accessed(cookie_jar)["a"] <= after
+
+            _set_last_accessed(cookie_jar, "a", 100)
+
+            # requests don't update it without tracking turned on
+            cookie_jar._cookies_for_request(create_dummy_request("https://example.com", "GET"))
+            cookie_jar.flush_last_access()
+            assert _get_last_accessed(cookie_jar)["a"] == 100
+
+    def test_last_access_batched_until_interval(self):
+        '''
+        access times should stay in memory until the flush interval has passed, or they are flushed manually
+        '''
+
+        with SqliteCookieJar(database_path=":memory:", track_last_access=True, last_access_flush_interval=1000) as cookie_jar:
+
+            cookie_jar.set_cookies([
+                create_simple_cookie("a", "b", "example.com"),
+                create_simple_cookie("c", "d", "zombo.com"),
+            ])
+            _set_last_accessed(cookie_jar, "a", 100)
+            _set_last_accessed(cookie_jar, "c", 100)
+
+            request = create_dummy_request("https://example.com", "GET")
+            assert len(cookie_jar._cookies_for_request(request)) == 1
+            assert len(cookie_jar._cookies_for_request(request)) == 1
+
+            # only one pending update for the cookie, even though it was accessed twice
+            assert len(cookie_jar._pending_last_access) == 1
+            assert _get_last_accessed(cookie_jar)["a"] == 100
+
+            cookie_jar.flush_last_access()
+
+            assert len(cookie_jar._pending_last_access) == 0
+            last_accessed = _get_last_accessed(cookie_jar)
+            assert last_accessed["a"] >= int(time.time()) - 5
+            assert last_accessed["c"] == 100
+
+    def test_last_access_flushed_after_interval(self):
+        '''
+        with a flush interval of 0 every request writes out its access times
+        '''
+
+        with SqliteCookieJar(database_path=":memory:", track_last_access=True, last_access_flush_interval=0) as cookie_jar:
+
+            cookie_jar.set_cookie(create_simple_cookie("a", "b", "example.com"))
+            _set_last_accessed(cookie_jar, "a", 100)
+
+            cookie_jar._cookies_for_request(create_dummy_request("https://example.com", "GET"))
+
+            assert len(cookie_jar._pending_last_access) == 0
+            assert _get_last_accessed(cookie_jar)["a"] >= int(time.time()) - 5
+
+    def test_last_access_flushed_at_close(self, tempfolder_database_path):
+        '''
+        pending access times should be written out when the jar is closed
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, track_last_access=True, last_access_flush_interval=1000) as cookie_jar:
+
+            cookie_jar.set_cookie(create_simple_cookie("a", "b", "example.com"))
+            _set_last_accessed(cookie_jar, "a", 100)
+
+            cookie_jar._cookies_for_request(create_dummy_request("https://example.com", "GET"))
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            assert _get_last_accessed(cookie_jar)["a"] >= int(time.time()) - 5
+
+    def test_capacity_limit_evicts_least_recently_used(self):
+        '''
+        a cookie that was recently sent should survive an eviction over an older cookie
+        that wasn't, even if the pending access time hasn't been flushed yet
+        '''
+
+        with SqliteCookieJar(
+            database_path=":memory:",
+            max_cookies_per_domain=2,
+            track_last_access=True,
+            last_access_flush_interval=1000) as cookie_jar:
+
+            other_path_cookie = create_simple_cookie("b", "2", "example.com")
+            other_path_cookie.path = "/other"
+
+            cookie_jar.set_cookies([
+                create_simple_cookie("a", "1", "example.com"),
+                other_path_cookie,
+            ])
+            _set_last_accessed(cookie_jar, "a", 100)
+            _set_last_accessed(cookie_jar, "b", 200)
+
+            # access `a` but not `b`, making `b` the least recently used
+            assert len(cookie_jar._cookies_for_request(create_dummy_request("https://example.com/", "GET"))) == 1
+
+            result = cookie_jar.set_cookies([create_simple_cookie("c", "3", "example.com")])
+
+            assert result.domain_limit_evicted == 1
+            assert sorted(x.name for x in cookie_jar) == ["a", "c"]
@@ -0,0 +1,207 @@
+from tests.fixtures import \
+(
+    tempfolder_database_path,
+    in_memory_sqlite_cookie_jar
+)
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import \
+(
+    assert_cookie_equality,
+    create_simple_cookie
+)
+
+import pathlib
+import time
+from http.cookiejar import Cookie, LoadError, MozillaCookieJar, LWPCookieJar
+
+import pytest
+
+
+def _create_file_cookie_jar_cookies() -> list[Cookie]:
+    '''
+    create a list of cookies that survive a round trip through both
+    the MozillaCookieJar and LWPCookieJar file formats
+
+    :return: a list of Cookie objects
+    '''
+
+    expiry_time = int(time.time()) + 1000
+
+    cookie_one = create_simple_cookie("a", "b", "example.com")
+    cookie_one.expires = expiry_time
+    cookie_one.discard = False
+
+    cookie_two = create_simple_cookie("c", "d", ".example.org")
+    cookie_two.domain_specified = True
+    cookie_two.domain_initial_dot = True
+    cookie_two.path = "/foo"
+    cookie_two.secure = True
+    cookie_two.expires = expiry_time
+    cookie_two.discard = False
+
+    # a session cookie, only loaded when `ignore_discard` is true
+    cookie_three = create_simple_cookie("e", "f", "example.net")
+
+    return [cookie_one, cookie_two, cookie_three]
+
+
+class TestLoadCookieFile():
+    '''
+    tests for `SqliteCookieJar.load_cookie_file`
+    '''
+
+    def test_load_mozilla_cookie_file(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        save a MozillaCookieJar file with the stdlib, and make sure we load the
+        same cookies the stdlib does
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+
+        stdlib_jar = MozillaCookieJar()
+        for iter_cookie in _create_file_cookie_jar_cookies():
+            stdlib_jar.set_cookie(iter_cookie)
+        stdlib_jar.save(cookie_file_path, ignore_discard=True)
+
+        # load it back with the stdlib to see what we should expect
+        expected_jar = MozillaCookieJar()
+        expected_jar.load(cookie_file_path)
+        expected_cookies = sorted(expected_jar, key=lambda x: x.name)
+
+        # the stdlib keeps the expiry as a string when loading a Netscape file
+        for iter_cookie in expected_cookies:
+            iter_cookie.expires = int(iter_cookie.expires)
+
+        number_loaded = in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path)
+
+        assert number_loaded == 2
+        assert len(in_memory_sqlite_cookie_jar) == 2
+
+        result_cookies = sorted(in_memory_sqlite_cookie_jar, key=lambda x: x.name)
+
+        assert len(result_cookies) == len(expected_cookies)
+        for iter_result, iter_expected in zip(result_cookies, expected_cookies):
+            assert_cookie_equality(iter_result, iter_expected)
+
+    def test_load_lwp_cookie_file(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        save a LWPCookieJar file with the stdlib, and make sure we load the
+        same cookies the stdlib does
+        '''
+
+        cookie_file_path = tmp_path / "cookies.lwp"
+
+        stdlib_jar = LWPCookieJar()
+        for iter_cookie in _create_file_cookie_jar_cookies():
+            stdlib_jar.set_cookie(iter_cookie)
+        stdlib_jar.save(cookie_file_path, ignore_discard=True)
+
+        expected_jar = LWPCookieJar()
+        expected_jar.load(cookie_file_path, ignore_discard=True)
+        expected_cookies = sorted(expected_jar, key=lambda x: x.name)
+
+        # the stdlib keeps the version as a string when loading a LWP file
+        for iter_cookie in expected_cookies:
+            iter_cookie.version = int(iter_cookie.version)
+
+        number_loaded = in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path, ignore_discard=True)
+
+        assert number_loaded == 3
+        assert len(in_memory_sqlite_cookie_jar) == 3
+
+        result_cookies = sorted(in_memory_sqlite_cookie_jar, key=lambda x: x.name)
+
+        assert len(result_cookies) == len(expected_cookies)
+        for iter_result, iter_expected in zip(result_cookies, expected_cookies):
+            assert_cookie_equality(iter_result, iter_expected)
+
+    def test_load_cookie_file_multiple_batches(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        load a cookie file that has more cookies than the batch size
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+
+        number_of_cookies = 25
+        expiry_time = int(time.time()) + 1000
+
+        stdlib_jar = MozillaCookieJar()
+        for i in range(number_of_cookies):
+            iter_cookie = create_simple_cookie(f"a{i}", f"b{i}", "example.com")
+            iter_cookie.expires = expiry_time
+            iter_cookie.discard = False
+            stdlib_jar.set_cookie(iter_cookie)
+        stdlib_jar.save(cookie_file_path)
+
+        number_loaded = in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path, batch_size=10)
+
+        assert number_loaded == number_of_cookies
+        assert len(in_memory_sqlite_cookie_jar) == number_of_cookies
+
+    def test_load_fractional_expiry(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        a fractional expiry in a Netscape file should be truncated to whole seconds, like MozillaCookieJar does
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+
+        expiry_time = int(time.time()) + 1000
+        cookie_file_path.write_text(
+            "# Netscape HTTP Cookie File\n"
+            f"example.com\tFALSE\t/\tFALSE\t{expiry_time}.75\ta\tb\n",
+            encoding="utf-8")
+
+        stdlib_jar = MozillaCookieJar()
+        stdlib_jar.load(cookie_file_path)
+
+        assert in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path) == 1
+        assert [x.expires for x in in_memory_sqlite_cookie_jar] == [x.expires for x in stdlib_jar] == [expiry_time]
+
+    def test_load_invalid_cookie_file_is_all_or_nothing(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        a bad line in the file should raise LoadError, and not leave any of the
+        earlier batches behind in the database
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+
+        expiry_time = int(time.time()) + 1000
+        cookie_file_path.write_text(
+            "# Netscape HTTP Cookie File\n"
+            f"example.com\tFALSE\t/\tFALSE\t{expiry_time}\ta\tb\n"
+            "this is not a cookie line\n",
+            encoding="utf-8")
+
+        with pytest.raises(LoadError):
+            in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path, batch_size=1)
+
+        assert len(in_memory_sqlite_cookie_jar) == 0
+
+    def test_load_unknown_cookie_file_format(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        a file without a known magic first line should raise LoadError
+        '''
+
+        cookie_file_path = tmp_path / "cookies.txt"
+        cookie_file_path.write_text("not a cookie file\n", encoding="utf-8")
+
+        with pytest.raises(LoadError):
+            in_memory_sqlite_cookie_jar.load_cookie_file(cookie_file_path)
@@ -0,0 +1,140 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from integration_tests.cookie_serving_http_server import CookieServingHttpServer, parse_set_cookie_mix
+from integration_tests.load_generator import LatencySummary, LocalHTTPHandler, run_load, REPORTED_PERCENTILES
+
+import json
+import socket
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def cookie_serving_http_server() -> CookieServingHttpServer:
+    ''' a fixture that runs a CookieServingHttpServer on a free port, that only sets persistent cookies
+    '''
+
+    httpd = CookieServingHttpServer(("127.0.0.1", 0), set_cookie_mix={"persistent": 1}, seed=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    yield httpd
+
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestLoadHarness():
+    '''
+    tests for the cookie serving HTTP server and the load generator in `integration_tests`
+    '''
+
+    def test_cookies_round_trip(
+        self,
+        cookie_serving_http_server:CookieServingHttpServer,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        cookies set by the server should be stored in the cookie jar and sent back on the next request
+        '''
+
+        server_address = cookie_serving_http_server.server_address[:2]
+        opener = urllib.request.build_opener(
+            LocalHTTPHandler(server_address), urllib.request.HTTPCookieProcessor(in_memory_sqlite_cookie_jar))
+
+        url = f"http://www.site1.test:{server_address[1]}/"
+
+        with opener.open(url) as response:
+            assert json.loads(response.read()) == {"received_cookies": 0, "set_cookies": 2}
+
+        assert all(x.domain == "www.site1.test" for x in in_memory_sqlite_cookie_jar)
+        cookie_count = len(in_memory_sqlite_cookie_jar)
+
+        with opener.open(url) as response:
+            assert json.loads(response.read())["received_cookies"] == cookie_count
+
+        post_request = urllib.request.Request(url, method="POST", data=json.dumps(
+            {"name": "posted", "cookie_value": "1", "path": "/", "maxage": 60, "httponly": True}).encode("utf-8"))
+
+        with opener.open(post_request) as response:
+            assert json.loads(response.read()) == {"set_cookies": 1}
+
+        assert "posted" in [x.name for x in in_memory_sqlite_cookie_jar]
+
+        with pytest.raises(urllib.error.HTTPError):
+            opener.open(urllib.request.Request(url, method="POST", data=b"not json"))
+
+    def test_run_load(
+        self,
+        cookie_serving_http_server:CookieServingHttpServer,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the load generator should report every request from every thread
+        '''
+
+        load_result = run_load(
+            cookie_jar=in_memory_sqlite_cookie_jar,
+            server_address=cookie_serving_http_server.server_address[:2],
+            threads=3,
+            requests_per_thread=10,
+            number_of_sites=5,
+            seed=1)
+
+        assert load_result.requests == 30
+        assert load_result.errors == 0
+        assert load_result.cookies_in_jar > 0
+        assert load_result.cookie_jar_latency.percentiles_ms[50] <= load_result.cookie_jar_latency.max_ms
+
+    def test_run_load_every_request_fails(self, in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the load generator should report errors rather than raise when no request gets a response, and the
+        command line tool should exit with a non zero status
+        '''
+
+        # a port that nothing is listening on
+        with socket.socket() as unused_socket:
+            unused_socket.bind(("127.0.0.1", 0))
+            unused_port = unused_socket.getsockname()[1]
+
+        load_result = run_load(
+            cookie_jar=in_memory_sqlite_cookie_jar,
+            server_address=("127.0.0.1", unused_port),
+            threads=2,
+            requests_per_thread=2,
+            number_of_sites=5,
+            seed=1)
+
+        assert (load_result.requests, load_result.errors) == (0, 4)
+        assert load_result.request_latency == LatencySummary(
+            mean_ms=0.0, max_ms=0.0, percentiles_ms={x: 0.0 for x in REPORTED_PERCENTILES})
+
+        process_result = subprocess.run(
+            [sys.executable, "-m", "integration_tests.load_generator", "--server-port", str(unused_port),
+                "--threads", "1", "--requests-per-thread", "2"],
+            capture_output=True, text=True)
+
+        assert process_result.returncode == 1
+        assert "0 requests" in process_result.stdout
+
+    def test_latency_summary_of_one(self):
+        '''
+        a single latency is every percentile
+        '''
+
+        latency_summary = LatencySummary.from_seconds([0.002])
+
+        assert latency_summary.max_ms == latency_summary.mean_ms == 2.0
+        assert latency_summary.percentiles_ms == {x: 2.0 for x in REPORTED_PERCENTILES}
+
+    def test_parse_set_cookie_mix(self):
+        '''
+        the mix should be parsed from `kind=weight` pairs
+        '''
+
+        assert parse_set_cookie_mix("session=3,delete=1") == {"session": 3, "delete": 1}
+
+        with pytest.raises(ValueError):
+            parse_set_cookie_mix("not_a_kind=1")
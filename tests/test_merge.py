@@ -0,0 +1,160 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.results import MergeResult
+from biscutbox import sql_statements
+from tests.testing_util import create_simple_cookie
+
+import pathlib
+import sqlite3
+import time
+
+import pytest
+
+
+NOW = int(time.time())
+
+
+def _create_cookie(name:str, value:str, domain:str, expires:int|None):
+    cookie = create_simple_cookie(name, value, domain)
+    cookie.expires = expires
+    cookie.discard = expires is None
+    return cookie
+
+
+def _cookie_values(cookie_jar:SqliteCookieJar) -> dict[str, str]:
+    return {x.name: x.value for x in cookie_jar}
+
+
+class TestMerge():
+    '''
+    tests for `SqliteCookieJar.merge_from`
+    '''
+
+    @pytest.fixture
+    def source_database_path(self, tmp_path:pathlib.Path) -> pathlib.Path:
+        '''
+        a database with a cookie for every kind of conflict, plus one that isn't in the target
+        '''
+
+        database_path = tmp_path / "source.sqlite3"
+
+        with SqliteCookieJar(database_path=database_path) as cookie_jar:
+            cookie_jar.set_cookies([
+                _create_cookie("new", "source", "example.com", NOW + 100),
+                _create_cookie("newer", "source", "example.com", NOW + 200),
+                _create_cookie("older", "source", "example.com", NOW + 50),
+                _create_cookie("session", "source", "example.com", None),
+                # a duplicate key, only the one that expires last is merged
+                _create_cookie("dup", "source-old", "example.com", NOW + 10),
+                _create_cookie("dup", "source", "example.com", NOW + 20),
+            ])
+
+            cookie_jar.partition("other").set_cookie(_create_cookie("other", "source", "example.com", NOW + 100))
+
+        return database_path
+
+    def _create_target(self, database_path:pathlib.Path) -> SqliteCookieJar:
+        '''
+        a connected cookie jar with a cookie for every kind of conflict with `source_database_path`
+        '''
+
+        cookie_jar = SqliteCookieJar(database_path=database_path)
+        cookie_jar.connect()
+        cookie_jar.set_cookies([
+            _create_cookie("newer", "target", "example.com", NOW + 100),
+            _create_cookie("older", "target", "example.com", NOW + 100),
+            _create_cookie("session", "target", "example.com", NOW + 100),
+            _create_cookie("dup", "target", "example.com", NOW + 20),
+            _create_cookie("untouched", "target", "example.com", NOW + 100),
+        ])
+
+        return cookie_jar
+
+    @pytest.mark.parametrize("conflict_rule,expected_result,expected_values", [
+        (sql_statements.MERGE_NEWEST_EXPIRY_WINS, MergeResult(source_cookies=5, inserted=1, replaced=1, kept=3),
+            {"new": "source", "newer": "source", "older": "target", "session": "target", "dup": "target"}),
+        (sql_statements.MERGE_SOURCE_WINS, MergeResult(source_cookies=5, inserted=1, replaced=4, kept=0),
+            {"new": "source", "newer": "source", "older": "source", "session": "source", "dup": "source"}),
+        (sql_statements.MERGE_TARGET_WINS, MergeResult(source_cookies=5, inserted=1, replaced=0, kept=4),
+            {"new": "source", "newer": "target", "older": "target", "session": "target", "dup": "target"}),
+    ])
+    def test_conflict_rules(
+        self,
+        tempfolder_database_path:pathlib.Path,
+        source_database_path:pathlib.Path,
+        conflict_rule:str,
+        expected_result:MergeResult,
+        expected_values:dict[str, str]):
+        '''
+        each conflict rule should pick the right cookie for every key, and count what it did
+        '''
+
+        with self._create_target(tempfolder_database_path) as cookie_jar:
+
+            assert cookie_jar.merge_from(source_database_path, conflict_rule) == expected_result
+
+            assert _cookie_values(cookie_jar) == expected_values | {"untouched": "target"}
+            assert len(cookie_jar) == 6
+
+            # the source's cookies are stored with their base domain, and the temporary table is gone
+            assert cookie_jar.count_for_domain("example.com") == 6
+            assert cookie_jar.sqlite_connection.execute(
+                f'SELECT name FROM sqlite_temp_master WHERE name == "{sql_statements.MERGE_SOURCE_TEMP_TABLE_NAME}"').fetchone() is None
+
+            # merging again changes nothing, except the source wins rule replacing the same cookies again
+            merge_result = cookie_jar.merge_from(source_database_path, conflict_rule)
+            assert merge_result.inserted == 0
+            assert _cookie_values(cookie_jar) == expected_values | {"untouched": "target"}
+
+    def test_merge_partitions(self, tempfolder_database_path:pathlib.Path, source_database_path:pathlib.Path):
+        '''
+        `source_jar_id` picks the source's partition, and the cookies go into this cookie jar's partition
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+
+            partition = cookie_jar.partition("merged")
+            merge_result = partition.merge_from(source_database_path, source_jar_id="other")
+
+            assert merge_result == MergeResult(source_cookies=1, inserted=1)
+            assert _cookie_values(partition) == {"other": "source"}
+            assert len(cookie_jar) == 0
+
+    def test_merge_errors(self, tempfolder_database_path:pathlib.Path, source_database_path:pathlib.Path):
+        '''
+        bad conflict rules and old source databases should raise, and leave the target alone
+        '''
+
+        with self._create_target(tempfolder_database_path) as cookie_jar:
+
+            with pytest.raises(ValueError):
+                cookie_jar.merge_from(source_database_path, "newest")
+
+            conn = sqlite3.connect(source_database_path)
+            with conn:
+                conn.execute("PRAGMA user_version = 3")
+
+            with pytest.raises(ValueError, match="schema version"):
+                cookie_jar.merge_from(source_database_path)
+
+            assert len(cookie_jar) == 5
+
+            with conn:
+                conn.execute(f"PRAGMA user_version = {sql_statements.SCHEMA_VERSION}")
+            conn.close()
+
+            # the source was detached, so another merge can attach it again
+            assert cookie_jar.merge_from(source_database_path).inserted == 1
+
+    def test_merge_capacity_limits(self, tempfolder_database_path:pathlib.Path, source_database_path:pathlib.Path):
+        '''
+        the capacity limits should still be enforced after a merge
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, max_cookies=3) as cookie_jar:
+
+            merge_result = cookie_jar.merge_from(source_database_path)
+
+            assert merge_result.inserted == 5
+            assert merge_result.eviction.total == 2
+            assert len(cookie_jar) == 3
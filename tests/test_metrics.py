@@ -0,0 +1,138 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.metrics import MetricsCollector, OperationMetrics
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+import sqlite3
+
+import pytest
+
+
+class TestMetrics():
+    '''
+    tests for the `metrics_callback` of SqliteCookieJar and `biscutbox.metrics.MetricsCollector`
+    '''
+
+    def test_operations_are_reported(self):
+        '''
+        each public operation should report its row counts, transactions and commits
+        '''
+
+        metrics_list:list[OperationMetrics] = list()
+
+        other_port_cookie = create_simple_cookie("b", "2", "example.com")
+        other_port_cookie.port = "8080"
+        other_port_cookie.port_specified = True
+
+        with SqliteCookieJar(database_path=":memory:", metrics_callback=metrics_list.append) as cookie_jar:
+
+            cookie_jar.set_cookies([
+                create_simple_cookie("a", "1", "example.com"),
+                other_port_cookie,
+                create_simple_cookie("c", "3", "zombo.com"),
+            ])
+
+            cookie_jar._cookies_for_request(create_dummy_request("https://example.com/", "GET"))
+            assert len(cookie_jar) == 3
+            assert len(list(cookie_jar)) == 3
+            cookie_jar.clear("zombo.com")
+            cookie_jar.clear_expired_cookies()
+            cookie_jar.clear_session_cookies()
+            cookie_jar.partition("other").clear()
+
+            with pytest.raises(ValueError):
+                cookie_jar.clear(path="/")
+
+        assert [x.operation for x in metrics_list] == [
+            "set_cookies",
+            "_cookies_for_request",
+            "__len__",
+            "__len__",
+            "__iter__",
+            "clear",
+            "clear_expired_cookies",
+            "clear_session_cookies",
+            "clear",
+        ]
+
+        # both cookies for example.com are read, but the one for port 8080 doesn't pass the port policy
+        lookup_metrics = metrics_list[1]
+        assert (lookup_metrics.rows_fetched, lookup_metrics.cookies_returned) == (2, 1)
+
+        iter_metrics = metrics_list[4]
+        assert (iter_metrics.rows_fetched, iter_metrics.cookies_returned) == (3, 3)
+
+        assert all(x.transactions == 1 and x.commits == 1 for x in metrics_list)
+        assert all(x.duration_seconds >= 0 and not x.error for x in metrics_list)
+        assert metrics_list[-1].jar_id == "other"
+
+    def test_errors_are_reported(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        an operation that raises should still be reported, as an error that wasn't committed
+        '''
+
+        metrics_list:list[OperationMetrics] = list()
+        in_memory_sqlite_cookie_jar.metrics_callback = metrics_list.append
+
+        in_memory_sqlite_cookie_jar.sqlite_connection.execute(
+            f'CREATE TEMP TRIGGER fail BEFORE DELETE ON "{sql_statements.TABLE_NAME_V1}" BEGIN SELECT RAISE(ABORT, \'no\'); END')
+        in_memory_sqlite_cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+        with pytest.raises(sqlite3.IntegrityError):
+            in_memory_sqlite_cookie_jar.clear()
+
+        assert metrics_list[-1].operation == "clear"
+        assert metrics_list[-1].error
+        assert (metrics_list[-1].transactions, metrics_list[-1].commits) == (1, 0)
+
+    def test_broken_callback(self):
+        '''
+        a callback that raises shouldn't break the cookie jar
+        '''
+
+        def _broken_callback(operation_metrics:OperationMetrics):
+            raise RuntimeError("broken")
+
+        with SqliteCookieJar(database_path=":memory:", metrics_callback=_broken_callback) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+            assert len(cookie_jar) == 1
+
+    def test_metrics_collector(self):
+        '''
+        the collector should add up the metrics into histograms and counters
+        '''
+
+        collector = MetricsCollector(latency_buckets=[0.1, 1.0])
+
+        collector(OperationMetrics(operation="set_cookies", jar_id="", duration_seconds=0.05, transactions=1, commits=1))
+        collector(OperationMetrics(operation="set_cookies", jar_id="", duration_seconds=0.5, transactions=1, commits=1))
+        collector(OperationMetrics(operation="__len__", jar_id="", duration_seconds=2.0, transactions=1, error=True))
+
+        snapshot = collector.snapshot()
+
+        assert snapshot["set_cookies"].count == 2
+        assert snapshot["set_cookies"].latency_bucket_counts == [1, 2, 2]
+        assert snapshot["set_cookies"].commits == 2
+        assert snapshot["__len__"].latency_bucket_counts == [0, 0, 1]
+        assert snapshot["__len__"].errors == 1
+
+        prometheus_text = collector.format_prometheus()
+        assert 'biscutbox_operation_duration_seconds_bucket{operation="set_cookies",le="0.1"} 1' in prometheus_text
+        assert 'biscutbox_operation_duration_seconds_bucket{operation="set_cookies",le="+Inf"} 2' in prometheus_text
+        assert 'biscutbox_errors_total{operation="__len__"} 1' in prometheus_text
+
+        collector.reset()
+        assert collector.snapshot() == {}
+
+        # the collector can be used as the callback directly
+        with SqliteCookieJar(database_path=":memory:", metrics_callback=collector) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+        assert collector.snapshot()["set_cookies"].count == 1
@@ -0,0 +1,143 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar, tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+import pathlib
+import time
+
+import pytest
+
+
+class TestPartitions():
+    '''
+    tests for the `jar_id` column and `SqliteCookieJar.partition()`
+    '''
+
+    def test_partitions_are_isolated(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        each partition should only see its own cookies
+        '''
+
+        partition_one = in_memory_sqlite_cookie_jar.partition("one")
+        partition_two = in_memory_sqlite_cookie_jar.partition("two")
+
+        in_memory_sqlite_cookie_jar.set_cookie(create_simple_cookie("a", "parent", "example.com"))
+        partition_one.set_cookies([
+            create_simple_cookie("a", "one", "example.com"),
+            create_simple_cookie("b", "one", "zombo.com"),
+        ])
+
+        assert len(in_memory_sqlite_cookie_jar) == 1
+        assert len(partition_one) == 2
+        assert len(partition_two) == 0
+
+        request = create_dummy_request("https://example.com", "GET")
+        assert [x.value for x in in_memory_sqlite_cookie_jar._cookies_for_request(request)] == ["parent"]
+        assert [x.value for x in partition_one._cookies_for_request(request)] == ["one"]
+        assert partition_two._cookies_for_request(request) == []
+        assert [x.value for x in partition_one._cookies_for_domain("example.com", request)] == ["one"]
+
+        assert sorted(x.name for x in partition_one) == ["a", "b"]
+        assert in_memory_sqlite_cookie_jar.jar_ids() == [sql_statements.DEFAULT_JAR_ID, "one"]
+
+        # handles share everything with the parent, rather than loading their own
+        assert partition_one.sqlite_connection is in_memory_sqlite_cookie_jar.sqlite_connection
+        assert partition_one._public_suffix_list is in_memory_sqlite_cookie_jar._public_suffix_list
+        assert partition_one._cookies_lock is in_memory_sqlite_cookie_jar._cookies_lock
+        assert partition_one.partition("two").jar_id == "two"
+
+        with pytest.raises(ValueError):
+            in_memory_sqlite_cookie_jar.partition(sql_statements.DEFAULT_JAR_ID)
+
+    def test_partition_clear_and_purges(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        clearing a partition, or purging its expired and session cookies, shouldn't touch the other partitions
+        '''
+
+        partition_list = [in_memory_sqlite_cookie_jar.partition(f"session_{i}") for i in range(3)]
+
+        for iter_partition in partition_list:
+
+            expired_cookie = create_simple_cookie("expired", "1", "example.com")
+            expired_cookie.expires = int(time.time()) - 10
+
+            persistent_cookie = create_simple_cookie("persistent", "2", "example.com")
+            persistent_cookie.expires = int(time.time()) + 1000
+            persistent_cookie.discard = False
+
+            iter_partition.set_cookies([
+                expired_cookie,
+                persistent_cookie,
+                create_simple_cookie("session", "3", "example.com"),
+                create_simple_cookie("other", "4", "zombo.com"),
+            ])
+
+        partition_list[0].clear()
+        partition_list[1].clear_expired_cookies()
+        partition_list[1].clear_session_cookies()
+        partition_list[2].clear("zombo.com")
+
+        assert len(partition_list[0]) == 0
+        assert sorted(x.name for x in partition_list[1]) == ["persistent"]
+        assert sorted(x.name for x in partition_list[2]) == ["expired", "persistent", "session"]
+
+        assert in_memory_sqlite_cookie_jar.jar_ids() == ["session_1", "session_2"]
+
+    def test_partition_clear_uses_index(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        clearing a partition should be a range delete on an index, not a scan of the whole table
+        '''
+
+        query_plan = in_memory_sqlite_cookie_jar.sqlite_connection.execute(
+            f"EXPLAIN QUERY PLAN {sql_statements.DELETE_ALL_FROM_COOKIE_TABLE}", {"jar_id": "a"}).fetchall()
+
+        query_plan_detail = " ".join(x["detail"] for x in query_plan)
+        assert "INDEX" in query_plan_detail
+        assert "jar_id=?" in query_plan_detail
+
+    def test_partition_capacity_limits(self):
+        '''
+        the parent's capacity limits apply to each partition on its own
+        '''
+
+        with SqliteCookieJar(database_path=":memory:", max_cookies_per_domain=2) as cookie_jar:
+
+            partition_one = cookie_jar.partition("one")
+            partition_two = cookie_jar.partition("two")
+
+            for iter_partition in [partition_one, partition_two]:
+                iter_partition.set_cookies([create_simple_cookie(f"a{i}", "b", "example.com") for i in range(2)])
+
+            result = partition_one.set_cookies([create_simple_cookie("c", "d", "example.com")])
+
+            assert result.domain_limit_evicted == 1
+            assert sorted(x.name for x in partition_one) == ["a1", "c"]
+            assert sorted(x.name for x in partition_two) == ["a0", "a1"]
+
+    def test_partitions_are_persisted(self, tempfolder_database_path:pathlib.Path):
+        '''
+        a cookie jar opened with a `jar_id` should see the cookies stored through a partition handle
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+
+            with cookie_jar.partition("one") as partition_one:
+                partition_one.set_cookie(create_simple_cookie("a", "b", "example.com"))
+
+            # closing the handle doesn't close the parent's connection
+            assert len(partition_one) == 1
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, jar_id="one") as cookie_jar:
+            assert [x.name for x in cookie_jar] == ["a"]
+            assert cookie_jar.partition(sql_statements.DEFAULT_JAR_ID).jar_ids() == ["one"]
@@ -0,0 +1,148 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.policy_evaluator import DefaultPolicyEvaluator
+from biscutbox.metrics import OperationMetrics
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+from http.cookiejar import Cookie, DefaultCookiePolicy
+import itertools
+import time
+import urllib.request
+
+import pytest
+
+
+NOW = int(time.time())
+
+'''
+every combination of these is checked against every request and policy below
+'''
+COOKIE_DOMAINS = ["example.com", ".example.com", "a.example.com", ".a.example.com", "zombo.com", "localhost.local",
+    ".local", "127.0.0.1", ""]
+COOKIE_PATHS = ["/", "/account", "/account/", "/acc"]
+COOKIE_PORTS = [None, "80", "8080", "80,443"]
+COOKIE_EXPIRES = [None, NOW - 10, NOW, NOW + 10]
+
+REQUESTS = [
+    ("https://example.com/", None, False),
+    ("http://a.example.com/account/settings", None, False),
+    ("https://a.example.com:8080/acc", None, False),
+    ("http://a.example.com:443/account", None, False),
+    ("http://localhost/", None, False),
+    ("http://127.0.0.1/account", None, False),
+    ("https://a.example.com/", "zombo.com", True),
+    ("https://a.example.com/", "example.com", True),
+    ("wss://example.com:notaport/", None, False),
+]
+
+POLICIES = [
+    DefaultCookiePolicy(),
+    DefaultCookiePolicy(rfc2965=True),
+    DefaultCookiePolicy(rfc2965=True, netscape=False),
+    DefaultCookiePolicy(rfc2965=True, strict_rfc2965_unverifiable=False, strict_ns_unverifiable=True),
+    DefaultCookiePolicy(strict_ns_domain=DefaultCookiePolicy.DomainStrict),
+    DefaultCookiePolicy(blocked_domains=[".a.example.com", "127.0.0.1"]),
+    DefaultCookiePolicy(allowed_domains=["example.com", ".a.example.com", "localhost.local"]),
+    DefaultCookiePolicy(secure_protocols=("https", "wss")),
+]
+
+
+class OverriddenCookiePolicy(DefaultCookiePolicy):
+    '''
+    a DefaultCookiePolicy that overrides one of the return_ok checks, so it can't be evaluated in bulk
+    '''
+
+    def return_ok_port(self, cookie, request):
+        return True
+
+
+def _make_cookie(domain:str, path:str, port:str|None, expires:int|None, version:int, secure:bool, domain_specified:bool) -> Cookie:
+    return Cookie(version=version, name="a", value="1", port=port, port_specified=port is not None,
+        domain=domain, domain_specified=domain_specified, domain_initial_dot=domain.startswith("."),
+        path=path, path_specified=True, secure=secure, expires=expires, discard=expires is None,
+        comment=None, comment_url=None, rest={}, rfc2109=False)
+
+
+def _make_cookies() -> list[Cookie]:
+    return [_make_cookie(*x) for x in itertools.product(
+        COOKIE_DOMAINS, COOKIE_PATHS, COOKIE_PORTS, COOKIE_EXPIRES, [0, 1], [False, True], [False, True])]
+
+
+class TestPolicyEvaluator():
+    '''
+    tests for `DefaultPolicyEvaluator`, which has to give exactly the same answers as DefaultCookiePolicy
+    '''
+
+    @pytest.mark.parametrize("policy", POLICIES)
+    @pytest.mark.parametrize("url,origin_req_host,unverifiable", REQUESTS)
+    def test_same_results_as_default_cookie_policy(
+        self,
+        policy:DefaultCookiePolicy,
+        url:str,
+        origin_req_host:str|None,
+        unverifiable:bool):
+        '''
+        every combination of cookie attributes should get the same result as calling the policy for each cookie
+        '''
+
+        request = urllib.request.Request(url, origin_req_host=origin_req_host, unverifiable=unverifiable)
+        cookie_list = _make_cookies()
+
+        policy._now = NOW
+        policy_evaluator = DefaultPolicyEvaluator.for_policy(policy, request)
+
+        expected_list = [policy.domain_return_ok(x.domain, request)
+            and policy.path_return_ok(x.path, request)
+            and policy.return_ok(x, request) for x in cookie_list]
+
+        assert policy_evaluator.check_cookies(cookie_list) == expected_list
+
+        # without the domain check, like `_cookies_for_domain`
+        expected_list = [policy.path_return_ok(x.path, request) and policy.return_ok(x, request) for x in cookie_list]
+
+        assert policy_evaluator.check_cookies(cookie_list, check_domain=False) == expected_list
+
+        # the cookies that passed `sql_statements.DEFAULT_POLICY_FILTER`
+        filtered_list = [x for x in cookie_list if policy.path_return_ok(x.path, request)
+            and policy.return_ok_secure(x, request) and policy.return_ok_expires(x, request)]
+
+        expected_list = [policy.domain_return_ok(x.domain, request) and policy.return_ok(x, request) for x in filtered_list]
+
+        assert policy_evaluator.check_cookies(filtered_list, default_policy_filtered=True) == expected_list
+
+    def test_for_policy(self):
+        '''
+        an evaluator should only be used for policies that don't override any of the checks
+        '''
+
+        request = create_dummy_request("https://example.com/", "GET")
+
+        assert DefaultPolicyEvaluator.for_policy(DefaultCookiePolicy(), request) is not None
+        assert DefaultPolicyEvaluator.for_policy(OverriddenCookiePolicy(), request) is None
+
+    def test_cookie_jar_with_overridden_policy(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the cookie jar should still call the policy for each cookie when a check is overridden
+        '''
+
+        port_cookie = create_simple_cookie("port", "1", "example.com")
+        port_cookie.port = "8080"
+        port_cookie.port_specified = True
+
+        in_memory_sqlite_cookie_jar.set_cookies([port_cookie, create_simple_cookie("a", "1", "example.com")])
+
+        request = create_dummy_request("https://example.com/", "GET")
+
+        assert [x.name for x in in_memory_sqlite_cookie_jar._cookies_for_request(request)] == ["a"]
+        assert [x.name for x in in_memory_sqlite_cookie_jar._cookies_for_domain("example.com", request)] == ["a"]
+
+        in_memory_sqlite_cookie_jar.set_policy(OverriddenCookiePolicy())
+
+        assert sorted(x.name for x in in_memory_sqlite_cookie_jar._cookies_for_request(request)) == ["a", "port"]
+        assert sorted(x.name for x in in_memory_sqlite_cookie_jar._cookies_for_domain("example.com", request)) == ["a", "port"]
@@ -0,0 +1,122 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.metrics import OperationMetrics
+from tests.testing_util import \
+(
+    cookie_keys,
+    create_corpus_requests,
+    create_cookie_corpus,
+    create_dummy_request,
+    create_simple_cookie,
+    PythonOnlyCookiePolicy
+)
+
+from http.cookiejar import DefaultCookiePolicy
+import time
+
+import pytest
+
+
+class TestPolicyPushdown():
+    '''
+    tests for doing DefaultCookiePolicy's path, secure and expiry checks in SQL
+    '''
+
+    def test_same_cookies_as_python_checks(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the cookies returned with the checks in SQL should be exactly the ones returned with every check in python
+        '''
+
+        in_memory_sqlite_cookie_jar.set_cookies(create_cookie_corpus(int(time.time())))
+
+        python_only_policy = PythonOnlyCookiePolicy()
+        default_policy = DefaultCookiePolicy()
+
+        for iter_request in create_corpus_requests():
+
+            in_memory_sqlite_cookie_jar.set_policy(default_policy)
+            assert in_memory_sqlite_cookie_jar._get_default_policy_filter_params(iter_request) is not None
+            sql_cookie_list = in_memory_sqlite_cookie_jar._cookies_for_request(iter_request)
+
+            in_memory_sqlite_cookie_jar.set_policy(python_only_policy)
+            assert in_memory_sqlite_cookie_jar._get_default_policy_filter_params(iter_request) is None
+            python_cookie_list = in_memory_sqlite_cookie_jar._cookies_for_request(iter_request)
+
+            assert cookie_keys(sql_cookie_list) == cookie_keys(python_cookie_list)
+
+            for iter_domain in {x.domain for x in python_cookie_list}:
+
+                python_domain_list = in_memory_sqlite_cookie_jar._cookies_for_domain(iter_domain, iter_request)
+                in_memory_sqlite_cookie_jar.set_policy(default_policy)
+                sql_domain_list = in_memory_sqlite_cookie_jar._cookies_for_domain(iter_domain, iter_request)
+                in_memory_sqlite_cookie_jar.set_policy(python_only_policy)
+
+                assert cookie_keys(sql_domain_list) == cookie_keys(python_domain_list)
+
+    @pytest.mark.parametrize("cookie_path,request_path,expected", [
+        ("/", "/", True),
+        ("/", "/anything", True),
+        ("/account", "/account", True),
+        ("/account", "/account/settings", True),
+        ("/acc", "/account", False),
+        ("/acc/", "/acc/x", True),
+        ("/account/settings", "/account", False),
+        ("/ü", "/%C3%BC", False),
+    ])
+    def test_path_matching(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar,
+        cookie_path:str,
+        request_path:str,
+        expected:bool):
+        '''
+        the path check in SQL should match `DefaultCookiePolicy.path_return_ok`
+        '''
+
+        cookie = create_simple_cookie("a", "1", "example.com")
+        cookie.path = cookie_path
+        in_memory_sqlite_cookie_jar.set_cookie(cookie)
+
+        request = create_dummy_request(f"https://example.com{request_path}", "GET")
+
+        assert DefaultCookiePolicy().path_return_ok(cookie_path, request) == expected
+        assert len(in_memory_sqlite_cookie_jar._cookies_for_request(request)) == int(expected)
+
+    def test_rejected_rows_are_not_fetched(self):
+        '''
+        expired cookies, secure cookies for a http request and cookies on other paths shouldn't be read at all
+        '''
+
+        metrics_list:list[OperationMetrics] = list()
+
+        with SqliteCookieJar(database_path=":memory:", policy=DefaultCookiePolicy(), metrics_callback=metrics_list.append) as cookie_jar:
+
+            expired_cookie = create_simple_cookie("expired", "1", "example.com")
+            expired_cookie.expires = int(time.time()) - 10
+
+            secure_cookie = create_simple_cookie("secure", "1", "example.com")
+            secure_cookie.secure = True
+
+            other_path_cookie = create_simple_cookie("other_path", "1", "example.com")
+            other_path_cookie.path = "/other"
+
+            cookie_jar.set_cookies([
+                expired_cookie,
+                secure_cookie,
+                other_path_cookie,
+                create_simple_cookie("sent", "1", "example.com"),
+            ])
+
+            request = create_dummy_request("http://example.com/", "GET")
+
+            assert [x.name for x in cookie_jar._cookies_for_request(request)] == ["sent"]
+            assert (metrics_list[-1].rows_fetched, metrics_list[-1].cookies_returned) == (1, 1)
+
+            assert [x.name for x in cookie_jar._cookies_for_domain("example.com", request)] == ["sent"]
+            assert (metrics_list[-1].rows_fetched, metrics_list[-1].cookies_returned) == (1, 1)
+
+            # the secure cookie is sent over https
+            https_request = create_dummy_request("https://example.com/", "GET")
+            assert sorted(x.name for x in cookie_jar._cookies_for_request(https_request)) == ["secure", "sent"]
@@ -0,0 +1,149 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar, ReadOnlyCookieJarError
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie,
+    FakeResponse
+)
+
+import pathlib
+import sqlite3
+import time
+import urllib.request
+
+import pytest
+
+
+class TestReadOnly():
+    '''
+    tests for opening a SqliteCookieJar with `read_only` and `immutable`
+    '''
+
+    def test_read_only_reads_and_sees_writes(self, tempfolder_database_path:pathlib.Path):
+        '''
+        a read only cookie jar should return cookies, including ones written by another connection after it was opened
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as writer_cookie_jar, \
+            SqliteCookieJar(database_path=tempfolder_database_path, lazy_connect=True, read_only=True) as reader_cookie_jar:
+
+            writer_cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            request = create_dummy_request("https://example.com/", "GET")
+            assert [x.name for x in reader_cookie_jar._cookies_for_request(request)] == ["a"]
+
+            writer_cookie_jar.set_cookie(create_simple_cookie("b", "2", "example.com"))
+
+            assert sorted(x.name for x in reader_cookie_jar._cookies_for_request(request)) == ["a", "b"]
+            assert len(reader_cookie_jar) == 2
+            assert reader_cookie_jar.stats().total_cookies == 2
+
+    @pytest.mark.parametrize("immutable", [False, True])
+    def test_mutating_methods_raise(self, tempfolder_database_path:pathlib.Path, immutable:bool):
+        '''
+        every method that would change the cookies should raise, and leave the database alone
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+        database_bytes = tempfolder_database_path.read_bytes()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, read_only=not immutable, immutable=immutable) as cookie_jar:
+
+            assert cookie_jar.read_only
+
+            request = create_dummy_request("https://example.com/", "GET")
+            response = FakeResponse(["Set-Cookie: b=2; Path=/"])
+
+            for iter_function in [
+                lambda: cookie_jar.set_cookie(create_simple_cookie("b", "2", "example.com")),
+                lambda: cookie_jar.set_cookies([create_simple_cookie("b", "2", "example.com")]),
+                lambda: cookie_jar.extract_cookies(response, request),
+                lambda: cookie_jar.clear(),
+                lambda: cookie_jar.clear("example.com"),
+                lambda: cookie_jar.clear_session_cookies(),
+                lambda: cookie_jar.clear_expired_cookies_from_time(int(time.time())),
+                lambda: cookie_jar.import_firefox_cookies(tempfolder_database_path),
+                lambda: cookie_jar.partition("other").set_cookie(create_simple_cookie("b", "2", "example.com")),
+            ]:
+                with pytest.raises(ReadOnlyCookieJarError):
+                    iter_function()
+
+            assert [x.name for x in cookie_jar] == ["a"]
+
+        assert tempfolder_database_path.read_bytes() == database_bytes
+
+    @pytest.mark.parametrize("immutable", [False, True])
+    def test_add_cookie_header(self, tempfolder_database_path:pathlib.Path, immutable:bool):
+        '''
+        sending cookies is what read only cookie jars are for, so `add_cookie_header` shouldn't raise even though
+        `CookieJar.add_cookie_header` clears the expired cookies, and expired cookies still shouldn't be sent
+        '''
+
+        expired_cookie = create_simple_cookie("expired", "1", "example.com")
+        expired_cookie.expires = int(time.time()) - 10
+        expired_cookie.discard = False
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookies([create_simple_cookie("a", "1", "example.com"), expired_cookie])
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, read_only=not immutable, immutable=immutable) as cookie_jar:
+
+            request = create_dummy_request("https://example.com/", "GET")
+            cookie_jar.add_cookie_header(request)
+            assert request.get_header("Cookie") == "a=1"
+
+            # the same through an opener's cookie processor
+            request = urllib.request.Request("https://example.com/")
+            urllib.request.HTTPCookieProcessor(cookie_jar).http_request(request)
+            assert request.get_header("Cookie") == "a=1"
+
+            cookie_jar.clear_expired_cookies()
+            assert len(cookie_jar) == 2
+
+    def test_immutable_snapshot(self, tempfolder_database_path:pathlib.Path, tmp_path:pathlib.Path):
+        '''
+        a snapshot should be readable with `immutable`, without creating a WAL or shared memory file next to it
+        '''
+
+        snapshot_path = tmp_path / "snapshot.sqlite3"
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", "example.com") for i in range(10)])
+            cookie_jar.snapshot(snapshot_path)
+
+        with SqliteCookieJar(database_path=snapshot_path, immutable=True) as cookie_jar:
+
+            request = create_dummy_request("https://example.com/", "GET")
+            assert len(cookie_jar._cookies_for_request(request)) == 10
+
+        assert sorted(x.name for x in tmp_path.iterdir()) == ["snapshot.sqlite3"]
+
+    def test_invalid_options(self, tempfolder_database_path:pathlib.Path):
+        '''
+        read only cookie jars need a current database on disk, and can't be combined with options that write
+        '''
+
+        with pytest.raises(ValueError):
+            SqliteCookieJar(database_path=sql_statements.IN_MEMORY_DATABASE_PATH, read_only=True)
+
+        with pytest.raises(ValueError):
+            SqliteCookieJar(database_path=tempfolder_database_path, read_only=True, track_last_access=True)
+
+        # the database doesn't exist yet
+        with pytest.raises(sqlite3.OperationalError):
+            SqliteCookieJar(database_path=tempfolder_database_path, read_only=True).connect()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path):
+            pass
+
+        conn = sqlite3.connect(tempfolder_database_path)
+        with conn:
+            conn.execute("PRAGMA user_version = 3")
+        conn.close()
+
+        with pytest.raises(ReadOnlyCookieJarError, match="schema version"):
+            SqliteCookieJar(database_path=tempfolder_database_path, read_only=True).connect()
@@ -0,0 +1,148 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_statements
+from tests.testing_util import create_dummy_request, create_simple_cookie
+
+import pathlib
+import sqlite3
+
+'''
+the cookie table as it was created by the first version of biscutbox, before
+`PRAGMA user_version` was used
+'''
+VERSION_ZERO_CREATE_TABLE_STATEMENT = f'''
+CREATE TABLE "{sql_statements.TABLE_NAME_V1}"  (
+    "id" INTEGER NOT NULL,
+    "version" INTEGER NOT NULL,
+    "name" TEXT NOT NULL,
+    "value" TEXT,
+    "port" INTEGER ,
+    "domain" TEXT NOT NULL,
+    "path" TEXT NOT NULL,
+    "secure" INTEGER NOT NULL,
+    "expires" INTEGER,
+    "discard" INTEGER NOT NULL,
+    "comment" INTEGER,
+    "comment_url" TEXT,
+    "rfc2109" INTEGER NOT NULL,
+    "rest" TEXT NOT NULL,
+    "port_specified" INTEGER NOT NULL,
+    "domain_specified" INTEGER NOT NULL,
+    "domain_initial_dot" INTEGER NOT NULL,
+    "path_specified" INTEGER NOT NULL,
+    PRIMARY KEY("id" AUTOINCREMENT)
+);
+'''
+
+VERSION_ZERO_INSERT_STATEMENT = f'''
+INSERT INTO "{sql_statements.TABLE_NAME_V1}"
+(version, name, value, port, domain, path, secure, expires, discard, comment, comment_url, rfc2109, rest,
+port_specified, domain_specified, domain_initial_dot, path_specified)
+VALUES (0, ?, ?, NULL, ?, '/', 0, NULL, 1, NULL, NULL, 0, '{{}}', 0, 0, 0, 1)
+'''
+
+
+def _get_schema_version(database_path:pathlib.Path) -> int:
+    '''
+    :param database_path: the database to check
+    :return: the `PRAGMA user_version` of the database
+    '''
+
+    conn = sqlite3.connect(database_path)
+    schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return schema_version
+
+
+class TestSchemaMigration():
+    '''
+    tests for creating and upgrading the database schema
+    '''
+
+    def test_new_database_has_current_schema_version(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        a brand new database should be stamped with the current schema version
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            assert len(cookie_jar) == 0
+
+        assert _get_schema_version(tempfolder_database_path) == sql_statements.SCHEMA_VERSION
+
+    def test_upgrade_version_zero_database(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        a database created before schema versions existed should be upgraded, keeping its cookies
+        '''
+
+        conn = sqlite3.connect(tempfolder_database_path)
+        with conn:
+            conn.execute(VERSION_ZERO_CREATE_TABLE_STATEMENT)
+            conn.executemany(VERSION_ZERO_INSERT_STATEMENT, [
+                ("a", "b", "example.com"),
+                ("c", "d", ".a.example.com"),
+                ("e", "f", "localhost"),
+            ])
+        conn.close()
+
+        assert _get_schema_version(tempfolder_database_path) == 0
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+
+            assert len(cookie_jar) == 3
+
+            base_domain_list = [x["base_domain"] for x in
+                cookie_jar.sqlite_connection.execute(
+                    f'SELECT base_domain FROM "{sql_statements.TABLE_NAME_V1}" ORDER BY id')]
+            assert base_domain_list == ["example.com", "example.com", "localhost"]
+
+            request = create_dummy_request("https://a.example.com", "GET")
+            assert len(cookie_jar._cookies_for_request(request)) == 2
+
+        assert _get_schema_version(tempfolder_database_path) == sql_statements.SCHEMA_VERSION
+
+        # opening it again shouldn't try to upgrade it again
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            assert len(cookie_jar) == 3
+
+    def test_upgrade_removes_duplicate_cookies(
+        self,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        older versions could store the same cookie more than once, upgrading should keep the last one that was set
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path):
+            pass
+
+        # turn the database back into schema version 4, which had no `creation_time` or unique key
+        conn = sqlite3.connect(tempfolder_database_path)
+        with conn:
+            conn.execute('DROP INDEX "cookie_key_idx"')
+            conn.execute(f'ALTER TABLE "{sql_statements.TABLE_NAME_V1}" DROP COLUMN "creation_time"')
+            conn.executemany(f'''INSERT INTO "{sql_statements.TABLE_NAME_V1}"
+                (version, name, value, domain, path, secure, discard, rfc2109, rest, port_specified,
+                domain_specified, domain_initial_dot, path_specified, base_domain, jar_id)
+                VALUES (0, ?, ?, 'example.com', '/', 0, 1, 0, '{{}}', 0, 0, 0, 1, 'example.com', ?)''', [
+                ("a", "1", ""),
+                ("a", "2", ""),
+                ("b", "1", ""),
+                ("a", "3", "other"),
+            ])
+            conn.execute("PRAGMA user_version = 4")
+        conn.close()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+
+            assert len(cookie_jar) == 2
+            assert sorted((x.name, x.value) for x in cookie_jar) == [("a", "2"), ("b", "1")]
+            assert [x.value for x in cookie_jar.partition("other")] == ["3"]
+
+            # setting it again replaces it now
+            cookie_jar.set_cookie(create_simple_cookie("a", "4", "example.com"))
+            assert sorted((x.name, x.value) for x in cookie_jar) == [("a", "4"), ("b", "1")]
+
+        assert _get_schema_version(tempfolder_database_path) == sql_statements.SCHEMA_VERSION
@@ -0,0 +1,155 @@
+from biscutbox.sharded_sqlite_cookie_jar import ShardedSqliteCookieJar, SHARD_DATABASE_FILENAME_TEMPLATE
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie,
+    FakeResponse
+)
+
+import pathlib
+import time
+
+import pytest
+
+
+@pytest.fixture(params=[False, True], ids=["serial", "parallel"])
+def sharded_cookie_jar(request, tmp_path:pathlib.Path) -> ShardedSqliteCookieJar:
+    ''' a fixture to set up a ShardedSqliteCookieJar with 4 shards, with and without the thread pool
+    '''
+
+    cj = ShardedSqliteCookieJar(shard_directory=tmp_path / "shards", number_of_shards=4, parallel=request.param)
+    cj.connect()
+
+    yield cj
+
+    cj.close()
+
+
+class TestShardedSqliteCookieJar():
+    '''
+    tests for ShardedSqliteCookieJar
+    '''
+
+    def test_cookies_routed_by_registrable_domain(
+        self,
+        sharded_cookie_jar:ShardedSqliteCookieJar):
+        '''
+        cookies for the same registrable domain should all end up in the same shard, and only that shard
+        '''
+
+        domain_list = ["example.com", "zombo.com", "contoso.com", "example.org", "example.net", "example.co.uk"]
+
+        for iter_domain in domain_list:
+            sharded_cookie_jar.set_cookies([
+                create_simple_cookie("a", "1", iter_domain),
+                create_simple_cookie("b", "2", f".www.{iter_domain}"),
+            ])
+
+        assert len(sharded_cookie_jar) == len(domain_list) * 2
+        assert len(list(sharded_cookie_jar)) == len(domain_list) * 2
+
+        for iter_domain in domain_list:
+
+            expected_shard = sharded_cookie_jar.get_shard(iter_domain)
+            assert expected_shard is sharded_cookie_jar.get_shard(f"a.b.{iter_domain}")
+
+            for iter_shard in sharded_cookie_jar.shards:
+                shard_domains = {x.domain.lstrip(".").removeprefix("www.") for x in iter_shard}
+                assert (iter_domain in shard_domains) == (iter_shard is expected_shard)
+
+        # the shards are separate files in the shard directory
+        assert len(list(sharded_cookie_jar.shard_directory.glob("*.sqlite3"))) == 4
+        assert (sharded_cookie_jar.shard_directory / SHARD_DATABASE_FILENAME_TEMPLATE.format(0)).exists()
+
+    def test_request_round_trip(
+        self,
+        sharded_cookie_jar:ShardedSqliteCookieJar):
+        '''
+        cookies extracted from a response should be sent back on the next request to that site, and not others
+        '''
+
+        request = create_dummy_request("https://www.example.com/", "GET")
+        response = FakeResponse(["Set-Cookie: a=1; Domain=.example.com; Path=/", "Set-Cookie: b=2"])
+
+        sharded_cookie_jar.extract_cookies(response, request)
+
+        assert len(sharded_cookie_jar) == 2
+
+        next_request = create_dummy_request("https://www.example.com/page", "GET")
+        sharded_cookie_jar.add_cookie_header(next_request)
+        assert sorted(next_request.get_header("Cookie").split("; ")) == ["a=1", "b=2"]
+
+        other_request = create_dummy_request("https://a.example.com/", "GET")
+        assert [x.name for x in sharded_cookie_jar._cookies_for_request(other_request)] == ["a"]
+
+        unrelated_request = create_dummy_request("https://zombo.com/", "GET")
+        sharded_cookie_jar.add_cookie_header(unrelated_request)
+        assert not unrelated_request.has_header("Cookie")
+
+    def test_clear(
+        self,
+        sharded_cookie_jar:ShardedSqliteCookieJar):
+        '''
+        clearing a domain only clears that domain, clearing with no arguments clears every shard
+        '''
+
+        sharded_cookie_jar.set_cookies(
+            [create_simple_cookie("a", "1", f"example{i}.com") for i in range(20)])
+
+        sharded_cookie_jar.clear("example0.com")
+        assert len(sharded_cookie_jar) == 19
+
+        sharded_cookie_jar.clear("example1.com", "/", "a")
+        assert len(sharded_cookie_jar) == 18
+
+        with pytest.raises(ValueError):
+            sharded_cookie_jar.clear(path="/")
+
+        sharded_cookie_jar.clear()
+        assert len(sharded_cookie_jar) == 0
+
+    def test_clear_expired_and_session_cookies(
+        self,
+        sharded_cookie_jar:ShardedSqliteCookieJar):
+        '''
+        purges without a domain should fan out to every shard
+        '''
+
+        cookie_list = list()
+        for i in range(20):
+            iter_cookie = create_simple_cookie(f"a{i}", "1", f"example{i}.com")
+            if i % 2 == 0:
+                iter_cookie.expires = int(time.time()) - 10
+            else:
+                iter_cookie.expires = int(time.time()) + 1000
+                iter_cookie.discard = i % 4 == 1
+            cookie_list.append(iter_cookie)
+
+        sharded_cookie_jar.set_cookies(cookie_list)
+        assert len(sharded_cookie_jar) == 20
+
+        sharded_cookie_jar.clear_expired_cookies()
+        assert len(sharded_cookie_jar) == 10
+
+        sharded_cookie_jar.clear_session_cookies()
+        assert sorted(x.name for x in sharded_cookie_jar) == sorted(f"a{i}" for i in range(3, 20, 4))
+
+    def test_shards_are_persisted(self, tmp_path:pathlib.Path):
+        '''
+        reopening the jar with the same number of shards should find the same cookies
+        '''
+
+        with ShardedSqliteCookieJar(shard_directory=tmp_path, number_of_shards=3, max_cookies_per_domain=1) as cookie_jar:
+            eviction_result = cookie_jar.set_cookies([
+                create_simple_cookie("a", "1", "example.com"),
+                create_simple_cookie("b", "2", "example.com"),
+                create_simple_cookie("c", "3", "zombo.com"),
+            ])
+
+            assert eviction_result.domain_limit_evicted == 1
+
+        with ShardedSqliteCookieJar(shard_directory=tmp_path, number_of_shards=3) as cookie_jar:
+            assert len(cookie_jar) == 2
+
+            request = create_dummy_request("https://zombo.com/", "GET")
+            assert [x.name for x in cookie_jar._cookies_for_request(request)] == ["c"]
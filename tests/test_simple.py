@@ -13,6 +13,7 @@ from tests.testing_util import assert_cookie_equality
 
 import pathlib
 import itertools
+import threading
 from http.cookiejar import Cookie
 
 import pytest
@@ -262,3 +263,43 @@ class TestSimple:
 
         # assert the total number of cookies in the database also matches
         assert len(in_memory_sqlite_cookie_jar) == number_of_cookies
+
+    def test_iter_does_not_hold_the_lock(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        a half consumed iterator shouldn't hold the lock or a transaction open, and should
+        keep going from where it was if cookies are added or removed between batches
+        '''
+
+        def create_cookie(name:str) -> Cookie:
+            return Cookie(version=0, name=name, value="b", port=None, port_specified=False,
+                domain="example.com", domain_specified=False, domain_initial_dot=False, path="/",
+                path_specified=True, secure=False, expires=None, discard=True, comment=None,
+                comment_url=None, rest={}, rfc2109=False)
+
+        in_memory_sqlite_cookie_jar.set_cookies(
+            [create_cookie(f"a-{i}") for i in range(SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE * 2)])
+
+        the_iterator = iter(in_memory_sqlite_cookie_jar)
+        assert next(the_iterator).name == "a-0"
+
+        assert not in_memory_sqlite_cookie_jar.sqlite_connection.in_transaction
+
+        lock_result = []
+        lock_thread = threading.Thread(target=lambda: lock_result.append(
+            in_memory_sqlite_cookie_jar._cookies_lock.acquire(timeout=5) and in_memory_sqlite_cookie_jar._cookies_lock.release() is None))
+        lock_thread.start()
+        lock_thread.join()
+        assert lock_result == [True]
+
+        # remove a cookie from the first batch, which was already fetched, and add a new one at the end
+        in_memory_sqlite_cookie_jar.clear("example.com", "/", "a-1")
+        in_memory_sqlite_cookie_jar.set_cookie(create_cookie("new"))
+
+        names = [x.name for x in the_iterator]
+
+        assert len(names) == SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE * 2
+        assert names[0] == "a-1"
+        assert names[SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE - 1] == f"a-{SELECT_ALL_FROM_COOKIE_TABLE_BATCH_SIZE}"
+        assert names[-1] == "new"
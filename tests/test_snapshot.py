@@ -0,0 +1,87 @@
+from tests.fixtures import \
+(
+    tempfolder_database_path,
+    in_memory_sqlite_cookie_jar
+)
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from tests.testing_util import create_simple_cookie
+
+import pathlib
+
+import pytest
+
+
+class TestSnapshot():
+    '''
+    tests for `SqliteCookieJar.snapshot`
+    '''
+
+    def test_snapshot_in_small_steps(
+        self,
+        tmp_path:pathlib.Path,
+        tempfolder_database_path:pathlib.Path):
+        '''
+        take a snapshot one page at a time and make sure the progress is reported
+        and that the snapshot has every cookie
+        '''
+
+        number_of_cookies = 500
+        snapshot_path = tmp_path / "snapshot.sqlite3"
+        progress_list = list()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+
+            cookie_jar.set_cookies(
+                [create_simple_cookie(f"a{i}", f"b{i}" * 10, "example.com") for i in range(number_of_cookies)])
+
+            result = cookie_jar.snapshot(
+                snapshot_path,
+                pages_per_step=1,
+                sleep_seconds=0,
+                progress=lambda copied, total: progress_list.append((copied, total)))
+
+            # the jar is still usable afterwards
+            cookie_jar.set_cookie(create_simple_cookie("c", "d", "example.com"))
+            assert len(cookie_jar) == number_of_cookies + 1
+
+        assert result.destination_path == snapshot_path
+        assert result.total_pages > 1
+        assert result.steps == result.total_pages
+        assert result.duration_seconds >= 0
+
+        assert len(progress_list) == result.steps
+        assert progress_list[0] == (1, result.total_pages)
+        assert progress_list[-1] == (result.total_pages, result.total_pages)
+
+        with SqliteCookieJar(database_path=snapshot_path) as snapshot_jar:
+            assert len(snapshot_jar) == number_of_cookies
+
+    def test_snapshot_of_memory_database(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        a `:memory:` database can be snapshotted to disk too
+        '''
+
+        snapshot_path = tmp_path / "snapshot.sqlite3"
+
+        in_memory_sqlite_cookie_jar.set_cookie(create_simple_cookie("a", "b", "example.com"))
+
+        result = in_memory_sqlite_cookie_jar.snapshot(snapshot_path)
+
+        assert result.steps >= 1
+
+        with SqliteCookieJar(database_path=snapshot_path) as snapshot_jar:
+            assert len(snapshot_jar) == 1
+
+    def test_snapshot_invalid_pages_per_step(
+        self,
+        tmp_path:pathlib.Path,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        pages_per_step has to be positive, as sqlite treats a negative number as "copy everything"
+        '''
+
+        with pytest.raises(ValueError):
+            in_memory_sqlite_cookie_jar.snapshot(tmp_path / "snapshot.sqlite3", pages_per_step=0)
@@ -0,0 +1,97 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox import sql_functions, sql_statements
+from tests.testing_util import create_dummy_request
+
+from http.cookiejar import DefaultCookiePolicy
+import itertools
+
+import pytest
+
+
+class TestSqlFunctions():
+    '''
+    tests for the SQL functions in `biscutbox.sql_functions` and the request lookup that uses them
+    '''
+
+    def test_domain_match_is_domain_return_ok(self):
+        '''
+        `domain_match` should agree with `DefaultCookiePolicy.domain_return_ok`
+        '''
+
+        policy = DefaultCookiePolicy()
+
+        host_list = ["example.com", "www.example.com", "a.b.example.com", "notexample.com", "example.co.uk"]
+        domain_list = ["example.com", ".example.com", "www.example.com", ".www.example.com", "b.example.com",
+            "xample.com", "com", ".co.uk", "example.co.uk", ""]
+
+        for iter_host, iter_domain in itertools.product(host_list, domain_list):
+
+            request = create_dummy_request(f"https://{iter_host}/", "GET")
+
+            assert sql_functions.domain_match(iter_host, iter_domain) == policy.domain_return_ok(iter_domain, request), \
+                (iter_host, iter_domain)
+
+        assert not sql_functions.domain_match("example.com", None)
+
+    def test_path_match_is_path_return_ok(self):
+        '''
+        `path_match` should agree with `DefaultCookiePolicy.path_return_ok`
+        '''
+
+        policy = DefaultCookiePolicy()
+
+        path_list = ["/", "/a", "/a/", "/ab", "/a/b", "/a/b/", "", "/b"]
+
+        for iter_request_path, iter_path in itertools.product(path_list[:-2], path_list):
+
+            request = create_dummy_request(f"https://example.com{iter_request_path}", "GET")
+
+            assert sql_functions.path_match(iter_request_path or "/", iter_path) == policy.path_return_ok(iter_path, request), \
+                (iter_request_path, iter_path)
+
+        assert not sql_functions.path_match("/", None)
+
+    @pytest.mark.parametrize("domain,expected", [
+        ("example.com", "com.example"),
+        (".www.Example.com", "com.example.www"),
+        ("localhost", "localhost"),
+        (None, None),
+    ])
+    def test_reversed_domain(self, domain:str|None, expected:str|None):
+        '''
+        `reversed_domain` should reverse the labels of the domain, without the leading dot
+        '''
+
+        assert sql_functions.reversed_domain(domain) == expected
+
+    def test_functions_are_registered(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        every function should be callable from SQL on the cookie jar's connection
+        '''
+
+        result = in_memory_sqlite_cookie_jar.sqlite_connection.execute(
+            f"SELECT {sql_statements.DOMAIN_MATCH_FUNCTION_NAME}('a.example.com', '.example.com') AS d, "
+            f"{sql_statements.PATH_MATCH_FUNCTION_NAME}('/a/b', '/a') AS p, "
+            f"{sql_statements.REVERSED_DOMAIN_FUNCTION_NAME}('a.example.com') AS r").fetchone()
+
+        assert (result["d"], result["p"], result["r"]) == (1, 1, "com.example.a")
+
+    def test_request_lookup_uses_base_domain_index(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the request lookup should be a search of the `base_domain` index rather than a scan of the partition
+        '''
+
+        for iter_statement in sql_statements.SELECT_ALL_FROM_COOKIE_TABLE_FOR_REQUEST_STATEMENTS.values():
+
+            query_plan = in_memory_sqlite_cookie_jar.sqlite_connection.execute(
+                f"EXPLAIN QUERY PLAN {iter_statement}",
+                {"jar_id": "", "base_domain": "example.com", "request_host": "example.com", "cookie_domains": "[]",
+                    "now": 0, "request_path": "/", "request_is_secure": True}).fetchall()
+
+            query_plan_detail = " ".join(x["detail"] for x in query_plan)
+            assert "USING INDEX base_domain_idx (jar_id=? AND base_domain=?)" in query_plan_detail
@@ -0,0 +1,89 @@
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.sql_trace import SqlTracer
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+import logging
+import sqlite3
+
+import pytest
+
+
+class TestSqlTrace():
+    '''
+    tests for the `slow_statement_threshold` diagnostic mode of SqliteCookieJar
+    '''
+
+    def test_slow_statements_are_logged_with_query_plan(self, caplog:pytest.LogCaptureFixture):
+        '''
+        with a threshold of 0 every statement is slow, and should be logged with its query plan
+        '''
+
+        with SqliteCookieJar(database_path=":memory:", slow_statement_threshold=0) as cookie_jar:
+
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            # the statements run while connecting aren't kept
+            cookie_jar.sql_tracer.slow_statements.clear()
+
+            with caplog.at_level(logging.WARNING, logger="biscutbox.sql_trace"):
+                cookie_jar._cookies_for_request(create_dummy_request("https://a.example.com/", "GET"))
+
+            lookup_statement_list = [x for x in cookie_jar.sql_tracer.slow_statements if "base_domain ==" in x.sql]
+            assert len(lookup_statement_list) == 1
+
+            # the parameters are filled in, and the plan says how the cookie table is read
+            lookup_statement = lookup_statement_list[0]
+            assert "'a.example.com'" in lookup_statement.sql
+            assert any(sql_statements.TABLE_NAME_V1 in x for x in lookup_statement.query_plan)
+
+            assert "slow SQL statement" in caplog.text
+            assert sql_statements.TABLE_NAME_V1 in caplog.text
+
+            # statements without a query plan are kept without one
+            commit_statement_list = [x for x in cookie_jar.sql_tracer.slow_statements if x.sql.startswith("COMMIT")]
+            assert all(x.query_plan == [] for x in commit_statement_list)
+
+    def test_fast_statements_are_not_logged(self):
+        '''
+        statements under the threshold shouldn't be kept, and tracing is off by default
+        '''
+
+        with SqliteCookieJar(database_path=":memory:") as cookie_jar:
+            assert cookie_jar.sql_tracer is None
+
+        with SqliteCookieJar(database_path=":memory:", slow_statement_threshold=60) as cookie_jar:
+            cookie_jar.set_cookie(create_simple_cookie("a", "1", "example.com"))
+            assert len(cookie_jar) == 1
+            assert len(cookie_jar.sql_tracer.slow_statements) == 0
+
+    def test_only_transactions_are_timed(self):
+        '''
+        a statement is timed until the next one starts or the transaction ends, statements
+        outside of `begin()` / `end()` aren't timed at all
+        '''
+
+        connection = sqlite3.connect(":memory:")
+        tracer = SqlTracer(slow_statement_threshold=0, max_slow_statements=2)
+        tracer.install(connection)
+
+        connection.execute("CREATE TABLE a (b)")
+
+        tracer.begin()
+        tracer.begin()
+        connection.execute("INSERT INTO a VALUES (1)")
+        tracer.end(connection)
+        connection.execute("SELECT b FROM a").fetchall()
+        tracer.end(connection)
+
+        connection.execute("SELECT b FROM a WHERE b == 2").fetchall()
+
+        assert [x.sql for x in tracer.slow_statements] == ["INSERT INTO a VALUES (1)", "SELECT b FROM a"]
+        assert tracer.slow_statements[1].query_plan == ["SCAN a"]
+
+        tracer.uninstall(connection)
+        connection.close()
@@ -0,0 +1,85 @@
+from tests.fixtures import tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar, get_public_suffix_list
+from biscutbox import sql_statements
+from tests.testing_util import \
+(
+    create_dummy_request,
+    create_simple_cookie
+)
+
+import pathlib
+import sqlite3
+
+import pytest
+
+
+class TestStartup():
+    '''
+    tests for the things SqliteCookieJar puts off or skips to start up faster
+    '''
+
+    def test_lazy_connect(self, tempfolder_database_path:pathlib.Path):
+        '''
+        with `lazy_connect`, the database shouldn't be opened until the cookie jar is used
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, lazy_connect=True) as cookie_jar:
+            assert cookie_jar.sqlite_connection is None
+
+        # never used, so the database was never created
+        assert not tempfolder_database_path.exists()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, lazy_connect=True) as cookie_jar:
+
+            partition = cookie_jar.partition("other")
+            partition.set_cookie(create_simple_cookie("a", "1", "example.com"))
+
+            # using a partition opens the parent's connection
+            assert cookie_jar.sqlite_connection is not None
+            assert partition.sqlite_connection is cookie_jar.sqlite_connection
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, jar_id="other", lazy_connect=True) as cookie_jar:
+
+            request = create_dummy_request("https://example.com/", "GET")
+            assert [x.name for x in cookie_jar._cookies_for_request(request)] == ["a"]
+
+    def test_current_schema_skips_ddl(self, tempfolder_database_path:pathlib.Path):
+        '''
+        opening a database whose schema is already current should only check the schema version
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, slow_statement_threshold=0) as cookie_jar:
+            assert any("CREATE" in x.sql for x in cookie_jar.sql_tracer.slow_statements)
+
+        with SqliteCookieJar(database_path=tempfolder_database_path, slow_statement_threshold=0) as cookie_jar:
+
+            statement_list = [x.sql for x in cookie_jar.sql_tracer.slow_statements]
+
+            assert sql_statements.GET_SCHEMA_VERSION.strip() in [x.strip() for x in statement_list]
+            assert not any("CREATE" in x or sql_statements.SELECT_COOKIE_TABLE_EXISTS.strip() in x for x in statement_list)
+
+        # an older schema is still upgraded
+        conn = sqlite3.connect(tempfolder_database_path)
+        with conn:
+            conn.execute('DROP INDEX "cookie_key_idx"')
+            conn.execute(f'ALTER TABLE "{sql_statements.TABLE_NAME_V1}" DROP COLUMN "creation_time"')
+            conn.execute("PRAGMA user_version = 4")
+        conn.close()
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            schema_version = cookie_jar.sqlite_connection.execute(sql_statements.GET_SCHEMA_VERSION).fetchone()[0]
+            assert schema_version == sql_statements.SCHEMA_VERSION
+
+    def test_public_suffix_list_is_shared(self):
+        '''
+        the public suffix list should only be loaded once per process, and not by the constructor
+        '''
+
+        with SqliteCookieJar(database_path=":memory:") as cookie_jar_one, \
+            SqliteCookieJar(database_path=":memory:") as cookie_jar_two:
+
+            assert cookie_jar_one._public_suffix_list is cookie_jar_two._public_suffix_list
+            assert cookie_jar_one._public_suffix_list is get_public_suffix_list()
+
+        with pytest.raises(ValueError):
+            SqliteCookieJar(database_path="")
@@ -0,0 +1,116 @@
+from tests.fixtures import in_memory_sqlite_cookie_jar, tempfolder_database_path
+from biscutbox.sqlite_cookie_jar import SqliteCookieJar
+from biscutbox.jar_stats import format_jar_stats
+from biscutbox import sql_statements
+from tests.testing_util import create_simple_cookie
+
+import json
+import pathlib
+import subprocess
+import sys
+import time
+
+
+class TestStats():
+    '''
+    tests for `SqliteCookieJar.stats()` and the `biscutbox.jar_stats` command line tool
+    '''
+
+    def test_stats(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        the stats should count every kind of cookie in the partition
+        '''
+
+        now = int(time.time())
+
+        def _cookie_expiring_in(name:str, seconds:int):
+            cookie = create_simple_cookie(name, "value", "zombo.com")
+            cookie.expires = now + seconds
+            cookie.discard = False
+            return cookie
+
+        in_memory_sqlite_cookie_jar.set_cookies(
+            [create_simple_cookie(f"a{i}", "1", f"{i}.example.com") for i in range(5)] +
+            [create_simple_cookie("b", "ü", "contoso.com")] +
+            [
+                _cookie_expiring_in("expired", -10),
+                _cookie_expiring_in("hour", 60),
+                _cookie_expiring_in("week", 60 * 60 * 24 * 3),
+                _cookie_expiring_in("later", 60 * 60 * 24 * 1000),
+            ])
+
+        # another partition isn't counted
+        in_memory_sqlite_cookie_jar.partition("other").set_cookie(create_simple_cookie("c", "1", "zombo.com"))
+
+        jar_stats = in_memory_sqlite_cookie_jar.stats(top_domains=2)
+
+        assert jar_stats.total_cookies == 10
+        assert jar_stats.session_cookies == 6
+        assert jar_stats.persistent_cookies == 4
+        assert jar_stats.expired_cookies == 1
+        assert jar_stats.no_expiry_cookies == 6
+        assert jar_stats.total_domains == 3
+        assert [(x.base_domain, x.count) for x in jar_stats.top_domains] == [("example.com", 5), ("zombo.com", 4)]
+
+        assert [x.label for x in jar_stats.expiry_histogram] == \
+            [x[0] for x in sql_statements.STATS_EXPIRY_HISTOGRAM_BUCKETS] + ["later"]
+        assert [x.count for x in jar_stats.expiry_histogram] == [1, 0, 1, 0, 0, 1]
+
+        # the value is counted in bytes, not characters
+        assert jar_stats.value_bytes_total == 5 + 2 + 4 * 5
+        assert jar_stats.value_bytes_max == 5
+        assert jar_stats.value_bytes_average == 2.7
+
+        assert jar_stats.page_size > 0
+        assert jar_stats.page_count > 0
+        assert jar_stats.storage is None or \
+            sql_statements.TABLE_NAME_V1 in [x.name for x in jar_stats.storage]
+
+        assert "example.com" in format_jar_stats(jar_stats)
+
+    def test_stats_empty(
+        self,
+        in_memory_sqlite_cookie_jar:SqliteCookieJar):
+        '''
+        an empty cookie jar should have zeros rather than None
+        '''
+
+        jar_stats = in_memory_sqlite_cookie_jar.stats()
+
+        assert jar_stats.total_cookies == 0
+        assert jar_stats.value_bytes_average == 0.0
+        assert jar_stats.top_domains == []
+        assert all(x.count == 0 for x in jar_stats.expiry_histogram)
+
+    def test_command_line(self, tempfolder_database_path:pathlib.Path):
+        '''
+        the command line tool should print the stats as JSON
+        '''
+
+        with SqliteCookieJar(database_path=tempfolder_database_path) as cookie_jar:
+            cookie_jar.set_cookies([create_simple_cookie(f"a{i}", "1", "example.com") for i in range(3)])
+
+        process_result = subprocess.run(
+            [sys.executable, "-m", "biscutbox.jar_stats", "--database-path", str(tempfolder_database_path), "--json"],
+            capture_output=True, check=True, text=True)
+
+        stats_dict = json.loads(process_result.stdout)
+        assert stats_dict["total_cookies"] == 3
+        assert stats_dict["top_domains"] == [{"base_domain": "example.com", "count": 3}]
+
+    def test_command_line_missing_database(self, tmp_path:pathlib.Path):
+        '''
+        the command line tool should fail for a database that doesn't exist, rather than creating it
+        '''
+
+        database_path = tmp_path / "missing.sqlite3"
+
+        process_result = subprocess.run(
+            [sys.executable, "-m", "biscutbox.jar_stats", "--database-path", str(database_path)],
+            capture_output=True, text=True)
+
+        assert process_result.returncode != 0
+        assert "doesn't exist" in process_result.stderr
+        assert not database_path.exists()
@@ -1,7 +1,15 @@
-from http.cookiejar import Cookie
+from http.cookiejar import Cookie, DefaultCookiePolicy
+import email
+import itertools
 import urllib.request
 
 
+'''
+the registrable domains of the cookies and requests from `create_cookie_corpus` and `create_corpus_requests`
+'''
+CORPUS_SITES:list[str] = ["example.com", "zombo.com", "example.co.uk", "example.org", "contoso.com", "fabrikam.net"]
+
+
 def assert_cookie_equality(cookie_one:Cookie, cookie_two:Cookie):
     '''
     http.cookiejar.Cookie doesn't implement __eq__ so we can't do
@@ -79,4 +87,96 @@ def create_dummy_request(url:str, method:str) -> urllib.request.Request:
         unverifiable=False,
         method="GET")
 
-    return dummy_request
\ No newline at end of file
+    return dummy_request
+
+
+class FakeResponse:
+    '''
+    just enough of a response for `CookieJar.extract_cookies`
+    '''
+
+    def __init__(self, headers:list[str]):
+        '''
+        :param headers: list of RFC822-style 'Key: value' strings
+        '''
+        self._headers = email.message_from_string("\n".join(headers))
+
+    def info(self):
+        return self._headers
+
+
+class PythonOnlyCookiePolicy(DefaultCookiePolicy):
+    '''
+    a DefaultCookiePolicy that overrides `path_return_ok` without changing it, so SqliteCookieJar
+    has to do every check in python
+    '''
+
+    def path_return_ok(self, path, request):
+        return super().path_return_ok(path, request)
+
+
+class PythonOnlyDomainCookiePolicy(DefaultCookiePolicy):
+    '''
+    a DefaultCookiePolicy that overrides `domain_return_ok` without changing it, so SqliteCookieJar
+    has to check the blocked and allowed domains in python
+    '''
+
+    def domain_return_ok(self, domain, request):
+        return super().domain_return_ok(domain, request)
+
+
+def cookie_keys(cookie_list:list[Cookie]) -> list[tuple[str, str, str]]:
+    '''
+    the sorted (domain, path, name) of each cookie, to compare lists of cookies without `assert_cookie_equality`
+
+    :param cookie_list: the cookies
+    :return: the sorted keys
+    '''
+
+    return sorted((x.domain, x.path, x.name) for x in cookie_list)
+
+
+def create_cookie_corpus(now:int) -> list[Cookie]:
+    '''
+    create a small corpus of cookies with every combination of domain, path, secure flag and expiry for each
+    of `CORPUS_SITES`, for tests that check that two ways of getting the cookies for a request agree
+
+    :param now: the unix timestamp that the expiries are relative to
+    :return: the cookies
+    '''
+
+    cookie_list = list()
+
+    for index, (site, domain_template, path, secure, expires) in enumerate(itertools.product(
+        CORPUS_SITES,
+        ["{}", "www.{}", ".{}", ".www.{}"],
+        ["/", "/account", "/acc", "/api/"],
+        [False, True],
+        [None, now - 10, now + 3600])):
+
+        test_cookie = create_simple_cookie(f"c{index}", "1", domain_template.format(site))
+        test_cookie.domain_specified = test_cookie.domain_initial_dot = test_cookie.domain.startswith(".")
+        test_cookie.path = path
+        test_cookie.secure = secure
+        test_cookie.expires = expires
+        test_cookie.discard = expires is None
+
+        cookie_list.append(test_cookie)
+
+    return cookie_list
+
+
+def create_corpus_requests() -> list[urllib.request.Request]:
+    '''
+    create requests for every combination of host, scheme and path for each of `CORPUS_SITES`, the paths
+    match some of the paths of `create_cookie_corpus` and not others
+
+    :return: the requests
+    '''
+
+    return [create_dummy_request(f"{scheme}://{host_template.format(site)}{path}", "GET")
+        for site, host_template, scheme, path in itertools.product(
+            CORPUS_SITES,
+            ["{}", "www.{}", "api.{}", "a.www.{}"],
+            ["http", "https"],
+            ["/", "/account/settings", "/accounts", "/api", "/api/v1"])]